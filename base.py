@@ -27,7 +27,15 @@ from typing import List, Dict, Any, Optional, Tuple
 
 # 导入窗口管理器
 from ui.window import WindowManager
+from ui.render_cache import TabRenderCache
 from write_tasks import get_write_task_manager, get_pending_cache
+from utils import perf_trace
+from utils.job_scheduler import (
+    JobScheduler, JobCancelled, check_cancelled,
+    PRIORITY_VISIBLE, PRIORITY_BACKGROUND_TAB, PRIORITY_REGISTRY_SYNC,
+)
+from core.result_frame import concat_results
+from core.file_scanner import classify_files, parse_source_timestamp, scan_excel_files
 
 FORCED_DEFAULT_FOLDER = r"//10.102.2.7/文件服务器/建筑结构所/接口文件/各项目内外部接口手册"
 DEV_OVERRIDE_PASSWORD = "0929"
@@ -104,57 +112,26 @@ def _parse_datetime_from_source_filename(file_type: int, filename: str) -> Optio
     """
     从源文件文件名中解析“时间后缀”，用于同项目同类型只取最新文件。
 
-    约定（已在 main.py 的匹配规则中出现）：
-    - file1: 2016按项目导出IDI手册2025-08-01-17_55_52.xlsx（含时分秒）或 2016按项目导出IDI手册2025-08-01.xlsx（仅日期）
-    - file2: 内部接口信息单报表190720251203.xlsx（YYYYMMDD）
-    - file3: 外部接口ICM报表190720251203.xlsx（YYYYMMDD）
-    - file4: 外部接口单报表190720251203.xlsx（YYYYMMDD）
+    规则见 core.file_scanner.SOURCE_PATTERNS（file1: 日期[+时分秒]；file2/3/4: YYYYMMDD）。
 
     返回：
     - datetime.datetime（可比较）
     - 解析失败返回 None（为安全起见，调用方可选择“不去重”）
     """
-    try:
-        if file_type == 1:
-            # 按项目导出IDI手册 + YYYY-MM-DD[-HH_MM_SS]
-            m = re.search(
-                r"按项目导出IDI手册(?P<date>\d{4}-\d{2}-\d{2})(?:-(?P<h>\d{2})_(?P<m>\d{2})_(?P<s>\d{2}))?",
-                filename
-            )
-            if not m:
-                return None
-            date_str = m.group("date")
-            h = m.group("h")
-            mi = m.group("m")
-            s = m.group("s")
-            if h and mi and s:
-                return datetime.datetime.strptime(f"{date_str}-{h}_{mi}_{s}", "%Y-%m-%d-%H_%M_%S")
-            return datetime.datetime.strptime(date_str, "%Y-%m-%d")
-
-        if file_type == 2:
-            m = re.search(r"内部接口信息单报表\d{4}(?P<date>\d{8})", filename)
-        elif file_type == 3:
-            m = re.search(r"外部接口ICM报表\d{4}(?P<date>\d{8})", filename)
-        elif file_type == 4:
-            m = re.search(r"外部接口单报表\d{4}(?P<date>\d{8})", filename)
-        else:
-            return None
-
-        if not m:
-            return None
-        return datetime.datetime.strptime(m.group("date"), "%Y%m%d")
-    except Exception:
-        return None
+    return parse_source_timestamp(file_type, filename)
 
 
 def select_latest_source_files_per_project(
     file_type: int,
     file_list: List[Tuple[str, str]],
-    file_type_name: str = ""
+    file_type_name: str = "",
+    timestamps: Optional[Dict[str, datetime.datetime]] = None,
 ) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str, str]]]:
     """
     对同一 file_type 的候选文件按 project_id 去重：每个项目只保留文件名时间最新的那一份。
 
+    timestamps: 可选，{文件路径: 文件名时间}（core.file_scanner.classify_files 已解析的结果，避免重复解析）
+
     返回：
     - filtered: [(file_path, project_id), ...]
     - ignored:  [(file_path, project_id, reason), ...]
@@ -168,7 +145,9 @@ def select_latest_source_files_per_project(
     parsed: List[Tuple[str, datetime.datetime, str, str]] = []
     for file_path, project_id in file_list:
         base = os.path.basename(file_path)
-        dt = _parse_datetime_from_source_filename(file_type, base)
+        dt = timestamps.get(file_path) if timestamps else None
+        if dt is None:
+            dt = _parse_datetime_from_source_filename(file_type, base)
         if dt is None:
             # 保守：不去重
             tip = f"[最新文件筛选] {file_type_name or f'file{file_type}'}: 无法从文件名解析时间，跳过去重：{base}"
@@ -352,6 +331,16 @@ def concurrent_read_excel_files(file_paths, max_workers=4):
 
 class ExcelProcessorApp:
     """主应用程序类"""
+
+    # 选项卡索引 -> (选项卡名称, 处理结果属性, 已处理标志属性, 文件类型, viewer属性)
+    RESULT_TABS = {
+        0: ("内部需打开接口", "processing_results", "has_processed_results1", 1, "tab1_viewer"),
+        1: ("内部需回复接口", "processing_results2", "has_processed_results2", 2, "tab2_viewer"),
+        2: ("外部需打开接口", "processing_results3", "has_processed_results3", 3, "tab3_viewer"),
+        3: ("外部需回复接口", "processing_results4", "has_processed_results4", 4, "tab4_viewer"),
+        4: ("三维提资接口", "processing_results5", "has_processed_results5", 5, "tab5_viewer"),
+        5: ("收发文函", "processing_results6", "has_processed_results6", 6, "tab6_viewer"),
+    }
     
     def __init__(self, auto_mode: bool = False, resume_action: str = ""):
         self.auto_mode = auto_mode
@@ -381,7 +370,8 @@ class ExcelProcessorApp:
         # 启动阶段：严格不触网。任何涉及 folder_path(可能为UNC) 的访问，
         # 统一延迟到用户点击“刷新文件列表”后再执行。
         self._deferred_network_folder_path = self.config.get('folder_path', '').strip()
-        self._refresh_cancel_event = None
+        # 后台任务统一由调度器执行（刷新/处理/预渲染/同步），回调经UI任务队列回到主线程
+        self.job_scheduler = JobScheduler(post_ui=self._post_ui_task, name="AppJob")
         
         # 【重要】不在启动阶段触发 registry / update 的任何网络访问：
         # - 不 set_data_folder（避免后续钩子意外触发 load_config(data_folder=...)）
@@ -622,6 +612,8 @@ class ExcelProcessorApp:
         self.has_processed_results4 = False
         self.has_processed_results5 = False
         self.has_processed_results6 = False
+        # 【优化】选项卡渲染缓存：切换选项卡时复用已准备好的显示数据（见 _show_result_tab）
+        self._tab_render_cache = TabRenderCache()
         # 监控器
         self.monitor = None
         
@@ -680,12 +672,11 @@ class ExcelProcessorApp:
             return None
 
     def _log_update_message(self, message: str):
-        print(f"[Update] {message}")
         try:
             from core import Monitor
-            Monitor.log_info(message)
+            Monitor.log_info(f"[Update] {message}", category="update")
         except Exception:
-            pass
+            print(f"[Update] {message}")
 
     def _log_exit_reason(self, reason: str):
         try:
@@ -807,11 +798,12 @@ class ExcelProcessorApp:
 
         def _kickoff():
             try:
-                threading.Thread(
-                    target=self._startup_update_check_worker,
-                    daemon=True,
-                    name="StartupUpdateCheck",
-                ).start()
+                self.job_scheduler.submit(
+                    "startup_update_check",
+                    lambda job: self._startup_update_check_worker(),
+                    priority=PRIORITY_REGISTRY_SYNC,
+                    key="startup_update_check",
+                )
             except Exception:
                 pass
 
@@ -1110,6 +1102,10 @@ class ExcelProcessorApp:
         if "auto_startup" not in self.config:
             self.config["auto_startup"] = True
 
+        # 【新增】性能埋点开关（环境变量 EXCEL_PROCESSOR_PERF_TRACE 已开启时以环境变量为准）
+        if self.config.get("perf_trace_enabled", False):
+            perf_trace.set_enabled(True)
+
         # 【新增】路径锁定开关（默认启用；以项目配置为准，便于统一测试）
         project_lock_enabled = bool(self.default_config.get("folder_path_lock_enabled", True))
         self.config["folder_path_lock_enabled"] = project_lock_enabled
@@ -1547,37 +1543,41 @@ class ExcelProcessorApp:
         if selected_tab == 0 and self.target_file1:  # 内部需打开接口
             # 如果有处理结果，显示过滤后的数据；否则提示点击开始处理
             if self.has_processed_results1 and self.processing_results is not None and not self.processing_results.empty:
-                # Step4：统一走 display_results，确保 PendingCache 覆盖（责任人/状态）与过滤逻辑一致
-                self.display_results(self.processing_results, show_popup=False)
+                # Step4：与 display_results 同一口径（PendingCache 覆盖/Registry 过滤）；命中渲染缓存时直接复用
+                if not self._show_result_tab(0):
+                    self.display_results(self.processing_results, show_popup=False)
             elif self.has_processed_results1:
                 self.show_empty_message(self.tab1_viewer, "无内部需打开接口")
             else:
                 self.show_empty_message(self.tab1_viewer, "请点击开始处理生成结果")
         elif selected_tab == 1 and (self.target_file2 or self.has_processed_results2):  # 内部需回复接口
             if self.has_processed_results2 and self.processing_results2 is not None and not self.processing_results2.empty:
-                # 统一走 display_results2：确保 PendingCache 覆盖（责任人/状态）生效
-                self.display_results2(self.processing_results2, show_popup=False)
+                if not self._show_result_tab(1):
+                    self.display_results2(self.processing_results2, show_popup=False)
             elif self.has_processed_results2:
                 self.show_empty_message(self.tab2_viewer, "无内部需回复接口")
             else:
                 self.show_empty_message(self.tab2_viewer, "请点击开始处理生成结果")
         elif selected_tab == 2 and (self.target_file3 or self.has_processed_results3):  # 外部需打开接口
             if self.has_processed_results3 and self.processing_results3 is not None and not self.processing_results3.empty:
-                self.display_results3(self.processing_results3, show_popup=False)
+                if not self._show_result_tab(2):
+                    self.display_results3(self.processing_results3, show_popup=False)
             elif self.has_processed_results3:
                 self.show_empty_message(self.tab3_viewer, "无外部需打开接口")
             else:
                 self.show_empty_message(self.tab3_viewer, "请点击开始处理生成结果")
         elif selected_tab == 3 and (self.target_file4 or self.has_processed_results4):  # 外部需回复接口
             if self.has_processed_results4 and self.processing_results4 is not None and not self.processing_results4.empty:
-                self.display_results4(self.processing_results4, show_popup=False)
+                if not self._show_result_tab(3):
+                    self.display_results4(self.processing_results4, show_popup=False)
             elif self.has_processed_results4:
                 self.show_empty_message(self.tab4_viewer, "无外部需回复接口")
             else:
                 self.show_empty_message(self.tab4_viewer, "请点击开始处理生成结果")
         elif selected_tab == 4 and (getattr(self, 'target_files5', None) or self.has_processed_results5):  # 三维提资接口
             if self.has_processed_results5 and self.processing_results5 is not None and not self.processing_results5.empty:
-                self.display_results5(self.processing_results5, show_popup=False)
+                if not self._show_result_tab(4):
+                    self.display_results5(self.processing_results5, show_popup=False)
             elif self.has_processed_results5:
                 # 【修复】处理后无数据，显示空提示，不显示原始数据
                 self.show_empty_message(self.tab5_viewer, "无三维接口")
@@ -1585,7 +1585,8 @@ class ExcelProcessorApp:
                 self.show_empty_message(self.tab5_viewer, "请点击开始处理生成结果")
         elif selected_tab == 5 and (getattr(self, 'target_files6', None) or self.has_processed_results6):  # 收发文函
             if self.has_processed_results6 and self.processing_results6 is not None and not self.processing_results6.empty:
-                self.display_results6(self.processing_results6, show_popup=False)
+                if not self._show_result_tab(5):
+                    self.display_results6(self.processing_results6, show_popup=False)
             elif self.has_processed_results6:
                 self.show_empty_message(self.tab6_viewer, "无需要回复的文函")
             else:
@@ -1614,6 +1615,123 @@ class ExcelProcessorApp:
         except Exception:
             pass
 
+        # 【优化】后台准备其余选项卡，之后切换选项卡无需重新过滤/查询
+        self._schedule_tab_prerender(active_tab)
+
+    def _tab_render_key(self, tab_name: str, results, file_type=None) -> tuple:
+        """
+        选项卡渲染缓存键：任一输入变化都会使缓存的显示数据失效
+        
+        包含：处理结果（对象身份）、用户姓名与角色、PendingCache 版本（给定 file_type 时只看该类型）、
+        Registry 快照版本、当天日期（延期判断）、超期隐藏设置、该选项卡的源文件
+        """
+        user_roles = getattr(self, 'user_roles', []) or [getattr(self, 'user_role', '').strip()]
+        pending_cache = getattr(self, 'pending_cache', None)
+        try:
+            from registry import hooks as registry_hooks
+            registry_version = registry_hooks.get_snapshot_version()
+        except Exception:
+            registry_version = None
+        return (
+            id(results),
+            len(results),
+            getattr(self, 'user_name', '').strip(),
+            tuple(user_roles),
+            (pending_cache.type_version(file_type) if file_type is not None else pending_cache.version)
+            if pending_cache is not None else 0,
+            registry_version,
+            datetime.date.today(),
+            bool(self.config.get("auto_hide_overdue_enabled", True)),
+            self.config.get("auto_hide_overdue_days", 30),
+            tuple(self._get_source_files_for_tab(tab_name)),
+        )
+
+    def _prepare_result_tab_model(self, tab_index: int):
+        """
+        准备选项卡的显示数据（命中缓存时直接返回；不访问 Tk 控件，可在后台线程调用）
+        
+        返回:
+            (缓存键, DisplayModel)；该选项卡没有可显示的处理结果时返回 (None, None)
+        """
+        tab_name, results_attr, flag_attr, file_type, _viewer_attr = self.RESULT_TABS[tab_index]
+        results = getattr(self, results_attr, None)
+        if not getattr(self, flag_attr, False) or not isinstance(results, pd.DataFrame) \
+                or results.empty or '原始行号' not in results.columns:
+            return None, None
+
+        key = self._tab_render_key(tab_name, results, file_type)
+        model = self._tab_render_cache.get(tab_name, key)
+        if model is None:
+            display_df = self._ensure_source_file_column_for_pending_cache(results, tab_name)
+            display_df = self._apply_pending_overrides(display_df, file_type)
+            params = self._original_rows_display_params(display_df, tab_name, list(display_df['原始行号']))
+            model = self.window_manager.prepare_display_model(**params)
+            model.results = results
+            model = self._tab_render_cache.put(tab_name, key, model)
+        return key, model
+
+    def _show_result_tab(self, tab_index: int) -> bool:
+        """
+        从渲染缓存显示选项卡（Tk线程）：viewer 已显示同一份数据时不做任何操作
+        
+        返回:
+            False 表示没有可显示的处理结果（由调用方走原有显示逻辑）
+        """
+        tab_name, _results_attr, _flag_attr, _file_type, viewer_attr = self.RESULT_TABS[tab_index]
+        try:
+            _key, model = self._prepare_result_tab_model(tab_index)
+            if model is None:
+                return False
+            if not self._tab_render_cache.is_rendered(tab_name, model):
+                self.window_manager.render_display_model(getattr(self, viewer_attr), model)
+                self._tab_render_cache.mark_rendered(tab_name, model)
+                print(f"{tab_name}处理结果已显示：{len(model.rows)} 行（全部数据，支持滚动）")
+        except Exception as e:
+            print(f"[渲染缓存] {tab_name} 显示失败，改用完整显示流程: {e}")
+            self._tab_render_cache.invalidate(tab_name)
+            return False
+        self.update_export_button_state()
+        return True
+
+    def _schedule_tab_prerender(self, active_tab: int):
+        """
+        后台任务准备非当前选项卡的显示数据，Tk线程空闲时逐个插入对应 viewer
+        
+        新一轮处理开始后，旧一轮尚未完成的预渲染任务被取消，已准备的结果直接丢弃。
+        """
+        tabs = [i for i in self.RESULT_TABS if i != active_tab]
+
+        def worker(job):
+            for tab_index in tabs:
+                check_cancelled()
+                try:
+                    key, model = self._prepare_result_tab_model(tab_index)
+                except Exception as e:
+                    print(f"[预渲染] {self.RESULT_TABS[tab_index][0]} 准备失败: {e}")
+                    continue
+                if model is None:
+                    continue
+                try:
+                    self.root.after(0, lambda i=tab_index, k=key, m=model: self._swap_in_prepared_tab(i, k, m, job))
+                except Exception:
+                    return
+
+        self.job_scheduler.submit("tab_prerender", worker, priority=PRIORITY_BACKGROUND_TAB,
+                                  key="tab_prerender", replace=True)
+
+    def _swap_in_prepared_tab(self, tab_index: int, key, model, job):
+        """Tk线程：把后台准备好的显示数据插入 viewer（任务已取消、数据已过期或已显示时跳过）"""
+        tab_name, _results_attr, _flag_attr, _file_type, viewer_attr = self.RESULT_TABS[tab_index]
+        if job.cancelled:
+            return
+        if self._tab_render_cache.get(tab_name, key) is not model or self._tab_render_cache.is_rendered(tab_name, model):
+            return
+        try:
+            self.window_manager.render_display_model(getattr(self, viewer_attr), model)
+            self._tab_render_cache.mark_rendered(tab_name, model)
+        except Exception as e:
+            print(f"[预渲染] {tab_name} 显示失败: {e}")
+
     def load_file_to_viewer(self, file_path, viewer, tab_name):
         """加载Excel文件到预览器（优化版：使用只读模式）"""
         import os
@@ -1663,6 +1781,18 @@ class ExcelProcessorApp:
         参数:
             source_files: 源文件路径列表（用于勾选功能），可选
         """
+        params = self._original_rows_display_params(df, tab_name, original_row_numbers, source_files)
+        self.window_manager.display_excel_data(viewer=viewer, **params)
+        # viewer 内容不再是渲染缓存中的数据，下次切换到该选项卡时重新插入
+        self._tab_render_cache.mark_rendered(tab_name, None)
+        print(f"{tab_name}处理结果已显示：{len(params['df'])} 行（全部数据，支持滚动）")
+
+    def _original_rows_display_params(self, df, tab_name, original_row_numbers, source_files=None):
+        """
+        显示处理结果前的过滤（排除已完成/已确认任务），返回 display_excel_data 的参数（不含 viewer）
+        
+        不访问 Tk 控件，可在后台线程调用
+        """
         # 如果没有提供source_files，尝试从当前处理的文件中获取
         if source_files is None:
             source_files = self._get_source_files_for_tab(tab_name)
@@ -1704,18 +1834,15 @@ class ExcelProcessorApp:
             if user_role:
                 user_roles = [user_role]
         
-        # 使用WindowManager的display_excel_data方法，显示全部数据
-        self.window_manager.display_excel_data(
-            viewer=viewer,
-            df=df,
-            tab_name=tab_name,
-            show_all=True,  # 处理完成后显示全部数据
-            original_row_numbers=original_row_numbers,
-            source_files=source_files,
-            file_manager=self.file_manager,
-            current_user_roles=user_roles  # 【新增】传递用户角色列表
-        )
-        print(f"{tab_name}处理结果已显示：{len(df)} 行（全部数据，支持滚动）")
+        return {
+            "df": df,
+            "tab_name": tab_name,
+            "show_all": True,  # 处理完成后显示全部数据
+            "original_row_numbers": original_row_numbers,
+            "source_files": source_files,
+            "file_manager": self.file_manager,
+            "current_user_roles": user_roles,  # 【新增】传递用户角色列表
+        }
 
     def _exclude_completed_rows(self, df, source_file):
         """
@@ -1831,8 +1958,9 @@ class ExcelProcessorApp:
                 # 【修复】即使没有Registry任务，也要应用超期过滤
                 return self._apply_overdue_filter(df, file_type)
             
-            # 批量查询状态
-            status_map = registry_hooks.get_display_status(task_keys)
+            # 批量查询状态（与界面显示共用同一读取接口，一个读事务内完成）
+            task_states = registry_hooks.get_task_states(task_keys)
+            status_map = {tid: state["display_status"] for tid, state in task_states.items() if state["display_status"]}
 
             # 【关键兜底】如果Registry是新库/路径变化/未初始化导致查不到任何任务，
             # 不能把所有行当作“无状态(=已忽略/已归档)”直接过滤掉，否则会出现“结果全变0”的灾难性体验。
@@ -2346,6 +2474,13 @@ class ExcelProcessorApp:
         self.show_empty_message(self.tab6_viewer, "等待加载收发文函数据")
 
     def _apply_pending_overrides(self, df, file_type):
+        """
+        将未写入完成的指派/回文临时覆盖到 DataFrame（供显示与未指派检测）
+
+        注意：返回值不保证是副本——没有命中时就是 df 本身，命中时可能是 PendingCache
+        为同一 df 记忆的共享结果。调用方只读使用（prepare_display_model 内部会复制）；
+        df 传入后也不要原地修改，需要修改时先 copy()。
+        """
         try:
             if hasattr(self, 'pending_cache') and self.pending_cache:
                 return self.pending_cache.apply_overrides_to_dataframe(
@@ -2938,6 +3073,7 @@ class ExcelProcessorApp:
                 else:
                     messagebox.showinfo("路径已固定", f"仍使用默认路径:\n{default_folder}")
                 folder_path = default_folder
+                self._cancel_folder_jobs(folder_path)
                 self.path_var.set(folder_path)
                 self.config["folder_path"] = folder_path
                 self.save_config()
@@ -2955,6 +3091,8 @@ class ExcelProcessorApp:
         )
         
         if folder_path:
+            # 切换文件夹：取消旧文件夹尚未完成的处理/预渲染（刷新由 refresh_file_list 替换）
+            self._cancel_folder_jobs(folder_path)
             self.path_var.set(folder_path)
             self.config["folder_path"] = folder_path
             self.save_config()
@@ -2968,6 +3106,15 @@ class ExcelProcessorApp:
             
             self.refresh_file_list()
 
+    def _cancel_folder_jobs(self, new_folder: str):
+        """文件夹切换时取消与旧文件夹绑定的后台任务（处理、选项卡预渲染、Registry 预同步）"""
+        current = self.path_var.get().strip()
+        if current and os.path.normcase(os.path.normpath(current)) == os.path.normcase(os.path.normpath(new_folder)):
+            return
+        for key in ("process", "tab_prerender", "registry_sync"):
+            if self.job_scheduler.cancel(key):
+                print(f"[Jobs] 文件夹已切换，取消任务: {key}")
+
     def browse_export_folder(self):
         """选择导出结果生成位置（可为空，表示沿用文件夹路径）"""
         folder_path = filedialog.askdirectory(
@@ -2993,6 +3140,19 @@ class ExcelProcessorApp:
         except Exception as e:
             print(f"[帮助] 显示帮助窗口失败: {e}")
 
+    def show_perf_report_window(self):
+        """显示性能报告窗口（最近N次运行的各阶段耗时汇总）"""
+        try:
+            from ui.perf_report import PerfReportWindow
+
+            def on_toggle(enabled):
+                self.config["perf_trace_enabled"] = bool(enabled)
+                self.save_config()
+
+            PerfReportWindow(self.root, on_toggle=on_toggle).show()
+        except Exception as e:
+            print(f"[性能报告] 显示窗口失败: {e}")
+
     def show_settings_menu(self):
         """显示设置菜单"""
         # 创建设置菜单窗口
@@ -3152,7 +3312,54 @@ class ExcelProcessorApp:
                     notify_connected(db_path=db_path if db_path else None)
                 except Exception as e:
                     messagebox.showerror("维护模式失败", f"退出维护模式失败：{e}", parent=settings_menu)
-            
+
+            # 【新增】维护窗口内压缩事件日志（旧事件按月移入归档库，VACUUM 热库）
+            def _compact_events():
+                folder_path = _get_registry_folder()
+                if not folder_path:
+                    return
+                try:
+                    from registry.db import is_maintenance_mode
+                    from registry.config import load_config
+                    if not is_maintenance_mode(data_folder=folder_path):
+                        messagebox.showinfo("事件日志压缩", "请先进入维护模式，并等待其他客户端退出。", parent=settings_menu)
+                        return
+                    cfg = load_config(data_folder=folder_path, ensure_registry_dir=False)
+                    db_path = cfg.get("registry_db_path", "")
+                    retention_days = int(cfg.get("registry_event_retention_days", 180))
+                except Exception as e:
+                    messagebox.showerror("事件日志压缩失败", f"读取Registry配置失败：{e}", parent=settings_menu)
+                    return
+                if not db_path or not os.path.exists(db_path):
+                    messagebox.showwarning("事件日志压缩", "未找到Registry数据库。", parent=settings_menu)
+                    return
+                if not messagebox.askyesno(
+                    "确认压缩事件日志",
+                    f"将把 {retention_days} 天前的事件移入按月归档库并整理数据库。\n是否继续？",
+                    parent=settings_menu
+                ):
+                    return
+
+                def _worker():
+                    try:
+                        from registry.event_archive import compact_events, format_report
+                        from registry.sharding import is_sharded, list_shard_paths
+                        # 已按项目分片时逐个分片压缩
+                        sections = []
+                        for path in list_shard_paths(db_path):
+                            report = compact_events(path, retention_days=retention_days)
+                            text = format_report(report)
+                            sections.append(f"[{os.path.basename(path)}]\n{text}" if is_sharded(db_path) else text)
+                        summary = "\n\n".join(sections)
+                        self.root.after(0, lambda: messagebox.showinfo(
+                            "事件日志压缩完成", summary, parent=settings_menu))
+                    except Exception as e:
+                        error = str(e)
+                        self.root.after(0, lambda: messagebox.showerror(
+                            "事件日志压缩失败", f"压缩事件日志失败：{error}", parent=settings_menu))
+
+                threading.Thread(target=_worker, name="EventCompaction", daemon=True).start()
+
             maintenance_btn_row = ttk.Frame(maintenance_frame)
             maintenance_btn_row.pack(fill=tk.X, pady=(6, 0))
             ttk.Button(
@@ -3164,6 +3371,11 @@ class ExcelProcessorApp:
                 maintenance_btn_row,
                 text="退出维护模式",
                 command=_exit_maintenance
+            ).pack(side=tk.LEFT, padx=(0, 8))
+            ttk.Button(
+                maintenance_btn_row,
+                text="压缩事件日志",
+                command=_compact_events
             ).pack(side=tk.LEFT)
 
         # 【新增】自动隐藏超期任务设置
@@ -3293,8 +3505,13 @@ class ExcelProcessorApp:
                 except Exception:
                     pass
         
-        cache_button = ttk.Button(frame, text="清除缓存", command=on_clear_cache, width=14)
-        cache_button.pack(pady=(10, 0))
+        # 【新增】清除缓存 / 性能报告 同一行，避免设置窗口高度不足
+        tools_row = ttk.Frame(frame)
+        tools_row.pack(pady=(10, 0))
+        cache_button = ttk.Button(tools_row, text="清除缓存", command=on_clear_cache, width=14)
+        cache_button.pack(side=tk.LEFT, padx=(0, 6))
+        perf_button = ttk.Button(tools_row, text="性能报告", command=self.show_perf_report_window, width=14)
+        perf_button.pack(side=tk.LEFT)
         
         # 关闭按钮
         close_button = ttk.Button(frame, text="确定", command=settings_menu.destroy, width=14)
@@ -3402,7 +3619,6 @@ class ExcelProcessorApp:
     def refresh_file_list(self, show_popup=True):
         """刷新Excel文件列表"""
         import os
-        import threading
         
         # 标记为手动操作（用于弹窗控制）
         self._manual_operation = True
@@ -3414,17 +3630,16 @@ class ExcelProcessorApp:
             self._manual_operation = False
             return
 
-        # 防止重复刷新：如果已有刷新线程在跑，直接返回（不弹等待框，避免卡住）
-        try:
-            if getattr(self, "_refresh_thread", None) and getattr(self._refresh_thread, "is_alive", lambda: False)():
-                self.update_file_info("刷新正在进行中，请稍候…")
-                self._manual_operation = False
-                return
-        except Exception:
-            pass
+        # 合并重复刷新：同一文件夹的刷新已在排队/执行时直接返回（不弹等待框，避免卡住）；
+        # 文件夹已切换时取消旧刷新，不再等待旧一轮结束
+        active_refresh = self.job_scheduler.active_job("refresh")
+        if active_refresh is not None and active_refresh.meta.get("folder_path") == folder_path:
+            self.update_file_info("刷新正在进行中，请稍候…")
+            self._manual_operation = False
+            return
         
         # 显示等待对话框（自动模式下不显示）
-        waiting_dialog, _ = self.show_waiting_dialog("刷新文件列表", "正在刷新中，请稍后。。。 。。。")
+        waiting_dialog, waiting_label = self.show_waiting_dialog("刷新文件列表", "正在刷新中，请稍后。。。 。。。")
 
         # 刷新期间禁用按钮（避免并发触发）
         try:
@@ -3440,9 +3655,6 @@ class ExcelProcessorApp:
         except Exception:
             enabled_projects = []
 
-        cancel_event = threading.Event()
-        self._refresh_cancel_event = cancel_event
-
         def finalize_ui(file_info: str, popup_message: str, db_path: str = "", db_error: str = ""):
             # 主线程：更新选项卡✓标记
             try:
@@ -3510,26 +3722,24 @@ class ExcelProcessorApp:
             # 重置手动操作标志
             self._manual_operation = False
 
-        # 结果共享：后台线程只写这里；主线程轮询后调用 finalize_ui 更新界面
-        result_holder = {"done": False, "file_info": "", "popup": "", "db_path": "", "db_error": ""}
-        done_event = threading.Event()
-
-        def refresh_worker():
-            # 后台线程：允许触网/耗时IO，但不能调用任何 Tk API
+        def refresh_worker(job):
+            # 后台线程：允许触网/耗时IO，但不能调用任何 Tk API；取消后在各检查点抛出 JobCancelled
             popup_message = ""
             file_info = ""
             db_path = ""
             db_error = ""
             try:
                 # 1) 触网动作统一在刷新时执行：同步 update.exe
-                if self.update_manager and folder_path and not cancel_event.is_set():
+                job.report_progress(1, 5, "同步更新程序")
+                if self.update_manager and folder_path:
                     try:
                         self.update_manager.sync_update_executable(folder_path)
                     except Exception as e:
                         print(f"[Update] 同步 update.exe 失败: {e}")
 
                 # 2) 触网动作统一在刷新时执行：Registry 数据目录/DB 路径初始化（会 mkdir）
-                if folder_path and not cancel_event.is_set():
+                job.report_progress(2, 5, "连接数据库")
+                if folder_path:
                     try:
                         from registry import hooks as registry_hooks
                         registry_hooks.set_data_folder(folder_path)
@@ -3555,19 +3765,20 @@ class ExcelProcessorApp:
                         db_error = f"Registry 初始化失败: {e}"
 
                 # 3) 查找Excel文件（可能是网络路径，放在后台线程）
-                excel_extensions = ['.xlsx', '.xls']
-                self.excel_files = []
-                for file_path in Path(folder_path).iterdir():
-                    if cancel_event.is_set():
-                        return
-                    if file_path.is_file() and file_path.suffix.lower() in excel_extensions:
-                        self.excel_files.append(str(file_path))
+                # 【优化】os.scandir 单次遍历（大小取自目录条目）；文件夹未变化时复用目录快照，不再列目录
+                job.report_progress(3, 5, "查找Excel文件")
+                scan_entries, _from_snapshot = scan_excel_files(folder_path, snapshot_path=self._folder_snapshot_path())
+                file_sizes = {entry.path: entry.size for entry in scan_entries}
+                self.excel_files = [entry.path for entry in scan_entries]
 
                 # 4) 识别特定文件（后台线程，避免触发 Tk：不更新 UI）
+                job.report_progress(4, 5, "识别待处理文件")
                 self.identify_target_files(update_ui=False, enabled_projects_override=enabled_projects)
 
                 # 5) 检查文件标识并加载缓存（后台线程）
+                job.report_progress(5, 5, "加载缓存")
                 self._check_and_load_cache()
+                check_cancelled()
 
                 # 6) 构建输出文本（后台线程）
                 if self.excel_files:
@@ -3650,11 +3861,10 @@ class ExcelProcessorApp:
 
                     file_info += "\n📁 全部Excel文件列表:\n"
                     for i, fp in enumerate(self.excel_files, 1):
-                        try:
-                            file_name = os.path.basename(fp)
-                            file_size = os.path.getsize(fp)
-                            file_info += f"{i}. {file_name} ({file_size} 字节)\n"
-                        except Exception:
+                        file_size = file_sizes.get(fp)
+                        if file_size is not None:
+                            file_info += f"{i}. {os.path.basename(fp)} ({file_size} 字节)\n"
+                        else:
                             file_info += f"{i}. {os.path.basename(fp)}\n"
 
                     popup_message = self._generate_popup_message(project_summary, total_identified_files)
@@ -3666,49 +3876,55 @@ class ExcelProcessorApp:
                 file_info = f"读取文件列表时发生错误: {str(e)}"
                 popup_message = file_info
 
-            # 不触碰Tk：只写共享结果，交给主线程轮询执行 finalize_ui
-            try:
-                result_holder["file_info"] = file_info
-                result_holder["popup"] = popup_message
-                result_holder["db_path"] = db_path
-                result_holder["db_error"] = db_error
-                result_holder["done"] = True
-                done_event.set()
-            except Exception:
-                pass
+            # 不触碰Tk：结果经调度器回到主线程执行 finalize_ui
+            return {"file_info": file_info, "popup_message": popup_message, "db_path": db_path, "db_error": db_error}
 
-        # 先让等待框显示出来，再启动线程
-        def start_thread():
-            try:
-                self._refresh_thread = threading.Thread(target=refresh_worker, daemon=True)
-                self._refresh_thread.start()
-            except Exception as e:
-                finalize_ui(f"启动刷新线程失败: {e}", f"启动刷新线程失败: {e}")
+        def on_refresh_done(result):
+            finalize_ui(**result)
+            # 低优先级预同步 Registry 本地只读副本（网络盘），首次状态查询不再等待整库复制
+            if result.get("db_path") and not result.get("db_error"):
+                self._schedule_registry_sync()
 
-        self.root.after(100, start_thread)
-        # 注意：最终UI更新由主线程轮询 done_event 后执行 finalize_ui（Tk非线程安全）
+        def on_refresh_failed(error):
+            finalize_ui(f"读取文件列表时发生错误: {error}", f"读取文件列表时发生错误: {error}")
 
-        def _poll_finalize():
-            # 主线程轮询：一旦后台线程写入结果就更新UI
+        def on_refresh_cancelled():
+            # 被新的刷新（切换文件夹）取代：只关闭本次的等待框，按钮/标记由新刷新负责
             try:
-                if done_event.is_set() and result_holder.get("done"):
-                    finalize_ui(
-                        result_holder.get("file_info", ""),
-                        result_holder.get("popup", ""),
-                        db_path=result_holder.get("db_path", ""),
-                        db_error=result_holder.get("db_error", ""),
-                    )
-                    # 仅打印一次，便于你从终端确认 finalize_ui 确实执行了
-                    return
+                self.close_waiting_dialog(waiting_dialog)
             except Exception:
                 pass
 
+        def on_refresh_progress(current, total, message):
             try:
-                self.root.after(100, _poll_finalize)
+                if waiting_label is not None and waiting_dialog.winfo_exists():
+                    waiting_label.config(text=f"正在刷新中（{current}/{total} {message}）")
             except Exception:
                 pass
 
-        self.root.after(150, _poll_finalize)
+        # 注意：最终UI更新经调度器投递到主线程后执行 finalize_ui（Tk非线程安全）
+        self.job_scheduler.submit(
+            "refresh", refresh_worker, priority=PRIORITY_VISIBLE,
+            key="refresh", replace=True, meta={"folder_path": folder_path},
+            on_done=on_refresh_done, on_error=on_refresh_failed,
+            on_cancelled=on_refresh_cancelled, on_progress=on_refresh_progress,
+        )
+
+    def _folder_snapshot_path(self):
+        """数据文件夹目录快照路径（与处理结果缓存同目录，本机保存）"""
+        cache_dir = getattr(getattr(self, "file_manager", None), "result_cache_dir", None)
+        return os.path.join(cache_dir, "folder_snapshot.json") if cache_dir else None
+
+    def _schedule_registry_sync(self):
+        """后台预同步 Registry 本地只读副本（低优先级，重复提交自动合并）"""
+        def worker(job):
+            from registry import hooks as registry_hooks
+            return registry_hooks.warm_read_cache()
+
+        try:
+            self.job_scheduler.submit("registry_sync", worker, priority=PRIORITY_REGISTRY_SYNC, key="registry_sync")
+        except Exception as e:
+            print(f"[Registry] 预同步任务提交失败: {e}")
 
     def _generate_popup_message(self, project_summary, total_identified_files):
         """生成弹窗显示的识别结果信息"""
@@ -3756,7 +3972,7 @@ class ExcelProcessorApp:
                                 combined_results.append(filtered_df)
                     
                     if combined_results:
-                        self.processing_results = pd.concat(combined_results, ignore_index=True)
+                        self.processing_results = concat_results(combined_results)
                         self.has_processed_results1 = True
                     else:
                         self.processing_results = pd.DataFrame()
@@ -3776,7 +3992,7 @@ class ExcelProcessorApp:
                                 combined_results.append(filtered_df)
                     
                     if combined_results:
-                        self.processing_results2 = pd.concat(combined_results, ignore_index=True)
+                        self.processing_results2 = concat_results(combined_results)
                         self.has_processed_results2 = True
                     else:
                         self.processing_results2 = pd.DataFrame()
@@ -3796,7 +4012,7 @@ class ExcelProcessorApp:
                                 combined_results.append(filtered_df)
                     
                     if combined_results:
-                        self.processing_results3 = pd.concat(combined_results, ignore_index=True)
+                        self.processing_results3 = concat_results(combined_results)
                         self.has_processed_results3 = True
                     else:
                         self.processing_results3 = pd.DataFrame()
@@ -3816,7 +4032,7 @@ class ExcelProcessorApp:
                                 combined_results.append(filtered_df)
                     
                     if combined_results:
-                        self.processing_results4 = pd.concat(combined_results, ignore_index=True)
+                        self.processing_results4 = concat_results(combined_results)
                         self.has_processed_results4 = True
                     else:
                         self.processing_results4 = pd.DataFrame()
@@ -3836,7 +4052,7 @@ class ExcelProcessorApp:
                                 combined_results.append(filtered_df)
                     
                     if combined_results:
-                        self.processing_results5 = pd.concat(combined_results, ignore_index=True)
+                        self.processing_results5 = concat_results(combined_results)
                         self.has_processed_results5 = True
                     else:
                         self.processing_results5 = pd.DataFrame()
@@ -3856,7 +4072,7 @@ class ExcelProcessorApp:
                                 combined_results.append(filtered_df)
                     
                     if combined_results:
-                        self.processing_results6 = pd.concat(combined_results, ignore_index=True)
+                        self.processing_results6 = concat_results(combined_results)
                         self.has_processed_results6 = True
                     else:
                         self.processing_results6 = pd.DataFrame()
@@ -3888,6 +4104,14 @@ class ExcelProcessorApp:
             if getattr(self, "_suppress_tab_change_render", False):
                 return
 
+            # 显式刷新：丢弃当前选项卡的渲染缓存，重新过滤/查询
+            try:
+                tab_index = self.notebook.index(self.notebook.select())
+                if tab_index in self.RESULT_TABS:
+                    self._tab_render_cache.invalidate(self.RESULT_TABS[tab_index][0])
+            except Exception:
+                pass
+
             # 直接复用 on_tab_changed 的分支逻辑（它已按 Step1/Step4 收敛）
             self.on_tab_changed(None)
         except Exception as e:
@@ -3945,6 +4169,8 @@ class ExcelProcessorApp:
         self.has_processed_results4 = False
         self.has_processed_results5 = False
         self.has_processed_results6 = False
+        self._tab_render_cache.invalidate()
+        self.job_scheduler.cancel("tab_prerender")
         # 重置选项卡状态（仅主线程可更新UI）
         if update_ui:
             self.update_tab_color(0, "normal")
@@ -3959,148 +4185,31 @@ class ExcelProcessorApp:
         if enabled_projects is None:
             enabled_projects = self.get_enabled_projects()
         try:
-            # 安全导入main模块（不依赖文件系统检查）
-            try:
-                from core import main
-            except ImportError:
-                import sys
-                import os
-                # 如果是打包环境，添加当前目录到路径
-                if hasattr(sys, '_MEIPASS'):
-                    sys.path.insert(0, sys._MEIPASS)
-                else:
-                    sys.path.insert(0, os.path.dirname(__file__))
-                from core import main
-            
-            # 识别待处理文件1（批量 + 兼容性）
-            if hasattr(main, 'find_all_target_files1'):
-                # 批量识别所有待处理文件1
-                all_files = main.find_all_target_files1(self.excel_files)
-                # 项目号筛选
-                self.target_files1, ignored = self._filter_files_by_project(all_files, enabled_projects, "待处理文件1")
-                self.ignored_files.extend(ignored)
-                # 每项目只保留最新文件（按文件名时间）
-                self.target_files1, ignored_latest = select_latest_source_files_per_project(
-                    1, self.target_files1, "待处理文件1"
-                )
-                self.ignored_files.extend(ignored_latest)
-                if self.target_files1:
-                    # 兼容性：设置第一个文件为单文件变量
-                    self.target_file1, self.target_file1_project_id = self.target_files1[0]
-                    if update_ui:
-                        self.update_tab_color(0, "green")
-                    # 【修复】不再在识别文件时立即显示原始数据，避免覆盖后续的处理结果
-                    # self.load_file_to_viewer(self.target_file1, self.tab1_viewer, "内部需打开接口")
-            elif hasattr(main, 'find_target_file'):
-                # 兼容旧版本
-                self.target_file1, self.target_file1_project_id = main.find_target_file(self.excel_files)
-                if self.target_file1:
-                    all_files = [(self.target_file1, self.target_file1_project_id)]
-                    self.target_files1, ignored = self._filter_files_by_project(all_files, enabled_projects, "待处理文件1")
-                    self.ignored_files.extend(ignored)
-                    if self.target_files1:
-                        if update_ui:
-                            self.update_tab_color(0, "green")
-                        # 【修复】不再在识别文件时立即显示原始数据，避免覆盖后续的处理结果
-                        # self.load_file_to_viewer(self.target_file1, self.tab1_viewer, "内部需打开接口")
-                    else:
-                        self.target_file1 = None
-                        self.target_file1_project_id = None
-            
-            # 识别所有待处理文件
-            if hasattr(main, 'find_all_target_files2'):
-                all_files = main.find_all_target_files2(self.excel_files)
-                self.target_files2, ignored = self._filter_files_by_project(all_files, enabled_projects, "待处理文件2")
-                self.ignored_files.extend(ignored)
-                # 每项目只保留最新文件（按文件名时间）
-                self.target_files2, ignored_latest = select_latest_source_files_per_project(
-                    2, self.target_files2, "待处理文件2"
-                )
-                self.ignored_files.extend(ignored_latest)
-                if self.target_files2:
-                    self.target_file2, self.target_file2_project_id = self.target_files2[0]
-                    if update_ui:
-                        self.update_tab_color(1, "green")
-            elif hasattr(main, 'find_target_file2'):
-                self.target_file2, self.target_file2_project_id = main.find_target_file2(self.excel_files)
-                if self.target_file2:
-                    all_files = [(self.target_file2, self.target_file2_project_id)]
-                    self.target_files2, ignored = self._filter_files_by_project(all_files, enabled_projects, "待处理文件2")
-                    self.ignored_files.extend(ignored)
-                    if not self.target_files2:
-                        self.target_file2 = None
-                        self.target_file2_project_id = None
-                    else:
-                        if update_ui:
-                            self.update_tab_color(1, "green")
-            
-            if hasattr(main, 'find_all_target_files3'):
-                all_files = main.find_all_target_files3(self.excel_files)
-                self.target_files3, ignored = self._filter_files_by_project(all_files, enabled_projects, "待处理文件3")
-                self.ignored_files.extend(ignored)
-                # 每项目只保留最新文件（按文件名时间）
-                self.target_files3, ignored_latest = select_latest_source_files_per_project(
-                    3, self.target_files3, "待处理文件3"
-                )
-                self.ignored_files.extend(ignored_latest)
-                if self.target_files3:
-                    self.target_file3, self.target_file3_project_id = self.target_files3[0]
-                    if update_ui:
-                        self.update_tab_color(2, "green")
-            elif hasattr(main, 'find_target_file3'):
-                self.target_file3, self.target_file3_project_id = main.find_target_file3(self.excel_files)
-                if self.target_file3:
-                    all_files = [(self.target_file3, self.target_file3_project_id)]
-                    self.target_files3, ignored = self._filter_files_by_project(all_files, enabled_projects, "待处理文件3")
-                    self.ignored_files.extend(ignored)
-                    if not self.target_files3:
-                        self.target_file3 = None
-                        self.target_file3_project_id = None
-                    else:
-                        if update_ui:
-                            self.update_tab_color(2, "green")
-            
-            if hasattr(main, 'find_all_target_files4'):
-                all_files = main.find_all_target_files4(self.excel_files)
-                self.target_files4, ignored = self._filter_files_by_project(all_files, enabled_projects, "待处理文件4")
-                self.ignored_files.extend(ignored)
-                # 每项目只保留最新文件（按文件名时间）
-                self.target_files4, ignored_latest = select_latest_source_files_per_project(
-                    4, self.target_files4, "待处理文件4"
-                )
-                self.ignored_files.extend(ignored_latest)
-                if self.target_files4:
-                    self.target_file4, self.target_file4_project_id = self.target_files4[0]
-                    if update_ui:
-                        self.update_tab_color(3, "green")
-            elif hasattr(main, 'find_target_file4'):
-                self.target_file4, self.target_file4_project_id = main.find_target_file4(self.excel_files)
-                if self.target_file4:
-                    all_files = [(self.target_file4, self.target_file4_project_id)]
-                    self.target_files4, ignored = self._filter_files_by_project(all_files, enabled_projects, "待处理文件4")
-                    self.ignored_files.extend(ignored)
-                    if not self.target_files4:
-                        self.target_file4 = None
-                        self.target_file4_project_id = None
-                    else:
-                        if update_ui:
-                            self.update_tab_color(3, "green")
-
-            if hasattr(main, 'find_all_target_files5'):
-                all_files = main.find_all_target_files5(self.excel_files)
-                self.target_files5, ignored = self._filter_files_by_project(all_files, enabled_projects, "待处理文件5")
-                self.ignored_files.extend(ignored)
-                if self.target_files5:
-                    if update_ui:
-                        self.update_tab_color(4, "green")
-
-            if hasattr(main, 'find_all_target_files6'):
-                all_files = main.find_all_target_files6(self.excel_files)
-                self.target_files6, ignored = self._filter_files_by_project(all_files, enabled_projects, "待处理文件6")
+            # 【优化】每个文件名只识别一次（合并的识别规则表），得到 类型 -> [(文件路径, 项目号)] 与文件名时间
+            by_type, timestamps = classify_files(self.excel_files)
+            for file_type in range(1, 7):
+                type_name = f"待处理文件{file_type}"
+                target_files, ignored = self._filter_files_by_project(by_type[file_type], enabled_projects, type_name)
                 self.ignored_files.extend(ignored)
-                if self.target_files6:
-                    if update_ui:
-                        self.update_tab_color(5, "green")
+                if file_type <= 4:
+                    # 每项目只保留最新文件（按文件名时间）
+                    target_files, ignored_latest = select_latest_source_files_per_project(
+                        file_type, target_files, type_name, timestamps=timestamps
+                    )
+                    self.ignored_files.extend(ignored_latest)
+                    if target_files:
+                        # 兼容性：设置第一个文件为单文件变量
+                        setattr(self, f"target_file{file_type}", target_files[0][0])
+                        setattr(self, f"target_file{file_type}_project_id", target_files[0][1])
+                setattr(self, f"target_files{file_type}", target_files)
+                if target_files and update_ui:
+                    self.update_tab_color(file_type - 1, "green")
+            try:
+                from core import Monitor
+                summary = "，".join(f"文件{t}:{len(getattr(self, f'target_files{t}'))}个" for t in range(1, 7))
+                Monitor.log_success(f"识别待处理文件完成（{len(self.excel_files)}个Excel文件）：{summary}")
+            except Exception:
+                pass
             
             # 【性能优化Step1】已确认：移除“并发预加载Excel”
             # 说明：预加载仅用于“未处理状态原始预览”，该功能已删除。
@@ -4108,6 +4217,17 @@ class ExcelProcessorApp:
             print(f"识别目标文件时发生错误: {e}")
     
     def _process_with_cache(self, file_path, project_id, file_type, process_func, *args):
+        """
+        带缓存的处理方法（外层记录性能埋点，实际逻辑见 _process_with_cache_impl）
+        """
+        with perf_trace.span("process_with_cache", file_type=file_type, project_id=project_id) as sp:
+            result = self._process_with_cache_impl(file_path, project_id, file_type, process_func, *args)
+            if perf_trace.is_enabled():
+                info = getattr(self, "_last_cache_hit_info", None) or {}
+                sp.set(rows=0 if result is None else len(result), cache_hit=bool(info.get("hit")))
+            return result
+
+    def _process_with_cache_impl(self, file_path, project_id, file_type, process_func, *args):
         """
         带缓存的处理方法
         
@@ -4648,11 +4768,11 @@ class ExcelProcessorApp:
             return
         
         # 显示等待对话框（自动模式下不显示）
-        processing_dialog, _ = self.show_waiting_dialog("开始处理", "正在处理中，请稍后。。。 。。。")
+        processing_dialog, processing_label = self.show_waiting_dialog("开始处理", "正在处理中，请稍后。。。 。。。")
             
         self.process_button.config(state='disabled', text="处理中...")
         
-        def process_files():
+        def process_files(job):
             try:
                 # 导入必要的模块
                 import pandas as pd
@@ -4706,15 +4826,11 @@ class ExcelProcessorApp:
                                 # 仅在“DB为空/新库”时做一次 bootstrap（写入当前结果以获得 display_status）
                                 # 这不会破坏 Step3 的性能目标：只会在少见的“空库”场景触发一次。
                                 try:
-                                    from registry.db import get_connection, close_connection_after_use, MaintenanceModeError
+                                    from registry.db import close_connection_after_use, MaintenanceModeError
                                     try:
-                                        conn = get_connection(db_path, bool(cfg.get("registry_wal", False)))
-                                        row = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='tasks'").fetchone()
-                                        if not row:
-                                            registry_bootstrap_needed = True
-                                        else:
-                                            c = conn.execute("SELECT COUNT(*) FROM tasks").fetchone()
-                                            registry_bootstrap_needed = bool((c[0] if c else 0) == 0)
+                                        # 已分片时检查各项目分片（拆分后主库 tasks 为空）
+                                        registry_bootstrap_needed = registry_hooks.registry_is_empty(
+                                            db_path, bool(cfg.get("registry_wal", False)))
                                         if registry_bootstrap_needed:
                                             print("[Registry] 检测到 tasks 为空：本轮将执行一次 bootstrap 写入以恢复状态显示")
                                     except MaintenanceModeError:
@@ -4742,6 +4858,22 @@ class ExcelProcessorApp:
                 except Exception as e:
                     print(f"[Registry] 设置数据目录失败（将导致状态查询为空）: {e}")
 
+                # 【优化】本轮待审查任务快照：各项目文件共享，每种文件类型只查询一次数据库
+                from registry.pending_review import begin_run_snapshot, end_run_snapshot
+                begin_run_snapshot()
+
+                # 【新增】按待处理文件回报进度；同时作为取消检查点（切换文件夹后尽快退出）
+                progress = {"done": 0, "total": sum(
+                    len(files or []) for flag, files in (
+                        (process_file1, self.target_files1), (process_file2, self.target_files2),
+                        (process_file3, self.target_files3), (process_file4, self.target_files4),
+                    ) if flag
+                )}
+
+                def step(label):
+                    progress["done"] += 1
+                    job.report_progress(progress["done"], progress["total"], label)
+
                 # 处理待处理文件1（批量）
                 if process_file1 and self.target_files1:
                     if hasattr(main, 'process_target_file'):
@@ -4762,6 +4894,7 @@ class ExcelProcessorApp:
                         registry_should_update = {}
                         
                         for file_path, project_id in self.target_files1:
+                            step(f"项目{project_id}文件1")
                             try:
                                 print(f"处理项目{project_id}的文件1: {os.path.basename(file_path)}")
                                 try:
@@ -4877,7 +5010,7 @@ class ExcelProcessorApp:
                         
                         # 合并所有结果（用于显示）
                         if combined_results:
-                            results1 = pd.concat(combined_results, ignore_index=True)
+                            results1 = concat_results(combined_results)
                             print(f"文件1批量处理完成，显示: {len(results1)} 行")
                             try:
                                 from core import Monitor
@@ -4913,6 +5046,7 @@ class ExcelProcessorApp:
                         raw_results_for_registry = {}
                         
                         for file_path, project_id in self.target_files2:
+                            step(f"项目{project_id}文件2")
                             try:
                                 print(f"处理项目{project_id}的文件2: {os.path.basename(file_path)}")
                                 # Step2：优先复用 refresh 阶段已加载到内存的 raw 缓存（避免二次读 .pkl）
@@ -4996,7 +5130,7 @@ class ExcelProcessorApp:
                         
                         # 合并所有结果（用于显示）
                         if combined_results:
-                            results2 = pd.concat(combined_results, ignore_index=True)
+                            results2 = concat_results(combined_results)
                             print(f"文件2批量处理完成，显示: {len(results2)} 行")
                         else:
                             results2 = pd.DataFrame()
@@ -5019,6 +5153,7 @@ class ExcelProcessorApp:
                         raw_results_for_registry = {}
                         
                         for file_path, project_id in self.target_files3:
+                            step(f"项目{project_id}文件3")
                             try:
                                 print(f"处理项目{project_id}的文件3: {os.path.basename(file_path)}")
                                 # Step2：优先复用 refresh 阶段已加载到内存的 raw 缓存（避免二次读 .pkl）
@@ -5098,7 +5233,7 @@ class ExcelProcessorApp:
                         
                         # 合并所有结果（用于显示）
                         if combined_results:
-                            results3 = pd.concat(combined_results, ignore_index=True)
+                            results3 = concat_results(combined_results)
                             print(f"文件3批量处理完成，显示: {len(results3)} 行")
                         else:
                             results3 = pd.DataFrame()
@@ -5121,6 +5256,7 @@ class ExcelProcessorApp:
                         raw_results_for_registry = {}
                         
                         for file_path, project_id in self.target_files4:
+                            step(f"项目{project_id}文件4")
                             try:
                                 print(f"处理项目{project_id}的文件4: {os.path.basename(file_path)}")
                                 # Step2：优先复用 refresh 阶段已加载到内存的 raw 缓存（避免二次读 .pkl）
@@ -5200,7 +5336,7 @@ class ExcelProcessorApp:
                         
                         # 合并所有结果（用于显示）
                         if combined_results:
-                            results4 = pd.concat(combined_results, ignore_index=True)
+                            results4 = concat_results(combined_results)
                             print(f"文件4批量处理完成，显示: {len(results4)} 行")
                         else:
                             results4 = pd.DataFrame()
@@ -5214,6 +5350,8 @@ class ExcelProcessorApp:
                         self.processing_results_multi4 = new_multi4
                 
                 def update_display():
+                    if job.cancelled:
+                        return
                     # Step3：执行归档逻辑（标记消失任务，归档超期任务）
                     try:
                         from registry import hooks as registry_hooks
@@ -5455,7 +5593,7 @@ class ExcelProcessorApp:
                                     print(f"[Registry] 文件5钩子调用失败: {e}")
                             
                             if combined_results:
-                                results5 = pd.concat(combined_results, ignore_index=True)
+                                results5 = concat_results(combined_results)
                                 self.processing_results5 = results5
                                 self.has_processed_results5 = True
                                 if not process_file1 and not process_file2 and not process_file3 and not process_file4:
@@ -5584,7 +5722,7 @@ class ExcelProcessorApp:
                                     print(f"[Registry] 文件6钩子调用失败: {e}")
                             
                             if combined_results:
-                                results6 = pd.concat(combined_results, ignore_index=True)
+                                results6 = concat_results(combined_results)
                                 self.processing_results6 = results6
                                 self.has_processed_results6 = True
                                 if not process_file1 and not process_file2 and not process_file3 and not process_file4 and not process_file5:
@@ -5626,6 +5764,9 @@ class ExcelProcessorApp:
                     # Step4：仅渲染 active_tab（避免 update_display 与 on_tab_changed 双重渲染）
                     self._post_processing_select_and_render_active_tab(active_tab)
                     
+                    # 【新增】本轮处理与界面刷新完成，结束性能埋点批次
+                    perf_trace.end_run()
+
                     # 统一弹窗显示处理结果（批量处理版本）
                     # 只有手动操作时才显示"处理完成"弹窗
                     if completion_messages and self._should_show_popup():
@@ -5687,9 +5828,22 @@ class ExcelProcessorApp:
                     # 重置手动操作标志
                     self._manual_operation = False
                 
+                # 已被取消（切换文件夹）：不再把旧一轮结果显示到界面
+                check_cancelled()
+                end_run_snapshot()
                 self.root.after(0, update_display)
                 
+            except JobCancelled:
+                from registry.pending_review import end_run_snapshot
+                end_run_snapshot()
+                raise
             except Exception as exc:
+                try:
+                    from registry.pending_review import end_run_snapshot
+                    end_run_snapshot()
+                except Exception:
+                    pass
+                perf_trace.end_run()
                 self.root.after(0, lambda: self.close_waiting_dialog(processing_dialog))
                 error_message = f"处理过程中发生错误: {exc}"
                 if self._should_show_popup() or not getattr(self, "_auto_context", True):
@@ -5698,8 +5852,27 @@ class ExcelProcessorApp:
                 # 重置手动操作标志
                 self._manual_operation = False
         
-        thread = threading.Thread(target=process_files, daemon=True)
-        thread.start()
+        def on_processing_cancelled():
+            perf_trace.end_run()
+            self.close_waiting_dialog(processing_dialog)
+            self.process_button.config(state="normal", text="开始处理")
+            self._manual_operation = False
+            print("[处理] 已取消本轮处理")
+
+        def on_processing_progress(current, total, message):
+            try:
+                if processing_label is not None and processing_dialog.winfo_exists():
+                    processing_label.config(text=f"正在处理中（{current}/{total} {message}）")
+            except Exception:
+                pass
+
+        if perf_trace.is_enabled():
+            perf_trace.begin_run("自动处理" if getattr(self, 'auto_mode', False) else "开始处理")
+        self.job_scheduler.submit(
+            "process", process_files, priority=PRIORITY_VISIBLE,
+            key="process", meta={"folder_path": self.path_var.get().strip()},
+            on_cancelled=on_processing_cancelled, on_progress=on_processing_progress,
+        )
 
     def display_results(self, results, show_popup=True):
         """显示处理结果"""
@@ -6705,6 +6878,18 @@ class ExcelProcessorApp:
         """完全退出应用程序"""
         self.is_closing = True
         
+        try:
+            self.job_scheduler.shutdown()
+        except Exception:
+            pass
+
+        # 写入暂存的共享任务日志（失败时保留在本地，下次启动补写）
+        try:
+            if getattr(self, "write_task_manager", None):
+                self.write_task_manager.flush_shared_log()
+        except Exception:
+            pass
+
         if self.tray_icon:
             self.tray_icon.stop()
         
@@ -7310,32 +7495,8 @@ class ExcelProcessorApp:
         overdue_tasks = []
         
         try:
-            # 获取registry配置
-            cfg = registry_hooks._cfg()
-            if not cfg:
-                print("[收集延期任务] Registry未配置")
-                return []
-            
-            db_path = cfg.get('registry_db_path')
-            if not db_path:
-                print("[收集延期任务] 数据库路径未设置")
-                return []
-            
-            # 直接从数据库读取所有未忽略的任务
-            import sqlite3
-            conn = sqlite3.connect(db_path)
-            cursor = conn.execute("""
-                SELECT 
-                    file_type, project_id, interface_id, source_file, 
-                    row_index, interface_time, status, display_status,
-                    responsible_person, department, role
-                FROM tasks
-                WHERE status NOT IN ('archived')
-                  AND (ignored IS NULL OR ignored = 0)
-                ORDER BY file_type, project_id, interface_id
-            """)
-            
-            rows = cursor.fetchall()
+            # 读取所有未归档且未忽略的任务（网络盘优先读本地只读副本）
+            rows = registry_hooks.get_active_tasks()
             print(f"[收集延期任务] 从数据库读取到 {len(rows)} 个未归档且未忽略的任务")
             
             # 文件类型映射到选项卡名称
@@ -7351,7 +7512,17 @@ class ExcelProcessorApp:
             # 检查每个任务是否延期
             for row in rows:
                 try:
-                    file_type, project_id, interface_id, source_file, row_index, interface_time, status, display_status, responsible_person, department, role = row
+                    file_type = row['file_type']
+                    project_id = row['project_id']
+                    interface_id = row['interface_id']
+                    source_file = row['source_file']
+                    row_index = row['row_index']
+                    interface_time = row['interface_time']
+                    status = row['status']
+                    display_status = row['display_status']
+                    responsible_person = row['responsible_person']
+                    department = row['department']
+                    role = row['role']
                     
                     # 检查接口时间是否有效
                     if not interface_time or str(interface_time).strip() in ['', '-', 'nan', 'None', '未知']:
@@ -7384,8 +7555,6 @@ class ExcelProcessorApp:
                     print(f"[收集延期任务] 处理任务失败: {e}")
                     continue
             
-            conn.close()
-            
         except Exception as e:
             print(f"[收集延期任务] 数据库查询失败: {e}")
             import traceback
@@ -8,10 +8,12 @@ Excel数据处理监控器
 import tkinter as tk
 from tkinter import ttk, scrolledtext
 import threading
-import queue
 import datetime
 import os
 import sys
+from collections import deque
+
+from utils import app_log
 
 def get_resource_path(relative_path):
     """获取资源文件的绝对路径，兼容开发环境和打包环境"""
@@ -22,15 +24,47 @@ def get_resource_path(relative_path):
         # 开发环境
         return os.path.join(os.path.dirname(os.path.abspath(__file__)), relative_path)
 
+# 【新增】消息类型颜色/前缀（批量渲染时按类型复用 Text 标签）
+COLOR_MAP = {
+    "DEBUG": "gray",
+    "INFO": "black",
+    "SUCCESS": "green",
+    "WARNING": "orange",
+    "ERROR": "red",
+    "PROCESS": "blue",
+    "SYSTEM": "purple",
+}
+
+PREFIX_MAP = {
+    "DEBUG": "[调试]",
+    "INFO": "[信息]",
+    "SUCCESS": "[成功]",
+    "WARNING": "[警告]",
+    "ERROR": "[错误]",
+    "PROCESS": "[处理]",
+    "SYSTEM": "[系统]",
+}
+
+# 紧凑模式下隐藏的日志分类（步骤级别/逐行调试信息），由调用方通过 category 标注
+COMPACT_HIDDEN_CATEGORIES = {"step", "date_parse", "style", "registry.pending"}
+
+
 class ProcessMonitor:
     """处理过程监控器"""
-    
+
+    RENDER_INTERVAL_MS = 200   # 批量渲染间隔
+    MAX_BATCH = 500            # 单次渲染最多消息数
+    MAX_PENDING = 5000         # 未渲染消息上限（超出丢弃最旧）
+    MAX_MESSAGES = 1000        # 保留的已渲染消息数
+
     def __init__(self, parent=None):
         self.parent = parent
         self.window = None
-        self.message_queue = queue.Queue()
         self.is_running = False
         
+        # 待渲染消息（后台线程写入，UI定时器批量取出）
+        self._pending = deque(maxlen=self.MAX_PENDING)
+        self._render_job = None
         # 存储所有消息
         self.messages = []
         # 紧凑模式（仅显示文件级别的信息，隐藏步骤级别如“处理1/2/3/4/5/6”等）
@@ -102,6 +136,8 @@ class ProcessMonitor:
             font=('Consolas', 9)
         )
         self.text_display.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        for msg_type, color in COLOR_MAP.items():
+            self.text_display.tag_config(msg_type, foreground=color)
         
         # 按钮框架
         button_frame = ttk.Frame(main_frame)
@@ -135,152 +171,95 @@ class ProcessMonitor:
         self.is_running = True
         self.status_label.config(text="监控已启动", foreground="green")
         
-        # 启动消息处理线程
-        threading.Thread(target=self.process_messages, daemon=True).start()
+        # 【修复】不再逐条 after(0, ...)，改为定时批量渲染
+        self._schedule_render()
         
     def stop_monitoring(self):
         """停止监控"""
         self.is_running = False
         self.status_label.config(text="监控已停止", foreground="red")
-        
-    def process_messages(self):
-        """处理消息队列"""
-        while self.is_running:
+        if self._render_job is not None and self.window:
             try:
-                # 从队列中获取消息（阻塞等待，超时1秒）
-                message, msg_type = self.message_queue.get(timeout=1.0)
-                
-                # 在主线程中更新界面
-                if self.window and self.window.winfo_exists():
-                    self.window.after(0, lambda m=message, t=msg_type: self.display_message(m, t))
-                    
-            except queue.Empty:
-                continue
-            except Exception as e:
-                print(f"处理监控消息时发生错误: {e}")
-                
-    def add_message(self, message, msg_type="INFO"):
-        """添加消息到队列"""
-        try:
-            if self.compact_mode and self._should_suppress(message):
-                return
-        except Exception:
-            pass
-        try:
-            self.message_queue.put((message, msg_type), block=False)
-        except queue.Full:
-            # 如果队列满了，丢弃最旧的消息
-            try:
-                self.message_queue.get_nowait()
-                self.message_queue.put((message, msg_type), block=False)
-            except queue.Empty:
+                self.window.after_cancel(self._render_job)
+            except Exception:
                 pass
+        self._render_job = None
+
+    def _schedule_render(self):
+        if self.is_running and self.window and self.window.winfo_exists():
+            self._render_job = self.window.after(self.RENDER_INTERVAL_MS, self._render_pending)
 
-    def _should_suppress(self, message: str) -> bool:
-        """紧凑模式下隐藏步骤级别/调试级别的信息，仅保留文件级别信息。"""
+    def _render_pending(self):
+        """定时器回调：取出一批待渲染消息一次性插入"""
+        self._render_job = None
         try:
-            s = str(message)
-        except Exception:
-            s = message
+            batch = self.drain_pending(self.MAX_BATCH)
+            if batch:
+                self._render_batch(batch)
+        except Exception as e:
+            print(f"处理监控消息时发生错误: {e}")
+        self._schedule_render()
+
+    def drain_pending(self, limit=None):
+        """取出待渲染消息 [(timestamp, message, msg_type), ...]"""
+        items = []
+        while self._pending and (limit is None or len(items) < limit):
+            try:
+                items.append(self._pending.popleft())
+            except IndexError:
+                break
+        return items
+                
+    def add_message(self, message, msg_type="INFO", category=None):
+        """
+        添加消息到待渲染队列（线程安全）
 
-        if not s:
-            return False
+        参数:
+            message: 消息文本
+            msg_type: 消息类型（INFO/SUCCESS/WARNING/ERROR/PROCESS/SYSTEM/DEBUG）
+            category: 日志分类；紧凑模式下隐藏 COMPACT_HIDDEN_CATEGORIES 中的分类和调试消息
+        """
+        if self.compact_mode and (category in COMPACT_HIDDEN_CATEGORIES or msg_type == "DEBUG"):
+            return
+        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+        self._pending.append((timestamp, message, msg_type))
 
-        # 直接放行的关键词（文件级别）
-        whitelist_keywords = [
-            "开始批量识别待处理文件",
-            "找到待处理文件",
-            "批量识别完成",
-            "开始批量处理待处理文件",
-            "项目",
-            "最终完成处理数据",
-            "批量数据处理完成",
-            "导出完成",
-            "导出结果",
-            "批量导出完成",
-        ]
-        for kw in whitelist_keywords:
-            if kw in s:
-                return False
+    @staticmethod
+    def format_message(timestamp, message, msg_type="INFO"):
+        """格式化单条消息"""
+        prefix = PREFIX_MAP.get(msg_type, "[信息]")
+        return f"[{timestamp}] {prefix} {message}\n"
 
-        # 步骤/调试类关键词（需隐藏）
-        suppress_keywords = [
-            "开始执行处理1", "开始执行处理2", "开始执行处理3", "开始执行处理4", "开始执行处理5", "开始执行处理6",
-            "执行处理1", "执行处理2", "执行处理3", "执行处理4", "执行处理5", "执行处理6",
-            "处理1完成", "处理2完成", "处理3完成", "处理4完成", "处理5完成", "处理6完成",
-            "处理1：", "处理2：", "处理3：", "处理4：", "处理5：", "处理6：",
-            "处理1(", "处理2(", "处理3(", "处理4(", "处理5(", "处理6(",
-            "筛选日期范围", "筛选范围", "读取到数据", "数据概览", "开始处理待处理文件",
-            "组1", "组2", "日期解析失败", "样式复制失败", "数据行样式复制失败",
-        ]
-        for kw in suppress_keywords:
-            if kw in s:
-                return True
+    def _render_batch(self, items):
+        """将一批消息一次性插入 Text 控件（每种类型复用一个颜色标签）"""
+        formatted = [(self.format_message(ts, msg, t), t if t in COLOR_MAP else "INFO")
+                     for ts, msg, t in items]
+        self.messages.extend(text for text, _ in formatted)
+
+        # 限制消息数量：超过上限后裁剪到一半并整体重绘，避免每条消息都触发重绘
+        if len(self.messages) > self.MAX_MESSAGES:
+            self.messages = self.messages[-(self.MAX_MESSAGES // 2):]
+            self.refresh_display()
+            return
 
-        # 默认不过滤
-        return False
-                
-    def display_message(self, message, msg_type="INFO"):
-        """在界面上显示消息"""
         if not self.window or not self.window.winfo_exists():
             return
-            
-        # 生成时间戳
-        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-        
-        # 根据消息类型设置颜色和前缀
-        color_map = {
-            "INFO": "black",
-            "SUCCESS": "green",
-            "WARNING": "orange", 
-            "ERROR": "red",
-            "PROCESS": "blue",
-            "SYSTEM": "purple"
-        }
-        
-        prefix_map = {
-            "INFO": "[信息]",
-            "SUCCESS": "[成功]",
-            "WARNING": "[警告]",
-            "ERROR": "[错误]",
-            "PROCESS": "[处理]",
-            "SYSTEM": "[系统]"
-        }
-        
-        color = color_map.get(msg_type, "black")
-        prefix = prefix_map.get(msg_type, "[信息]")
-        
-        # 格式化消息
-        formatted_message = f"[{timestamp}] {prefix} {message}\n"
-        
-        # 存储消息
-        self.messages.append(formatted_message)
-        
-        # 显示消息
+        chunks = []
+        for text, tag in formatted:
+            chunks.extend((text, tag))
         self.text_display.config(state='normal')
-        self.text_display.insert(tk.END, formatted_message)
-        
-        # 设置颜色标签
-        try:
-            # 为新插入的文本设置颜色
-            line_start = self.text_display.index(tk.END + "-2 lines linestart")
-            line_end = self.text_display.index(tk.END + "-2 lines lineend")
-            
-            tag_name = f"{msg_type}_{len(self.messages)}"
-            self.text_display.tag_add(tag_name, line_start, line_end)
-            self.text_display.tag_config(tag_name, foreground=color)
-        except Exception:
-            pass
-        
+        self.text_display.insert(tk.END, *chunks)
         self.text_display.config(state='disabled')
         
         # 自动滚动到底部
         self.text_display.see(tk.END)
-        
-        # 限制消息数量（保留最近1000条）
-        if len(self.messages) > 1000:
-            self.messages = self.messages[-1000:]
-            self.refresh_display()
+                
+    def display_message(self, message, msg_type="INFO"):
+        """在界面上立即显示单条消息（需在UI线程调用）"""
+        if not self.window or not self.window.winfo_exists():
+            return
+        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+        self._render_batch([(timestamp, message, msg_type)])
             
     def refresh_display(self):
         """刷新显示所有消息"""
@@ -351,33 +330,37 @@ def get_monitor():
         _global_monitor = ProcessMonitor()
     return _global_monitor
 
-def log_message(message, msg_type="INFO"):
-    """记录消息到监控器"""
-    monitor = get_monitor()
-    monitor.add_message(message, msg_type)
-    
-    # 同时打印到控制台
-    print(f"[{msg_type}] {message}")
+def _monitor_sink(record):
+    """app_log 输出目标：转发到监控器"""
+    get_monitor().add_message(record["message"], record["level"], record.get("category"))
+
+
+# 【新增】监控器作为 app_log 的一个输出目标（控制台/文件由 app_log 负责）
+app_log.add_sink("monitor", _monitor_sink, level="PROCESS")
+
+def log_message(message, msg_type="INFO", category=None):
+    """记录消息（经 app_log 路由到监控器、控制台与日志文件）"""
+    app_log.log(msg_type, category, message)
 
-def log_info(message):
+def log_info(message, category=None):
     """记录信息消息"""
-    log_message(message, "INFO")
+    log_message(message, "INFO", category)
 
-def log_success(message):
+def log_success(message, category=None):
     """记录成功消息"""
-    log_message(message, "SUCCESS")
+    log_message(message, "SUCCESS", category)
 
-def log_warning(message):
+def log_warning(message, category=None):
     """记录警告消息"""
-    log_message(message, "WARNING")
+    log_message(message, "WARNING", category)
 
-def log_error(message):
+def log_error(message, category=None):
     """记录错误消息"""
-    log_message(message, "ERROR")
+    log_message(message, "ERROR", category)
 
-def log_process(message):
+def log_process(message, category=None):
     """记录处理过程消息"""
-    log_message(message, "PROCESS")
+    log_message(message, "PROCESS", category)
 
 def show_monitor():
     """显示监控窗口"""
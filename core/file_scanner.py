@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据文件夹扫描与源文件识别模块
+
+原流程：
+1. Path(folder).iterdir() + 每个条目 is_file()（UNC 路径上每次都是一次网络往返）
+2. 六个 find_all_target_filesN 各自对全部文件名跑一遍正则，每个匹配都写一条 Monitor 日志
+3. 生成文件列表文本时再对每个文件 os.path.getsize()
+
+本模块：
+1. scan_excel_files()：os.scandir 单次遍历，文件大小/修改时间取自 DirEntry（Windows 上无额外网络往返）；
+   扫描结果按文件夹持久化为目录快照，文件夹修改时间未变时直接复用快照，不再列目录
+2. classify_filename()：先用合并后的标记正则定位候选类型，再用该类型的识别规则确认，
+   每个文件名只分类一次，得到 (文件类型, 项目号, 文件名时间)
+3. classify_files()：按类型分组，结果可直接交给 select_latest_source_files_per_project
+
+识别规则与 core.main.find_all_target_filesN 保持一致（后者保留给脚本/旧调用方使用）。
+"""
+
+import datetime
+import json
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from utils.job_scheduler import check_cancelled
+
+EXCEL_EXTENSIONS = (".xlsx", ".xls")
+
+# 目录快照格式版本（结构变化时递增，旧快照自动失效）
+SNAPSHOT_VERSION = 1
+# 扫描时刻距文件夹修改时间不足该秒数时，快照不可信（同一时间粒度内可能还有新文件写入）
+SNAPSHOT_RACY_SECONDS = 2.0
+
+
+@dataclass(frozen=True)
+class SourcePattern:
+    """一种源文件的识别规则"""
+
+    file_type: int
+    marker: str                    # 文件名中的固定标记（合并预筛选用）
+    pattern: "re.Pattern"          # 完整识别规则（与 find_all_target_filesN 一致）
+    project_optional: bool = False  # 未匹配到项目号时是否仍识别（项目号为空字符串）
+    timestamp_pattern: Optional["re.Pattern"] = None  # 文件名时间（同项目只保留最新文件用）
+
+
+SOURCE_PATTERNS: Tuple[SourcePattern, ...] = (
+    SourcePattern(1, "按项目导出IDI手册",
+                  re.compile(r'^(\d{4})按项目导出IDI手册\d{4}-\d{2}-\d{2}.*\.(xlsx|xls)$'),
+                  timestamp_pattern=re.compile(
+                      r"按项目导出IDI手册(?P<date>\d{4}-\d{2}-\d{2})(?:-(?P<h>\d{2})_(?P<m>\d{2})_(?P<s>\d{2}))?")),
+    SourcePattern(2, "内部接口信息单报表",
+                  re.compile(r'^内部接口信息单报表(\d{4})\d{8}\.(xlsx|xls)$'),
+                  timestamp_pattern=re.compile(r"内部接口信息单报表\d{4}(?P<date>\d{8})")),
+    SourcePattern(3, "外部接口ICM报表",
+                  re.compile(r'^外部接口ICM报表(\d{4})\d{8}\.(xlsx|xls)$'),
+                  timestamp_pattern=re.compile(r"外部接口ICM报表\d{4}(?P<date>\d{8})")),
+    SourcePattern(4, "外部接口单报表",
+                  re.compile(r'^外部接口单报表(\d{4})\d{8}\.(xlsx|xls)$'),
+                  timestamp_pattern=re.compile(r"外部接口单报表\d{4}(?P<date>\d{8})")),
+    SourcePattern(5, "接口提资清单",
+                  re.compile(r'^(\d{4})接口提资清单.*\.(xlsx|xls)$')),
+    # 文件6：包含“收发文清单”的 .xlsx/.xls；紧随其后的四位数字作为项目号（可缺省）
+    SourcePattern(6, "收发文清单",
+                  re.compile(r'收发文清单(\d{4})'),
+                  project_optional=True),
+)
+
+# 合并预筛选：一次扫描找出文件名中出现的全部类型标记
+_MARKER_RE = re.compile("|".join(re.escape(p.marker) for p in SOURCE_PATTERNS))
+
+
+class ScanEntry(NamedTuple):
+    """扫描到的 Excel 文件"""
+
+    path: str
+    size: int
+    mtime_ns: int
+
+
+class Classification(NamedTuple):
+    """文件名识别结果"""
+
+    file_type: int
+    project_id: str
+    timestamp: Optional[datetime.datetime]
+
+
+def parse_source_timestamp(file_type: int, filename: str) -> Optional[datetime.datetime]:
+    """
+    从源文件文件名中解析时间后缀（同项目同类型只取最新文件用）
+
+    - file1: 2016按项目导出IDI手册2025-08-01-17_55_52.xlsx（含时分秒）或 ...2025-08-01.xlsx（仅日期）
+    - file2/3/4: 报表名 + 项目号 + YYYYMMDD
+
+    返回:
+        datetime；不支持的类型或解析失败返回 None
+    """
+    spec = next((p for p in SOURCE_PATTERNS if p.file_type == file_type), None)
+    if spec is None or spec.timestamp_pattern is None:
+        return None
+    try:
+        m = spec.timestamp_pattern.search(filename)
+        if not m:
+            return None
+        date_str = m.group("date")
+        if file_type == 1:
+            h, mi, s = m.group("h"), m.group("m"), m.group("s")
+            if h and mi and s:
+                return datetime.datetime.strptime(f"{date_str}-{h}_{mi}_{s}", "%Y-%m-%d-%H_%M_%S")
+            return datetime.datetime.strptime(date_str, "%Y-%m-%d")
+        return datetime.datetime.strptime(date_str, "%Y%m%d")
+    except Exception:
+        return None
+
+
+def classify_filename(filename: str) -> List[Classification]:
+    """
+    识别单个文件名
+
+    返回:
+        [Classification, ...]（通常 0 或 1 项；文件名同时满足多种规则时按类型顺序全部返回，
+        与分别调用各 find_all_target_filesN 的结果一致）
+    """
+    markers = set(_MARKER_RE.findall(filename))
+    if not markers:
+        return []
+    found = []
+    for spec in SOURCE_PATTERNS:
+        if spec.marker not in markers:
+            continue
+        if spec.project_optional:
+            if not filename.endswith(EXCEL_EXTENSIONS):
+                continue
+            m = spec.pattern.search(filename)
+            project_id = m.group(1) if m else ""
+        else:
+            m = spec.pattern.match(filename)
+            if not m:
+                continue
+            project_id = m.group(1)
+        found.append(Classification(spec.file_type, project_id, parse_source_timestamp(spec.file_type, filename)))
+    return found
+
+
+def classify_files(paths: Iterable[str]) -> Tuple[Dict[int, List[Tuple[str, str]]], Dict[str, datetime.datetime]]:
+    """
+    按类型分组识别文件
+
+    返回:
+        (by_type, timestamps)
+        by_type: {file_type: [(文件路径, 项目号), ...]}（1~6 均有键，顺序同输入）
+        timestamps: {文件路径: 文件名时间}（仅能解析时间的文件）
+    """
+    by_type: Dict[int, List[Tuple[str, str]]] = {p.file_type: [] for p in SOURCE_PATTERNS}
+    timestamps: Dict[str, datetime.datetime] = {}
+    for path in paths:
+        for item in classify_filename(os.path.basename(path)):
+            by_type[item.file_type].append((path, item.project_id))
+            if item.timestamp is not None:
+                timestamps[path] = item.timestamp
+    return by_type, timestamps
+
+
+# ============================================================================
+# 目录扫描 + 快照
+# ============================================================================
+
+def _snapshot_key(folder: str) -> str:
+    return os.path.normcase(os.path.abspath(folder))
+
+
+def _load_snapshots(snapshot_path: Optional[str]) -> dict:
+    if not snapshot_path or not os.path.exists(snapshot_path):
+        return {}
+    try:
+        with open(snapshot_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != SNAPSHOT_VERSION:
+            return {}
+        return data.get("folders", {}) or {}
+    except Exception as e:
+        print(f"[扫描] 读取目录快照失败（将重新列目录）: {e}")
+        return {}
+
+
+def _save_snapshot(snapshot_path: str, folder: str, dir_mtime_ns: int, scanned_at: float,
+                   entries: List[ScanEntry]) -> None:
+    folders = _load_snapshots(snapshot_path)
+    folders[_snapshot_key(folder)] = {
+        "dir_mtime_ns": dir_mtime_ns,
+        "scanned_at": scanned_at,
+        "entries": [[os.path.basename(e.path), e.size, e.mtime_ns] for e in entries],
+    }
+    try:
+        os.makedirs(os.path.dirname(snapshot_path) or ".", exist_ok=True)
+        tmp_path = snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": SNAPSHOT_VERSION, "folders": folders}, f, ensure_ascii=False)
+        os.replace(tmp_path, snapshot_path)
+    except Exception as e:
+        print(f"[扫描] 保存目录快照失败: {e}")
+
+
+def scan_excel_files(folder: str, snapshot_path: Optional[str] = None,
+                     cancel_token=None) -> Tuple[List[ScanEntry], bool]:
+    """
+    列出文件夹下的 Excel 文件（不递归）
+
+    参数:
+        folder: 数据文件夹（可为 UNC 路径）
+        snapshot_path: 目录快照文件路径（None 表示不使用快照）
+        cancel_token: 取消令牌（可选，默认使用当前调度任务的令牌）
+
+    返回:
+        (entries, from_snapshot)：entries 按文件名排序；from_snapshot 表示是否直接复用了快照
+
+    说明:
+        快照以文件夹修改时间判断是否有效：新增/删除/重命名文件会改变文件夹修改时间，
+        原地覆盖同名文件不会（此时文件名列表不变，识别结果也不变，只有快照中的大小可能是旧值；
+        文件内容变化由 file_manager 的文件标识检测负责）。
+    """
+    dir_mtime_ns = os.stat(folder).st_mtime_ns
+    key = _snapshot_key(folder)
+
+    if snapshot_path:
+        cached = _load_snapshots(snapshot_path).get(key)
+        if (
+            cached
+            and cached.get("dir_mtime_ns") == dir_mtime_ns
+            and float(cached.get("scanned_at", 0)) - dir_mtime_ns / 1e9 >= SNAPSHOT_RACY_SECONDS
+        ):
+            entries = [ScanEntry(os.path.join(folder, name), int(size), int(mtime_ns))
+                       for name, size, mtime_ns in cached.get("entries", [])]
+            print(f"[扫描] 文件夹未变化，复用目录快照: {len(entries)} 个Excel文件")
+            return entries, True
+
+    scanned_at = time.time()
+    entries: List[ScanEntry] = []
+    with os.scandir(folder) as it:
+        for i, entry in enumerate(it):
+            if i % 200 == 0:
+                check_cancelled(cancel_token)
+            if not entry.name.lower().endswith(EXCEL_EXTENSIONS):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            entries.append(ScanEntry(entry.path, st.st_size, st.st_mtime_ns))
+    entries.sort(key=lambda e: os.path.basename(e.path))
+
+    if snapshot_path:
+        _save_snapshot(snapshot_path, folder, dir_mtime_ns, scanned_at, entries)
+    return entries, False
@@ -0,0 +1,490 @@
+# -*- coding: utf-8 -*-
+"""
+六类待处理文件的声明
+
+每类文件声明：筛选条件（列位置 + 单元格判断）、组合逻辑、待审查加回条件、版次列、派生列、导出标题，
+由 core.process_engine.run_spec 统一执行。单元格判断函数只接收一个单元格值，引擎按唯一值缓存结果。
+
+修改某类文件的业务规则时只改这里；tests/test_process_engine.py 的黄金数据用于确认未意外改变结果。
+"""
+
+import datetime
+import re
+
+import pandas as pd
+
+from utils import app_log
+from core.process_engine import DerivedColumn, FileSpec, Predicate
+
+# 导入项目特殊调整模块（1818项目日期减6天等）
+try:
+    from utils.adjust import adjust_date_for_project
+except ImportError:
+    def adjust_date_for_project(cell_date, project_id):
+        """兜底函数：无调整"""
+        return cell_date
+
+
+DEPARTMENT_CODES = (("25C1", "结构一室"), ("25C2", "结构二室"), ("25C3", "建筑总图室"))
+DEPARTMENTS = ("结构一室", "结构二室", "建筑总图室")
+HEBEI_STRUCTURE_PREFIX = "河北分公司-建筑结构所"
+CONFIRM_DEPARTMENT = "请室主任确认"
+
+_ZH_PATTERN = re.compile(r"[\u4e00-\u9fa5]+")
+# 文件1/2/5：先按固定格式，失败再智能解析
+_LOOSE_DATE_FORMATS = ['%Y-%m-%d', '%Y/%m/%d', '%Y-%m-%d %H:%M:%S', '%Y/%m/%d %H:%M:%S']
+# 文件3/4：只接受固定格式或日期对象
+_STRICT_DATE_FORMATS = ['%Y-%m-%d', '%Y/%m/%d', '%Y.%m.%d', '%Y-%m-%d %H:%M:%S', '%Y/%m/%d %H:%M:%S']
+_OWNER_SEPARATORS = [',', '，', ';', '；', '/', '、']
+
+
+# ===================== 单元格判断 =====================
+
+def _text(value):
+    return str(value) if value is not None else ""
+
+
+def is_blank(value):
+    return pd.isna(value) or str(value).strip() == ""
+
+
+def is_not_blank(value):
+    return not is_blank(value)
+
+
+def has_department_code(value):
+    """包含25C1/25C2/25C3"""
+    s = _text(value)
+    return any(code in s for code, _ in DEPARTMENT_CODES)
+
+
+def equals_stripped(target):
+    def test(value):
+        return pd.notna(value) and str(value).strip() == target
+    return test
+
+
+def starts_with_hebei(value):
+    return pd.notna(value) and str(value).strip().startswith(HEBEI_STRUCTURE_PREFIX)
+
+
+def parse_loose_date(value):
+    """文件1/2/5的日期解析：字符串先试固定格式，再交给 pandas 智能解析；失败返回 NaT"""
+    if isinstance(value, str):
+        cell_date = None
+        for fmt in _LOOSE_DATE_FORMATS:
+            try:
+                cell_date = pd.to_datetime(value, format=fmt, errors='raise')
+                break
+            except Exception:
+                continue
+        if cell_date is None or pd.isna(cell_date):
+            cell_date = pd.to_datetime(value, errors='coerce')
+        return cell_date
+    return pd.to_datetime(value, errors='coerce')
+
+
+def parse_strict_date(value, reject_4444=False):
+    """
+    文件3/4的日期解析：固定格式字符串或日期对象（取日期部分）；失败返回 None
+
+    reject_4444: 4444 作为年份表示"无效占位"，直接视为无日期（文件3）
+    """
+    if not pd.notna(value):
+        return None
+    value_str = str(value).strip()
+    if reject_4444 and value_str.startswith('4444'):
+        return None
+    for fmt in _STRICT_DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(value_str, fmt)
+        except ValueError:
+            continue
+    # 如果是pandas的Timestamp对象
+    if hasattr(value, 'year'):
+        return datetime.datetime(value.year, value.month, value.day)
+    return None
+
+
+def in_date_window(ctx, parse, label):
+    """
+    日期在 ctx.date_window 内（1818项目先减6天）
+
+    参数:
+        ctx: 处理上下文
+        parse: 单元格值 -> 日期（解析失败返回 None/NaT）
+        label: 解析异常日志中的列说明
+    """
+    start_date, end_date = ctx.date_window
+    project_id = ctx.project_id
+
+    def test(value):
+        try:
+            cell_date = parse(value)
+            if cell_date is None or pd.isna(cell_date):
+                return False
+            # 【1818特殊逻辑】日期减6天后再进行筛选
+            cell_date = adjust_date_for_project(cell_date, project_id)
+            return start_date <= cell_date <= end_date
+        except Exception as e:
+            app_log.warning("date_parse", f"{label}日期解析失败: {value}, 错误: {e}")
+            return False
+    return test
+
+
+def within_14_days(ctx):
+    """文件6：I列日期 ≤ 今天+14天（包含过去的日期）。1818项目先减6天"""
+    today = ctx.current_datetime.date()
+    project_id = ctx.project_id
+
+    def test(value):
+        try:
+            parsed = pd.to_datetime(value, errors='coerce')
+            if pd.isna(parsed):
+                return False
+            parsed = adjust_date_for_project(parsed, project_id)
+            return (parsed.date() - today).days <= 14
+        except Exception:
+            return False
+    return test
+
+
+def is_valid_date(value):
+    """文件6：I列不为空且可解析为日期"""
+    if value is None or str(value).strip() == '':
+        return False
+    try:
+        return not pd.isna(pd.to_datetime(value, errors='coerce'))
+    except Exception:
+        return False
+
+
+# ===================== 派生列取值 =====================
+
+def department_from_code(value):
+    """25C1/25C2/25C3 → 科室名"""
+    s = _text(value)
+    for code, department in DEPARTMENT_CODES:
+        if code in s:
+            return department
+    return ""
+
+
+def department_from_name(value):
+    """包含科室名 → 科室名，否则为空"""
+    s = str(value)
+    for department in DEPARTMENTS:
+        if department in s:
+            return department
+    return ""
+
+
+def department_or_confirm(value):
+    """包含科室名 → 科室名；空值 → 请室主任确认；否则保留原值"""
+    s = "" if (value is None or (isinstance(value, float) and pd.isna(value))) else str(value).strip()
+    if s == "":
+        return CONFIRM_DEPARTMENT
+    for department in DEPARTMENTS:
+        if department in s:
+            return department
+    return s
+
+
+def chinese_text(value):
+    """提取中文字符"""
+    return "".join(_ZH_PATTERN.findall(_text(value)))
+
+
+def chinese_text_or_none(value):
+    """提取中文字符，空值显示"无" """
+    return chinese_text(value) or "无"
+
+
+def date_text(value):
+    """日期 → yyyy.mm.dd（保留完整年份，支持跨年延期判断）；无法解析为空"""
+    try:
+        parsed = pd.to_datetime(value, errors='coerce')
+    except Exception:
+        return ""
+    if parsed is None or pd.isna(parsed):
+        return ""
+    return parsed.strftime('%Y.%m.%d')
+
+
+def host_office(value):
+    """主办室：保持原格式（可能包含多室并列）"""
+    s = str(value) if value is not None and value is not pd.NA else ""
+    return s.strip()
+
+
+def split_owner_names(value):
+    """按 , ， ; ； / 、 拆分姓名并以逗号重新拼接"""
+    s = _text(value)
+    for sep in _OWNER_SEPARATORS:
+        s = s.replace(sep, ',')
+    return ','.join(t.strip() for t in s.split(',') if t.strip())
+
+
+def filter_valid_names(names_str, valid_names_set):
+    """
+    过滤责任人姓名，只保留在姓名角色表中存在的姓名
+
+    Args:
+        names_str: 逗号分隔的姓名字符串，如"刘峰a,张三,李四b"
+        valid_names_set: 有效姓名集合
+
+    Returns:
+        str: 过滤后的姓名字符串
+
+    规则：
+        - "刘峰a" → 尝试匹配"刘峰"（去除尾部字母）
+        - 只保留在姓名角色表中存在的姓名
+    """
+    if not names_str or not valid_names_set:
+        return names_str
+
+    tokens = [t.strip() for t in names_str.split(',') if t.strip()]
+    filtered_names = []
+
+    for name in tokens:
+        # 首先尝试精确匹配
+        if name in valid_names_set:
+            filtered_names.append(name)
+        else:
+            # 尝试去除尾部字母后匹配（如"刘峰a" → "刘峰"）
+            # 移除尾部的英文字母（一个或多个）
+            cleaned_name = re.sub(r'[a-zA-Z]+$', '', name)
+            if cleaned_name and cleaned_name in valid_names_set:
+                filtered_names.append(cleaned_name)
+            # 如果都不匹配，不添加该姓名（过滤掉）
+
+    return ','.join(filtered_names)
+
+
+def mapped(col_idx, func):
+    """派生列：对结果行的某列逐值映射"""
+    return lambda ctx: ctx.map_column(col_idx, func)
+
+
+def constant(value):
+    """派生列：常量"""
+    return lambda ctx: [value] * len(ctx.rows)
+
+
+# ===================== 文件1：内部需打开接口 =====================
+# final = P1 & P2 & P3 - P4；待审查加回须通过科室筛选(P1)
+
+FILE1_SPEC = FileSpec(
+    file_type=1,
+    title="内部需打开接口",
+    predicates=[
+        Predicate("p1", "处理1(H列25C1/25C2/25C3)", lambda ctx: ctx.column_mask(7, has_department_code)),
+        Predicate("p2", "处理2(K列日期筛选)",
+                  lambda ctx: ctx.column_mask(10, in_date_window(ctx, parse_loose_date, "处理2：K列"))),
+        Predicate("p3", "处理3(A列非空且M列为空)",
+                  lambda ctx: ctx.column_mask(0, is_not_blank) & ctx.column_mask(12, is_blank)),
+        Predicate("p4", "处理4(B列作废，需排除)", lambda ctx: ctx.column_mask(1, lambda v: "作废" in _text(v))),
+    ],
+    select=lambda m, ctx: m["p1"] & m["p2"] & m["p3"] & ~m["p4"],
+    pending_allowed=lambda m, ctx: m["p1"],
+    derived=[
+        DerivedColumn("科室", mapped(7, department_from_code)),
+        DerivedColumn("接口时间", mapped(10, date_text)),
+        DerivedColumn("责任人", mapped(17, chinese_text)),
+    ],
+)
+
+
+# ===================== 文件2：内部需回复接口 =====================
+# 1907和2016项目：final = P1 & P2 & P4；其他项目：final = P1 & P2 & P4 - P3
+# 日期调整使用调用方传入的项目号
+
+def _file2_select(m, ctx):
+    final = m["p1"] & m["p2"] & m["p4"]
+    if ctx.project_id in ['1907', '2016']:
+        return final
+    return final & ~m["p3"]
+
+
+FILE2_SPEC = FileSpec(
+    file_type=2,
+    title="内部需回复接口",
+    predicates=[
+        Predicate("p1", "处理1(I列河北分公司-建筑结构所或25C1/25C2/25C3)",
+                  lambda ctx: ctx.column_mask(8, lambda v: HEBEI_STRUCTURE_PREFIX in str(v) or has_department_code(str(v)))),
+        Predicate("p2", "处理2(M列日期筛选)",
+                  lambda ctx: ctx.column_mask(12, in_date_window(ctx, parse_loose_date, "M列"))),
+        Predicate("p3", "处理3(AB列4444开头且F列为传递，排除项)",
+                  lambda ctx: (ctx.column_mask(27, lambda v: str(v).startswith("4444"))
+                               & ctx.column_mask(5, lambda v: str(v) == "传递"))),
+        Predicate("p4", "处理4(A列非空且N列为空)",
+                  lambda ctx: ctx.column_mask(0, is_not_blank) & ctx.column_mask(13, is_blank)),
+    ],
+    select=_file2_select,
+    pending_allowed=lambda m, ctx: m["p1"],
+    derived=[
+        DerivedColumn("责任人", mapped(38, chinese_text_or_none), fallback="无"),
+        DerivedColumn("科室", mapped(8, department_from_name)),
+        DerivedColumn("接口时间", mapped(12, date_text)),
+    ],
+    version_col=4,
+    project_from_argument=True,
+)
+
+
+# ===================== 文件3：外部需打开接口 =====================
+# 组1(M列路径) = P1 & P2 & P3 & P6；组2(L列路径) = P1 & P2 & P4 & P5；final = 组1 | 组2
+# 待审查加回须通过科室筛选与时间窗口：P1 & P2 & (P3 | P4)，避免把远未来(如2028)的数据加回
+
+def _file3_groups(m):
+    group1 = m["p1"] & m["p2"] & m["p3"] & m["p6"]
+    group2 = m["p1"] & m["p2"] & m["p4"] & m["p5"]
+    return group1, group2
+
+
+def _file3_select(m, ctx):
+    group1, group2 = _file3_groups(m)
+    return group1 | group2
+
+
+def _file3_source_column(ctx):
+    """来源标记（回文单号写入列）：仅满足组2为 L，其余（含两组都满足）为 M"""
+    group1, group2 = _file3_groups(ctx.masks)
+    only_l = (group2 & ~group1)[ctx.rows]
+    return ['L' if flag else 'M' for flag in only_l]
+
+
+def _file3_interface_time(ctx):
+    """接口时间与筛选路径一致：M 路径取 M 列，L 路径取 L 列"""
+    m_values = ctx.map_column(12, date_text)
+    l_values = ctx.map_column(11, date_text)
+    return [l if source == 'L' else m for source, m, l in zip(_file3_source_column(ctx), m_values, l_values)]
+
+
+FILE3_SPEC = FileSpec(
+    file_type=3,
+    title="外部需打开接口",
+    predicates=[
+        Predicate("p1", "处理1(I列为B)", lambda ctx: ctx.column_mask(8, equals_stripped("B"))),
+        Predicate("p2", "处理2(AL列河北分公司-建筑结构所开头)", lambda ctx: ctx.column_mask(37, starts_with_hebei)),
+        Predicate("p3", "处理3(M列时间筛选)",
+                  lambda ctx: ctx.column_mask(12, in_date_window(ctx, lambda v: parse_strict_date(v, True), "M列"))),
+        Predicate("p4", "处理4(L列时间筛选)",
+                  lambda ctx: ctx.column_mask(11, in_date_window(ctx, lambda v: parse_strict_date(v, True), "L列"))),
+        Predicate("p5", "处理5(Q列为空)", lambda ctx: ctx.column_mask(16, is_blank)),
+        Predicate("p6", "处理6(T列为空)", lambda ctx: ctx.column_mask(19, is_blank)),
+    ],
+    select=_file3_select,
+    pending_allowed=lambda m, ctx: m["p1"] & m["p2"] & (m["p3"] | m["p4"]),
+    derived=[
+        DerivedColumn("_source_column", _file3_source_column, fallback="M"),
+        DerivedColumn("科室", mapped(40, department_or_confirm), fallback=CONFIRM_DEPARTMENT),
+        DerivedColumn("接口时间", _file3_interface_time),
+        DerivedColumn("责任人", mapped(41, chinese_text)),
+    ],
+    version_col=28,
+)
+
+
+# ===================== 文件4：外部需回复接口 =====================
+# final = P1 & P2 & P3 & P4
+# 待审查加回：上级审查优先，不受时间窗口影响，只要求 P1 & P2；项目号优先取行数据，文件名兜底
+
+FILE4_SPEC = FileSpec(
+    file_type=4,
+    title="外部需回复接口",
+    predicates=[
+        Predicate("p1", "处理1(AF列河北分公司-建筑结构所开头)", lambda ctx: ctx.column_mask(31, starts_with_hebei)),
+        Predicate("p2", "处理2(P列为B或P列为空且AC列为B)",
+                  lambda ctx: (ctx.column_mask(15, equals_stripped("B"))
+                               | (ctx.column_mask(15, is_blank, missing=True)
+                                  & ctx.column_mask(28, equals_stripped("B"))))),
+        Predicate("p3", "处理3(S列时间筛选)",
+                  lambda ctx: ctx.column_mask(18, in_date_window(ctx, parse_strict_date, "S列"))),
+        Predicate("p4", "处理4(V列为空)", lambda ctx: ctx.column_mask(21, is_blank)),
+    ],
+    select=lambda m, ctx: m["p1"] & m["p2"] & m["p3"] & m["p4"],
+    pending_allowed=lambda m, ctx: m["p1"] & m["p2"],
+    derived=[
+        DerivedColumn("科室", mapped(32, department_or_confirm), fallback=CONFIRM_DEPARTMENT),
+        DerivedColumn("接口时间", mapped(18, date_text)),
+        DerivedColumn("责任人", mapped(33, chinese_text)),
+    ],
+    version_col=8,
+    use_row_project=True,
+)
+
+
+# ===================== 文件5：三维提资接口 =====================
+# final = P1 & P2 & P3；待审查加回须通过科室筛选(P1)
+
+FILE5_SPEC = FileSpec(
+    file_type=5,
+    title="三维提资接口",
+    predicates=[
+        Predicate("p1", "处理1(G列25C1/25C2/25C3)", lambda ctx: ctx.column_mask(6, has_department_code)),
+        Predicate("p2", "处理2(L列日期筛选)",
+                  lambda ctx: ctx.column_mask(11, in_date_window(ctx, parse_loose_date, "L列"))),
+        Predicate("p3", "处理3(N列为空)", lambda ctx: ctx.column_mask(13, is_blank)),
+    ],
+    select=lambda m, ctx: m["p1"] & m["p2"] & m["p3"],
+    pending_allowed=lambda m, ctx: m["p1"],
+    derived=[
+        DerivedColumn("科室", mapped(6, department_from_code)),
+        DerivedColumn("接口时间", mapped(11, date_text)),
+        DerivedColumn("责任人", mapped(10, chinese_text)),
+    ],
+)
+
+
+# ===================== 文件6：收发文函 =====================
+# 普通模式：final = P1 & P_i & P3 & P4
+# 管理员/所领导模式（skip_date_filter）：final = P1 & P_i & P4（跳过日期范围，但仍需I列为有效日期）
+
+def _file6_select(m, ctx):
+    final = m["p1"] & m["pi"] & m["p4"]
+    if ctx.options.get("skip_date_filter"):
+        return final
+    return final & m["p3"]
+
+
+def _file6_owners(ctx):
+    """责任人：X列按分隔符拆分；给定有效姓名集合时只保留其中的姓名（过滤后为空则保留原值，避免变成"请指派"）"""
+    valid_names_set = ctx.options.get("valid_names_set")
+
+    def owners(value):
+        names_str = split_owner_names(value)
+        if valid_names_set:
+            filtered_names = filter_valid_names(names_str, valid_names_set)
+            if filtered_names:
+                names_str = filtered_names
+        return names_str
+    return ctx.map_column(23, owners)
+
+
+FILE6_SPEC = FileSpec(
+    file_type=6,
+    title="收发文函",
+    predicates=[
+        Predicate("p1", "处理1(V列河北分公司.建筑结构所)",
+                  lambda ctx: ctx.column_mask(21, lambda v: "河北分公司.建筑结构所" in _text(v))),
+        Predicate("pi", "I列为有效日期", lambda ctx: ctx.column_mask(8, is_valid_date)),
+        Predicate("p3", "处理3(I列日期≤今天+14天)", lambda ctx: ctx.column_mask(8, within_14_days(ctx))),
+        Predicate("p4", "处理4(M列尚未回复/超期未回复)",
+                  lambda ctx: ctx.column_mask(12, lambda v: str(v).strip() in ("尚未回复", "超期未回复"))),
+    ],
+    select=_file6_select,
+    pending_allowed=lambda m, ctx: m["p1"],
+    derived=[
+        DerivedColumn("接口时间", mapped(8, date_text)),
+        DerivedColumn("科室", constant("")),
+        DerivedColumn("主办室", mapped(22, host_office)),
+        DerivedColumn("责任人", _file6_owners),
+    ],
+    version_col=28,
+)
+
+
+FILE_SPECS = {spec.file_type: spec for spec in (
+    FILE1_SPEC, FILE2_SPEC, FILE3_SPEC, FILE4_SPEC, FILE5_SPEC, FILE6_SPEC,
+)}
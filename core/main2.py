@@ -187,11 +187,13 @@ def write_export_summary(
                 }
                 col_idx = col_index_map.get(interface_col_letter, 0)
                 
-                # 使用iloc通过索引获取列数据
-                if col_idx < len(df.columns):
+                # 使用iloc通过索引获取列数据（紧凑结果按"接口号"列名读取）
+                from core.result_frame import interface_column
+                interface_source = interface_column(df, col_idx)
+                if interface_source is not None:
                     interface_series = [
                         (str(v).strip() if v is not None and str(v).strip() and str(v) != 'nan' else "")
-                        for v in df.iloc[:, col_idx].tolist()
+                        for v in interface_source.tolist()
                     ]
                 else:
                     interface_series = [""] * len(df)
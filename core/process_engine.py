@@ -0,0 +1,587 @@
+# -*- coding: utf-8 -*-
+"""
+待处理文件处理引擎
+
+六类待处理文件共用同一流程：
+    读取 → 列筛选（处理1、处理2…）→ 组合 → 待审查加回 → 版次筛选 → 派生列 → 指派记忆 → 紧凑结果
+各类型的差异（列位置、筛选条件、组合逻辑、派生列、导出标题）由 core.file_specs 中的 FileSpec 声明，
+本模块只负责执行，性能优化在这里做一次即可覆盖全部类型：
+1. 筛选条件按列整体计算为布尔掩码，每个唯一单元格值只判断一次（日期解析、正则提取等）
+2. 筛选条件按需计算并缓存，组合逻辑直接做掩码运算
+3. 派生列只对结果行计算，同样按唯一值缓存
+4. 导出时同一源样式只复制一次，xlsx 不再重复用 pandas 读取源文件
+
+用法：
+    from core.file_specs import FILE_SPECS
+    result_df = run_spec(FILE_SPECS[1], file_path, current_datetime)
+    export_result(FILE_SPECS[1], result_df, file_path, current_datetime, output_dir, project_id)
+"""
+
+import datetime
+import os
+import re
+from copy import copy
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils import app_log
+from utils.job_scheduler import check_cancelled
+from core.result_frame import compact_result
+
+# 文件名中的项目号（四位数字）
+_PROJECT_PATTERN = re.compile(r'(\d{4})')
+
+
+@dataclass
+class Predicate:
+    """
+    单个筛选条件
+
+    name: 组合逻辑中引用的名称（如 "p1"）
+    label: 日志中的说明（如 "H列包含25C1/25C2/25C3"）
+    compute: (ctx) -> 长度为 len(df) 的布尔掩码
+    """
+    name: str
+    label: str
+    compute: Callable[["ProcessContext"], np.ndarray]
+
+
+@dataclass
+class DerivedColumn:
+    """
+    派生列
+
+    compute: (ctx) -> 与 ctx.rows 等长的取值序列
+    fallback: 计算失败时整列填充的值
+    """
+    name: str
+    compute: Callable[["ProcessContext"], Sequence[Any]]
+    fallback: Any = ""
+
+
+@dataclass
+class FileSpec:
+    """
+    待处理文件类型声明
+
+    file_type: 文件类型（1-6）
+    title: 导出 Sheet 名称与文件名前缀
+    predicates: 筛选条件列表
+    select: (m, ctx) -> 最终筛选掩码，m[name] 取筛选条件掩码
+    pending_allowed: (m, ctx) -> 待审查加回前必须满足的掩码
+    derived: 派生列
+    version_col: 版次列位置（同接口号只保留最高版次）；None 表示不做版次筛选
+    use_row_project: 待审查加回时是否优先使用行内项目号
+    project_from_argument: 日期调整用的项目号取调用参数（文件2），否则取自文件名
+    """
+    file_type: int
+    title: str
+    predicates: List[Predicate]
+    select: Callable[["_MaskView", "ProcessContext"], np.ndarray]
+    pending_allowed: Callable[["_MaskView", "ProcessContext"], np.ndarray]
+    derived: List[DerivedColumn] = field(default_factory=list)
+    version_col: Optional[int] = None
+    use_row_project: bool = False
+    project_from_argument: bool = False
+
+    def predicate(self, name: str) -> Predicate:
+        for pred in self.predicates:
+            if pred.name == name:
+                return pred
+        raise KeyError(name)
+
+
+def memoize_value(func: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """
+    按单元格值缓存单值函数的结果（同一列内重复值只计算一次）
+
+    键包含类型，避免 1 / 1.0 / True 这类相等但语义不同的值共用结果；NaN 统一为同一个键。
+    """
+    cache: Dict[Tuple[type, Any], Any] = {}
+
+    def call(value):
+        if isinstance(value, float) and value != value:
+            key = (float, "nan")
+        else:
+            key = (type(value), value)
+        try:
+            return cache[key]
+        except KeyError:
+            result = cache[key] = func(value)
+            return result
+        except TypeError:
+            # 不可哈希的值不缓存
+            return func(value)
+
+    return call
+
+
+def filter_date_window(current_datetime) -> Tuple[datetime.datetime, datetime.datetime]:
+    """
+    文件1~5的日期筛选窗口
+
+    1~19号：当年1月1日 ~ 当月末
+    20~31号：当年1月1日 ~ 次月末（11月、12月跨年）
+    """
+    current_day = current_datetime.day
+    current_year = current_datetime.year
+    current_month = current_datetime.month
+    start_date = datetime.datetime(current_year, 1, 1)
+    if current_day <= 19:
+        if current_month == 12:
+            end_date = datetime.datetime(current_year, 12, 31)
+        else:
+            end_date = datetime.datetime(current_year, current_month + 1, 1) - datetime.timedelta(days=1)
+    else:
+        if current_month == 12:
+            end_date = datetime.datetime(current_year + 1, 2, 1) - datetime.timedelta(days=1)
+        elif current_month == 11:
+            end_date = datetime.datetime(current_year + 1, 1, 1) - datetime.timedelta(days=1)
+        else:
+            end_date = datetime.datetime(current_year, current_month + 2, 1) - datetime.timedelta(days=1)
+    return start_date, end_date
+
+
+class ProcessContext:
+    """
+    单个源文件的处理上下文
+
+    df: 源数据（header=0 读取，第0行为第二行表头，不参与筛选）
+    project_id: 日期调整等筛选逻辑使用的项目号
+    file_project_id: 待审查加回使用的项目号
+    options: 类型特有参数（如文件6的 skip_date_filter / valid_names_set）
+    rows: 最终结果的行位置（升序），派生列阶段可用
+    masks: 筛选条件访问器，masks["p1"] 按需计算并缓存
+    """
+
+    def __init__(self, spec: FileSpec, df: pd.DataFrame, file_path: str, current_datetime,
+                 project_id: Optional[str], file_project_id: str, options: Dict[str, Any]):
+        self.spec = spec
+        self.df = df
+        self.file_path = file_path
+        self.current_datetime = current_datetime
+        self.project_id = project_id
+        self.file_project_id = file_project_id
+        self.options = options
+        self.rows = np.empty(0, dtype=np.int64)
+        self._masks: Dict[str, np.ndarray] = {}
+        self.masks = _MaskView(self)
+        self._values: Dict[int, np.ndarray] = {}
+        self._window = None
+
+    @property
+    def date_window(self) -> Tuple[datetime.datetime, datetime.datetime]:
+        if self._window is None:
+            self._window = filter_date_window(self.current_datetime)
+        return self._window
+
+    def column_values(self, col_idx: int) -> Optional[np.ndarray]:
+        """整列取值（object 数组，缓存）；列不存在时返回 None"""
+        if col_idx >= len(self.df.columns):
+            return None
+        values = self._values.get(col_idx)
+        if values is None:
+            values = self._values[col_idx] = self.df.iloc[:, col_idx].to_numpy(dtype=object)
+        return values
+
+    def column_mask(self, col_idx: int, test: Callable[[Any], bool], missing: bool = False) -> np.ndarray:
+        """
+        对整列逐个唯一值执行 test，返回布尔掩码
+
+        参数:
+            col_idx: 列位置
+            test: 单元格值 -> bool
+            missing: 列不存在时整列取值
+        """
+        values = self.column_values(col_idx)
+        if values is None:
+            return np.full(len(self.df), missing, dtype=bool)
+        return np.fromiter(map(memoize_value(test), values), dtype=bool, count=len(values))
+
+    def map_column(self, col_idx: int, func: Callable[[Any], Any]) -> List[Any]:
+        """对结果行的单元格逐个唯一值执行 func；列不存在时按 None 计算"""
+        values = self.column_values(col_idx)
+        if values is None:
+            return [func(None)] * len(self.rows)
+        return list(map(memoize_value(func), values[self.rows]))
+
+    def mask(self, name: str) -> np.ndarray:
+        """按需计算筛选条件（缓存），第0行（表头）恒为 False"""
+        result = self._masks.get(name)
+        if result is None:
+            result = np.asarray(self.spec.predicate(name).compute(self), dtype=bool).copy()
+            result[:1] = False
+            self._masks[name] = result
+        return result
+
+
+class _MaskView:
+    """组合逻辑中的 m["p1"] 访问器"""
+
+    def __init__(self, ctx: ProcessContext):
+        self._ctx = ctx
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self._ctx.mask(name)
+
+
+def _rows_of(mask: np.ndarray) -> set:
+    return set(np.flatnonzero(mask).tolist())
+
+
+def _get_version_rank(version_value):
+    if version_value is None:
+        return 0
+    version_str = str(version_value).strip()
+    if not version_str or version_str.lower() in ("nan", "none"):
+        return 0
+    match = re.search(r"[A-Za-z]", version_str)
+    if not match:
+        return 0
+    letter = match.group(0).upper()
+    return ord(letter) - ord("A") + 1
+
+
+def _filter_rows_by_highest_version(df, file_type, rows, version_col_index):
+    if not rows:
+        return rows
+    if version_col_index is None:
+        return rows
+    if len(df.columns) <= version_col_index:
+        app_log.warning("version", f"文件列数不足，无法访问版次列(索引{version_col_index})，跳过版次筛选")
+        return rows
+
+    # 【优化】整列提取接口号与版次字母，按接口号分组取最高版次（替代逐行 df.iloc + 正则）
+    from registry.util import extract_interface_id_series
+
+    positions = np.fromiter(rows, dtype=np.int64, count=len(rows))
+    positions = np.sort(positions[(positions >= 0) & (positions < len(df))])
+    interface_ids = extract_interface_id_series(df, file_type).to_numpy()[positions]
+    # 版次取值重复率高：只对唯一值计算排名，缺失值排名为0
+    version_codes, version_values = pd.factorize(df.iloc[positions, version_col_index].to_numpy(dtype=object))
+    # 末尾追加的0对应缺失值编码 -1
+    value_ranks = np.array([_get_version_rank(v) for v in version_values] + [0], dtype=np.int64)
+    ranks = value_ranks[version_codes]
+
+    # 同接口号只保留最高版次（并列时全部保留）；接口号为空的行原样保留
+    codes, uniques = pd.factorize(interface_ids)
+    best = np.full(len(uniques), -1, dtype=np.int64)
+    np.maximum.at(best, codes, ranks)
+    keep = (interface_ids == "") | (ranks == best[codes])
+    keep_rows = set(positions[keep].tolist())
+
+    removed = len(rows) - len(keep_rows)
+    if removed > 0:
+        app_log.info("version", f"[版本筛选] 文件{file_type}：剔除 {removed} 行低版本接口，仅保留最高版次")
+        try:
+            from core import Monitor
+            Monitor.log_info(f"[版本筛选] 文件{file_type}：剔除 {removed} 行低版本接口，仅保留最高版次")
+        except Exception:
+            pass
+
+    return keep_rows
+
+
+def apply_assignment_memory(result_df, file_type):
+    """
+    应用指派记忆：为责任人为空的行填充历史指派记忆
+
+    参数:
+        result_df: 处理结果DataFrame，必须包含'责任人'、'项目号'列
+        file_type: 文件类型（1-6）
+
+    返回:
+        DataFrame: 应用记忆后的结果（原地修改）
+    """
+    if result_df is None or result_df.empty:
+        return result_df
+
+    if '责任人' not in result_df.columns or '项目号' not in result_df.columns:
+        return result_df
+
+    try:
+        from services.assignment_memory import lookup_memories
+
+        # 获取接口号列名（根据文件类型）
+        interface_col = '接口号' if '接口号' in result_df.columns else None
+        if interface_col is None:
+            return result_df
+
+        # 【优化】整列向量化判断，避免逐行 .at 读写与正则；按位置索引，兼容重复行索引
+        invalid_values = ['nan', 'none']
+        positions = pd.RangeIndex(len(result_df))
+        responsible = pd.Series(result_df['责任人'].to_numpy(), index=positions).astype(str).str.strip()
+        empty_mask = (responsible == '') | responsible.str.lower().isin(invalid_values + ['无'])
+        if not empty_mask.any():
+            return result_df
+
+        project_ids = pd.Series(result_df['项目号'].to_numpy(), index=positions)[empty_mask].astype(str).str.strip()
+        interface_ids = pd.Series(result_df[interface_col].to_numpy(), index=positions)[empty_mask].astype(str).str.strip()
+        valid_mask = (
+            (project_ids != '') & ~project_ids.str.lower().isin(invalid_values)
+            & (interface_ids != '') & ~interface_ids.str.lower().isin(invalid_values)
+        )
+
+        # 查询指派记忆（规范化后按哈希索引批量匹配）
+        names = lookup_memories(file_type, project_ids[valid_mask], interface_ids[valid_mask])
+        names = names[names.notna()]
+        if not names.empty:
+            result_df.iloc[names.index.to_numpy(), result_df.columns.get_loc('责任人')] = names.to_numpy()
+        memory_applied_count = len(names)
+
+        if memory_applied_count > 0:
+            app_log.info("assignment_memory", f"[AssignmentMemory] 文件{file_type}: 应用了 {memory_applied_count} 条指派记忆")
+
+    except Exception as e:
+        # 记忆功能失败不影响主流程
+        app_log.warning("assignment_memory", f"[AssignmentMemory] 应用指派记忆失败: {e}")
+
+    return result_df
+
+
+def read_source(file_path: str) -> pd.DataFrame:
+    """读取源文件第一个工作表（不强制Sheet1）"""
+    if file_path.endswith('.xlsx'):
+        return pd.read_excel(file_path, sheet_name=0, engine='openpyxl')
+    return pd.read_excel(file_path, sheet_name=0, engine='xlrd')
+
+
+def _log(level: str, message: str, **kwargs):
+    """经监控器记录（log_info/log_success/...）；监控器不可用时直接交给 app_log"""
+    try:
+        from core import Monitor
+        getattr(Monitor, level)(message, **kwargs)
+    except Exception:
+        app_log.log(level[len("log_"):].upper(), kwargs.get("category"), message)
+
+
+def _collect_pending_rows(spec: FileSpec, ctx: ProcessContext, m: _MaskView, final: np.ndarray,
+                          pending_snapshot) -> set:
+    """待审查加回：Registry 中待审查的任务只要通过 pending_allowed 筛选就加回结果"""
+    try:
+        from registry.pending_review import collect_pending_review_rows
+
+        pending_rows = collect_pending_review_rows(
+            ctx.df, spec.file_type, ctx.file_project_id,
+            _rows_of(spec.pending_allowed(m, ctx)), _rows_of(final),
+            snapshot=pending_snapshot,
+            use_row_project=spec.use_row_project,
+        )
+        if pending_rows:
+            app_log.info("registry.pending", f"[Registry] 文件{spec.file_type}：共加回{len(pending_rows)}条待审查任务（项目{ctx.file_project_id}）")
+        return pending_rows
+    except Exception as e:
+        app_log.warning("registry.pending", f"[Registry] 查询待审查任务失败（不影响主流程）: {e}")
+        return set()
+
+
+def run_spec(spec: FileSpec, file_path: str, current_datetime, project_id: Optional[str] = None,
+             pending_snapshot=None, cancel_token=None, **options) -> pd.DataFrame:
+    """
+    按类型声明处理一个源文件
+
+    参数:
+        spec: 文件类型声明
+        file_path: 源文件路径
+        current_datetime: 当前日期时间
+        project_id: 调用方传入的项目号（仅 project_from_argument 的类型使用）
+        pending_snapshot: 待审查任务快照（可选，默认使用本轮运行快照）
+        cancel_token: 取消令牌（可选，默认使用当前调度任务的令牌；取消后在各阶段之间抛出 JobCancelled）
+        options: 类型特有参数，见 ProcessContext.options
+
+    返回:
+        紧凑结果 DataFrame（行按源文件顺序）；无结果时返回空 DataFrame
+    """
+    file_type = spec.file_type
+    basename = os.path.basename(file_path)
+    _log("log_process", f"开始处理待处理文件{file_type}: {basename}", category="step")
+
+    df = read_source(file_path)
+    check_cancelled(cancel_token)
+    if df.empty:
+        app_log.info("step", "文件为空")
+        return pd.DataFrame()
+    app_log.debug("step", f"读取到数据：{len(df)} 行，{len(df.columns)} 列")
+
+    match = _PROJECT_PATTERN.search(basename)
+    filename_project = match.group(1) if match else None
+    if not spec.project_from_argument:
+        project_id = filename_project
+    ctx = ProcessContext(spec, df, file_path, current_datetime, project_id,
+                         filename_project or project_id or "", options)
+    m = ctx.masks
+
+    final = np.asarray(spec.select(m, ctx), dtype=bool)
+    stats = " ".join(f"{name}:{int(mask.sum())}行" for name, mask in ctx._masks.items())
+    app_log.debug("step", f"筛选统计 - {stats} → 结果:{int(final.sum())}行")
+    for pred in spec.predicates:
+        if pred.name in ctx._masks:
+            _log("log_info", f"{pred.label}: {int(ctx._masks[pred.name].sum())} 行", category="step")
+
+    check_cancelled(cancel_token)
+    final_rows = _rows_of(final) | _collect_pending_rows(spec, ctx, m, final, pending_snapshot)
+    if spec.version_col is not None:
+        # 版次筛选：同接口号只保留最高版本
+        final_rows &= _filter_rows_by_highest_version(df, file_type, set(range(1, len(df))), spec.version_col)
+
+    if not final_rows:
+        _log("log_warning", "经过筛选后，无符合条件的数据", category="step")
+        return pd.DataFrame()
+    _log("log_success", f"最终完成处理数据: {len(final_rows)} 行", category="step")
+
+    check_cancelled(cancel_token)
+    ctx.rows = np.array(sorted(final_rows), dtype=np.int64)
+    result_df = df.iloc[ctx.rows].copy()
+    result_df['原始行号'] = ctx.rows + 2  # pandas索引+2 = Excel行号
+    for column in spec.derived:
+        try:
+            result_df[column.name] = list(column.compute(ctx))
+        except Exception as e:
+            app_log.warning("step", f"生成{column.name}列失败: {e}")
+            result_df[column.name] = column.fallback
+    # 【新增】添加source_file列（用于回文单号输入时定位源文件）
+    result_df['source_file'] = os.path.abspath(file_path)
+
+    result_df = apply_assignment_memory(result_df, file_type=file_type)
+    # 【优化】投影为紧凑结果（只保留UI/导出/Registry所需列，重复字符串转category）
+    return compact_result(result_df, file_type=file_type)
+
+
+# ===================== 导出 =====================
+
+_STYLE_ATTRS = ("font", "fill", "border", "alignment")
+
+
+def _copy_cell(source_cell, target_cell, style_cache: Dict[Tuple[int, ...], Any]):
+    """
+    复制单元格值与样式
+
+    【优化】同一源样式只做一次逐属性复制，之后直接复用目标工作簿中的样式索引
+    （原先每个单元格都 copy 字体/填充/边框/对齐对象，导出耗时主要在此）
+    """
+    target_cell.value = source_cell.value
+    # _style 为 None 表示默认样式
+    key = tuple(source_cell._style) if source_cell._style is not None else ()
+    cached = style_cache.get(key)
+    if cached is not None:
+        target_cell._style = copy(cached)
+        return
+    try:
+        for attr in _STYLE_ATTRS:
+            value = getattr(source_cell, attr)
+            if value:
+                setattr(target_cell, attr, copy(value))
+        if source_cell.number_format:
+            target_cell.number_format = source_cell.number_format
+    except Exception as style_error:
+        app_log.warning("style", f"样式复制失败，仅复制值: {style_error}")
+        return
+    style_cache[key] = copy(target_cell._style)
+
+
+def _output_path(title: str, current_datetime, output_dir: str, project_id: Optional[str]) -> str:
+    """结果文件路径：有项目号时放入"{项目号}结果文件"文件夹，重名自动加序号"""
+    if project_id:
+        final_output_dir = os.path.join(output_dir, f"{project_id}结果文件")
+        if not os.path.exists(final_output_dir):
+            os.makedirs(final_output_dir)
+            app_log.debug("export", f"创建结果文件夹: {final_output_dir}")
+    else:
+        final_output_dir = output_dir
+
+    base_filename = f"{title}{current_datetime.strftime('%Y-%m-%d')}"
+    output_path = os.path.join(final_output_dir, f"{base_filename}.xlsx")
+    counter = 1
+    while os.path.exists(output_path):
+        output_path = os.path.join(final_output_dir, f"{base_filename}({counter}).xlsx")
+        counter += 1
+    return output_path
+
+
+def export_result(spec: FileSpec, df, original_file_path, current_datetime, output_dir, project_id=None):
+    """
+    导出处理结果到Excel文件
+    新建空白Excel文件，Sheet名为类型标题，复制源表表头与结果行（值和格式），设置列宽；
+    源文件为.xls时仅复制值
+
+    参数:
+        spec: 文件类型声明（提供标题）
+        df: 完成处理数据（包含原始行号）
+        original_file_path: 原始文件路径
+        current_datetime: 当前日期时间
+        output_dir: 输出目录
+        project_id: 项目号，用于创建结果文件夹
+
+    返回:
+        str: 导出文件路径
+    """
+    from openpyxl import Workbook, load_workbook
+
+    title = spec.title
+    try:
+        output_path = _output_path(title, current_datetime, output_dir, project_id)
+
+        wb = Workbook()
+        ws = wb.active
+        ws.title = title
+
+        # 读取源文件（xlsx用openpyxl复制值和格式，xls回退为pandas仅复制值）
+        original_wb = original_ws = original_df = None
+        if original_file_path.endswith('.xlsx'):
+            original_wb = load_workbook(original_file_path)
+            original_ws = original_wb.worksheets[0]
+            max_col = original_ws.max_column
+            max_row = original_ws.max_row
+        else:
+            original_df = pd.read_excel(original_file_path, sheet_name=0, engine='xlrd', header=None)
+            max_col = len(original_df.columns)
+            max_row = len(original_df)
+
+        style_cache: Dict[Tuple[int, ...], Any] = {}
+
+        def write_row(source_row: int, target_row: int):
+            for col_idx in range(1, max_col + 1):
+                target_cell = ws.cell(row=target_row, column=col_idx)
+                if original_ws is not None:
+                    _copy_cell(original_ws.cell(row=source_row, column=col_idx), target_cell, style_cache)
+                else:
+                    target_cell.value = original_df.iat[source_row - 1, col_idx - 1]
+
+        # 复制表头
+        if max_row > 0:
+            write_row(1, 1)
+
+        # 复制结果行
+        written = 0
+        if df is not None and not df.empty and '原始行号' in df.columns:
+            for excel_row_num in sorted(df['原始行号'].tolist()):
+                if 1 < excel_row_num <= max_row:
+                    write_row(excel_row_num, written + 2)
+                    written += 1
+            app_log.info("export", f"已写入 {written} 行数据")
+        else:
+            app_log.info("export", "没有符合条件的数据行需要导出")
+
+        # 设置列宽（能完全显示1~4行数据，乘以1.2系数，限制在8~100）
+        for col_idx in range(1, max_col + 1):
+            max_width = 8
+            for row_idx in range(1, min(5, ws.max_row + 1)):
+                cell = ws.cell(row=row_idx, column=col_idx)
+                if cell.value is not None:
+                    max_width = max(max_width, len(str(cell.value)) * 1.2)
+            col_letter = ws.cell(row=1, column=col_idx).column_letter
+            ws.column_dimensions[col_letter].width = min(max(max_width * 1.2, 8), 100)
+
+        if original_wb is not None:
+            original_wb.close()
+        wb.save(output_path)
+        wb.close()
+
+        _log("log_success", f"{title}导出完成！文件保存到: {output_path}", category="export")
+        return output_path
+    except Exception as e:
+        _log("log_error", f"导出{title}数据时发生错误: {str(e)}", category="export")
+        raise
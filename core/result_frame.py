@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+紧凑处理结果模块
+
+process_target_fileN 原先返回 df.iloc[...] 的完整副本：保留源表全部列（object 类型），
+再追加科室、接口时间、责任人、source_file（每行重复一份绝对路径）等派生列。
+这些结果保存在 processing_results_multiN 中，会被反复 copy 并写入 .pkl 缓存。
+
+本模块把处理结果投影为 UI / 导出 / Registry 实际使用的列：
+1. 原始行号：回指源文件的行指针（Excel 行号），导出和回文单号写回都据此重新定位源行
+2. 接口号：源表接口号列的原值（替代按列位置 df.iloc[:, col_idx] 读取）
+3. _completed_value：完成列（回文单号等）的取值，供 Registry 判断状态重置
+4. 科室 / 接口时间 / 责任人 / source_file / _source_column / 主办室 / 项目号 / 角色来源 等派生列
+重复度高的字符串列转为 category 类型。
+
+用法：
+    result_df = compact_result(result_df, file_type=1)
+    combined = concat_results(frames)  # 代替 pd.concat(frames, ignore_index=True)
+"""
+
+from typing import Iterable, Optional
+
+import pandas as pd
+
+from registry.util import COMPLETED_COL_MAP, COMPLETED_VALUE_COLUMN, INTERFACE_COL_MAP
+
+# 紧凑结果保留的列（按此顺序输出，不存在的列跳过）
+RESULT_COLUMNS = (
+    "原始行号",
+    "接口号",
+    COMPLETED_VALUE_COLUMN,
+    "科室",
+    "接口时间",
+    "责任人",
+    "source_file",
+    "_source_column",
+    "主办室",
+    "项目号",
+    "角色来源",
+)
+
+# 重复度高、转为 category 的列
+CATEGORICAL_COLUMNS = ("source_file", "科室", "项目号", "责任人", "_source_column", "主办室")
+
+
+def is_compact(df) -> bool:
+    """是否为紧凑结果（已预先提取完成列取值）"""
+    return isinstance(df, pd.DataFrame) and COMPLETED_VALUE_COLUMN in df.columns
+
+
+def _completed_values(column: pd.Series) -> pd.Series:
+    """与 extract_completed_column_value 逐行一致：缺失为空字符串，其余 str().strip()"""
+    return column.map(lambda v: str(v).strip() if pd.notna(v) else "").astype(object)
+
+
+def _positional(df: pd.DataFrame, col_idx: int) -> Optional[pd.Series]:
+    if col_idx is None or col_idx >= len(df.columns):
+        return None
+    return df.iloc[:, col_idx]
+
+
+def categorize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    把重复度高的字符串列转为 category（原地修改）
+
+    参数:
+        df: 处理结果
+
+    返回:
+        同一个 DataFrame
+    """
+    if df is None or df.empty:
+        return df
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    return df
+
+
+def compact_result(df: pd.DataFrame, file_type: int) -> pd.DataFrame:
+    """
+    把处理结果投影为紧凑结果
+
+    参数:
+        df: process_target_fileN 的完整结果（保留源表全部列）
+        file_type: 文件类型（1-6）
+
+    返回:
+        只含 RESULT_COLUMNS 的新 DataFrame（保留原索引）；已是紧凑结果或无列时原样返回
+    """
+    if not isinstance(df, pd.DataFrame) or is_compact(df) or len(df.columns) == 0:
+        return df
+    file_type = int(file_type)
+
+    data = {}
+    for col in RESULT_COLUMNS:
+        if col == "接口号":
+            # 与 extract_interface_id 一致：优先"接口号"列名，否则按列位置
+            series = df["接口号"] if "接口号" in df.columns else _positional(df, INTERFACE_COL_MAP.get(file_type))
+        elif col == COMPLETED_VALUE_COLUMN:
+            col_idx = COMPLETED_COL_MAP.get(file_type)
+            if isinstance(col_idx, tuple):
+                # 文件3：Q列有值取Q列，否则取T列
+                q_col, t_col = (_positional(df, i) for i in col_idx)
+                q_val = _completed_values(q_col) if q_col is not None else pd.Series("", index=df.index, dtype=object)
+                t_val = _completed_values(t_col) if t_col is not None else pd.Series("", index=df.index, dtype=object)
+                series = q_val.where(q_val != "", t_val)
+            else:
+                column = _positional(df, col_idx)
+                series = _completed_values(column) if column is not None else pd.Series("", index=df.index, dtype=object)
+        else:
+            series = df[col] if col in df.columns else None
+        if series is not None:
+            data[col] = series.to_numpy()
+
+    compact = pd.DataFrame(data, index=df.index)
+    return categorize_columns(compact)
+
+
+def concat_results(frames: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """
+    合并多个项目的处理结果（pd.concat 后重新转换 category 列）
+
+    各项目 category 的取值不同，pd.concat 会退化为 object，这里合并后统一转换一次。
+    """
+    return categorize_columns(pd.concat(list(frames), ignore_index=True))
+
+
+def interface_column(df: pd.DataFrame, col_idx: int) -> Optional[pd.Series]:
+    """
+    取结果中的接口号列：紧凑结果取"接口号"列，完整结果按列位置取
+
+    参数:
+        df: 处理结果
+        col_idx: 完整结果中接口号的列位置
+
+    返回:
+        接口号 Series；取不到时返回 None
+    """
+    if is_compact(df) and "接口号" in df.columns:
+        return df["接口号"]
+    return _positional(df, col_idx)
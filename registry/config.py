@@ -6,6 +6,8 @@
 import json
 import os
 import sys
+import threading
+import time
 
 # 默认配置
 DEFAULTS = {
@@ -24,6 +26,8 @@ DEFAULTS = {
     # ============================================================
     "registry_local_cache_enabled": True,      # 是否启用本地只读缓存
     "registry_local_cache_sync_interval": 600, # 同步间隔（秒），默认5分钟
+    "registry_local_cache_backup_pages": 256,  # 在线备份每步复制的页数
+    "registry_local_cache_backup_sleep": 0.01, # 在线备份每步之间休眠（秒），避免占满共享盘带宽
     
     # ============================================================
     # 写入队列配置（第三阶段优化）
@@ -31,6 +35,14 @@ DEFAULTS = {
     "registry_write_queue_enabled": True,      # 是否启用写入队列
     "registry_write_batch_interval": 1.0,      # 批量写入间隔（秒）
     "registry_write_batch_size": 50,           # 单批最大任务数
+    "registry_outbox_enabled": True,           # 指派/回文/确认先写本机 outbox，后台批量写入共享库
+    
+    # ============================================================
+    # 本机 Registry 服务（可选，python -m registry.server 启动）
+    # ============================================================
+    "registry_server_url": "",                 # 非空时通过服务读写（如 http://127.0.0.1:8765），服务不可用时回退直连
+    "registry_server_timeout": 10.0,           # 读取请求超时（秒）；写入请求至少等待服务端排队时间
+    "registry_server_batch_interval": 0.05,    # 服务端收集一批写入的等待时间（秒）
     
     # ============================================================
     # 查询缓存配置
@@ -38,6 +50,11 @@ DEFAULTS = {
     "registry_query_cache_enabled": True,      # 是否启用查询结果缓存
     "registry_query_cache_ttl": 60,            # 缓存有效期（秒）
     
+    # ============================================================
+    # 事件日志压缩（维护模式下执行）
+    # ============================================================
+    "registry_event_retention_days": 180,      # events 热库保留天数，更早的按月移入归档库
+    
     # UI过滤相关（第二步UI使用）
     "view_hide_overdue_for_designer_default": False,
     "view_overdue_days_threshold": 30,
@@ -91,15 +108,7 @@ def load_config(
         config['registry_db_path'] = new_db_path
         if ensure_registry_dir:
             # 确保目录存在（可能触发网络盘访问）
-            try:
-                os.makedirs(registry_dir, exist_ok=True)
-                # 数据库路径信息已在db.py的get_connection中打印，这里不再重复输出
-            except Exception as e:
-                # 关键策略：不再回退到本地 result_cache/registry.db，避免产生“每人一份本地库”
-                # 直接禁用 Registry 并提示用户检查公共盘权限/路径
-                print(f"[Registry] 创建数据库目录失败，Registry已禁用（不会回退本地库）: {e}")
-                config["registry_enabled"] = False
-                config["registry_disabled_reason"] = f"无法创建公共盘数据库目录: {e}"
+            _apply_registry_dir_error(config, _ensure_registry_dir(registry_dir))
     elif config['registry_db_path'] is None:
         # 如果没有数据文件夹：彻底禁用 Registry（不再生成/使用本地 result_cache/registry.db）
         config["registry_enabled"] = False
@@ -109,6 +118,112 @@ def load_config(
     return config
 
 
+def _ensure_registry_dir(registry_dir: str):
+    """创建 registry 目录，成功返回 None，失败返回异常"""
+    try:
+        os.makedirs(registry_dir, exist_ok=True)
+        # 数据库路径信息已在db.py的get_connection中打印，这里不再重复输出
+        return None
+    except Exception as e:
+        return e
+
+
+def _apply_registry_dir_error(config: dict, error) -> None:
+    """目录不可用时禁用 Registry（不回退本地库）"""
+    if error is None:
+        return
+    # 关键策略：不再回退到本地 result_cache/registry.db，避免产生“每人一份本地库”
+    # 直接禁用 Registry 并提示用户检查公共盘权限/路径
+    print(f"[Registry] 创建数据库目录失败，Registry已禁用（不会回退本地库）: {error}")
+    config["registry_enabled"] = False
+    config["registry_disabled_reason"] = f"无法创建公共盘数据库目录: {error}"
+
+
+# ============================================================
+# 【优化】按数据文件夹缓存的配置服务
+# ============================================================
+# 钩子每次调用都需要配置；直接 load_config 会反复打开/解析 config.json，
+# 并对公共盘上的 .registry 目录做 makedirs。这里缓存合并后的结果：
+# - config.json 的 mtime 最多每 CONFIG_CHECK_INTERVAL 秒检查一次，变化时重新加载
+# - registry 目录检查每个数据文件夹只做一次（失败结果同样缓存）
+
+CONFIG_CHECK_INTERVAL = 3.0
+
+_clock = time.monotonic
+_cached_lock = threading.Lock()
+# (config_path绝对路径, data_folder) -> {"config", "mtime", "checked_at"}
+_cached_configs = {}
+# registry_dir -> None（可用）或 异常
+_registry_dir_status = {}
+
+
+def _config_mtime(config_path: str):
+    try:
+        return os.stat(config_path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def get_cached_config(data_folder: str = None, config_path: str = "config.json") -> dict:
+    """
+    获取配置（带缓存），供钩子等高频调用方使用
+
+    参数:
+        data_folder: 数据文件夹路径（用于确定数据库位置）
+        config_path: 配置文件路径
+
+    返回:
+        配置字典副本（调用方可自由修改）
+    """
+    key = (os.path.abspath(config_path), data_folder or None)
+    now = _clock()
+    with _cached_lock:
+        entry = _cached_configs.get(key)
+        if entry is not None and now - entry["checked_at"] < CONFIG_CHECK_INTERVAL:
+            return dict(entry["config"])
+
+    mtime = _config_mtime(config_path)
+    with _cached_lock:
+        entry = _cached_configs.get(key)
+        if entry is not None and entry["mtime"] == mtime:
+            entry["checked_at"] = now
+            return dict(entry["config"])
+
+    config = load_config(config_path, data_folder, ensure_registry_dir=False)
+    if data_folder and config.get("registry_enabled", True):
+        registry_dir = os.path.dirname(config.get("registry_db_path") or "")
+        if registry_dir == os.path.join(data_folder, ".registry"):
+            with _cached_lock:
+                checked = registry_dir in _registry_dir_status
+                error = _registry_dir_status.get(registry_dir)
+            if not checked:
+                error = _ensure_registry_dir(registry_dir)
+                with _cached_lock:
+                    _registry_dir_status[registry_dir] = error
+            _apply_registry_dir_error(config, error)
+
+    with _cached_lock:
+        _cached_configs[key] = {"config": config, "mtime": mtime, "checked_at": now}
+    return dict(config)
+
+
+def invalidate_config_cache(data_folder: str = None) -> None:
+    """
+    清除配置缓存
+
+    参数:
+        data_folder: 仅清除该数据文件夹相关的缓存与目录检查结果；None 表示全部清除
+    """
+    with _cached_lock:
+        if data_folder is None:
+            _cached_configs.clear()
+            _registry_dir_status.clear()
+            return
+        for key in [k for k in _cached_configs if k[1] == data_folder]:
+            del _cached_configs[key]
+        _registry_dir_status.pop(os.path.join(data_folder, ".registry"), None)
+
+
 # 全局配置缓存
 _config_cache = None
 
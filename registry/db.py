@@ -8,13 +8,18 @@ SQLite 在网络文件系统上有严重的锁定问题。本模块实现了以
 1. 自动检测网络路径，禁用 WAL 模式
 2. 使用短连接模式，减少锁持有时间
 3. 智能重试机制，应对临时锁定
+4. 连接池（按 db_path）：表结构每个进程、每个文件身份只校验一次，
+   之后重新打开连接不再执行 journal_mode/迁移检查/建表建索引；
+   lease_connection() 提供短租连接（按线程、按库路径独占），租约结束即关闭以释放网络盘文件
 """
 import sqlite3
 import os
 import time
 import random
+import threading
+from contextlib import contextmanager
 from threading import Lock
-from typing import Optional, Callable, TypeVar
+from typing import Dict, Iterator, Optional, Callable, Tuple, TypeVar
 
 # 全局连接缓存和锁
 _CONN: Optional[sqlite3.Connection] = None
@@ -23,6 +28,15 @@ _IS_NETWORK_PATH: Optional[bool] = None  # 缓存网络路径检测结果
 _DB_PATH: Optional[str] = None  # 缓存数据库路径
 _FORCE_NETWORK_MODE: bool = False  # 强制使用网络模式（用于本地测试）
 
+# 连接池状态：规范化 db_path -> (文件身份, schema_version, wal)，记录已完成引导（迁移+建表）的数据库
+_SCHEMA_VALIDATED: Dict[str, Tuple[tuple, int, bool]] = {}
+# 租约连接：每个线程各自持有，规范化 db_path -> [连接, 嵌套深度]
+_LEASES = threading.local()
+
+# 本进程的锁定重试统计（execute_with_retry 与钩子重试共用，供并发压力基准读取）
+_RETRY_STATS = {"lock_retries": 0, "lock_failures": 0}
+_RETRY_LOCK = Lock()
+
 T = TypeVar('T')
 
 
@@ -32,7 +46,9 @@ class MaintenanceModeError(RuntimeError):
 
 def _get_data_folder_from_db_path(db_path: str) -> str:
     """从数据库路径推导数据目录（data_folder）。"""
-    registry_dir = os.path.dirname(db_path)
+    from .sharding import get_main_db_path
+    # 分片库位于 .registry/shards 下，维护标志仍以主库所在目录为准
+    registry_dir = os.path.dirname(get_main_db_path(db_path))
     return os.path.dirname(registry_dir)
 
 
@@ -86,13 +102,109 @@ def disable_maintenance_mode(data_folder: str) -> bool:
 
 
 def close_connection_after_use() -> None:
-    """便捷关闭连接（用于读写结束后立即释放）。"""
+    """
+    便捷关闭连接（用于读写结束后立即释放）。
+
+    只关闭全局单例连接；租约连接由持有它的线程在最外层租约结束时关闭。
+    """
     try:
-        close_connection()
+        _close_global_connection()
     except Exception:
         pass
 
 
+def _pool_key(db_path: str) -> str:
+    return os.path.normcase(os.path.abspath(db_path))
+
+
+def _file_identity(db_path: str) -> Optional[tuple]:
+    """
+    数据库文件身份（文件被替换/重建后变化）
+
+    Windows 上 st_ctime 为创建时间；其他平台使用 (st_dev, st_ino)。
+    文件不存在时返回 None。
+    """
+    try:
+        st = os.stat(db_path)
+    except OSError:
+        return None
+    if os.name == "nt":
+        return (st.st_ino, st.st_ctime_ns)
+    return (st.st_dev, st.st_ino)
+
+
+def invalidate_schema_cache(db_path: Optional[str] = None) -> None:
+    """清除表结构校验缓存（db_path 为空时清除全部），下次连接重新引导"""
+    with _LOCK:
+        if db_path is None:
+            _SCHEMA_VALIDATED.clear()
+        else:
+            _SCHEMA_VALIDATED.pop(_pool_key(db_path), None)
+
+
+def _thread_leases() -> Dict[str, list]:
+    """当前线程持有的租约连接 {规范化 db_path: [连接, 嵌套深度]}"""
+    leases = getattr(_LEASES, "by_path", None)
+    if leases is None:
+        leases = _LEASES.by_path = {}
+    return leases
+
+
+def _leased_connection(db_path: str) -> Optional[sqlite3.Connection]:
+    """
+    当前线程对该库持有租约时返回租约连接（连接已被关闭则重新打开）
+
+    返回:
+        未持有租约时返回 None
+    """
+    entry = _thread_leases().get(_pool_key(db_path))
+    if entry is None:
+        return None
+    if entry[0] is None:
+        is_network = _FORCE_NETWORK_MODE or _is_network_path(db_path)
+        with _LOCK:
+            entry[0] = _open_connection(db_path, entry[2], is_network)
+    return entry[0]
+
+
+@contextmanager
+def lease_connection(db_path: str, wal: bool = True) -> Iterator[sqlite3.Connection]:
+    """
+    短租连接（按线程、按库路径独占）
+
+    租约连接不是全局单例：同一线程对同一库的嵌套租约、以及租约期间的 get_connection() 都返回它，
+    其他线程切换 db_path 或调用 close_connection_after_use() 都不会关闭它。
+    最外层租约结束时关闭连接，释放网络盘上的文件句柄。
+    维护模式检测与 get_connection 一致。
+    """
+    try:
+        ensure_not_in_maintenance(db_path=db_path)
+    except MaintenanceModeError:
+        invalidate_schema_cache(db_path)
+        raise
+
+    leases = _thread_leases()
+    key = _pool_key(db_path)
+    entry = leases.get(key)
+    if entry is None:
+        is_network = _FORCE_NETWORK_MODE or _is_network_path(db_path)
+        with _LOCK:
+            conn = _open_connection(db_path, wal, is_network)
+        entry = leases[key] = [conn, 0, wal]
+    entry[1] += 1
+    try:
+        yield _leased_connection(db_path)
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0:
+            leases.pop(key, None)
+            if entry[0] is not None:
+                try:
+                    entry[0].close()
+                except Exception:
+                    pass
+
+
 def set_force_network_mode(enabled: bool = True) -> None:
     """
     强制使用网络模式（用于本地开发测试）
@@ -165,6 +277,25 @@ def _cleanup_wal_files(db_path: str) -> None:
                 print(f"[Registry] 清理WAL文件失败: {e}")
 
 
+def note_lock_retry(failed: bool = False) -> None:
+    """记录一次锁定重试（failed=True 表示重试用尽后仍失败）"""
+    with _RETRY_LOCK:
+        _RETRY_STATS["lock_failures" if failed else "lock_retries"] += 1
+
+
+def get_retry_stats() -> Dict[str, int]:
+    """本进程累计的锁定重试统计 {'lock_retries', 'lock_failures'}"""
+    with _RETRY_LOCK:
+        return dict(_RETRY_STATS)
+
+
+def reset_retry_stats() -> None:
+    """清零锁定重试统计"""
+    with _RETRY_LOCK:
+        for name in _RETRY_STATS:
+            _RETRY_STATS[name] = 0
+
+
 def execute_with_retry(
     func: Callable[[], T],
     max_retries: int = 5,
@@ -203,6 +334,7 @@ def execute_with_retry(
                 last_exception = e
                 
                 if attempt < max_retries:
+                    note_lock_retry()
                     # 指数退避 + 随机抖动
                     delay = min(base_delay * (2 ** attempt) + random.uniform(0, 0.5), max_delay)
                     print(f"[Registry] {operation_name}被锁定，{delay:.1f}秒后重试 ({attempt + 1}/{max_retries})")
@@ -218,6 +350,7 @@ def execute_with_retry(
             raise
     
     # 所有重试都失败
+    note_lock_retry(failed=True)
     print(f"[Registry] {operation_name}在{max_retries}次重试后仍然失败")
     raise last_exception
 
@@ -225,6 +358,8 @@ def execute_with_retry(
 def get_connection(db_path: str, wal: bool = True) -> sqlite3.Connection:
     """
     获取或创建数据库连接（单例模式）
+
+    当前线程持有该库的租约时返回租约连接（见 lease_connection），不使用也不切换全局单例。
     
     参数:
         db_path: 数据库文件路径
@@ -235,13 +370,21 @@ def get_connection(db_path: str, wal: bool = True) -> sqlite3.Connection:
     """
     global _CONN, _IS_NETWORK_PATH, _DB_PATH
     
-    # 维护模式检测：若开启则禁止连接
-    ensure_not_in_maintenance(db_path=db_path)
+    # 维护模式检测：若开启则禁止连接（维护期间数据库可能被重建，清除校验缓存）
+    try:
+        ensure_not_in_maintenance(db_path=db_path)
+    except MaintenanceModeError:
+        invalidate_schema_cache(db_path)
+        raise
+
+    leased = _leased_connection(db_path)
+    if leased is not None:
+        return leased
     
     with _LOCK:
         # 【修复Bug】检查连接是否已关闭
         if _CONN is not None:
-            # 若目标 db_path 发生变化，必须切换连接
+            # 若目标 db_path 发生变化，必须切换连接（租约连接不受影响）
             if _DB_PATH and _DB_PATH != db_path:
                 try:
                     _CONN.close()
@@ -258,11 +401,6 @@ def get_connection(db_path: str, wal: bool = True) -> sqlite3.Connection:
                     print("[Registry] 检测到连接已关闭，重新创建...")
                     _CONN = None
         
-        # 确保目录存在
-        db_dir = os.path.dirname(db_path)
-        if db_dir and not os.path.exists(db_dir):
-            os.makedirs(db_dir, exist_ok=True)
-        
         # 缓存网络路径检测结果（避免重复检测）
         if _DB_PATH != db_path:
             if _FORCE_NETWORK_MODE:
@@ -272,66 +410,112 @@ def get_connection(db_path: str, wal: bool = True) -> sqlite3.Connection:
                 # 控制台输出优化：已验证逻辑，默认不输出
             _DB_PATH = db_path
         
-        is_network = _IS_NETWORK_PATH or _FORCE_NETWORK_MODE
-        
-        # 【关键修复】网络路径自动禁用WAL模式
-        if is_network and wal:
-            wal = False
-            # 尝试清理旧的WAL文件
+        _CONN = _open_connection(db_path, wal, _IS_NETWORK_PATH or _FORCE_NETWORK_MODE)
+        return _CONN
+
+
+def _open_connection(db_path: str, wal: bool, is_network: bool) -> sqlite3.Connection:
+    """
+    打开一个新连接并完成引导（调用方持有 _LOCK）
+
+    同一文件身份已完成引导时跳过 journal_mode/迁移/建表，只设置连接级参数。
+    """
+    # 确保目录存在
+    db_dir = os.path.dirname(db_path)
+    if db_dir and not os.path.exists(db_dir):
+        os.makedirs(db_dir, exist_ok=True)
+    
+    # 【新增】连接池：同一文件身份已完成引导时，跳过 journal_mode/迁移/建表
+    pool_key = _pool_key(db_path)
+    identity = _file_identity(db_path)
+    validated = _SCHEMA_VALIDATED.get(pool_key)
+    bootstrapped = (
+        identity is not None and validated is not None
+        and validated[0] == identity and validated[2] == (wal and not is_network)
+    )
+    
+    # 【关键修复】网络路径自动禁用WAL模式
+    if is_network and wal:
+        wal = False
+        # 尝试清理旧的WAL文件
+        if not bootstrapped:
             _cleanup_wal_files(db_path)
+    
+    # 创建连接，网络路径使用更短的超时（避免长时间阻塞）
+    timeout = 30.0 if is_network else 60.0
+    conn = sqlite3.connect(db_path, check_same_thread=False, timeout=timeout)
+    
+    if bootstrapped:
+        # schema_version 仅读取文件头，确认表结构未被其他进程修改
+        try:
+            bootstrapped = conn.execute("PRAGMA schema_version").fetchone()[0] == validated[1]
+        except sqlite3.Error:
+            bootstrapped = False
+    if bootstrapped:
+        _apply_session_pragmas(conn, is_network)
+        return conn
+    
+    # 配置日志模式和性能优化
+    try:
+        # 设置日志模式
+        if wal:
+            result = conn.execute("PRAGMA journal_mode=WAL").fetchone()
+        else:
+            result = conn.execute("PRAGMA journal_mode=DELETE").fetchone()
         
-        # 创建连接，网络路径使用更短的超时（避免长时间阻塞）
-        timeout = 30.0 if is_network else 60.0
-        conn = sqlite3.connect(db_path, check_same_thread=False, timeout=timeout)
+        actual_mode = result[0] if result else "unknown"
+        expected_mode = "wal" if wal else "delete"
         
-        # 配置日志模式和性能优化
-        try:
-            # 设置日志模式
-            if wal:
-                result = conn.execute("PRAGMA journal_mode=WAL").fetchone()
-            else:
+        if actual_mode.lower() != expected_mode:
+            print(f"[Registry] 警告: 日志模式设置失败! 期望={expected_mode}, 实际={actual_mode}")
+            # 如果是网络路径且模式不对，尝试强制切换
+            if is_network and actual_mode.lower() == "wal":
+                print("[Registry] 尝试强制切换到DELETE模式...")
+                # 执行一个空事务来刷新WAL
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute("COMMIT")
                 result = conn.execute("PRAGMA journal_mode=DELETE").fetchone()
-            
-            actual_mode = result[0] if result else "unknown"
-            expected_mode = "wal" if wal else "delete"
-            
-            if actual_mode.lower() != expected_mode:
-                print(f"[Registry] 警告: 日志模式设置失败! 期望={expected_mode}, 实际={actual_mode}")
-                # 如果是网络路径且模式不对，尝试强制切换
-                if is_network and actual_mode.lower() == "wal":
-                    print("[Registry] 尝试强制切换到DELETE模式...")
-                    # 执行一个空事务来刷新WAL
-                    conn.execute("BEGIN IMMEDIATE")
-                    conn.execute("COMMIT")
-                    result = conn.execute("PRAGMA journal_mode=DELETE").fetchone()
-                    print(f"[Registry] 重试后日志模式: {result[0] if result else 'unknown'}")
-            else:
-                # 控制台输出优化：已验证逻辑，默认不输出
-                pass
-            
-            # 设置繁忙超时（网络路径使用更长的超时）
-            busy_timeout = 60000 if is_network else 30000  # 60秒 或 30秒
-            conn.execute(f"PRAGMA busy_timeout={busy_timeout}")
-            conn.execute("PRAGMA synchronous=NORMAL")
-            
-            # 网络路径：禁用内存映射，使用传统IO（更可靠）
-            if is_network:
-                conn.execute("PRAGMA mmap_size=0")
-            
-        except Exception as e:
-            print(f"[Registry] 数据库配置失败: {e}")
-        
-        # 【关键修复】先检查并迁移数据库，再初始化
-        try:
-            from .migrate import migrate_if_needed
-            migrate_if_needed(db_path)
-        except Exception as e:
-            print(f"[Registry] 数据库迁移检查失败: {e}")
+                print(f"[Registry] 重试后日志模式: {result[0] if result else 'unknown'}")
+        else:
+            # 控制台输出优化：已验证逻辑，默认不输出
+            pass
         
-        init_db(conn)
+        _apply_session_pragmas(conn, is_network)
         
-        _CONN = conn
-        return conn
+    except Exception as e:
+        print(f"[Registry] 数据库配置失败: {e}")
+    
+    # 【关键修复】先检查并迁移数据库，再初始化
+    try:
+        from .migrate import migrate_if_needed
+        migrate_if_needed(db_path)
+    except Exception as e:
+        print(f"[Registry] 数据库迁移检查失败: {e}")
+    
+    init_db(conn)
+    
+    # 记录引导完成（文件此时一定已存在）
+    try:
+        schema_version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        new_identity = _file_identity(db_path)
+        if new_identity is not None:
+            _SCHEMA_VALIDATED[pool_key] = (new_identity, schema_version, wal)
+    except sqlite3.Error:
+        pass
+    
+    return conn
+
+
+def _apply_session_pragmas(conn: sqlite3.Connection, is_network: bool) -> None:
+    """设置连接级参数（不落盘、无网络IO，每个新连接都需要设置）"""
+    # 设置繁忙超时（网络路径使用更长的超时）
+    busy_timeout = 60000 if is_network else 30000  # 60秒 或 30秒
+    conn.execute(f"PRAGMA busy_timeout={busy_timeout}")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    
+    # 网络路径：禁用内存映射，使用传统IO（更可靠）
+    if is_network:
+        conn.execute("PRAGMA mmap_size=0")
 
 
 def open_isolated_connection(db_path: str, wal: bool = True) -> sqlite3.Connection:
@@ -439,6 +623,8 @@ def init_db(conn: sqlite3.Connection) -> None:
     cur.execute("CREATE INDEX IF NOT EXISTS idx_tasks_interface_id ON tasks(interface_id);")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_tasks_display_status ON tasks(display_status);")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_tasks_lookup ON tasks(file_type, project_id, interface_id);")
+    # 历史查询：按 (项目号, 接口号) 跨文件类型查找，按首次发现时间分页
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_tasks_history ON tasks(project_id, interface_id, first_seen_at);")
     
     # 创建events表
     cur.execute(
@@ -461,6 +647,23 @@ def init_db(conn: sqlite3.Connection) -> None:
     cur.execute("CREATE INDEX IF NOT EXISTS idx_events_ts ON events(ts);")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_events_type ON events(event);")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_events_ft_pid ON events(file_type, project_id);")
+    # 历史查询：同一接口的事件时间线（按 id 分页）
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_events_interface ON events(project_id, interface_id);")
+    
+    # 已归档事件的计数汇总（事件日志压缩后保留统计信息）
+    from .event_archive import ensure_summary_schema
+    ensure_summary_schema(conn)
+    
+    # 已执行的本机 outbox 变更幂等键（重试时跳过已执行的变更）
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS applied_ops (
+            op_id TEXT PRIMARY KEY,
+            applied_at TEXT NOT NULL
+        );
+        """
+    )
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_applied_ops_at ON applied_ops(applied_at);")
     
     # 创建ignored_snapshots表（忽略时的快照数据，用于检测变化）
     cur.execute(
@@ -488,7 +691,23 @@ def init_db(conn: sqlite3.Connection) -> None:
     conn.commit()
 
 def close_connection():
-    """关闭全局数据库连接"""
+    """
+    关闭全局数据库连接，以及当前线程的租约连接（锁定重试时释放锁）
+
+    租约仍有效时，下次 get_connection() 重新打开租约连接；其他线程的租约连接不受影响。
+    """
+    _close_global_connection()
+    for entry in _thread_leases().values():
+        if entry[0] is not None:
+            try:
+                entry[0].close()
+            except Exception:
+                pass
+            entry[0] = None
+
+
+def _close_global_connection() -> None:
+    """关闭全局单例连接"""
     global _CONN
     with _LOCK:
         if _CONN is not None:
@@ -510,6 +729,7 @@ def is_network_database() -> bool:
 
 _local_cache_manager = None
 _local_cache_enabled = True  # 默认启用
+_WRITE_GENERATION = 0  # 本进程写入次数（invalidate_read_cache 时递增）
 
 
 def set_local_cache_enabled(enabled: bool = True) -> None:
@@ -530,6 +750,62 @@ def set_local_cache_enabled(enabled: bool = True) -> None:
     print(f"[Registry] 本地缓存{'已启用' if enabled else '已禁用'}")
 
 
+def _get_local_cache_manager(db_path: str):
+    """
+    网络盘数据库的本地只读缓存管理器（本地路径或未启用缓存时返回 None）
+
+    db_path 变化时重置管理器，避免读取旧库。
+    """
+    global _local_cache_manager
+
+    try:
+        if _local_cache_manager is not None:
+            current_path = getattr(_local_cache_manager, "network_db_path", None)
+            if current_path and current_path != db_path:
+                try:
+                    _local_cache_manager.cleanup()
+                except Exception:
+                    pass
+                _local_cache_manager = None
+    except Exception:
+        pass
+
+    if not (_local_cache_enabled and _is_network_path(db_path)):
+        return None
+    try:
+        if _local_cache_manager is None:
+            from registry.local_cache import LocalCacheManager
+            from registry.config import get_config
+
+            config = get_config()
+            sync_interval = config.get('registry_local_cache_sync_interval', 300)
+
+            _local_cache_manager = LocalCacheManager(
+                db_path,
+                sync_interval=sync_interval,
+                backup_pages=config.get('registry_local_cache_backup_pages', 256),
+                backup_sleep=config.get('registry_local_cache_backup_sleep', 0.01),
+            )
+        return _local_cache_manager
+    except Exception as e:
+        print(f"[Registry] 本地缓存初始化失败，降级为直连: {e}")
+        return None
+
+
+def warm_read_cache(db_path: str) -> bool:
+    """
+    预先同步网络盘数据库的本地只读副本（后台任务调用，避免首次状态查询时才复制整个库）
+
+    返回:
+        True = 本地副本可用；本地路径、未启用缓存或同步失败时返回 False
+    """
+    ensure_not_in_maintenance(db_path=db_path)
+    manager = _get_local_cache_manager(db_path)
+    if manager is None:
+        return False
+    return bool(manager.ensure_local_cache())
+
+
 def get_read_connection(db_path: str) -> sqlite3.Connection:
     """
     获取只读连接（优先使用本地缓存）
@@ -545,44 +821,16 @@ def get_read_connection(db_path: str) -> sqlite3.Connection:
     返回:
         sqlite3.Connection（本地缓存或直连）
     """
-    global _local_cache_manager
-    
     # 维护模式检测：若开启则禁止读取
     ensure_not_in_maintenance(db_path=db_path)
 
-    # db_path 变化时重置本地缓存管理器，避免读取旧库
-    try:
-        if _local_cache_manager is not None:
-            current_path = getattr(_local_cache_manager, "network_db_path", None)
-            if current_path and current_path != db_path:
-                try:
-                    _local_cache_manager.cleanup()
-                except Exception:
-                    pass
-                _local_cache_manager = None
-    except Exception:
-        pass
-    
-    # 检查是否为网络路径且启用了本地缓存
-    if _local_cache_enabled and _is_network_path(db_path):
+    manager = _get_local_cache_manager(db_path)
+    if manager is not None:
         try:
-            if _local_cache_manager is None:
-                from registry.local_cache import LocalCacheManager
-                from registry.config import get_config
-                
-                config = get_config()
-                sync_interval = config.get('registry_local_cache_sync_interval', 300)
-                
-                _local_cache_manager = LocalCacheManager(
-                    db_path, 
-                    sync_interval=sync_interval
-                )
-            
             # 尝试获取本地缓存连接
-            local_conn = _local_cache_manager.get_read_connection()
+            local_conn = manager.get_read_connection()
             if local_conn:
                 return local_conn
-                
         except Exception as e:
             print(f"[Registry] 本地缓存初始化失败，降级为直连: {e}")
     
@@ -608,6 +856,50 @@ def get_write_connection(db_path: str) -> sqlite3.Connection:
     return get_connection(db_path, wal=not _is_network_path(db_path))
 
 
+@contextmanager
+def read_snapshot_connection(db_path: str, wal: bool = True, prefer_replica: bool = True) -> Iterator[sqlite3.Connection]:
+    """
+    批量读取用的只读连接
+
+    - 网络盘且启用本地缓存（且 prefer_replica）：使用本地只读副本
+    - 其他情况：打开一个独立的只读连接，结束时关闭
+
+    独立连接不与写队列共享单例连接，调用方在其上开启的读事务不会与其他线程的写入交织，
+    也不会修改 journal_mode。数据库文件尚不存在时回退到本线程的租约连接（负责建库建表）。
+
+    参数:
+        db_path: 数据库路径
+        wal: 是否使用WAL模式（仅回退到单例连接时使用）
+        prefer_replica: False 表示需要最新数据（如历史查询），不使用可能滞后的本地副本
+    """
+    ensure_not_in_maintenance(db_path=db_path)
+
+    # 本地副本只为主库维护：分片库直接读（分片后单库锁竞争已大幅降低）
+    from .sharding import is_shard_path
+    if prefer_replica and _local_cache_enabled and _is_network_path(db_path) and not is_shard_path(db_path):
+        conn = get_read_connection(db_path)
+        if conn is not _CONN and conn is not _leased_connection(db_path):
+            yield conn
+            return
+        # 本地副本不可用，已降级为单例连接：改用独立连接
+        close_connection_after_use()
+
+    if not os.path.exists(db_path):
+        # 租约连接负责建库建表，不切换其他线程可能正在使用的全局单例
+        with lease_connection(db_path, wal) as conn:
+            yield conn
+        return
+
+    is_network = _FORCE_NETWORK_MODE or _is_network_path(db_path)
+    conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30.0 if is_network else 60.0)
+    try:
+        _apply_session_pragmas(conn, is_network)
+        conn.execute("PRAGMA query_only = ON")
+        yield conn
+    finally:
+        conn.close()
+
+
 def invalidate_read_cache():
     """
     使读缓存失效（写入操作后调用）
@@ -615,11 +907,35 @@ def invalidate_read_cache():
     每次写入网络盘数据库后，应调用此函数使本地缓存失效，
     确保下次读取时能获取最新数据。
     """
-    global _local_cache_manager
+    global _local_cache_manager, _WRITE_GENERATION
+    _WRITE_GENERATION += 1
     if _local_cache_manager:
         _local_cache_manager.invalidate_cache()
 
 
+def get_snapshot_version(db_path: str) -> tuple:
+    """
+    数据库内容版本（界面渲染缓存的失效依据）
+
+    由主库与 -wal 文件的 (大小, 修改时间) 及本进程写入计数组成：
+    任一进程提交写入后都会变化，只需两次 stat，不打开数据库。
+
+    参数:
+        db_path: 数据库路径
+
+    返回:
+        可比较的版本元组
+    """
+    version = [_WRITE_GENERATION]
+    for path in (db_path, db_path + "-wal"):
+        try:
+            st = os.stat(path)
+            version.append((st.st_size, st.st_mtime_ns))
+        except OSError:
+            version.append(None)
+    return tuple(version)
+
+
 def force_sync_cache() -> bool:
     """
     强制同步缓存（手动刷新时调用）
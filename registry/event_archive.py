@@ -0,0 +1,341 @@
+"""
+事件日志压缩归档
+
+功能：
+1. 把超过保留期的 events 记录按月移入归档库：<registry目录>/events_archive/events_YYYY-MM.db
+   （extra 以 zlib 压缩存储，归档库整理后体积远小于热库中的同等数据）
+2. 在热库 event_summary 表中累计每月/事件类型/文件类型/项目的计数，统计类查询无需打开归档
+3. 压缩完成后 VACUUM 热库，报告体积变化与耗时
+4. 历史查询在热库事件读完后按月份倒序继续读取归档
+
+只能在维护模式下执行（其他客户端已退出，连接被拒绝），因此直接打开数据库文件，
+不经过 get_connection / open_isolated_connection 的维护模式检测。
+"""
+
+import glob
+import os
+import sqlite3
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+ARCHIVE_DIR_NAME = "events_archive"
+ARCHIVE_FILE_PREFIX = "events_"
+EVENT_COLUMNS = ("id", "ts", "event", "file_type", "project_id", "interface_id", "source_file", "row_index", "extra")
+
+# 每批移动的事件数（控制单个事务大小）
+COMPACT_BATCH_SIZE = 5000
+
+
+def get_archive_dir(db_path: str) -> str:
+    """归档目录：与 registry.db 同级的 events_archive（分片库为 shards/events_archive/<分片文件名>）"""
+    from .sharding import is_shard_path
+    archive_dir = os.path.join(os.path.dirname(os.path.abspath(db_path)), ARCHIVE_DIR_NAME)
+    if is_shard_path(db_path):
+        # 各分片的月份归档同名，按分片分目录存放
+        archive_dir = os.path.join(archive_dir, os.path.splitext(os.path.basename(db_path))[0])
+    return archive_dir
+
+
+def get_archive_path(db_path: str, month: str) -> str:
+    """某月（YYYY-MM）的归档库路径"""
+    return os.path.join(get_archive_dir(db_path), f"{ARCHIVE_FILE_PREFIX}{month}.db")
+
+
+def list_archive_months(db_path: str) -> List[str]:
+    """已有归档的月份（倒序）"""
+    pattern = os.path.join(get_archive_dir(db_path), f"{ARCHIVE_FILE_PREFIX}*.db")
+    months = [os.path.basename(p)[len(ARCHIVE_FILE_PREFIX):-3] for p in glob.glob(pattern)]
+    return sorted(months, reverse=True)
+
+
+def ensure_summary_schema(conn: sqlite3.Connection) -> None:
+    """热库中的事件计数汇总表（归档后保留的统计信息）"""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS event_summary (
+            month TEXT NOT NULL,
+            event TEXT NOT NULL,
+            file_type INTEGER NOT NULL DEFAULT 0,
+            project_id TEXT NOT NULL DEFAULT '',
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (month, event, file_type, project_id)
+        );
+        """
+    )
+
+
+def _ensure_archive_schema(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY,
+            ts TEXT NOT NULL,
+            event TEXT NOT NULL,
+            file_type INTEGER,
+            project_id TEXT,
+            interface_id TEXT,
+            source_file TEXT,
+            row_index INTEGER,
+            extra_z BLOB
+        );
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_archive_interface ON events(project_id, interface_id);")
+
+
+def _compress(extra: Optional[str]) -> Optional[bytes]:
+    if extra is None:
+        return None
+    return zlib.compress(extra.encode("utf-8"), 9)
+
+
+def _decompress(blob: Optional[bytes]) -> Optional[str]:
+    if blob is None:
+        return None
+    return zlib.decompress(blob).decode("utf-8")
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def compact_events(
+    db_path: str,
+    retention_days: int = 180,
+    now: Optional[datetime] = None,
+    vacuum: bool = True,
+    require_maintenance: bool = True,
+) -> Dict[str, Any]:
+    """
+    把早于保留期的事件移入按月归档库，并累计汇总计数
+
+    每个月份先写入归档库并提交（按 id 去重，可重复执行），
+    再在热库同一事务中累加 event_summary 并删除已归档的记录，中途中断不会丢失或重复计数。
+
+    参数:
+        db_path: registry.db 路径
+        retention_days: 热库保留的天数
+        now: 当前时间（默认本地当前时间）
+        vacuum: 是否在压缩后 VACUUM 热库与本次写入的归档库
+        require_maintenance: 是否要求处于维护模式（默认要求）
+
+    返回:
+        报告字典 {'cutoff', 'archived', 'months': {月份: 条数}, 'db_size_before', 'db_size_after',
+                  'archive_size', 'applied_ops_pruned', 'compact_seconds', 'vacuum_seconds'}
+    """
+    from .db import is_maintenance_mode
+
+    if require_maintenance and not is_maintenance_mode(db_path=db_path):
+        raise RuntimeError("事件日志压缩只能在维护模式下执行，请先进入维护模式")
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(db_path)
+
+    now = now or datetime.now()
+    cutoff = (now - timedelta(days=int(retention_days))).isoformat()
+    report: Dict[str, Any] = {
+        "cutoff": cutoff,
+        "archived": 0,
+        "months": {},
+        "db_size_before": _file_size(db_path),
+        "db_size_after": 0,
+        "archive_size": 0,
+        "applied_ops_pruned": 0,
+        "compact_seconds": 0.0,
+        "vacuum_seconds": 0.0,
+    }
+
+    started = time.perf_counter()
+    conn = sqlite3.connect(db_path, timeout=60.0)
+    try:
+        ensure_summary_schema(conn)
+        conn.commit()
+        months = [row[0] for row in conn.execute(
+            "SELECT DISTINCT substr(ts, 1, 7) FROM events WHERE ts < ? ORDER BY 1", (cutoff,)
+        )]
+        touched_archives = []
+        for month in months:
+            archive_path = get_archive_path(db_path, month)
+            os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+            moved = 0
+            while True:
+                rows = conn.execute(
+                    f"""
+                    SELECT {", ".join(EVENT_COLUMNS)} FROM events
+                    WHERE ts < ? AND substr(ts, 1, 7) = ?
+                    ORDER BY id LIMIT ?
+                    """,
+                    (cutoff, month, COMPACT_BATCH_SIZE),
+                ).fetchall()
+                if not rows:
+                    break
+                _write_archive_batch(archive_path, rows)
+                _drop_archived_batch(conn, month, rows)
+                moved += len(rows)
+            report["months"][month] = moved
+            report["archived"] += moved
+            touched_archives.append(archive_path)
+            print(f"[EventArchive] {month}: 归档 {moved} 条事件 -> {archive_path}")
+        report["applied_ops_pruned"] = _prune_applied_ops(conn, cutoff)
+        report["compact_seconds"] = round(time.perf_counter() - started, 3)
+
+        if vacuum and report["archived"]:
+            vacuum_started = time.perf_counter()
+            conn.execute("VACUUM")
+            for archive_path in touched_archives:
+                archive_conn = sqlite3.connect(archive_path, timeout=60.0)
+                try:
+                    archive_conn.execute("VACUUM")
+                finally:
+                    archive_conn.close()
+            report["vacuum_seconds"] = round(time.perf_counter() - vacuum_started, 3)
+    finally:
+        conn.close()
+
+    report["db_size_after"] = _file_size(db_path)
+    report["archive_size"] = sum(_file_size(get_archive_path(db_path, m)) for m in list_archive_months(db_path))
+    print(
+        f"[EventArchive] 完成：归档 {report['archived']} 条，热库 {report['db_size_before']} -> "
+        f"{report['db_size_after']} 字节，压缩 {report['compact_seconds']}s，VACUUM {report['vacuum_seconds']}s"
+    )
+    return report
+
+
+def _prune_applied_ops(conn: sqlite3.Connection, cutoff: str) -> int:
+    """清理保留期之前的 outbox 幂等键（本机 outbox 不会保留这么久的变更）"""
+    try:
+        cursor = conn.execute("DELETE FROM applied_ops WHERE applied_at < ?", (cutoff,))
+        conn.commit()
+        return cursor.rowcount
+    except sqlite3.OperationalError:
+        return 0  # 旧库尚无 applied_ops 表
+
+
+def _write_archive_batch(archive_path: str, rows: List[tuple]) -> None:
+    archive_conn = sqlite3.connect(archive_path, timeout=60.0)
+    try:
+        _ensure_archive_schema(archive_conn)
+        archive_conn.executemany(
+            """
+            INSERT OR IGNORE INTO events (id, ts, event, file_type, project_id, interface_id, source_file, row_index, extra_z)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            [row[:8] + (_compress(row[8]),) for row in rows],
+        )
+        archive_conn.commit()
+    finally:
+        archive_conn.close()
+
+
+def _drop_archived_batch(conn: sqlite3.Connection, month: str, rows: List[tuple]) -> None:
+    counts: Dict[Tuple[str, int, str], int] = {}
+    for row in rows:
+        key = (row[2], row[3] or 0, row[4] or "")
+        counts[key] = counts.get(key, 0) + 1
+    try:
+        for (event, file_type, project_id), count in counts.items():
+            conn.execute(
+                "INSERT OR IGNORE INTO event_summary (month, event, file_type, project_id, count) VALUES (?, ?, ?, ?, 0)",
+                (month, event, file_type, project_id),
+            )
+            conn.execute(
+                "UPDATE event_summary SET count = count + ? WHERE month = ? AND event = ? AND file_type = ? AND project_id = ?",
+                (count, month, event, file_type, project_id),
+            )
+        conn.executemany("DELETE FROM events WHERE id = ?", [(row[0],) for row in rows])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def iter_archived_interface_events(
+    db_path: str,
+    project_id: str,
+    interface_id: str,
+    file_type: Optional[int] = None,
+    page_size: int = 200,
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    按月份倒序逐页读取归档中同一接口的事件（只读打开归档库）
+
+    产出:
+        每页事件列表（字段与热库 events 相同，extra 已解压）
+    """
+    from .sharding import get_main_db_path
+
+    # 分片库还要读取拆分前主库的归档（按项目号过滤，互不重复）
+    sources = [db_path]
+    if get_main_db_path(db_path) != db_path:
+        sources.append(get_main_db_path(db_path))
+    archives = [(month, get_archive_path(source, month)) for source in sources for month in list_archive_months(source)]
+    archives.sort(key=lambda item: item[0], reverse=True)
+
+    for _, archive_path in archives:
+        try:
+            archive_conn = sqlite3.connect(f"file:{archive_path}?mode=ro", uri=True, timeout=30.0)
+        except sqlite3.Error as e:
+            print(f"[EventArchive] 打开归档失败 {archive_path}: {e}")
+            continue
+        try:
+            conditions = ["project_id = ?", "interface_id = ?"]
+            base_params: List[Any] = [project_id, interface_id]
+            if file_type:
+                conditions.append("file_type = ?")
+                base_params.append(int(file_type))
+            before_id = None
+            while True:
+                where = list(conditions)
+                params = list(base_params)
+                if before_id is not None:
+                    where.append("id < ?")
+                    params.append(before_id)
+                params.append(int(page_size))
+                rows = archive_conn.execute(
+                    f"""
+                    SELECT id, ts, event, file_type, project_id, interface_id, source_file, row_index, extra_z
+                    FROM events WHERE {" AND ".join(where)}
+                    ORDER BY id DESC LIMIT ?
+                    """,
+                    params,
+                ).fetchall()
+                if not rows:
+                    break
+                yield [dict(zip(EVENT_COLUMNS, row[:8] + (_decompress(row[8]),))) for row in rows]
+                if len(rows) < page_size:
+                    break
+                before_id = rows[-1][0]
+        finally:
+            archive_conn.close()
+
+
+def query_event_summary(conn: sqlite3.Connection, project_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """读取已归档事件的汇总计数（按月份倒序）"""
+    sql = "SELECT month, event, file_type, project_id, count FROM event_summary"
+    params: Tuple = ()
+    if project_id:
+        sql += " WHERE project_id = ?"
+        params = (project_id,)
+    sql += " ORDER BY month DESC, event"
+    try:
+        rows = conn.execute(sql, params).fetchall()
+    except sqlite3.OperationalError:
+        return []  # 尚未压缩过，汇总表不存在
+    return [dict(zip(("month", "event", "file_type", "project_id", "count"), row)) for row in rows]
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """压缩报告的文字说明（用于维护界面提示）"""
+    saved = report["db_size_before"] - report["db_size_after"]
+    lines = [
+        f"保留期截止：{report['cutoff'][:10]}",
+        f"归档事件：{report['archived']} 条（{len(report['months'])} 个月）",
+        f"热库体积：{report['db_size_before'] / 1024:.1f} KB -> {report['db_size_after'] / 1024:.1f} KB（节省 {saved / 1024:.1f} KB）",
+        f"归档总体积：{report['archive_size'] / 1024:.1f} KB",
+        f"压缩耗时：{report['compact_seconds']:.2f}s，VACUUM 耗时：{report['vacuum_seconds']:.2f}s",
+    ]
+    return "\n".join(lines)
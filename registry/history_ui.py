@@ -3,6 +3,8 @@
 
 提供历史查询对话框和历史显示窗口。
 """
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from datetime import datetime
@@ -31,6 +33,16 @@ STATUS_DISPLAY_MAP = {
     'in_review': '待审查',
 }
 
+# 事件类型显示（与 registry.models.EventType 对应）
+EVENT_DISPLAY_MAP = {
+    'process_done': '处理完成',
+    'export_done': '导出完成',
+    'response_written': '回文填写',
+    'confirmed': '确认',
+    'archived': '归档',
+    'assigned': '指派',
+}
+
 
 def format_time(time_str):
     """格式化时间显示"""
@@ -145,12 +157,15 @@ class HistoryQueryDialog(tk.Toplevel):
                     file_type = ft
                     break
         
-        # 查询数据库
+        # 查询数据库（只读第一页，其余页与事件时间线由显示窗口后台加载）
         try:
-            from .service import query_task_history
+            from .service import query_task_history_page
+            from .sharding import shard_db_path
             
-            history_data = query_task_history(
-                self.db_path,
+            # 已按项目分片时只需读该项目所在的分片
+            db_path = shard_db_path(self.db_path, project_id)
+            history_data, next_cursor = query_task_history_page(
+                db_path,
                 self.wal,
                 project_id,
                 interface_id,
@@ -171,9 +186,10 @@ class HistoryQueryDialog(tk.Toplevel):
                 history_data,
                 project_id,
                 interface_id,
-                self.db_path,
+                db_path,
                 self.wal,
-                file_type
+                file_type,
+                next_cursor=next_cursor,
             )
             
             # 关闭查询对话框
@@ -194,21 +210,35 @@ class HistoryDisplayWindow(tk.Toplevel):
     
     def __init__(self, parent, history_data: List[Dict[str, Any]], 
                  project_id: str, interface_id: str,
-                 db_path: str, wal: bool, file_type: Optional[int]):
+                 db_path: str, wal: bool, file_type: Optional[int],
+                 next_cursor=None):
+        """
+        参数:
+            history_data: 已读取的历史记录（通常为第一页）
+            next_cursor: 剩余历史记录的分页游标（None 表示历史记录已完整）
+        """
         super().__init__(parent)
         
-        self.history_data = history_data
+        self.history_data = list(history_data)
+        self.event_data: List[Dict[str, Any]] = []
         self.project_id = project_id
         self.interface_id = interface_id
         self.db_path = db_path
         self.wal = wal
         self.file_type = file_type
         
+        # 【优化】剩余历史页与事件时间线在后台线程逐页读取，经队列交给主线程追加显示
+        self._page_queue: "queue.Queue" = queue.Queue()
+        self._load_generation = 0
+        self._loading = False
+        self._notify_when_loaded = False
+        
         self.title(f"历史查询结果 - 项目{project_id} - 接口{interface_id}")
         self.geometry("1400x700")
         
         self._create_widgets()
         self._populate_table()
+        self._start_loading(task_cursor=next_cursor, skip_tasks=next_cursor is None)
         
     def _create_widgets(self):
         """创建控件"""
@@ -216,16 +246,21 @@ class HistoryDisplayWindow(tk.Toplevel):
         info_frame = ttk.Frame(self)
         info_frame.pack(fill=tk.X, padx=10, pady=10)
         
-        info_label = ttk.Label(
+        self.info_label = ttk.Label(
             info_frame, 
             text=f"共找到 {len(self.history_data)} 条历史记录",
             font=('微软雅黑', 10)
         )
-        info_label.pack(side=tk.LEFT)
+        self.info_label.pack(side=tk.LEFT)
+        
+        # 任务历史 / 事件时间线
+        notebook = ttk.Notebook(self)
+        notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+        self.notebook = notebook
         
         # 表格框架
-        table_frame = ttk.Frame(self)
-        table_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+        table_frame = ttk.Frame(notebook)
+        notebook.add(table_frame, text="任务历史")
         
         # 创建Treeview
         columns = (
@@ -276,6 +311,25 @@ class HistoryDisplayWindow(tk.Toplevel):
         table_frame.grid_rowconfigure(0, weight=1)
         table_frame.grid_columnconfigure(0, weight=1)
         
+        # 事件时间线
+        events_frame = ttk.Frame(notebook)
+        notebook.add(events_frame, text="事件时间线")
+        self.events_frame = events_frame
+        event_columns = ('时间', '事件', '文件类型', '源文件', '行号', '详情')
+        self.events_tree = ttk.Treeview(events_frame, columns=event_columns, show='headings', height=25)
+        event_widths = {'时间': 140, '事件': 100, '文件类型': 110, '源文件': 320, '行号': 60, '详情': 600}
+        for col in event_columns:
+            self.events_tree.heading(col, text=col)
+            self.events_tree.column(col, width=event_widths.get(col, 100), anchor=tk.W if col in ('源文件', '详情') else tk.CENTER)
+        events_vsb = ttk.Scrollbar(events_frame, orient=tk.VERTICAL, command=self.events_tree.yview)
+        events_hsb = ttk.Scrollbar(events_frame, orient=tk.HORIZONTAL, command=self.events_tree.xview)
+        self.events_tree.configure(yscrollcommand=events_vsb.set, xscrollcommand=events_hsb.set)
+        self.events_tree.grid(row=0, column=0, sticky='nsew')
+        events_vsb.grid(row=0, column=1, sticky='ns')
+        events_hsb.grid(row=1, column=0, sticky='ew')
+        events_frame.grid_rowconfigure(0, weight=1)
+        events_frame.grid_columnconfigure(0, weight=1)
+        
         # 按钮框架
         button_frame = ttk.Frame(self)
         button_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
@@ -298,8 +352,11 @@ class HistoryDisplayWindow(tk.Toplevel):
         for item in self.tree.get_children():
             self.tree.delete(item)
         
-        # 插入数据
-        for idx, task in enumerate(self.history_data, 1):
+        self._append_rows(self.history_data, 1)
+    
+    def _append_rows(self, tasks: List[Dict[str, Any]], start_idx: int):
+        """追加历史记录行（序号从 start_idx 开始）"""
+        for idx, task in enumerate(tasks, start_idx):
             # 文件类型
             file_type_name = FILE_TYPE_MAP.get(task.get('file_type', 0), '未知')
             
@@ -362,8 +419,84 @@ class HistoryDisplayWindow(tk.Toplevel):
             
             self.tree.insert('', tk.END, values=values)
     
+    def _append_events(self, events: List[Dict[str, Any]]):
+        """追加事件时间线行"""
+        for event in events:
+            event_type = event.get('event') or ''
+            self.events_tree.insert('', tk.END, values=(
+                format_time(event.get('ts')),
+                EVENT_DISPLAY_MAP.get(event_type, event_type),
+                FILE_TYPE_MAP.get(event.get('file_type'), '-'),
+                event.get('source_file') or '-',
+                event.get('row_index') if event.get('row_index') is not None else '-',
+                event.get('extra') or '',
+            ))
+    
+    def _start_loading(self, task_cursor=None, skip_tasks: bool = False):
+        """后台逐页读取剩余历史记录与事件时间线"""
+        self._load_generation += 1
+        generation = self._load_generation
+        self._loading = True
+        self._update_info_label()
+        
+        def worker():
+            from .service import iter_interface_history
+            try:
+                for kind, rows in iter_interface_history(
+                    self.db_path, self.wal, self.project_id, self.interface_id, self.file_type,
+                    task_cursor=task_cursor, skip_tasks=skip_tasks,
+                ):
+                    if generation != self._load_generation:
+                        return  # 窗口已关闭或已重新查询
+                    self._page_queue.put((generation, kind, rows))
+                self._page_queue.put((generation, "done", None))
+            except Exception as e:
+                print(f"[Registry] 加载历史记录失败: {e}")
+                self._page_queue.put((generation, "error", str(e)))
+        
+        threading.Thread(target=worker, name="HistoryLoader", daemon=True).start()
+        self.after(50, self._drain_pages)
+    
+    def _drain_pages(self):
+        """主线程：把后台读取的页追加到表格"""
+        try:
+            while True:
+                generation, kind, rows = self._page_queue.get_nowait()
+                if generation != self._load_generation:
+                    continue
+                if kind == "tasks":
+                    start_idx = len(self.history_data) + 1
+                    self.history_data.extend(rows)
+                    self._append_rows(rows, start_idx)
+                elif kind == "events":
+                    self.event_data.extend(rows)
+                    self._append_events(rows)
+                else:
+                    self._loading = False
+                    if kind == "error":
+                        messagebox.showerror("加载失败", f"加载历史记录失败：{rows}", parent=self)
+                    elif self._notify_when_loaded:
+                        messagebox.showinfo("刷新完成", "历史记录已刷新", parent=self)
+                    self._notify_when_loaded = False
+        except queue.Empty:
+            pass
+        self._update_info_label()
+        if self._loading:
+            self.after(50, self._drain_pages)
+    
+    def _update_info_label(self):
+        if self._loading:
+            text = f"已加载 {len(self.history_data)} 条历史记录，正在加载…"
+        else:
+            text = f"共找到 {len(self.history_data)} 条历史记录"
+        self.info_label.config(text=text)
+        self.notebook.tab(self.events_frame, text=f"事件时间线（{len(self.event_data)}）")
+    
     def _export_excel(self):
         """导出到Excel"""
+        if self._loading:
+            messagebox.showinfo("请稍候", "历史记录仍在加载，请加载完成后再导出", parent=self)
+            return
         try:
             # 准备数据
             export_data = []
@@ -459,37 +592,22 @@ class HistoryDisplayWindow(tk.Toplevel):
             traceback.print_exc()
     
     def _refresh(self):
-        """刷新数据"""
-        try:
-            from .service import query_task_history
-            
-            self.history_data = query_task_history(
-                self.db_path,
-                self.wal,
-                self.project_id,
-                self.interface_id,
-                self.file_type
-            )
-            
-            self._populate_table()
-            
-            # 更新标题中的记录数
-            for widget in self.winfo_children():
-                if isinstance(widget, ttk.Frame):
-                    for child in widget.winfo_children():
-                        if isinstance(child, ttk.Label) and "共找到" in child['text']:
-                            child.config(text=f"共找到 {len(self.history_data)} 条历史记录")
-                            break
-                    break
-            
-            messagebox.showinfo("刷新完成", "历史记录已刷新", parent=self)
-            
-        except Exception as e:
-            messagebox.showerror("刷新失败", f"刷新历史记录失败：{e}", parent=self)
-            import traceback
-            traceback.print_exc()
+        """刷新数据（重新逐页读取）"""
+        self.history_data = []
+        self.event_data = []
+        self._populate_table()
+        for item in self.events_tree.get_children():
+            self.events_tree.delete(item)
+        self._notify_when_loaded = True
+        self._start_loading()
     
     def _close(self):
         """关闭窗口"""
         self.destroy()
+    
+    def destroy(self):
+        # 使后台加载线程停止（下一页读取后发现代次变化即退出）
+        self._load_generation = getattr(self, "_load_generation", 0) + 1
+        self._loading = False
+        super().destroy()
 
@@ -10,9 +10,9 @@ import random
 import sqlite3
 import os
 import pandas as pd
-from .config import load_config, set_config
-from .service import write_event, mark_completed, mark_confirmed, batch_upsert_tasks
-from .db import close_connection, close_connection_after_use, MaintenanceModeError
+from .config import get_cached_config, invalidate_config_cache, load_config, set_config
+from .service import write_event, batch_upsert_tasks
+from .db import close_connection, close_connection_after_use, lease_connection, note_lock_retry, MaintenanceModeError
 from .models import EventType
 from .util import (
     build_task_key_from_row, 
@@ -21,6 +21,26 @@ from .util import (
     safe_now,
     normalize_project_id
 )
+from utils import perf_trace
+
+
+def _trace_process_done(args, kwargs, result):
+    """on_process_done 埋点字段"""
+    names = ("file_type", "project_id", "source_file", "result_df")
+    values = dict(zip(names, args))
+    values.update({k: v for k, v in kwargs.items() if k in names})
+    df = values.get("result_df")
+    return {
+        "file_type": values.get("file_type"),
+        "project_id": values.get("project_id"),
+        "rows": 0 if df is None else len(df),
+    }
+
+
+def _trace_display_status(args, kwargs, result):
+    """get_task_states 埋点字段：行数为查询的任务数"""
+    task_keys = args[0] if args else kwargs.get("task_keys")
+    return {"rows": len(task_keys or [])}
 
 
 def _retry_on_lock(operation_name: str, func, max_retries: int = 5):
@@ -37,6 +57,7 @@ def _retry_on_lock(operation_name: str, func, max_retries: int = 5):
             if "locked" in error_msg or "busy" in error_msg:
                 last_error = e
                 if attempt < max_retries:
+                    note_lock_retry()
                     # 指数退避 + 随机抖动
                     delay = min(1.0 * (2 ** attempt) + random.uniform(0, 1), 15.0)
                     print(f"[Registry] {operation_name}锁定中，{delay:.1f}秒后重试 ({attempt + 1}/{max_retries})")
@@ -44,6 +65,7 @@ def _retry_on_lock(operation_name: str, func, max_retries: int = 5):
                     close_connection()
                     time.sleep(delay)
                     continue
+                note_lock_retry(failed=True)
             raise
         except Exception:
             raise
@@ -132,6 +154,8 @@ def set_data_folder(folder_path: str):
     """
     global _DATA_FOLDER
     _DATA_FOLDER = folder_path
+    # 用户刷新/选择目录时重新校验，丢弃该目录之前缓存的检查结果
+    invalidate_config_cache(folder_path)
     # 在“允许触网”的时机（用户刷新/选择目录后）主动校验一次 registry 目录可用性。
     # 若不可用：直接禁用并提示（不回退到本地 result_cache/registry.db）。
     try:
@@ -152,6 +176,13 @@ def set_data_folder(folder_path: str):
                     notify_error(msg, show_dialog=True)
                 except Exception:
                     print(f"[Registry] {msg}")
+        elif cfg.get('registry_outbox_enabled', True):
+            # 上次退出前未写入共享库的本机变更：后台继续补写
+            from .outbox import get_outbox, get_outbox_drainer
+            if get_outbox().pending_count():
+                drainer = get_outbox_drainer()
+                drainer.set_server(cfg)
+                drainer.wake()
     except Exception:
         # set_data_folder 不应影响主流程
         pass
@@ -165,48 +196,163 @@ def get_data_folder() -> Optional[str]:
     """
     return _DATA_FOLDER
 
-def get_display_status(task_keys: List[Dict[str, Any]], current_user_roles_str: str = None) -> Dict[str, str]:
+def _parse_roles(current_user_roles_str: Optional[str]) -> List[str]:
+    """解析逗号分隔的角色字符串"""
+    if not current_user_roles_str:
+        return []
+    return [r.strip() for r in current_user_roles_str.split(',') if r.strip()]
+
+
+@perf_trace.traced("get_task_states", describe=_trace_display_status)
+def get_task_states(task_keys: List[Dict[str, Any]], current_user_roles_str: str = None) -> Dict[str, Dict[str, Any]]:
     """
-    批量查询任务的显示状态（用于UI显示）
-    
+    批量查询任务的显示状态、确认信息与责任人（一个读事务内完成，网络盘优先读本地只读副本）
+
+    UI显示、导出过滤共用此接口，不再各自打开连接逐行查询。
+
     参数:
         task_keys: 任务key列表，每个key包含 file_type, project_id, interface_id, source_file, row_index, interface_time
         current_user_roles_str: 当前用户角色列表（逗号分隔，如"设计人员,1818接口工程师"）
-    
+
     返回:
-        Dict[task_id, display_status_text]: 任务ID到显示文本的映射
+        Dict[task_id, state]: state 含 display_status / confirmed_at / confirmed_by /
+        responsible_person / status / ignored（见 service.get_task_states）
     """
     try:
         _ensure_data_folder_from_task_keys(task_keys)
         cfg = _cfg()
         if not _enabled(cfg):
             return {}
-        
+
         db_path = cfg['registry_db_path']
         wal = bool(cfg.get('registry_wal', False))
-        
-        # 解析用户角色列表
-        user_roles = []
-        if current_user_roles_str:
-            user_roles = [r.strip() for r in current_user_roles_str.split(',') if r.strip()]
-        
-        from .service import get_display_status as service_get_display_status
-        return service_get_display_status(db_path, wal, task_keys, user_roles)
-        
+        roles = _parse_roles(current_user_roles_str)
+        outbox_enabled = cfg.get('registry_outbox_enabled', True)
+
+        # 本机 outbox 中没有待写入变更时才读服务端（否则需要在本机叠加未写入的状态）
+        if not outbox_enabled or _outbox_is_empty():
+            handled, states = _call_server(cfg, 'get_task_states', task_keys=task_keys, current_user_roles=roles)
+            if handled:
+                return states
+
+        from .service import get_task_states as service_get_task_states
+        from .sharding import group_by_shard, fan_out
+
+        # 按项目分片分组，各分片并行查询（未分片时只有主库一组）
+        groups = group_by_shard(db_path, task_keys)
+
+        def query_shard(shard_path):
+            pending_ops = None
+            if outbox_enabled:
+                # 本机已提交但尚未写入共享库的变更叠加到结果上（确认后立即刷新也能看到新状态）
+                from .outbox import peek_pending_ops
+                pending_ops = peek_pending_ops(shard_path)
+            return service_get_task_states(shard_path, wal, groups[shard_path], roles,
+                                           pending_ops=pending_ops)
+
+        # 分片库尚不存在说明该项目还没有任何任务，无需查询
+        shard_paths = [path for path in groups if path == db_path or os.path.exists(path)]
+        states = {}
+        for shard_states in fan_out(shard_paths, query_shard):
+            states.update(shard_states)
+        return states
+
     except MaintenanceModeError as e:
         _handle_maintenance_mode(e)
         return {}
     except Exception as e:
-        print(f"[Registry] get_display_status 失败: {e}")
+        print(f"[Registry] get_task_states 失败: {e}")
         import traceback
         traceback.print_exc()
         return {}
-    finally:
-        close_connection_after_use()
+
+
+def _outbox_is_empty() -> bool:
+    """本机 outbox 中没有待写入的变更"""
+    try:
+        from .outbox import get_outbox
+        return get_outbox().pending_count() == 0
+    except Exception:
+        return False
+
+
+def get_display_status(task_keys: List[Dict[str, Any]], current_user_roles_str: str = None) -> Dict[str, str]:
+    """
+    批量查询任务的显示状态（用于UI显示）
+    
+    参数:
+        task_keys: 任务key列表，每个key包含 file_type, project_id, interface_id, source_file, row_index, interface_time
+        current_user_roles_str: 当前用户角色列表（逗号分隔，如"设计人员,1818接口工程师"）
+    
+    返回:
+        Dict[task_id, display_status_text]: 任务ID到显示文本的映射（已忽略/无状态的任务不返回）
+    """
+    states = get_task_states(task_keys, current_user_roles_str)
+    return {tid: state["display_status"] for tid, state in states.items() if state["display_status"]}
+
+
+def get_active_tasks() -> List[Dict[str, Any]]:
+    """
+    读取所有未归档且未忽略的任务（延期提醒等全量扫描使用）
+
+    返回:
+        任务列表，每项含 file_type, project_id, interface_id, source_file, row_index,
+        interface_time, status, display_status, responsible_person, department, role
+    """
+    try:
+        cfg = _cfg()
+        if not _enabled(cfg):
+            return []
+        db_path = cfg.get('registry_db_path')
+        if not db_path:
+            print("[Registry] 数据库路径未设置")
+            return []
+
+        from .service import list_active_tasks
+        from .sharding import list_shard_paths, fan_out
+        wal = bool(cfg.get('registry_wal', False))
+        tasks = []
+        for shard_tasks in fan_out(list_shard_paths(db_path), lambda path: list_active_tasks(path, wal)):
+            tasks.extend(shard_tasks)
+        return tasks
+
+    except MaintenanceModeError as e:
+        _handle_maintenance_mode(e)
+        return []
+    except Exception as e:
+        print(f"[Registry] get_active_tasks 失败: {e}")
+        return []
+
+def registry_is_empty(db_path: str, wal: bool = False) -> bool:
+    """
+    Registry 中是否还没有任何任务（空库/新库时处理线程需执行一次 bootstrap 写入）
+
+    已分片时主库的 tasks 在拆分后为空，改为检查各分片：任一分片有任务即不为空。
+    维护模式下抛出 MaintenanceModeError，由调用方处理。
+
+    参数:
+        db_path: 主库路径（配置中的 registry_db_path）
+        wal: 是否使用WAL模式
+    """
+    from .sharding import is_sharded, list_shard_paths
+    from .db import get_connection, read_snapshot_connection
+
+    def _has_tasks(conn) -> bool:
+        row = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='tasks'").fetchone()
+        return bool(row) and conn.execute("SELECT 1 FROM tasks LIMIT 1").fetchone() is not None
+
+    if not is_sharded(db_path):
+        return not _has_tasks(get_connection(db_path, wal))
+    for shard_path in list_shard_paths(db_path):
+        with read_snapshot_connection(shard_path, wal, prefer_replica=False) as conn:
+            if _has_tasks(conn):
+                return False
+    return True
+
 
 def _cfg():
-    """加载配置（内部辅助函数）"""
-    return load_config(data_folder=_DATA_FOLDER)
+    """加载配置（内部辅助函数；按数据文件夹缓存，config.json 变化时自动重新加载）"""
+    return get_cached_config(data_folder=_DATA_FOLDER)
 
 def _enabled(cfg: dict) -> bool:
     """检查registry是否启用（内部辅助函数）"""
@@ -269,6 +415,65 @@ def _handle_maintenance_mode(error: Exception):
     except Exception:
         pass
 
+def _route(cfg: dict, project_id: Any) -> str:
+    """某项目的数据所在的数据库路径（未分片时即主库）"""
+    from .sharding import shard_db_path
+    return shard_db_path(cfg['registry_db_path'], project_id)
+
+
+def _call_server(cfg: dict, method: str, **params):
+    """
+    通过本机 Registry 服务执行（配置了 registry_server_url 时）
+
+    返回:
+        (是否已由服务执行, 结果)；未配置、服务不可用或服务端执行失败（如锁定重试用尽）时为 (False, None)，
+        调用方改为写入本机 outbox 或直接读写 SQLite，变更不会丢失
+    """
+    from .server import get_client, RegistryServerError, RegistryServerUnavailable
+    client = get_client(cfg)
+    if client is None:
+        return False, None
+    try:
+        return True, client.call(method, **params)
+    except RegistryServerUnavailable as e:
+        print(f"[Registry] 本机服务不可用，改为直接读写数据库: {e}")
+        return False, None
+    except RegistryServerError as e:
+        print(f"[Registry] 本机服务执行失败，改为本机处理: {e}")
+        return False, None
+
+
+def _submit_mutation(cfg: dict, operation: str, key: Dict[str, Any], params: Dict[str, Any], now: datetime) -> None:
+    """
+    提交一条任务变更
+
+    启用 outbox 时追加到本机 outbox 并唤醒后台写入（毫秒级返回，不在调用线程上等待共享盘或本机服务）；
+    配置了本机服务时由后台线程转交服务合并写入。未启用或 outbox 不可用时直接写入共享库。
+    """
+    from .outbox import apply_outbox_operation
+
+    db_path = _route(cfg, key.get('project_id'))
+    wal = bool(cfg.get('registry_wal', False))
+    params = dict(params, key=key, now=now.isoformat())
+
+    if cfg.get('registry_outbox_enabled', True):
+        try:
+            from .outbox import get_outbox, get_outbox_drainer
+            from .util import make_task_id
+            task_id = make_task_id(key['file_type'], key['project_id'], key['interface_id'],
+                                   key['source_file'], key['row_index'])
+            drainer = get_outbox_drainer()
+            drainer.set_server(cfg)
+            get_outbox().append(db_path, wal, operation, params, task_id=task_id)
+            drainer.wake()
+            return
+        except Exception as e:
+            print(f"[Registry] 写入本机outbox失败，改为直接写入: {e}")
+
+    apply_outbox_operation(None, db_path, wal, operation, params)
+
+
+@perf_trace.traced("on_process_done", describe=_trace_process_done)
 def on_process_done(
     file_type: int, 
     project_id: str, 
@@ -299,8 +504,9 @@ def on_process_done(
             return
         
         now = now or safe_now()
-        db_path = cfg['registry_db_path']
         wal = bool(cfg.get('registry_wal', False))
+        event_project_id = normalize_project_id(project_id, file_type)
+        event_db_path = _route(cfg, event_project_id)
         
         # 批量构造任务数据
         tasks_data = []
@@ -309,22 +515,42 @@ def on_process_done(
             fields = build_task_fields_from_row(row, file_type)
             tasks_data.append({'key': key, 'fields': fields})
         
-        # 【关键改进】使用重试机制执行批量upsert
-        def do_batch_upsert():
-            return batch_upsert_tasks(db_path, wal, tasks_data, now)
-        
-        count = _retry_on_lock("批量写入任务", do_batch_upsert)
+        # 【分片】按任务项目号路由（未分片时只有主库一组）；事件所在的库排在最后，与事件共用租约
+        from .sharding import group_by_shard
+        groups = group_by_shard(cfg['registry_db_path'], tasks_data, lambda item: item['key'].get('project_id'))
+        shard_batches = [(path, data) for path, data in groups.items() if path != event_db_path]
+        shard_batches.append((event_db_path, groups.get(event_db_path, [])))
         
         # 写入process_done事件（也使用重试）
-        def do_write_event():
-            write_event(db_path, wal, EventType.PROCESS_DONE, {
-                'file_type': file_type,
-                'project_id': normalize_project_id(project_id, file_type),
-                'source_file': get_source_basename(source_file),
-                'extra': {'count': count}
-            }, now)
+        event_payload = {
+            'file_type': file_type,
+            'project_id': event_project_id,
+            'source_file': get_source_basename(source_file),
+        }
         
-        _retry_on_lock("写入事件", do_write_event)
+        def do_write_event(count):
+            write_event(event_db_path, wal, EventType.PROCESS_DONE, dict(event_payload, extra={'count': count}), now)
+        
+        # 启用本机服务时由服务端写入，服务不可用时直接写入共享库
+        handled, count = _call_server(cfg, 'batch_upsert_tasks', tasks_data=tasks_data, now=now.isoformat())
+        if handled:
+            # 本机服务已写入任务，事件也交给服务（服务此时不可用则直接写入）
+            handled, _ = _call_server(cfg, 'write_event', event=EventType.PROCESS_DONE,
+                                      payload=dict(event_payload, extra={'count': count}), now=now.isoformat())
+            if not handled:
+                with lease_connection(event_db_path, wal):
+                    _retry_on_lock("写入事件", lambda: do_write_event(count))
+            shard_batches = []
+        else:
+            count = 0
+        for db_path, shard_data in shard_batches:
+            # 【关键改进】使用重试机制执行批量upsert；批量写入与事件写入共用一个租约连接
+            with lease_connection(db_path, wal):
+                if shard_data:
+                    count += _retry_on_lock("批量写入任务",
+                                            lambda: batch_upsert_tasks(db_path, wal, shard_data, now))
+                if db_path == event_db_path:
+                    _retry_on_lock("写入事件", lambda: do_write_event(count))
         
         if count == 0:
             print(f"[Registry] ⚠ 文件{file_type}项目{project_id}: 写入0条（数据库可能未正确初始化）")
@@ -374,15 +600,20 @@ def on_export_done(
             return
         
         now = now or safe_now()
-        db_path = cfg['registry_db_path']
+        event_project_id = normalize_project_id(project_id, file_type)
+        db_path = _route(cfg, event_project_id)
         wal = bool(cfg.get('registry_wal', False))
         
-        write_event(db_path, wal, EventType.EXPORT_DONE, {
+        payload = {
             'file_type': file_type,
-            'project_id': normalize_project_id(project_id, file_type),
+            'project_id': event_project_id,
             'source_file': get_source_basename(export_path),
             'extra': {'count': int(count), 'path': export_path}
-        }, now)
+        }
+        handled, _ = _call_server(cfg, 'write_event', event=EventType.EXPORT_DONE, payload=payload, now=now.isoformat())
+        if not handled:
+            with lease_connection(db_path, wal):
+                write_event(db_path, wal, EventType.EXPORT_DONE, payload, now)
         
         # 控制台输出优化：已验证逻辑，默认不输出
         
@@ -425,8 +656,6 @@ def on_assigned(
             return
         
         now = now or safe_now()
-        db_path = cfg['registry_db_path']
-        wal = bool(cfg.get('registry_wal', False))
         
         # 构造任务key
         key = {
@@ -437,34 +666,13 @@ def on_assigned(
             'row_index': int(row_index or 0),
         }
         
-        # 更新任务：设置指派信息和显示状态
-        fields = {
+        # 【优化】设置指派信息和显示状态、写入ASSIGNED事件（见 service.record_assignment）经本机outbox提交
+        from .outbox import OP_ASSIGNED
+        _submit_mutation(cfg, OP_ASSIGNED, key, {
             'assigned_by': assigned_by,
-            'assigned_at': now.isoformat(),
-            'display_status': '待完成',
-            'responsible_person': assigned_to,
-            # 明确：这是“指派动作”的显示状态更新，必须覆盖旧状态（不要被 upsert_task 的“默认值继承”逻辑回退）
-            '_force_display_status': True,
-        }
-        
-        from .service import upsert_task
-        upsert_task(db_path, wal, key, fields, now)
-        
-        # 写入ASSIGNED事件
-        write_event(db_path, wal, EventType.ASSIGNED, {
-            'file_type': file_type,
-            'project_id': key['project_id'],
-            'interface_id': key['interface_id'],
-            'source_file': key['source_file'],
-            'row_index': key['row_index'],
-            'extra': {
-                'assigned_by': assigned_by,
-                'assigned_to': assigned_to
-            }
+            'assigned_to': assigned_to,
         }, now)
         
-        # 控制台输出优化：已验证逻辑，默认不输出
-        
     except MaintenanceModeError as e:
         _handle_maintenance_mode(e)
     except Exception as e:
@@ -512,8 +720,6 @@ def on_response_written(
             return
         
         now = now or safe_now()
-        db_path = cfg['registry_db_path']
-        wal = bool(cfg.get('registry_wal', False))
         
         # 构造任务key
         key = {
@@ -524,103 +730,15 @@ def on_response_written(
             'row_index': int(row_index or 0),
         }
         
-        # 【状态提醒】查询任务是否有指派人
-        from .util import make_task_id
-        from .db import get_connection
-        
-        tid = make_task_id(
-            key['file_type'],
-            key['project_id'],
-            key['interface_id'],
-            key['source_file'],
-            key['row_index']
-        )
-        
-        # 连接数据库查询（后续复用同一连接，避免重复打开/维护模式误触发）
-        conn = get_connection(db_path, wal)
-        try:
-            cursor = conn.execute("SELECT assigned_by FROM tasks WHERE id=?", (tid,))
-            task_row = cursor.fetchone()
-            has_assignor = task_row and task_row[0]  # 是否有指派人
-        except Exception as e:
-            # 如果表结构不存在或查询失败，假设没有指派人
-            print(f"[Registry] 查询指派人失败（可能是旧数据库）: {e}")
-            has_assignor = False
-        
-        # 确定display_status
-        if has_assignor:
-            display_status = '待指派人审查'
-        else:
-            display_status = '待审查'
-        
-        print(f"[Registry] 回文单号写入 - 设置display_status={display_status}, has_assignor={has_assignor}")
-        
-        # 【修复】查询旧任务的interface_time，避免误判为时间变化
-        # 使用business_id查询，确保能找到同一接口的历史任务（即使row_index变化）
-        old_interface_time = ''
-        try:
-            from .util import make_business_id
-            business_id = make_business_id(key['file_type'], key['project_id'], key['interface_id'])
-            cursor = conn.execute("SELECT interface_time FROM tasks WHERE business_id=? ORDER BY last_seen_at DESC LIMIT 1", (business_id,))
-            row = cursor.fetchone()
-            if row and row[0]:
-                old_interface_time = row[0]
-        except Exception as e:
-            print(f"[Registry] 查询旧interface_time失败: {e}")
-        
-        # 【关键】判断是否为上级角色（自动确认逻辑）
-        superior_roles = ['一室主任', '二室主任', '建筑总图室主任', '所长', '所领导', '接口工程师']
-        is_superior = role and any(sup_role in role for sup_role in superior_roles)
-        
-        # 【修复】如果是上级角色填写，直接设置display_status为"已审查"
-        if is_superior:
-            display_status = '已审查'  # 上级自己填写，已完成审查
-            print(f"[Registry] 上级角色{role}填写回文单号，自动完成确认，设置状态为'已审查'")
-        
-        # 更新任务字段（包含completed_by和response_number）
-        fields_to_update = {
-            'display_status': display_status,  # 保持"待审查"或"待指派人审查"
-            'interface_time': old_interface_time,  # 保持时间不变，避免误判为时间变化
-            '_completed_col_value': '有值',  # 标记完成列已填充
-            'response_number': response_number,  # 记录回文单号
-            'completed_by': user_name  # 【新增】记录完成人姓名
-        }
-        if role:
-            fields_to_update['role'] = role
-        
-        # 如果是上级自动确认，设置confirmed_by和confirmed_at
-        if is_superior:
-            fields_to_update['confirmed_by'] = user_name
-            fields_to_update['confirmed_at'] = now.isoformat()  # 【新增】明确设置确认时间
-        
-        from .service import upsert_task
-        upsert_task(db_path, wal, key, fields_to_update, now, conn=conn)
-        
-        print(f"[Registry] upsert_task完成，display_status={display_status}, completed_by={user_name}")
-        
-        # 更新状态为completed
-        mark_completed(db_path, wal, key, now, conn=conn)
-        
-        # 如果是上级角色，同时更新状态为confirmed
-        if is_superior:
-            mark_confirmed(db_path, wal, key, now, confirmed_by=user_name, conn=conn)
-            print(f"[Registry] 上级角色{role}自动确认完成")
-        
-        # 写入response_written事件
-        write_event(db_path, wal, EventType.RESPONSE_WRITTEN, {
-            'file_type': file_type,
-            'project_id': key['project_id'],
-            'interface_id': key['interface_id'],
-            'source_file': key['source_file'],
-            'row_index': key['row_index'],
-            'extra': {
-                'response_number': response_number,
-                'user_name': user_name,
-                'source_column': source_column
-            }
-        }, now, conn=conn)
-        
-        # 控制台输出优化：已验证逻辑，默认不输出
+        # 【优化】更新为completed（上级角色填写时同时confirmed）、写入response_written事件
+        # （见 service.record_response）经本机outbox提交，不在调用线程上等待共享盘
+        from .outbox import OP_RESPONSE_WRITTEN
+        _submit_mutation(cfg, OP_RESPONSE_WRITTEN, key, {
+            'response_number': response_number,
+            'user_name': user_name,
+            'source_column': source_column,
+            'role': role,
+        }, now)
         
     except MaintenanceModeError as e:
         _handle_maintenance_mode(e)
@@ -663,8 +781,6 @@ def on_confirmed_by_superior(
             return
         
         now = now or safe_now()
-        db_path = cfg['registry_db_path']
-        wal = bool(cfg.get('registry_wal', False))
         
         # 构造任务key
         key = {
@@ -675,20 +791,10 @@ def on_confirmed_by_superior(
             'row_index': int(row_index or 0),
         }
         
-        # 【修复】更新状态为confirmed，传递确认人姓名
-        mark_confirmed(db_path, wal, key, now, confirmed_by=user_name)
-        
-        # 写入confirmed事件
-        write_event(db_path, wal, EventType.CONFIRMED, {
-            'file_type': file_type,
-            'project_id': key['project_id'],
-            'interface_id': key['interface_id'],
-            'source_file': key['source_file'],
-            'row_index': key['row_index'],
-            'extra': {'user_name': user_name}
-        }, now)
-        
-        # 控制台输出优化：已验证逻辑，默认不输出
+        # 【优化】更新为confirmed并写入confirmed事件（见 service.record_confirmation）经本机outbox提交，
+        # 勾选确认立即返回，不再在界面线程上等待共享盘
+        from .outbox import OP_CONFIRMED
+        _submit_mutation(cfg, OP_CONFIRMED, key, {'user_name': user_name}, now)
         
     except MaintenanceModeError as e:
         _handle_maintenance_mode(e)
@@ -715,19 +821,17 @@ def on_unconfirmed_by_superior(
             _ensure_data_folder_from_path(key.get("source_file"))
         except Exception:
             pass
-        from .service import mark_unconfirmed
-        
         cfg = _cfg()
         if not _enabled(cfg):
             return
         
         now = safe_now()
-        db_path = cfg['registry_db_path']
-        wal = bool(cfg.get('registry_wal', False))
         
         print(f"[Registry] 上级取消确认: 文件类型={key['file_type']}, 项目={key['project_id']}, 接口={key['interface_id']}, 用户={user_name}")
         
-        mark_unconfirmed(db_path, wal, key, now)
+        # 与确认经同一outbox提交，保证“确认→取消确认”按顺序写入
+        from .outbox import OP_UNCONFIRMED
+        _submit_mutation(cfg, OP_UNCONFIRMED, dict(key), {'user_name': user_name}, now)
         
     except MaintenanceModeError as e:
         _handle_maintenance_mode(e)
@@ -765,9 +869,14 @@ def on_scan_finalize(
         wal = bool(cfg.get('registry_wal', False))
         days = int(missing_keep_days if missing_keep_days is not None else int(cfg.get('registry_missing_keep_days', 7)))
         
-        # 执行归档逻辑
-        from .service import finalize_scan
-        finalize_scan(db_path, wal, now, days)
+        # 执行归档逻辑（已分片时逐个分片执行；启用本机服务时由服务端合并同时到达的收尾请求）
+        handled, _ = _call_server(cfg, 'finalize_scan', now=now.isoformat(), missing_keep_days=days)
+        if not handled:
+            from .service import finalize_scan
+            from .sharding import list_shard_paths
+            for shard_path in list_shard_paths(db_path):
+                with lease_connection(shard_path, wal):
+                    finalize_scan(shard_path, wal, now, days)
         
         print(f"[Registry] scan_finalize: batch={batch_tag}, missing_keep_days={days}")
         
@@ -798,10 +907,13 @@ def write_event_only(event: str, payload: dict) -> None:
             return
         
         now = safe_now()
-        db_path = cfg['registry_db_path']
+        db_path = _route(cfg, payload.get('project_id'))
         wal = bool(cfg.get('registry_wal', False))
         
-        write_event(db_path, wal, event, payload, now)
+        handled, _ = _call_server(cfg, 'write_event', event=event, payload=payload, now=now.isoformat())
+        if not handled:
+            with lease_connection(db_path, wal):
+                write_event(db_path, wal, event, payload, now)
         
     except MaintenanceModeError as e:
         _handle_maintenance_mode(e)
@@ -829,6 +941,46 @@ def invalidate_cache():
         print(f"[Registry] invalidate_cache 失败: {e}")
 
 
+def get_snapshot_version():
+    """
+    当前数据库内容版本（界面渲染缓存键的一部分）
+
+    返回:
+        版本元组；Registry 未启用或获取失败时返回 None
+    """
+    try:
+        cfg = _cfg()
+        if not _enabled(cfg) or not cfg.get('registry_db_path'):
+            return None
+        from .db import get_snapshot_version as db_snapshot_version
+        from .sharding import is_sharded, list_shard_paths
+        db_path = cfg['registry_db_path']
+        if is_sharded(db_path):
+            # 任一分片写入都会改变版本
+            return tuple(db_snapshot_version(path) for path in list_shard_paths(db_path))
+        return db_snapshot_version(db_path)
+    except Exception:
+        return None
+
+
+def warm_read_cache() -> bool:
+    """
+    后台预同步本地只读副本（刷新文件列表后由任务调度器以低优先级执行）
+
+    返回:
+        True = 本地副本可用；未启用、本地路径或同步失败时返回 False
+    """
+    try:
+        cfg = _cfg()
+        if not _enabled(cfg) or not cfg.get('registry_db_path'):
+            return False
+        from .db import warm_read_cache as db_warm_read_cache
+        return db_warm_read_cache(cfg['registry_db_path'])
+    except Exception as e:
+        print(f"[Registry] warm_read_cache 失败: {e}")
+        return False
+
+
 def force_sync_cache() -> bool:
     """
     强制同步本地缓存
@@ -917,6 +1069,13 @@ def shutdown():
     3. 本地缓存已清理
     """
     try:
+        # 0. 写入本机outbox中的变更（未写完的保留在本机，下次启动补写）
+        try:
+            from .outbox import shutdown_outbox
+            shutdown_outbox(timeout=5.0)
+        except Exception as e:
+            print(f"[Registry] 关闭outbox失败: {e}")
+        
         # 1. 刷新写入队列
         flush_write_queue(timeout=5.0)
         
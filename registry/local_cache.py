@@ -13,19 +13,27 @@
 """
 
 import os
-import shutil
 import sqlite3
 import time
 import threading
 from typing import Optional
 from datetime import datetime
 
+# SQLite 数据库文件头（前16字节）
+SQLITE_HEADER = b"SQLite format 3\x00"
+
+# 在线备份：每步复制的页数与步间休眠（限制对共享盘带宽的占用）
+BACKUP_PAGES_PER_STEP = 256
+BACKUP_STEP_SLEEP = 0.01
+
 
 class LocalCacheManager:
     """本地缓存管理器"""
     
     def __init__(self, network_db_path: str, local_cache_dir: str = None, 
-                 sync_interval: int = 300):
+                 sync_interval: int = 300,
+                 backup_pages: int = BACKUP_PAGES_PER_STEP,
+                 backup_sleep: float = BACKUP_STEP_SLEEP):
         """
         初始化本地缓存管理器
         
@@ -33,9 +41,13 @@ class LocalCacheManager:
             network_db_path: 网络盘数据库路径
             local_cache_dir: 本地缓存目录（默认为用户临时目录）
             sync_interval: 同步间隔（秒），默认5分钟
+            backup_pages: 在线备份每步复制的页数
+            backup_sleep: 在线备份每步之间的休眠秒数
         """
         self.network_db_path = network_db_path
         self.sync_interval = sync_interval
+        self.backup_pages = max(1, int(backup_pages))
+        self.backup_sleep = max(0.0, float(backup_sleep))
         
         # 本地缓存目录
         if local_cache_dir is None:
@@ -50,7 +62,8 @@ class LocalCacheManager:
         self.local_db_path = os.path.join(local_cache_dir, 'registry_local.db')
         self.last_sync_time = None
         self._local_conn = None
-        self._lock = threading.Lock()
+        # 【修复】可重入：get_read_connection 持锁时会调用 ensure_local_cache
+        self._lock = threading.RLock()
         self._enabled = True
     
     def is_enabled(self) -> bool:
@@ -93,33 +106,89 @@ class LocalCacheManager:
             return True
     
     def _full_sync(self) -> bool:
-        """完整同步：复制整个数据库"""
+        """
+        完整同步：用 SQLite 在线备份 API 生成一致的副本，校验后原子替换
+
+        原实现用 shutil.copy2 复制文件，其他用户（DELETE 日志模式）写入途中复制会得到损坏的副本。
+        这里在网络盘库上开启读事务（持有共享锁，写入方无法提交），按 backup_pages 分批复制、
+        每批之间休眠，复制到临时文件并校验文件头与页数后，再关闭旧连接并 os.replace 替换。
+        替换之前旧副本的连接仍可继续读取。
+        """
+        tmp_path = self.local_db_path + ".tmp"
         try:
-            print("[LocalCache] 首次同步，复制数据库...")
+            print("[LocalCache] 同步数据库（在线备份）...")
+            started = time.perf_counter()
+            network_mtime = self._backup_to(tmp_path)
             
-            # 关闭现有连接
-            self._close_local_conn_internal()
+            # 使用网络盘库的修改时间（与原 copy2 行为一致，供增量同步比较）
+            os.utime(tmp_path, (time.time(), network_mtime))
             
-            # 复制文件（带重试）
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    shutil.copy2(self.network_db_path, self.local_db_path)
-                    break
-                except (IOError, OSError) as e:
-                    if attempt < max_retries - 1:
-                        time.sleep(0.5)
-                    else:
-                        raise e
+            with self._lock:
+                self._close_local_conn_internal()
+                os.replace(tmp_path, self.local_db_path)
             
             self.last_sync_time = datetime.now()
-            print(f"[LocalCache] 同步完成: {self.local_db_path}")
+            print(f"[LocalCache] 同步完成: {self.local_db_path} ({time.perf_counter() - started:.2f}s)")
             return True
             
         except Exception as e:
             print(f"[LocalCache] 同步失败: {e}")
+            try:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            except OSError:
+                pass
             return False
     
+    def _backup_to(self, tmp_path: str) -> float:
+        """
+        把网络盘库备份到 tmp_path 并校验
+        
+        返回:
+            备份时网络盘库的修改时间
+        """
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        
+        src = sqlite3.connect(self.network_db_path, timeout=30.0)
+        try:
+            src.execute("PRAGMA query_only = ON")
+            # 读事务：备份期间看到同一个快照（DELETE 模式下持有共享锁）
+            src.execute("BEGIN")
+            src.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            expected_pages = src.execute("PRAGMA page_count").fetchone()[0]
+            network_mtime = os.path.getmtime(self.network_db_path)
+            
+            dest = sqlite3.connect(tmp_path)
+            try:
+                def _throttle(status, remaining, total):
+                    if remaining and self.backup_sleep:
+                        time.sleep(self.backup_sleep)
+                
+                src.backup(dest, pages=self.backup_pages, progress=_throttle)
+                dest_pages = dest.execute("PRAGMA page_count").fetchone()[0]
+                page_size = dest.execute("PRAGMA page_size").fetchone()[0]
+            finally:
+                dest.close()
+            src.rollback()
+        finally:
+            src.close()
+        
+        self._verify_replica(tmp_path, expected_pages, dest_pages, page_size)
+        return network_mtime
+    
+    @staticmethod
+    def _verify_replica(path: str, expected_pages: int, dest_pages: int, page_size: int) -> None:
+        """低成本校验：文件头、页数与文件大小（不做 integrity_check 全库扫描）"""
+        with open(path, "rb") as f:
+            header = f.read(len(SQLITE_HEADER))
+        if header != SQLITE_HEADER:
+            raise ValueError("副本文件头无效")
+        if dest_pages != expected_pages:
+            raise ValueError(f"副本页数不一致: {dest_pages} != {expected_pages}")
+        if os.path.getsize(path) != dest_pages * page_size:
+            raise ValueError("副本文件大小与页数不一致")
+    
     def _incremental_sync(self) -> bool:
         """增量同步：检查是否需要更新"""
         try:
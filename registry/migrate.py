@@ -146,14 +146,129 @@ def migrate_if_needed(db_path: str) -> None:
             pass
 
 
+# 按项目号拆分到分片库的表（均含 project_id 列）
+SHARDED_TABLES = ("tasks", "events", "ignored_snapshots", "event_summary")
+
+
+def _table_columns(conn: sqlite3.Connection, schema: str, table: str) -> list:
+    """某个已附加数据库中表的列名（表不存在时为空列表）"""
+    return [row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+
+def split_registry_by_project(db_path: str, remove_from_main: bool = True,
+                              require_maintenance: bool = True) -> dict:
+    """
+    把主库按项目号拆分为分片库（.registry/shards/registry_<项目号>.db）
+
+    步骤：
+    1. 升级主库字段，按项目号把 tasks / events / ignored_snapshots / event_summary 复制到各分片
+       （保留原 id，INSERT OR IGNORE，可重复执行）；applied_ops 复制到每个分片，避免 outbox 重复执行
+    2. 校验每个分片的行数不少于主库中对应项目的行数
+    3. 写入分片布局标记，此后所有客户端按项目号路由
+    4. remove_from_main 时从主库删除已拆分的数据并 VACUUM（write_tasks_log 等共享表保留在主库）
+
+    只能在维护模式下执行（其他客户端已退出），因此直接打开数据库文件。
+
+    参数:
+        db_path: 主库路径（registry.db）
+        remove_from_main: 拆分后是否从主库删除已复制的数据
+        require_maintenance: 是否要求处于维护模式（默认要求）
+
+    返回:
+        报告字典 {'projects', 'shards': {分片路径: {表名: 行数}}, 'layout_path', 'removed_from_main', 'seconds'}
+    """
+    import time
+    from datetime import datetime
+    from .db import is_maintenance_mode, init_db
+    from .sharding import shard_file_path, write_layout
+
+    if require_maintenance and not is_maintenance_mode(db_path=db_path):
+        raise RuntimeError("拆分分片只能在维护模式下执行，请先进入维护模式")
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(db_path)
+
+    started = time.perf_counter()
+    migrate_database(db_path)
+    conn = sqlite3.connect(db_path, timeout=60.0)
+    report = {"projects": 0, "shards": {}, "layout_path": None, "removed_from_main": False, "seconds": 0.0}
+    try:
+        tables = [t for t in SHARDED_TABLES if _table_columns(conn, "main", t)]
+        project_ids = set()
+        for table in tables:
+            project_ids.update(row[0] or "" for row in conn.execute(f"SELECT DISTINCT project_id FROM {table}"))
+
+        # 不同写法的项目号可能落入同一分片（如空值）
+        by_shard = {}
+        for project_id in sorted(project_ids):
+            by_shard.setdefault(shard_file_path(db_path, project_id), []).append(project_id)
+
+        for shard_path, shard_projects in by_shard.items():
+            os.makedirs(os.path.dirname(shard_path), exist_ok=True)
+            shard_conn = sqlite3.connect(shard_path, timeout=60.0)
+            try:
+                init_db(shard_conn)
+            finally:
+                shard_conn.close()
+
+            placeholders = ",".join("?" * len(shard_projects))
+            conn.execute("ATTACH DATABASE ? AS shard", (shard_path,))
+            try:
+                counts = {}
+                with conn:
+                    for table in tables:
+                        shard_columns = set(_table_columns(conn, "shard", table))
+                        columns = ", ".join(c for c in _table_columns(conn, "main", table) if c in shard_columns)
+                        conn.execute(
+                            f"INSERT OR IGNORE INTO shard.{table} ({columns}) "
+                            f"SELECT {columns} FROM main.{table} WHERE COALESCE(project_id, '') IN ({placeholders})",
+                            shard_projects,
+                        )
+                    if _table_columns(conn, "main", "applied_ops"):
+                        conn.execute("INSERT OR IGNORE INTO shard.applied_ops (op_id, applied_at) "
+                                     "SELECT op_id, applied_at FROM main.applied_ops")
+                for table in tables:
+                    where = f"WHERE COALESCE(project_id, '') IN ({placeholders})"
+                    expected = conn.execute(f"SELECT COUNT(*) FROM main.{table} {where}", shard_projects).fetchone()[0]
+                    copied = conn.execute(f"SELECT COUNT(*) FROM shard.{table} {where}", shard_projects).fetchone()[0]
+                    if copied < expected:
+                        raise RuntimeError(f"分片校验失败 {shard_path} {table}: {copied} < {expected}")
+                    counts[table] = copied
+            finally:
+                conn.execute("DETACH DATABASE shard")
+            report["shards"][shard_path] = counts
+            print(f"[Migrate] 分片 {os.path.basename(shard_path)}: "
+                  + ", ".join(f"{t}={n}" for t, n in counts.items()))
+
+        report["projects"] = len(project_ids)
+        report["layout_path"] = write_layout(db_path, sorted(project_ids), datetime.now().isoformat())
+
+        if remove_from_main:
+            with conn:
+                for table in tables:
+                    conn.execute(f"DELETE FROM {table}")
+            conn.execute("VACUUM")
+            report["removed_from_main"] = True
+    finally:
+        conn.close()
+
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    print(f"[Migrate] 已拆分为 {len(report['shards'])} 个分片（{report['projects']} 个项目），"
+          f"耗时 {report['seconds']:.2f}s")
+    return report
+
+
 if __name__ == "__main__":
     import sys
     
     if len(sys.argv) < 2:
-        print("用法: python migrate.py <数据库路径>")
+        print("用法: python migrate.py <数据库路径> [--split-by-project [--keep-main]]")
         print("示例: python migrate.py result_cache/registry.db")
+        print("      python -m registry.migrate <数据目录>/.registry/registry.db --split-by-project（需先进入维护模式）")
         sys.exit(1)
     
     db_path = sys.argv[1]
-    migrate_database(db_path)
+    if "--split-by-project" in sys.argv[2:]:
+        split_registry_by_project(db_path, remove_from_main="--keep-main" not in sys.argv[2:])
+    else:
+        migrate_database(db_path)
 
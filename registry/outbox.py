@@ -0,0 +1,530 @@
+"""
+本地写前日志（outbox）
+
+功能：
+1. 指派/回文/确认等钩子把变更追加到本机 SQLite 文件（LOCALAPPDATA 下），毫秒级返回
+2. 后台线程按顺序把变更批量交给 WriteQueue，在共享库的一个事务内执行
+3. 每条变更带幂等键（op_id），共享库 applied_ops 表记录已执行的键，重试不会重复执行
+4. 共享盘不可用/被锁时变更留在本机，恢复后（含下次启动）继续补写
+5. 尚未写入的变更叠加到本机的状态查询结果上（确认后立即刷新也能看到新状态）
+6. 配置了本机 Registry 服务时，后台线程把变更连同幂等键转交服务执行，服务不可用/失败时直接写入共享库
+
+使用场景：
+- 共享盘慢或被锁时，确认勾选不再在界面线程上等待重试
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+# 变更类型
+OP_ASSIGNED = "assigned"
+OP_RESPONSE_WRITTEN = "response_written"
+OP_CONFIRMED = "confirmed"
+OP_UNCONFIRMED = "unconfirmed"
+
+# 单条变更执行失败（非锁定/连接问题）的最大次数，超过后不再重试（保留在文件中供排查）
+OUTBOX_MAX_ATTEMPTS = 10
+
+
+class OutboxEntry(NamedTuple):
+    """待写入的变更"""
+    seq: int
+    op_id: str
+    db_path: str
+    wal: bool
+    operation: str
+    params: Dict[str, Any]
+    attempts: int
+
+
+def _default_outbox_path() -> str:
+    cache_dir = os.path.join(
+        os.environ.get('LOCALAPPDATA', os.path.expanduser('~')),
+        'InterfaceFilter',
+        'cache'
+    )
+    return os.path.join(cache_dir, 'registry_outbox.db')
+
+
+class LocalOutbox:
+    """本机变更日志（SQLite 文件，进程重启后仍保留）"""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        参数:
+            path: outbox 文件路径（默认 LOCALAPPDATA/InterfaceFilter/cache/registry_outbox.db）
+        """
+        self.path = path or _default_outbox_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # 本机磁盘：每次追加都落盘，断电也不丢
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS outbox (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                op_id TEXT NOT NULL UNIQUE,
+                db_path TEXT NOT NULL,
+                wal INTEGER NOT NULL DEFAULT 0,
+                operation TEXT NOT NULL,
+                task_id TEXT,
+                params TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                state TEXT NOT NULL DEFAULT 'pending'
+            );
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_state ON outbox(state, seq);")
+        self._conn.commit()
+        self._pending = self._conn.execute("SELECT COUNT(*) FROM outbox WHERE state = 'pending'").fetchone()[0]
+
+    def append(self, db_path: str, wal: bool, operation: str, params: Dict[str, Any],
+               task_id: Optional[str] = None) -> str:
+        """
+        追加一条变更（提交后返回）
+
+        返回:
+            幂等键 op_id
+        """
+        op_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO outbox (op_id, db_path, wal, operation, task_id, params, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (op_id, db_path, int(bool(wal)), operation, task_id,
+                 json.dumps(params, ensure_ascii=False), datetime.now().isoformat()),
+            )
+            self._conn.commit()
+            self._pending += 1
+        return op_id
+
+    def pending_count(self) -> int:
+        return self._pending
+
+    def due(self, limit: int = 50) -> List[OutboxEntry]:
+        """按追加顺序读取待写入的变更"""
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT seq, op_id, db_path, wal, operation, params, attempts
+                FROM outbox WHERE state = 'pending' ORDER BY seq LIMIT ?
+                """,
+                (int(limit),),
+            ).fetchall()
+        return [
+            OutboxEntry(seq, op_id, db_path, bool(wal), operation, json.loads(params), attempts)
+            for seq, op_id, db_path, wal, operation, params, attempts in rows
+        ]
+
+    def mark_applied(self, op_ids: List[str]) -> None:
+        """删除已写入共享库的变更"""
+        if not op_ids:
+            return
+        with self._lock:
+            cursor = self._conn.executemany("DELETE FROM outbox WHERE op_id = ?", [(op_id,) for op_id in op_ids])
+            self._conn.commit()
+            self._pending = max(0, self._pending - cursor.rowcount)
+
+    def mark_failed(self, op_id: str, error: str, max_attempts: int = OUTBOX_MAX_ATTEMPTS) -> bool:
+        """
+        记录一次执行失败
+
+        返回:
+            True = 已达到最大次数，不再重试
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET attempts = attempts + 1, last_error = ? WHERE op_id = ?",
+                (error, op_id),
+            )
+            cursor = self._conn.execute(
+                "UPDATE outbox SET state = 'dead' WHERE op_id = ? AND attempts >= ?",
+                (op_id, int(max_attempts)),
+            )
+            self._conn.commit()
+            dead = cursor.rowcount > 0
+            if dead:
+                self._pending = max(0, self._pending - 1)
+        return dead
+
+    def pending_ops(self, db_path: str) -> Dict[str, List[Tuple[str, Dict[str, Any]]]]:
+        """
+        尚未写入共享库的变更，按任务ID分组（按追加顺序）
+
+        与写入时的路由一致（见 _route_entry）：拆分分片前追加、仍记录主库路径的变更
+        按项目号归入对应分片。
+
+        参数:
+            db_path: 要叠加变更的库（主库或项目分片）
+        """
+        if not self._pending:
+            return {}
+        from .sharding import get_main_db_path, shard_db_path
+
+        paths = {db_path, get_main_db_path(db_path)}
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT task_id, db_path, operation, params FROM outbox
+                WHERE state = 'pending' AND db_path IN ({", ".join("?" * len(paths))}) AND task_id IS NOT NULL
+                ORDER BY seq
+                """,
+                tuple(paths),
+            ).fetchall()
+        result: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}
+        for task_id, entry_path, operation, params in rows:
+            params = json.loads(params)
+            key = params.get('key') or {}
+            if shard_db_path(entry_path, key.get('project_id')) != db_path:
+                continue
+            result.setdefault(task_id, []).append((operation, params))
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+
+
+def project_pending_ops(row: Dict[str, Any], ops: List[Tuple[str, Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    把尚未写入的变更叠加到任务行上（只改动显示相关字段，与 service.record_* 的写入结果一致）
+
+    参数:
+        row: read_task_rows 返回的任务行
+        ops: [(操作, 参数), ...]（按追加顺序）
+
+    返回:
+        新的任务行（不修改入参）
+    """
+    from .service import is_superior_response_role
+
+    row = dict(row)
+    for operation, params in ops:
+        now = params.get('now')
+        if operation == OP_ASSIGNED:
+            row.update({
+                'assigned_by': params.get('assigned_by'),
+                'assigned_at': now,
+                'display_status': '待完成',
+                'responsible_person': params.get('assigned_to'),
+            })
+        elif operation == OP_RESPONSE_WRITTEN:
+            if is_superior_response_role(params.get('role')):
+                row.update({
+                    'status': 'confirmed',
+                    'display_status': '已审查',
+                    'confirmed_at': now,
+                    'confirmed_by': params.get('user_name'),
+                })
+            else:
+                row.update({
+                    'status': 'completed',
+                    'display_status': '待指派人审查' if row.get('assigned_by') else '待审查',
+                })
+            row['completed_by'] = params.get('user_name')
+            row['response_number'] = params.get('response_number')
+        elif operation == OP_CONFIRMED:
+            row.update({
+                'status': 'confirmed',
+                'display_status': '已审查',
+                'confirmed_at': now,
+                'confirmed_by': params.get('user_name'),
+            })
+        elif operation == OP_UNCONFIRMED:
+            row.update({
+                'status': 'completed',
+                'display_status': '待审查',
+                'confirmed_at': None,
+                'confirmed_by': None,
+            })
+    return row
+
+
+def apply_outbox_operation(conn, db_path: str, wal: bool, operation: str, params: Dict[str, Any]) -> None:
+    """
+    执行一条变更（conn 为 None 时各函数自行打开/释放连接）
+
+    参数:
+        operation: 变更类型（OP_*）
+        params: 追加时记录的参数（含 key 与 now）
+    """
+    from .service import record_assignment, record_response, record_confirmation, mark_unconfirmed
+
+    key = params['key']
+    now = datetime.fromisoformat(params['now'])
+    if operation == OP_ASSIGNED:
+        record_assignment(db_path, wal, key, params.get('assigned_by'), params.get('assigned_to'), now, conn=conn)
+    elif operation == OP_RESPONSE_WRITTEN:
+        record_response(db_path, wal, key, params.get('response_number'), params.get('user_name'), now,
+                        source_column=params.get('source_column'), role=params.get('role'), conn=conn)
+    elif operation == OP_CONFIRMED:
+        record_confirmation(db_path, wal, key, params.get('user_name'), now, conn=conn)
+    elif operation == OP_UNCONFIRMED:
+        mark_unconfirmed(db_path, wal, key, now, conn=conn)
+    else:
+        raise ValueError(f"未知的变更类型: {operation}")
+
+
+def _route_entry(entry: OutboxEntry) -> str:
+    """变更实际要写入的库：追加时记录的是主库路径且之后已拆分分片时，改写到项目分片"""
+    from .sharding import shard_db_path
+    key = entry.params.get('key') or {}
+    return shard_db_path(entry.db_path, key.get('project_id'))
+
+
+class OutboxDrainer:
+    """后台把 outbox 中的变更按批次写入共享库"""
+
+    def __init__(self, outbox: LocalOutbox, batch_size: int = 50,
+                 idle_interval: float = 30.0, max_backoff: float = 60.0):
+        """
+        参数:
+            outbox: 本机变更日志
+            batch_size: 每个共享库事务最多执行的变更数
+            idle_interval: 无唤醒时的检查间隔（秒）
+            max_backoff: 共享库不可用时的最长重试间隔（秒）
+        """
+        from .write_queue import WriteQueue
+
+        self.outbox = outbox
+        self.batch_size = batch_size
+        self.idle_interval = idle_interval
+        self.max_backoff = max_backoff
+        # 不启动队列线程：批次在本线程上通过 WriteQueue.execute_batch 执行
+        self._write_queue = WriteQueue(enabled=False, max_batch_size=batch_size)
+        self._wake = threading.Event()
+        self._drain_lock = threading.Lock()
+        self._stopped = False
+        self._backoff = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._server_cfg: Optional[Dict[str, Any]] = None
+
+    def set_server(self, cfg: dict) -> None:
+        """按配置启用/停用经本机 Registry 服务写入（registry_server_url 为空时直接写入共享库）"""
+        url = (cfg.get('registry_server_url') or '').strip()
+        self._server_cfg = {
+            'registry_server_url': url,
+            'registry_server_timeout': cfg.get('registry_server_timeout', 10.0),
+        } if url else None
+
+    def wake(self) -> None:
+        """有新的变更：立即尝试写入"""
+        if self._stopped:
+            return
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="RegistryOutbox", daemon=True)
+            self._thread.start()
+        self._wake.set()
+
+    def drain_once(self) -> Tuple[int, bool]:
+        """
+        写入一批变更
+
+        返回:
+            (写入条数, 是否遇到共享库不可用)
+        """
+        from .db import lease_connection
+        from .write_queue import WriteOperation, WriteRequest
+
+        with self._drain_lock:
+            entries = self.outbox.due(self.batch_size)
+            if not entries:
+                return 0, False
+
+            # 只处理开头同一个共享库的连续变更，保证顺序
+            # （拆分分片前追加的变更按项目号重新路由到所在分片）
+            targets = [_route_entry(entry) for entry in entries]
+            db_path, wal = targets[0], entries[0].wal
+            batch = []
+            for entry, target in zip(entries, targets):
+                if (target, entry.wal) != (db_path, wal):
+                    break
+                batch.append(entry)
+
+            # 经本机服务写入；服务不可用或执行失败时改为直接写入共享库
+            # （服务端与直接写入都在各自事务内检查并记录 applied_ops，不会重复执行）
+            outcome = self._drain_via_server(batch)
+            if outcome is not None:
+                return outcome
+
+            requests = [
+                WriteRequest(WriteOperation.APPLY_OUTBOX, {
+                    'op_id': entry.op_id,
+                    'db_path': db_path,
+                    'wal': wal,
+                    'operation': entry.operation,
+                    'params': entry.params,
+                })
+                for entry in batch
+            ]
+            self._write_queue.set_db_path(db_path)
+            try:
+                with lease_connection(db_path, wal):
+                    self._write_queue.execute_batch(requests)
+            except Exception as e:
+                print(f"[Outbox] 共享库暂不可用，{len(batch)} 条变更保留在本机: {e}")
+                return 0, True
+
+            return self._record_outcomes(batch, [(bool(request.result), request.error, request.transient)
+                                                 for request in requests])
+
+    def _drain_via_server(self, batch: List[OutboxEntry]) -> Optional[Tuple[int, bool]]:
+        """
+        把一批变更转交本机 Registry 服务（同批在服务端合并为一个事务）
+
+        返回:
+            (写入条数, 是否遇到共享库不可用)；未配置服务、服务不可用或执行失败时返回 None（调用方直接写入）
+        """
+        if self._server_cfg is None:
+            return None
+        from .db import MaintenanceModeError
+        from .server import get_client, RegistryServerError, RegistryServerUnavailable
+
+        client = get_client(self._server_cfg)
+        if client is None:
+            return None
+        operations = [{'op_id': entry.op_id, 'operation': entry.operation, 'params': entry.params}
+                      for entry in batch]
+        try:
+            results = client.call('apply_operations', operations=operations)
+        except MaintenanceModeError as e:
+            print(f"[Outbox] 共享库维护中，{len(batch)} 条变更保留在本机: {e}")
+            return 0, True
+        except (RegistryServerUnavailable, RegistryServerError) as e:
+            print(f"[Outbox] 本机服务写入失败，改为直接写入共享库: {e}")
+            return None
+        return self._record_outcomes(batch, [(bool(r.get('ok')), r.get('error'), bool(r.get('transient')))
+                                             for r in results])
+
+    def _record_outcomes(self, batch: List[OutboxEntry],
+                         outcomes: List[Tuple[bool, Optional[str], bool]]) -> Tuple[int, bool]:
+        """
+        记录一批变更的执行结果：成功的从 outbox 删除，暂时失败的保留，其余累计失败次数
+
+        参数:
+            outcomes: 与 batch 对应的 (是否成功, 错误信息, 是否暂时失败)
+        """
+        applied = [entry.op_id for entry, (ok, _, _) in zip(batch, outcomes) if ok]
+        self.outbox.mark_applied(applied)
+        transient = False
+        for entry, (ok, error, is_transient) in zip(batch, outcomes):
+            if ok:
+                continue
+            if is_transient:
+                transient = True
+            elif self.outbox.mark_failed(entry.op_id, error or ""):
+                print(f"[Outbox] 变更多次执行失败，已放弃: {entry.operation} {entry.op_id}: {error}")
+        if applied:
+            print(f"[Outbox] 已写入 {len(applied)} 条变更，剩余 {self.outbox.pending_count()} 条")
+        return len(applied), transient
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        在调用线程上写入全部变更（退出前调用）
+
+        返回:
+            True = outbox 已清空
+        """
+        deadline = time.time() + timeout
+        while self.outbox.pending_count() and time.time() < deadline:
+            applied, transient = self.drain_once()
+            if transient or not applied:
+                break
+        return self.outbox.pending_count() == 0
+
+    def stop(self, timeout: float = 5.0) -> bool:
+        """停止后台线程并尽量写入剩余变更（未写入的保留到下次启动）"""
+        self._stopped = True
+        self._wake.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=timeout)
+        return self.flush(timeout=timeout)
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wake.wait(self._backoff or self.idle_interval)
+            self._wake.clear()
+            if self._stopped:
+                return
+            try:
+                while self.outbox.pending_count() and not self._stopped:
+                    applied, transient = self.drain_once()
+                    if transient:
+                        self._backoff = min(max(self._backoff * 2, 1.0), self.max_backoff)
+                        break
+                    self._backoff = 0.0
+                    if not applied:
+                        break
+            except Exception as e:
+                print(f"[Outbox] 写入变更失败: {e}")
+                self._backoff = min(max(self._backoff * 2, 1.0), self.max_backoff)
+
+
+# 模块级单例
+_outbox: Optional[LocalOutbox] = None
+_drainer: Optional[OutboxDrainer] = None
+_outbox_lock = threading.Lock()
+
+
+def get_outbox() -> LocalOutbox:
+    """获取本机 outbox 单例"""
+    global _outbox
+    with _outbox_lock:
+        if _outbox is None:
+            _outbox = LocalOutbox()
+        return _outbox
+
+
+def get_outbox_drainer() -> OutboxDrainer:
+    """获取后台写入线程单例"""
+    global _drainer
+    outbox = get_outbox()
+    with _outbox_lock:
+        if _drainer is None:
+            from .config import get_config
+            _drainer = OutboxDrainer(outbox, batch_size=get_config().get('registry_write_batch_size', 50))
+        return _drainer
+
+
+def peek_pending_ops(db_path: str) -> Dict[str, List[Tuple[str, Dict[str, Any]]]]:
+    """尚未写入的变更（outbox 未初始化时返回空字典，不创建文件）"""
+    outbox = _outbox
+    if outbox is None or not outbox.pending_count():
+        return {}
+    return outbox.pending_ops(db_path)
+
+
+def shutdown_outbox(timeout: float = 5.0) -> bool:
+    """
+    停止后台写入并关闭 outbox
+
+    返回:
+        True = 全部变更已写入共享库
+    """
+    global _outbox, _drainer
+    with _outbox_lock:
+        outbox, drainer = _outbox, _drainer
+        _outbox, _drainer = None, None
+    if outbox is None:
+        return True
+    drained = drainer.stop(timeout=timeout) if drainer else outbox.pending_count() == 0
+    if not drained:
+        print(f"[Outbox] 仍有 {outbox.pending_count()} 条变更未写入，下次启动后继续")
+    outbox.close()
+    return drained
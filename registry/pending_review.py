@@ -0,0 +1,190 @@
+"""
+待审查任务加回模块
+
+process_target_fileN 会把 Registry 中处于"待审查/待指派人审查"的任务加回筛选结果。
+原实现每处理一个项目文件就查询一次数据库，并逐行 df.iloc 建立接口号索引。
+
+本模块提供：
+1. PendingReviewSnapshot：一次处理运行内的待审查任务快照，每种文件类型只查询一次，按项目号分组
+2. collect_pending_review_rows：按快照在 DataFrame 中匹配需要加回的行
+
+用法（base.py 处理线程）：
+    begin_run_snapshot(cfg)
+    ... process_target_fileN 自动使用当前运行快照 ...
+    end_run_snapshot()
+"""
+import os
+import threading
+from typing import Dict, Iterable, Optional, Set
+
+import pandas as pd
+
+from utils import app_log
+from .util import extract_interface_id_series, extract_project_id_series
+
+PENDING_REVIEW_STATUSES = ('待审查', '待指派人审查')
+
+
+class PendingReviewSnapshot:
+    """一次处理运行内的待审查任务快照（按文件类型懒加载，每种类型只查询一次）"""
+
+    def __init__(self, db_path: Optional[str], wal: bool = False):
+        """
+        参数:
+            db_path: 数据库路径（为空或不存在时快照为空）
+            wal: 是否使用WAL模式
+        """
+        self.db_path = db_path
+        self.wal = bool(wal)
+        self.query_count = 0
+        self._lock = threading.Lock()
+        # file_type -> {project_id: {interface_id: display_status}}
+        self._by_type: Dict[int, Dict[str, Dict[str, str]]] = {}
+
+    @classmethod
+    def from_config(cls, cfg: dict = None) -> "PendingReviewSnapshot":
+        """按当前 Registry 配置创建快照"""
+        if cfg is None:
+            from .hooks import _cfg
+            cfg = _cfg()
+        return cls(cfg.get('registry_db_path'), bool(cfg.get('registry_wal', False)))
+
+    def tasks_by_project(self, file_type: int) -> Dict[str, Dict[str, str]]:
+        """
+        返回某文件类型的待审查任务
+
+        返回:
+            {project_id: {interface_id: display_status}}
+        """
+        file_type = int(file_type)
+        with self._lock:
+            cached = self._by_type.get(file_type)
+            if cached is not None:
+                return cached
+            grouped: Dict[str, Dict[str, str]] = {}
+            if self.db_path and os.path.exists(self.db_path):
+                for interface_id, project_id, display_status in self._query(file_type):
+                    grouped.setdefault(str(project_id or ""), {})[str(interface_id or "")] = display_status
+            self._by_type[file_type] = grouped
+            return grouped
+
+    def _query(self, file_type: int):
+        from .db import lease_connection
+        from .sharding import list_shard_paths
+
+        rows = []
+        # 已按项目分片时逐个分片查询（未分片时只有主库）；租约连接属于本线程，不与其他线程争用单例
+        for db_path in list_shard_paths(self.db_path):
+            with lease_connection(db_path, self.wal) as conn:
+                # 【方案A】只查询"待审查"状态的任务（设计人员已填写回文单号，等待确认）
+                # 不加回"待完成"或"请指派"状态，这些应该依赖Excel筛选条件
+                rows.extend(conn.execute("""
+                    SELECT interface_id, project_id, display_status
+                    FROM tasks
+                    WHERE file_type = ?
+                      AND display_status IN (?, ?)
+                      AND (ignored = 0 OR ignored IS NULL)
+                      AND status != 'archived'
+                """, (file_type,) + PENDING_REVIEW_STATUSES).fetchall())
+        self.query_count += 1
+        print(f"[Registry] 待审查快照：文件类型{file_type}共{len(rows)}个待审查任务")
+        return rows
+
+
+# ============================================================
+# 运行级快照（由 base.py 处理线程开启/结束）
+# ============================================================
+
+_active_lock = threading.Lock()
+_active_snapshot: Optional[PendingReviewSnapshot] = None
+
+
+def begin_run_snapshot(cfg: dict = None) -> Optional[PendingReviewSnapshot]:
+    """开启本轮处理的待审查快照，失败时返回 None（各文件退化为单独查询）"""
+    global _active_snapshot
+    try:
+        snapshot = PendingReviewSnapshot.from_config(cfg)
+    except Exception as e:
+        print(f"[Registry] 创建待审查快照失败: {e}")
+        snapshot = None
+    with _active_lock:
+        _active_snapshot = snapshot
+    return snapshot
+
+
+def end_run_snapshot() -> None:
+    """结束本轮处理的待审查快照"""
+    global _active_snapshot
+    with _active_lock:
+        _active_snapshot = None
+
+
+def get_active_snapshot() -> Optional[PendingReviewSnapshot]:
+    """返回当前运行快照（未开启时为 None）"""
+    return _active_snapshot
+
+
+# ============================================================
+# 向量化索引与匹配
+# ============================================================
+
+def collect_pending_review_rows(
+    df: pd.DataFrame,
+    file_type: int,
+    file_project_id: str,
+    allowed_rows: Iterable[int],
+    final_rows: Iterable[int],
+    snapshot: Optional[PendingReviewSnapshot] = None,
+    use_row_project: bool = False,
+) -> Set[int]:
+    """
+    匹配需要加回的待审查行
+
+    参数:
+        df: 原始数据（行位置即筛选集合中的行号，第0行为表头行不参与匹配）
+        file_type: 文件类型（1-6）
+        file_project_id: 文件项目号（通常取自文件名）
+        allowed_rows: 加回前必须满足的筛选集合（如科室筛选）
+        final_rows: 原始筛选结果（已在其中的行不重复加回）
+        snapshot: 待审查快照；为空时使用当前运行快照，仍为空则按当前配置临时查询
+        use_row_project: 是否优先使用行内项目号（文件4）；都取不到项目号时退化为仅按接口号匹配
+
+    返回:
+        需要加回的行号集合
+    """
+    if snapshot is None:
+        snapshot = get_active_snapshot() or PendingReviewSnapshot.from_config()
+    tasks = snapshot.tasks_by_project(file_type)
+    if not tasks or len(df) <= 1:
+        return set()
+
+    interface_ids = extract_interface_id_series(df, file_type)
+    file_project_id = str(file_project_id or "")
+    if use_row_project:
+        projects = extract_project_id_series(df)
+        projects = projects.where(projects != "", file_project_id)
+    else:
+        projects = pd.Series([file_project_id] * len(df), dtype=object)
+
+    matched = pd.Series(False, index=interface_ids.index)
+    for project_id in projects[projects != ""].unique():
+        ids = tasks.get(project_id)
+        if ids:
+            matched |= (projects == project_id) & interface_ids.isin(list(ids))
+    if use_row_project and not file_project_id:
+        # 文件名未能提取项目号时，退化为按接口号匹配
+        all_ids = {iid for ids in tasks.values() for iid in ids}
+        matched |= (projects == "") & interface_ids.isin(list(all_ids))
+    matched &= interface_ids != ""
+    matched.iloc[0] = False
+
+    allowed = set(allowed_rows)
+    final = set(final_rows)
+    pending = set()
+    for idx in matched[matched].index:
+        idx = int(idx)
+        # 【关键】必须通过科室筛选；已在原始筛选结果中的行跳过
+        if idx in allowed and idx not in final:
+            pending.add(idx)
+            app_log.debug("registry.pending", f"[Registry] 加回待审查任务: {interface_ids.iat[idx]}, 行{idx+2}")
+    return pending
@@ -0,0 +1,577 @@
+"""
+本机 Registry 服务（可选）
+
+由一个进程独占打开 registry.db，其他客户端通过本机 HTTP 接口调用 registry.service 的读写操作，
+不再各自通过 SMB 直接争用数据库文件锁：
+
+1. 写入（batch_upsert_tasks / mark_* / apply_operation(s) / write_event / finalize_scan）进入服务端队列，
+   由唯一的写线程按批次串行执行：同批的 mark_*/apply_operation/write_event 合并为一个事务（每条一个保存点），
+   同批重复的 finalize_scan 只执行一次
+   apply_operation 带 outbox 幂等键（op_id）时在同一事务内检查并记录 applied_ops，
+   客户端超时后改为直接写入也不会重复执行
+2. 读取（get_task_states / get_display_status）在请求线程上用独立只读连接执行，互不阻塞
+3. 已按项目分片时服务端负责路由（见 sharding）
+
+客户端通过配置 registry_server_url 启用（见 hooks）：任务变更先写入本机 outbox，由后台线程转交服务
+（apply_operations）；服务不可用时自动回退到直接读写 SQLite。
+
+启动：python -m registry.server --data-folder <数据目录> [--host 127.0.0.1] [--port 8765]
+
+协议：POST /rpc  {"method": 方法名, "params": {...}}
+      -> {"ok": true, "result": ...} 或 {"ok": false, "error": 说明, "type": 异常类型名}
+      GET /health -> {"ok": true, "db_path": ..., "stats": {...}}
+时间参数以 ISO 字符串传递。
+"""
+
+import json
+import queue
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# 服务端：收集一批写入的等待时间与单批上限
+SERVER_BATCH_INTERVAL = 0.05
+SERVER_MAX_BATCH = 200
+# 单个写入请求在服务端排队等待的最长时间（秒）：超时仍未开始执行的请求被取消，不会再执行
+SERVER_WRITE_TIMEOUT = 60.0
+# 客户端写入请求的超时比服务端等待时间多出的余量（秒）
+CLIENT_TIMEOUT_MARGIN = 5.0
+
+# 客户端：服务不可用后多久内直接回退直连、不再尝试连接（秒）
+CLIENT_RETRY_AFTER = 30.0
+
+READ_METHODS = ("get_task_states", "get_display_status", "ping")
+WRITE_METHODS = ("batch_upsert_tasks", "mark_completed", "mark_confirmed", "mark_unconfirmed",
+                 "apply_operation", "apply_operations", "write_event", "finalize_scan")
+# 可以合并到同一事务的写入（service 函数接受 conn 参数）
+_TRANSACTIONAL_METHODS = ("mark_completed", "mark_confirmed", "mark_unconfirmed", "apply_operation", "write_event")
+
+
+class RegistryServerUnavailable(ConnectionError):
+    """本机 Registry 服务无法连接（调用方应回退到直接读写 SQLite）"""
+
+
+class RegistryServerError(RuntimeError):
+    """服务端执行请求失败"""
+
+
+class _Call:
+    """一次写入调用（请求线程等待写线程执行完毕）"""
+
+    __slots__ = ("method", "params", "done", "result", "error", "transient", "started", "cancelled")
+
+    def __init__(self, method: str, params: Dict[str, Any]):
+        self.method = method
+        self.params = params
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        # 整个事务失败（锁定、连接问题）而非这一条变更本身出错
+        self.transient = False
+        # 由 RegistryServer._claim_lock 保护：写线程开始执行 / 请求线程等待超时取消
+        self.started = False
+        self.cancelled = False
+
+
+def _parse_now(params: Dict[str, Any]) -> datetime:
+    value = params.get("now")
+    return datetime.fromisoformat(value) if value else datetime.now()
+
+
+class RegistryServer:
+    """独占数据库的本机 Registry 服务"""
+
+    def __init__(self, db_path: str, wal: bool = False, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 batch_interval: float = SERVER_BATCH_INTERVAL, max_batch: int = SERVER_MAX_BATCH):
+        """
+        参数:
+            db_path: 主库路径（已分片时按项目路由到分片库）
+            wal: 是否使用WAL模式
+            host / port: 监听地址（port=0 时由系统分配，见 self.url）
+            batch_interval: 收集一批写入的等待时间（秒）
+            max_batch: 单批最多执行的写入数
+        """
+        self.db_path = db_path
+        self.wal = bool(wal)
+        self.batch_interval = float(batch_interval)
+        self.max_batch = int(max_batch)
+        self._queue: "queue.Queue[_Call]" = queue.Queue()
+        self._running = False
+        self._writer: Optional[threading.Thread] = None
+        self._http_thread: Optional[threading.Thread] = None
+        self._stats_lock = threading.Lock()
+        self._claim_lock = threading.Lock()
+        self.stats = {"reads": 0, "writes": 0, "batches": 0, "transactions": 0,
+                      "finalize_merged": 0, "errors": 0, "max_batch_size": 0}
+        self._httpd = ThreadingHTTPServer((host, int(port)), self._make_handler())
+        self._httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _count(self, **deltas) -> None:
+        with self._stats_lock:
+            for name, delta in deltas.items():
+                self.stats[name] += delta
+
+    # ------------------------------------------------------------------
+    # 生命周期
+    # ------------------------------------------------------------------
+
+    def start(self) -> "RegistryServer":
+        """在后台线程中启动写线程与 HTTP 服务（测试或嵌入主程序时使用）"""
+        self._start_writer()
+        self._http_thread = threading.Thread(target=self._httpd.serve_forever, name="RegistryServerHTTP", daemon=True)
+        self._http_thread.start()
+        print(f"[RegistryServer] 已启动: {self.url} -> {self.db_path}")
+        return self
+
+    def serve_forever(self) -> None:
+        """在当前线程提供服务，直到 Ctrl+C"""
+        self._start_writer()
+        print(f"[RegistryServer] 已启动: {self.url} -> {self.db_path}")
+        try:
+            self._httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """停止服务：不再接收请求，执行完队列中的写入后释放数据库连接"""
+        if self._http_thread is not None:
+            self._httpd.shutdown()
+            self._http_thread.join(timeout)
+            self._http_thread = None
+        self._httpd.server_close()
+        self._running = False
+        if self._writer is not None:
+            self._writer.join(timeout)
+            self._writer = None
+        from .db import close_connection
+        close_connection()
+
+    def _start_writer(self) -> None:
+        if self._writer is not None:
+            return
+        self._running = True
+        self._writer = threading.Thread(target=self._writer_loop, name="RegistryServerWriter", daemon=True)
+        self._writer.start()
+
+    # ------------------------------------------------------------------
+    # 请求分发
+    # ------------------------------------------------------------------
+
+    def dispatch(self, method: str, params: Dict[str, Any]) -> Any:
+        """执行一次调用：读取直接执行，写入交给写线程并等待结果"""
+        if method in READ_METHODS:
+            self._count(reads=1)
+            return self._read(method, params)
+        if method not in WRITE_METHODS:
+            raise ValueError(f"未知的方法: {method}")
+        if not self._running:
+            raise RegistryServerError("服务正在停止")
+        if method == "apply_operations":
+            return self._apply_operations(params.get("operations") or [])
+        call = _Call(method, params)
+        self._queue.put(call)
+        self._wait(call, time.monotonic() + SERVER_WRITE_TIMEOUT)
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def _wait(self, call: _Call, deadline: float) -> None:
+        """
+        等待写线程执行完毕
+
+        超时仍未开始执行的调用被取消（写线程不会再执行，抛出 TimeoutError）；
+        已开始执行的调用等到结束为止，保证返回时结果已确定。
+        """
+        if call.done.wait(max(0.0, deadline - time.monotonic())):
+            return
+        with self._claim_lock:
+            if not call.started:
+                call.cancelled = True
+                raise TimeoutError(f"{call.method} 等待执行超时（已取消）")
+        call.done.wait()
+
+    def _apply_operations(self, operations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        执行一批 outbox 变更（每条 {op_id, operation, params}，由写线程合并到同一事务）
+
+        返回:
+            与入参顺序一致的 [{"ok", "error", "transient"}]；transient=True 表示稍后可重试
+        """
+        calls = [_Call("apply_operation", dict(op.get("params") or {}, operation=op["operation"], op_id=op["op_id"]))
+                 for op in operations]
+        for call in calls:
+            self._queue.put(call)
+        deadline = time.monotonic() + SERVER_WRITE_TIMEOUT
+        outcomes = []
+        for call in calls:
+            try:
+                self._wait(call, deadline)
+            except TimeoutError as e:
+                outcomes.append({"ok": False, "error": str(e), "transient": True})
+                continue
+            if call.error is not None:
+                outcomes.append({"ok": False, "error": str(call.error), "transient": call.transient})
+            else:
+                outcomes.append({"ok": True, "error": None, "transient": False})
+        return outcomes
+
+    def _read(self, method: str, params: Dict[str, Any]) -> Any:
+        if method == "ping":
+            return True
+        from .service import get_task_states
+        from .sharding import group_by_shard, fan_out
+        import os
+
+        groups = group_by_shard(self.db_path, params.get("task_keys") or [])
+        roles = params.get("current_user_roles") or []
+        paths = [path for path in groups if path == self.db_path or os.path.exists(path)]
+        states: Dict[str, Dict[str, Any]] = {}
+        for shard_states in fan_out(paths, lambda path: get_task_states(path, self.wal, groups[path], roles)):
+            states.update(shard_states)
+        if method == "get_display_status":
+            return {tid: state["display_status"] for tid, state in states.items() if state["display_status"]}
+        return states
+
+    # ------------------------------------------------------------------
+    # 写线程
+    # ------------------------------------------------------------------
+
+    def _writer_loop(self) -> None:
+        while self._running or not self._queue.empty():
+            try:
+                first = self._queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            batch = [first]
+            deadline = time.monotonic() + self.batch_interval
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            with self._claim_lock:
+                batch = [call for call in batch if not call.cancelled]
+                for call in batch:
+                    call.started = True
+            if batch:
+                self._run_batch(batch)
+
+    def _run_batch(self, batch: List[_Call]) -> None:
+        """按顺序执行一批写入：相邻的可合并写入共用一个事务"""
+        from .db import lease_connection
+
+        with self._stats_lock:
+            self.stats["batches"] += 1
+            self.stats["writes"] += len(batch)
+            self.stats["max_batch_size"] = max(self.stats["max_batch_size"], len(batch))
+        try:
+            with lease_connection(self.db_path, self.wal):
+                index = 0
+                while index < len(batch):
+                    call = batch[index]
+                    if call.method in _TRANSACTIONAL_METHODS:
+                        group = [call]
+                        while index + len(group) < len(batch) and batch[index + len(group)].method in _TRANSACTIONAL_METHODS:
+                            group.append(batch[index + len(group)])
+                        self._run_transactional(group)
+                        index += len(group)
+                    elif call.method == "finalize_scan":
+                        # 同批的重复收尾请求（多个客户端同时扫描结束）只执行一次
+                        group = [call]
+                        while index + len(group) < len(batch) and batch[index + len(group)].method == "finalize_scan":
+                            group.append(batch[index + len(group)])
+                        self._run_finalize(group)
+                        index += len(group)
+                    else:
+                        self._run_single(call)
+                        index += 1
+        except Exception as e:
+            # 租约/连接失败：本批尚未完成的调用全部失败
+            for call in batch:
+                if not call.done.is_set():
+                    call.error = e
+                    call.transient = True
+                    call.done.set()
+            self._count(errors=1)
+        finally:
+            from .db import close_connection_after_use
+            close_connection_after_use()
+
+    def _finish(self, call: _Call, result: Any = None, error: Optional[BaseException] = None) -> None:
+        call.result = result
+        call.error = error
+        if error is not None:
+            self._count(errors=1)
+        call.done.set()
+
+    def _run_transactional(self, group: List[_Call]) -> None:
+        """同一分片的一组变更共用一个事务，每条变更一个保存点（失败只回滚这一条）"""
+        from .db import execute_with_retry, get_connection, invalidate_read_cache, lease_connection
+        from .sharding import shard_db_path
+        from .write_queue import _DeferredCommitConnection
+
+        by_path: Dict[str, List[_Call]] = {}
+        for call in group:
+            by_path.setdefault(shard_db_path(self.db_path, self._project_of(call)), []).append(call)
+
+        for db_path, calls in by_path.items():
+            def run():
+                conn = get_connection(db_path, self.wal)
+                conn.execute("BEGIN IMMEDIATE")
+                outcomes = []
+                try:
+                    for call in calls:
+                        conn.execute("SAVEPOINT server_call")
+                        try:
+                            self._apply_write(_DeferredCommitConnection(conn), db_path, call)
+                            conn.execute("RELEASE SAVEPOINT server_call")
+                            outcomes.append(None)
+                        except Exception as e:
+                            conn.execute("ROLLBACK TO SAVEPOINT server_call")
+                            conn.execute("RELEASE SAVEPOINT server_call")
+                            outcomes.append(e)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                return outcomes
+
+            try:
+                with lease_connection(db_path, self.wal):
+                    outcomes = execute_with_retry(run, operation_name="服务端批量写入")
+            except Exception as e:
+                for call in calls:
+                    call.transient = True
+                    self._finish(call, error=e)
+                continue
+            invalidate_read_cache()
+            self._count(transactions=1)
+            for call, error in zip(calls, outcomes):
+                self._finish(call, result=None if error else True, error=error)
+
+    def _run_finalize(self, group: List[_Call]) -> None:
+        from .db import execute_with_retry, lease_connection
+        from .service import finalize_scan
+        from .sharding import list_shard_paths
+
+        by_days: Dict[int, List[_Call]] = {}
+        for call in group:
+            by_days.setdefault(int(call.params.get("missing_keep_days", 7)), []).append(call)
+        for days, calls in by_days.items():
+            now = max(_parse_now(call.params) for call in calls)
+            try:
+                for db_path in list_shard_paths(self.db_path):
+                    with lease_connection(db_path, self.wal):
+                        execute_with_retry(lambda: finalize_scan(db_path, self.wal, now, days),
+                                           operation_name="服务端扫描收尾")
+            except Exception as e:
+                for call in calls:
+                    self._finish(call, error=e)
+                continue
+            self._count(finalize_merged=len(calls) - 1)
+            for call in calls:
+                self._finish(call, result=True)
+
+    def _run_single(self, call: _Call) -> None:
+        from .db import execute_with_retry, lease_connection
+        from .service import batch_upsert_tasks
+        from .sharding import group_by_shard
+
+        try:
+            tasks_data = call.params.get("tasks_data") or []
+            now = _parse_now(call.params)
+            count = 0
+            groups = group_by_shard(self.db_path, tasks_data, lambda item: item['key'].get('project_id'))
+            for db_path, shard_data in groups.items():
+                with lease_connection(db_path, self.wal):
+                    count += execute_with_retry(lambda: batch_upsert_tasks(db_path, self.wal, shard_data, now),
+                                                operation_name="服务端批量写入任务")
+            self._finish(call, result=count)
+        except Exception as e:
+            self._finish(call, error=e)
+
+    @staticmethod
+    def _project_of(call: _Call) -> Any:
+        if call.method == "write_event":
+            return (call.params.get("payload") or {}).get("project_id")
+        return (call.params.get("key") or {}).get("project_id")
+
+    def _apply_write(self, conn, db_path: str, call: _Call) -> None:
+        from .outbox import apply_outbox_operation
+        from .service import mark_completed, mark_confirmed, mark_unconfirmed, write_event
+
+        params = call.params
+        now = _parse_now(params)
+        if call.method == "mark_completed":
+            mark_completed(db_path, self.wal, params["key"], now, conn=conn)
+        elif call.method == "mark_confirmed":
+            mark_confirmed(db_path, self.wal, params["key"], now, confirmed_by=params.get("confirmed_by"), conn=conn)
+        elif call.method == "mark_unconfirmed":
+            mark_unconfirmed(db_path, self.wal, params["key"], now, conn=conn)
+        elif call.method == "apply_operation":
+            # outbox 幂等键：已执行（如客户端超时后已直接写入）则跳过，否则与变更在同一事务内记录
+            op_id = params.get("op_id")
+            if op_id and conn.execute("SELECT 1 FROM applied_ops WHERE op_id = ?", (op_id,)).fetchone():
+                return
+            apply_outbox_operation(conn, db_path, self.wal, params["operation"], dict(params, now=now.isoformat()))
+            if op_id:
+                conn.execute("INSERT INTO applied_ops (op_id, applied_at) VALUES (?, ?)",
+                             (op_id, datetime.now().isoformat()))
+        elif call.method == "write_event":
+            write_event(db_path, self.wal, params["event"], params.get("payload") or {}, now, conn=conn)
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):  # noqa: A002 - 覆盖基类签名
+                pass
+
+            def _reply(self, status: int, body: Dict[str, Any]) -> None:
+                data = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path != "/health":
+                    self._reply(404, {"ok": False, "error": "not found"})
+                    return
+                with server._stats_lock:
+                    stats = dict(server.stats)
+                self._reply(200, {"ok": True, "db_path": server.db_path, "stats": stats,
+                                  "queue": server._queue.qsize()})
+
+            def do_POST(self):
+                if self.path != "/rpc":
+                    self._reply(404, {"ok": False, "error": "not found"})
+                    return
+                try:
+                    length = int(self.headers.get("Content-Length") or 0)
+                    request = json.loads(self.rfile.read(length).decode("utf-8"))
+                    result = server.dispatch(request["method"], request.get("params") or {})
+                    self._reply(200, {"ok": True, "result": result})
+                except Exception as e:
+                    self._reply(200, {"ok": False, "error": str(e), "type": type(e).__name__})
+
+        return Handler
+
+
+class RegistryClient:
+    """本机 Registry 服务的客户端"""
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        """
+        参数:
+            url: 服务地址
+            timeout: 读取请求的超时（秒）；写入请求至少等待服务端的排队时间
+                     （SERVER_WRITE_TIMEOUT + CLIENT_TIMEOUT_MARGIN），避免客户端先超时、
+                     回退本机写入后服务端又执行一次
+        """
+        self.url = url.rstrip("/")
+        self.timeout = float(timeout)
+        self.write_timeout = max(self.timeout, SERVER_WRITE_TIMEOUT + CLIENT_TIMEOUT_MARGIN)
+        self._unavailable_until = 0.0
+
+    def available(self) -> bool:
+        """最近一次连接失败后的 CLIENT_RETRY_AFTER 秒内视为不可用（直接回退，不再等待连接超时）"""
+        return time.monotonic() >= self._unavailable_until
+
+    def call(self, method: str, **params) -> Any:
+        """
+        调用服务端方法
+
+        抛出:
+            RegistryServerUnavailable: 无法连接（调用方回退直连）
+            MaintenanceModeError: 服务端处于维护模式
+            RegistryServerError: 服务端执行失败
+        """
+        if not self.available():
+            raise RegistryServerUnavailable(f"Registry 服务暂不可用: {self.url}")
+        body = json.dumps({"method": method, "params": params}, ensure_ascii=False, default=str).encode("utf-8")
+        request = urllib.request.Request(self.url + "/rpc", data=body,
+                                         headers={"Content-Type": "application/json; charset=utf-8"})
+        timeout = self.timeout if method in READ_METHODS else self.write_timeout
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                reply = json.loads(response.read().decode("utf-8"))
+        except (urllib.error.URLError, ConnectionError, TimeoutError, OSError) as e:
+            self._unavailable_until = time.monotonic() + CLIENT_RETRY_AFTER
+            raise RegistryServerUnavailable(f"无法连接 Registry 服务 {self.url}: {e}") from e
+        if reply.get("ok"):
+            return reply.get("result")
+        if reply.get("type") == "MaintenanceModeError":
+            from .db import MaintenanceModeError
+            raise MaintenanceModeError(reply.get("error"))
+        raise RegistryServerError(f"{method}: {reply.get('error')}")
+
+
+_client: Optional[RegistryClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client(cfg: dict) -> Optional[RegistryClient]:
+    """
+    按配置返回服务客户端
+
+    返回:
+        未配置 registry_server_url 或服务暂不可用时返回 None（调用方直接读写 SQLite）
+    """
+    global _client
+    url = (cfg.get("registry_server_url") or "").strip()
+    if not url:
+        return None
+    with _client_lock:
+        if _client is None or _client.url != url.rstrip("/"):
+            _client = RegistryClient(url, timeout=cfg.get("registry_server_timeout", 10.0))
+        client = _client
+    return client if client.available() else None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import argparse
+    from .config import load_config
+
+    parser = argparse.ArgumentParser(description="本机 Registry 服务")
+    parser.add_argument("--data-folder", required=True, help="数据目录（使用其中的 .registry/registry.db）")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+
+    cfg = load_config(data_folder=args.data_folder)
+    RegistryServer(
+        cfg["registry_db_path"],
+        wal=bool(cfg.get("registry_wal", False)),
+        host=args.host,
+        port=args.port,
+        batch_interval=cfg.get("registry_server_batch_interval", SERVER_BATCH_INTERVAL),
+    ).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
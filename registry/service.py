@@ -5,8 +5,8 @@
 """
 import json
 from datetime import datetime
-from typing import Dict, Any, Optional, List
-from .db import get_connection, close_connection_after_use
+from typing import Dict, Any, Iterator, Optional, List, Tuple
+from .db import get_connection, close_connection_after_use, read_snapshot_connection
 from .models import Status, EventType
 from .util import make_task_id, make_business_id
 
@@ -671,6 +671,183 @@ def mark_unconfirmed(db_path: str, wal: bool, key: Dict[str, Any], now: datetime
     if owns_conn:
         close_connection_after_use()
 
+# 上级角色：填写回文单号时自动完成确认
+SUPERIOR_RESPONSE_ROLES = ('一室主任', '二室主任', '建筑总图室主任', '所长', '所领导', '接口工程师')
+
+
+def record_assignment(
+    db_path: str,
+    wal: bool,
+    key: Dict[str, Any],
+    assigned_by: str,
+    assigned_to: str,
+    now: datetime,
+    conn=None
+) -> None:
+    """
+    记录任务指派（更新指派信息与显示状态，并写入 ASSIGNED 事件）
+
+    参数:
+        key: 任务关键字段（已规范化）
+        assigned_by: 指派人（含角色）
+        assigned_to: 责任人姓名
+    """
+    owns_conn = conn is None
+    conn = conn or get_connection(db_path, wal)
+    try:
+        fields = {
+            'assigned_by': assigned_by,
+            'assigned_at': now.isoformat(),
+            'display_status': '待完成',
+            'responsible_person': assigned_to,
+            # 明确：这是“指派动作”的显示状态更新，必须覆盖旧状态（不要被 upsert_task 的“默认值继承”逻辑回退）
+            '_force_display_status': True,
+        }
+        upsert_task(db_path, wal, key, fields, now, conn=conn)
+        write_event(db_path, wal, EventType.ASSIGNED, {
+            'file_type': key['file_type'],
+            'project_id': key['project_id'],
+            'interface_id': key['interface_id'],
+            'source_file': key['source_file'],
+            'row_index': key['row_index'],
+            'extra': {
+                'assigned_by': assigned_by,
+                'assigned_to': assigned_to
+            }
+        }, now, conn=conn)
+    finally:
+        if owns_conn:
+            close_connection_after_use()
+
+
+def is_superior_response_role(role: Optional[str]) -> bool:
+    """填写回文单号的角色是否为上级（上级填写即视为已确认）"""
+    return bool(role) and any(sup_role in role for sup_role in SUPERIOR_RESPONSE_ROLES)
+
+
+def record_response(
+    db_path: str,
+    wal: bool,
+    key: Dict[str, Any],
+    response_number: str,
+    user_name: str,
+    now: datetime,
+    source_column: Optional[str] = None,
+    role: Optional[str] = None,
+    conn=None
+) -> None:
+    """
+    记录回文单号写入：任务更新为 completed（上级角色填写时同时 confirmed），并写入 RESPONSE_WRITTEN 事件
+
+    参数:
+        key: 任务关键字段（已规范化）
+        response_number: 回文单号
+        user_name: 填写人姓名
+        source_column: 写入列名（可选）
+        role: 填写人角色（可选）
+    """
+    owns_conn = conn is None
+    conn = conn or get_connection(db_path, wal)
+    try:
+        tid = make_task_id(
+            key['file_type'],
+            key['project_id'],
+            key['interface_id'],
+            key['source_file'],
+            key['row_index']
+        )
+        # 【状态提醒】有指派人时进入“待指派人审查”
+        try:
+            task_row = conn.execute("SELECT assigned_by FROM tasks WHERE id=?", (tid,)).fetchone()
+            has_assignor = bool(task_row and task_row[0])
+        except Exception as e:
+            # 如果表结构不存在或查询失败，假设没有指派人
+            print(f"[Registry] 查询指派人失败（可能是旧数据库）: {e}")
+            has_assignor = False
+        display_status = '待指派人审查' if has_assignor else '待审查'
+
+        # 【修复】查询旧任务的interface_time，避免误判为时间变化
+        # 使用business_id查询，确保能找到同一接口的历史任务（即使row_index变化）
+        old_interface_time = ''
+        try:
+            business_id = make_business_id(key['file_type'], key['project_id'], key['interface_id'])
+            row = conn.execute(
+                "SELECT interface_time FROM tasks WHERE business_id=? ORDER BY last_seen_at DESC LIMIT 1",
+                (business_id,)
+            ).fetchone()
+            if row and row[0]:
+                old_interface_time = row[0]
+        except Exception as e:
+            print(f"[Registry] 查询旧interface_time失败: {e}")
+
+        # 【关键】上级角色填写：直接视为已审查
+        is_superior = is_superior_response_role(role)
+        if is_superior:
+            display_status = '已审查'
+            print(f"[Registry] 上级角色{role}填写回文单号，自动完成确认，设置状态为'已审查'")
+
+        fields_to_update = {
+            'display_status': display_status,
+            'interface_time': old_interface_time,  # 保持时间不变，避免误判为时间变化
+            '_completed_col_value': '有值',  # 标记完成列已填充
+            'response_number': response_number,
+            'completed_by': user_name
+        }
+        if role:
+            fields_to_update['role'] = role
+        if is_superior:
+            fields_to_update['confirmed_by'] = user_name
+            fields_to_update['confirmed_at'] = now.isoformat()
+
+        upsert_task(db_path, wal, key, fields_to_update, now, conn=conn)
+        mark_completed(db_path, wal, key, now, conn=conn)
+        if is_superior:
+            mark_confirmed(db_path, wal, key, now, confirmed_by=user_name, conn=conn)
+
+        write_event(db_path, wal, EventType.RESPONSE_WRITTEN, {
+            'file_type': key['file_type'],
+            'project_id': key['project_id'],
+            'interface_id': key['interface_id'],
+            'source_file': key['source_file'],
+            'row_index': key['row_index'],
+            'extra': {
+                'response_number': response_number,
+                'user_name': user_name,
+                'source_column': source_column
+            }
+        }, now, conn=conn)
+        print(f"[Registry] 回文单号写入完成: display_status={display_status}, completed_by={user_name}")
+    finally:
+        if owns_conn:
+            close_connection_after_use()
+
+
+def record_confirmation(
+    db_path: str,
+    wal: bool,
+    key: Dict[str, Any],
+    confirmed_by: str,
+    now: datetime,
+    conn=None
+) -> None:
+    """记录上级确认：任务更新为 confirmed，并写入 CONFIRMED 事件"""
+    owns_conn = conn is None
+    conn = conn or get_connection(db_path, wal)
+    try:
+        mark_confirmed(db_path, wal, key, now, confirmed_by=confirmed_by, conn=conn)
+        write_event(db_path, wal, EventType.CONFIRMED, {
+            'file_type': key['file_type'],
+            'project_id': key['project_id'],
+            'interface_id': key['interface_id'],
+            'source_file': key['source_file'],
+            'row_index': key['row_index'],
+            'extra': {'user_name': confirmed_by}
+        }, now, conn=conn)
+    finally:
+        if owns_conn:
+            close_connection_after_use()
+
+
 def mark_ignored_batch(
     db_path: str, 
     wal: bool, 
@@ -821,48 +998,198 @@ def mark_ignored_batch(
         'failed_tasks': failed_tasks
     }
 
-def get_display_status(db_path: str, wal: bool, task_keys: List[Dict[str, Any]], current_user_roles: List[str] = None) -> Dict[str, str]:
+# 批量状态查询读取的任务列
+TASK_STATE_COLUMNS = (
+    "status",
+    "display_status",
+    "assigned_by",
+    "role",
+    "confirmed_at",
+    "confirmed_by",
+    "responsible_person",
+    "ignored",
+)
+
+# 未归档任务扫描（延期提醒等）读取的任务列
+ACTIVE_TASK_COLUMNS = (
+    "file_type",
+    "project_id",
+    "interface_id",
+    "source_file",
+    "row_index",
+    "interface_time",
+    "status",
+    "display_status",
+    "responsible_person",
+    "department",
+    "role",
+)
+
+# 单条 IN (...) 查询的参数个数上限（旧版 SQLite 限制 999 个变量）
+_IN_QUERY_CHUNK = 500
+
+_DISPLAY_EMOJI = {
+    '待完成': '📌',
+    '待设计人员完成': '📌',
+    '请指派': '❗',
+    '待审查': '⏳',
+    '待指派人审查': '⏳',
+    '待确认（可自行确认）': '⏳'
+}
+
+
+def read_task_rows(conn, task_ids, columns=TASK_STATE_COLUMNS) -> Dict[str, Dict[str, Any]]:
     """
-    批量查询任务的显示状态（用于UI显示）
-    
+    在一个读事务内批量读取任务行
+
+    按 _IN_QUERY_CHUNK 分批执行 WHERE id IN (...)，所有批次共享同一快照，
+    不会读到其他用户写入一半的状态。
+
     参数:
-        db_path: 数据库路径
-        wal: 是否使用WAL模式
-        task_keys: 任务key列表，每个key包含 file_type, project_id, interface_id, source_file, row_index, interface_time
-        current_user_roles: 当前用户角色列表（如["设计人员", "1818接口工程师"]）
-    
+        conn: 数据库连接（可为本地只读副本）
+        task_ids: 任务ID列表（可重复）
+        columns: 读取的列
+
     返回:
-        Dict[task_id, display_status_text]: 任务ID到显示文本的映射
-        例如: {"task_abc123": "📌 待完成", "task_def456": "⏳ 待审查"}
+        {task_id: {列名: 值}}，不存在的任务不出现在结果中
     """
-    if not task_keys:
-        return {}
-    
-    conn = get_connection(db_path, wal)
-    result = {}
-    
-    # 判断用户角色类型
+    ids = list(dict.fromkeys(task_ids))
+    rows = {}
+    if not ids:
+        return rows
+
+    select = ", ".join(columns)
+    own_txn = not conn.in_transaction
+    if own_txn:
+        conn.execute("BEGIN")
+    try:
+        for start in range(0, len(ids), _IN_QUERY_CHUNK):
+            chunk = ids[start:start + _IN_QUERY_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            cursor = conn.execute(
+                f"SELECT id, {select} FROM tasks WHERE id IN ({placeholders})",
+                chunk
+            )
+            for row in cursor:
+                rows[row[0]] = dict(zip(columns, row[1:]))
+    finally:
+        # 只读事务，结束即可
+        if own_txn and conn.in_transaction:
+            conn.rollback()
+    return rows
+
+
+def _role_flags(current_user_roles: Optional[List[str]]):
+    """返回 (是否设计人员, 是否上级角色)"""
     is_designer = False
     is_superior = False
-    if current_user_roles:
-        for role in current_user_roles:
-            if "设计人员" in role:
-                is_designer = True
-            if any(keyword in role for keyword in ['所领导', '室主任', '接口工程师']):
-                is_superior = True
-    
-    # 导入延期判断函数
+    for role in current_user_roles or []:
+        if "设计人员" in role:
+            is_designer = True
+        if any(keyword in role for keyword in ['所领导', '室主任', '接口工程师']):
+            is_superior = True
+    return is_designer, is_superior
+
+
+def _overdue_checker():
+    """导入延期判断函数（导入失败时一律视为未延期）"""
     try:
         import sys
         import os
         sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
         from utils.date_utils import is_date_overdue
+        return is_date_overdue
     except Exception:
-        # 如果导入失败，使用简单判断
-        def is_date_overdue(date_str):
-            return False
-    
+        return lambda date_str: False
+
+
+def compose_display_status(row: Dict[str, Any], is_overdue: bool, is_designer: bool, is_superior: bool) -> str:
+    """
+    由任务行计算UI显示文本
+
+    参数:
+        row: read_task_rows 返回的任务行
+        is_overdue: 接口时间是否已延期
+        is_designer: 当前用户是否含设计人员角色
+        is_superior: 当前用户是否含上级角色（所领导/室主任/接口工程师）
+
+    返回:
+        显示文本（如"📌 待完成"）；已忽略或无状态时返回空字符串
+    """
+    if row.get("ignored") == 1:
+        return ""
+
+    display_status = row.get("display_status")
+
+    # 【修复】已确认的任务统一显示"已审查"（旧数据的display_status可能不是"已审查"）
+    if row.get("confirmed_at"):
+        display_text = '已审查'
+        if is_overdue:
+            display_text = f"（已延期）{display_text}"
+        return display_text
+
+    if not display_status:
+        return ""
+
+    if display_status == '待完成':
+        if not row.get("responsible_person") and is_superior:
+            # 上级角色看到未指派的待完成任务：显示"请指派"
+            display_text = '请指派'
+        elif is_superior and not is_designer:
+            # 【需求2】纯上级角色看到"待设计人员完成"
+            display_text = '待设计人员完成'
+        else:
+            # 【需求3】重叠角色、设计人员或其他角色：显示"待完成"
+            display_text = '待完成'
+    else:
+        # 待确认状态保持不变（不受责任人影响）
+        display_text = display_status
+
+    emoji = _DISPLAY_EMOJI.get(display_text, '')
+    if is_overdue:
+        display_text = f"（已延期）{display_text}"
+    return f"{emoji} {display_text}" if emoji else display_text
+
+
+def get_task_states(
+    db_path: str,
+    wal: bool,
+    task_keys: List[Dict[str, Any]],
+    current_user_roles: List[str] = None,
+    conn=None,
+    pending_ops: Optional[Dict[str, List[Tuple[str, Dict[str, Any]]]]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    批量查询任务的显示状态、确认信息与责任人（一个读事务内完成）
+
+    参数:
+        db_path: 数据库路径
+        wal: 是否使用WAL模式
+        task_keys: 任务key列表，每个key包含 file_type, project_id, interface_id, source_file, row_index, interface_time
+        current_user_roles: 当前用户角色列表（如["设计人员", "1818接口工程师"]）
+        conn: 可选连接；不传时使用 read_snapshot_connection（网络盘优先本地只读副本）
+        pending_ops: 本机尚未写入共享库的变更 {task_id: [(操作, 参数), ...]}，叠加到读取结果上
+
+    返回:
+        Dict[task_id, state]，state 包含:
+            display_status: 显示文本（已忽略/无状态时为空字符串）
+            confirmed_at / confirmed_by / responsible_person / status: 数据库原值
+            ignored: 是否已忽略
+        数据库中不存在的任务不出现在结果中
+    """
+    if not task_keys:
+        return {}
+
+    if conn is None:
+        with read_snapshot_connection(db_path, wal) as snapshot_conn:
+            return get_task_states(db_path, wal, task_keys, current_user_roles, conn=snapshot_conn,
+                                   pending_ops=pending_ops)
+
+    is_designer, is_superior = _role_flags(current_user_roles)
+    is_date_overdue = _overdue_checker()
+
     try:
+        keyed = []
         for key in task_keys:
             tid = make_task_id(
                 key['file_type'],
@@ -871,94 +1198,96 @@ def get_display_status(db_path: str, wal: bool, task_keys: List[Dict[str, Any]],
                 key['source_file'],
                 key['row_index']
             )
-            
-            # 获取接口时间（用于判断是否延期）
-            interface_time = key.get('interface_time', '')
-            is_overdue = is_date_overdue(interface_time) if interface_time and interface_time != '-' else False
-            
-            # 查询任务信息
-            cursor = conn.execute(
-                """
-                SELECT status, display_status, assigned_by, role, confirmed_at, responsible_person, ignored
-                FROM tasks
-                WHERE id = ?
-                """,
-                (tid,)
-            )
-            row = cursor.fetchone()
-            
-            if not row:
+            keyed.append((tid, key.get('interface_time', '')))
+
+        rows = read_task_rows(conn, [tid for tid, _ in keyed])
+        if pending_ops:
+            from .outbox import project_pending_ops
+            for tid, ops in pending_ops.items():
+                if tid in rows:
+                    rows[tid] = project_pending_ops(rows[tid], ops)
+
+        result = {}
+        overdue_cache = {}
+        for tid, interface_time in keyed:
+            row = rows.get(tid)
+            if row is None:
                 # 任务不存在，不显示状态
                 continue
-            
-            status, display_status, assigned_by, role, confirmed_at, responsible_person, ignored = row
-            
-            # 【新增】如果任务被忽略，完全不返回（UI中会被过滤）
-            if ignored == 1:
-                continue
-            
-            # 【修复】如果已确认，直接使用display_status（应该已经是"已审查"）
-            if confirmed_at:
-                # 已确认的任务，display_status应该已经是"已审查"
-                # 如果不是（旧数据），使用"已审查"作为默认值
-                display_text = display_status if display_status == '已审查' else '已审查'
-                # 如果任务延期，在状态前加"（已延期）"
-                if is_overdue:
-                    display_text = f"（已延期）{display_text}"
-                result[tid] = display_text
-                continue
-            
-            # 如果有预设的display_status，根据用户角色调整显示
-            if display_status:
-                if display_status == '待完成':
-                    # 【新增】判断是否需要指派（没有责任人且是未完成状态）
-                    if not responsible_person and is_superior:
-                        # 上级角色看到未指派的待完成任务：显示"请指派"
-                        display_text = '请指派'
-                    # 【需求2】上级角色看到"待设计人员完成"，设计人员看到"待完成"
-                    elif is_superior and not is_designer:
-                        # 纯上级角色
-                        display_text = '待设计人员完成'
-                    elif is_designer and is_superior:
-                        # 【需求3】重叠角色：显示"待完成"
-                        display_text = '待完成'
-                    else:
-                        # 设计人员或其他角色
-                        display_text = '待完成'
-                else:
-                    # 待确认状态保持不变（不受责任人影响）
-                    display_text = display_status
-                
-                # 【新增】如果任务延期，在状态前加"（已延期）"
-                if is_overdue:
-                    display_text = f"（已延期）{display_text}"
-                
-                # 添加Emoji前缀
-                emoji_map = {
-                    '待完成': '📌',
-                    '待设计人员完成': '📌',
-                    '请指派': '❗',
-                    '待审查': '⏳',
-                    '待指派人审查': '⏳',
-                    '待确认（可自行确认）': '⏳'
-                }
-                
-                # 如果有"（已延期）"前缀，去掉前缀后查找emoji
-                emoji_key = display_text.replace('（已延期）', '')
-                emoji = emoji_map.get(emoji_key, '')
-                if emoji:
-                    result[tid] = f"{emoji} {display_text}"
-                else:
-                    result[tid] = display_text
-        
-        close_connection_after_use()
+            if interface_time and interface_time != '-':
+                if interface_time not in overdue_cache:
+                    overdue_cache[interface_time] = is_date_overdue(interface_time)
+                is_overdue = overdue_cache[interface_time]
+            else:
+                is_overdue = False
+            result[tid] = {
+                "display_status": compose_display_status(row, is_overdue, is_designer, is_superior),
+                "confirmed_at": row.get("confirmed_at"),
+                "confirmed_by": row.get("confirmed_by"),
+                "responsible_person": row.get("responsible_person"),
+                "status": row.get("status"),
+                "ignored": row.get("ignored") == 1,
+            }
         return result
-        
+
     except Exception as e:
-        print(f"[Registry] get_display_status内部错误: {e}")
-        close_connection_after_use()
+        print(f"[Registry] get_task_states内部错误: {e}")
         return {}
 
+
+def get_display_status(
+    db_path: str,
+    wal: bool,
+    task_keys: List[Dict[str, Any]],
+    current_user_roles: List[str] = None,
+    conn=None
+) -> Dict[str, str]:
+    """
+    批量查询任务的显示状态（用于UI显示）
+    
+    参数:
+        db_path: 数据库路径
+        wal: 是否使用WAL模式
+        task_keys: 任务key列表，每个key包含 file_type, project_id, interface_id, source_file, row_index, interface_time
+        current_user_roles: 当前用户角色列表（如["设计人员", "1818接口工程师"]）
+        conn: 可选连接（同 get_task_states）
+    
+    返回:
+        Dict[task_id, display_status_text]: 任务ID到显示文本的映射
+        例如: {"task_abc123": "📌 待完成", "task_def456": "⏳ 待审查"}
+        已忽略、无状态的任务不返回（UI中会被过滤）
+    """
+    states = get_task_states(db_path, wal, task_keys, current_user_roles, conn=conn)
+    return {tid: state["display_status"] for tid, state in states.items() if state["display_status"]}
+
+
+def list_active_tasks(db_path: str, wal: bool, conn=None) -> List[Dict[str, Any]]:
+    """
+    读取所有未归档且未忽略的任务（按 file_type, project_id, interface_id 排序）
+
+    参数:
+        db_path: 数据库路径
+        wal: 是否使用WAL模式
+        conn: 可选连接；不传时使用 read_snapshot_connection
+
+    返回:
+        任务列表，每项为 {ACTIVE_TASK_COLUMNS 列名: 值}
+    """
+    if conn is None:
+        with read_snapshot_connection(db_path, wal) as snapshot_conn:
+            return list_active_tasks(db_path, wal, conn=snapshot_conn)
+
+    cursor = conn.execute(
+        f"""
+        SELECT {", ".join(ACTIVE_TASK_COLUMNS)}
+        FROM tasks
+        WHERE status NOT IN ('archived')
+          AND (ignored IS NULL OR ignored = 0)
+        ORDER BY file_type, project_id, interface_id
+        """
+    )
+    return [dict(zip(ACTIVE_TASK_COLUMNS, row)) for row in cursor.fetchall()]
+
 def finalize_scan(db_path: str, wal: bool, now: datetime, missing_keep_days: int) -> None:
     """
     完成扫描，标记缺失任务并归档超期项
@@ -1508,6 +1837,191 @@ def batch_upsert_tasks(db_path: str, wal: bool, tasks_data: list, now: datetime)
         raise
 
 
+# 历史查询分页大小
+HISTORY_PAGE_SIZE = 200
+
+# 历史窗口/导出用到的任务列
+HISTORY_TASK_COLUMNS = (
+    "id",
+    "file_type",
+    "project_id",
+    "interface_id",
+    "source_file",
+    "row_index",
+    "status",
+    "display_status",
+    "ignored",
+    "ignored_at",
+    "ignored_by",
+    "ignored_reason",
+    "first_seen_at",
+    "completed_at",
+    "completed_by",
+    "confirmed_at",
+    "confirmed_by",
+    "archived_at",
+    "archive_reason",
+    "assigned_by",
+    "assigned_at",
+    "responsible_person",
+    "response_number",
+    "interface_time",
+    "last_seen_at",
+    "missing_since",
+)
+
+HISTORY_EVENT_COLUMNS = ("id", "ts", "event", "file_type", "project_id", "interface_id", "source_file", "row_index", "extra")
+
+
+def query_task_history_page(
+    db_path: str,
+    wal: bool,
+    project_id: str,
+    interface_id: str,
+    file_type: Optional[int] = None,
+    after: Optional[Tuple[str, int]] = None,
+    limit: int = HISTORY_PAGE_SIZE,
+    conn=None,
+) -> Tuple[List[Dict[str, Any]], Optional[Tuple[str, int]]]:
+    """
+    分页查询任务历史（按首次发现时间倒序，键集分页）
+
+    按 (project_id, interface_id[, file_type]) 列查询，走 idx_tasks_history 索引，
+    不再使用无法利用索引的 business_id LIKE '%|项目号|接口号'。
+
+    参数:
+        after: 上一页返回的游标；None 表示第一页
+        limit: 每页条数
+        conn: 已有连接（可选，默认打开读取最新数据的独立只读连接）
+
+    返回:
+        (本页记录, 下一页游标)；没有下一页时游标为 None
+    """
+    if conn is None:
+        with read_snapshot_connection(db_path, wal, prefer_replica=False) as read_conn:
+            return query_task_history_page(db_path, wal, project_id, interface_id, file_type,
+                                           after=after, limit=limit, conn=read_conn)
+
+    conditions = ["project_id = ?", "interface_id = ?"]
+    params: List[Any] = [project_id, interface_id]
+    if file_type:
+        conditions.append("file_type = ?")
+        params.append(int(file_type))
+    if after is not None:
+        conditions.append("(first_seen_at < ? OR (first_seen_at = ? AND rowid < ?))")
+        params.extend([after[0], after[0], after[1]])
+    params.append(int(limit))
+
+    rows = conn.execute(
+        f"""
+        SELECT {", ".join(HISTORY_TASK_COLUMNS)}, rowid
+        FROM tasks
+        WHERE {" AND ".join(conditions)}
+        ORDER BY first_seen_at DESC, rowid DESC
+        LIMIT ?
+        """,
+        params,
+    ).fetchall()
+
+    results = [dict(zip(HISTORY_TASK_COLUMNS, row[:-1])) for row in rows]
+    next_cursor = None
+    if len(rows) == limit:
+        last = rows[-1]
+        next_cursor = (last[HISTORY_TASK_COLUMNS.index("first_seen_at")], last[-1])
+    return results, next_cursor
+
+
+def query_interface_events_page(
+    db_path: str,
+    wal: bool,
+    project_id: str,
+    interface_id: str,
+    file_type: Optional[int] = None,
+    before_id: Optional[int] = None,
+    limit: int = HISTORY_PAGE_SIZE,
+    conn=None,
+) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """
+    分页查询同一接口的事件时间线（按事件 id 倒序，走 idx_events_interface 索引）
+
+    返回:
+        (本页事件, 下一页游标)；没有下一页时游标为 None
+    """
+    if conn is None:
+        with read_snapshot_connection(db_path, wal, prefer_replica=False) as read_conn:
+            return query_interface_events_page(db_path, wal, project_id, interface_id, file_type,
+                                               before_id=before_id, limit=limit, conn=read_conn)
+
+    conditions = ["project_id = ?", "interface_id = ?"]
+    params: List[Any] = [project_id, interface_id]
+    if file_type:
+        conditions.append("file_type = ?")
+        params.append(int(file_type))
+    if before_id is not None:
+        conditions.append("id < ?")
+        params.append(int(before_id))
+    params.append(int(limit))
+
+    rows = conn.execute(
+        f"""
+        SELECT {", ".join(HISTORY_EVENT_COLUMNS)}
+        FROM events
+        WHERE {" AND ".join(conditions)}
+        ORDER BY id DESC
+        LIMIT ?
+        """,
+        params,
+    ).fetchall()
+    results = [dict(zip(HISTORY_EVENT_COLUMNS, row)) for row in rows]
+    next_cursor = rows[-1][0] if len(rows) == limit else None
+    return results, next_cursor
+
+
+def iter_interface_history(
+    db_path: str,
+    wal: bool,
+    project_id: str,
+    interface_id: str,
+    file_type: Optional[int] = None,
+    task_cursor: Optional[Tuple[str, int]] = None,
+    skip_tasks: bool = False,
+    page_size: int = HISTORY_PAGE_SIZE,
+) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    逐页读取接口的任务历史与事件时间线（同一连接，供历史窗口后台加载）
+
+    参数:
+        task_cursor: 任务历史从该游标之后继续（第一页已由调用方读取时传入）
+        skip_tasks: True 表示任务历史已全部读取，只读取事件时间线
+
+    产出:
+        ("tasks", 本页任务) ... 然后 ("events", 本页事件) ...（热库事件之后继续读取归档事件）
+    """
+    with read_snapshot_connection(db_path, wal, prefer_replica=False) as conn:
+        if not skip_tasks:
+            cursor = task_cursor
+            while True:
+                rows, cursor = query_task_history_page(db_path, wal, project_id, interface_id, file_type,
+                                                       after=cursor, limit=page_size, conn=conn)
+                if rows:
+                    yield "tasks", rows
+                if cursor is None:
+                    break
+        before_id = None
+        while True:
+            rows, before_id = query_interface_events_page(db_path, wal, project_id, interface_id, file_type,
+                                                          before_id=before_id, limit=page_size, conn=conn)
+            if rows:
+                yield "events", rows
+            if before_id is None:
+                break
+        
+    # 已压缩到按月归档库的更早事件
+    from .event_archive import iter_archived_interface_events
+    for rows in iter_archived_interface_events(db_path, project_id, interface_id, file_type, page_size=page_size):
+        yield "events", rows
+
+
 def query_task_history(db_path: str, wal: bool, project_id: str, interface_id: str, file_type: Optional[int] = None) -> List[Dict[str, Any]]:
     """
     查询任务历史记录
@@ -1524,47 +2038,21 @@ def query_task_history(db_path: str, wal: bool, project_id: str, interface_id: s
     返回:
         历史记录列表（按创建时间倒序）
     """
-    conn = get_connection(db_path, wal)
-    
     try:
-        if file_type:
-            # 精确查询特定文件类型
-            business_id = f"{file_type}|{project_id}|{interface_id}"
-            sql = """
-                SELECT * FROM tasks 
-                WHERE business_id = ? 
-                ORDER BY first_seen_at DESC
-            """
-            params = (business_id,)
-        else:
-            # 查询所有文件类型
-            business_id_pattern = f"%|{project_id}|{interface_id}"
-            sql = """
-                SELECT * FROM tasks 
-                WHERE business_id LIKE ? 
-                ORDER BY first_seen_at DESC
-            """
-            params = (business_id_pattern,)
-        
-        cursor = conn.execute(sql, params)
-        rows = cursor.fetchall()
-        
-        # 转换为字典列表
-        columns = [desc[0] for desc in cursor.description]
-        results = []
-        for row in rows:
-            task = dict(zip(columns, row))
-            results.append(task)
-        
-        return results
-        
+        with read_snapshot_connection(db_path, wal, prefer_replica=False) as conn:
+            results: List[Dict[str, Any]] = []
+            cursor = None
+            while True:
+                rows, cursor = query_task_history_page(db_path, wal, project_id, interface_id, file_type,
+                                                       after=cursor, conn=conn)
+                results.extend(rows)
+                if cursor is None:
+                    return results
     except Exception as e:
         print(f"[Registry] 查询历史失败: {e}")
         import traceback
         traceback.print_exc()
         return []
-    finally:
-        close_connection_after_use()
 
 
 def find_tasks_for_force_assign(
@@ -0,0 +1,205 @@
+"""
+Registry 按项目分片存储
+
+把任务、事件按项目号拆分到独立的数据库文件，多个用户处理不同项目时不再争用同一把文件锁：
+
+    <data_folder>/.registry/registry.db                    主库（未分片时唯一的库）
+    <data_folder>/.registry/shards/shard_layout.json       分片布局标记（由迁移工具写入）
+    <data_folder>/.registry/shards/registry_<项目号>.db     各项目的分片库
+
+只有存在布局标记时才按项目路由，所有客户端据此得到一致的路由结果；
+未迁移的数据目录完全按原方式读写主库。拆分见 migrate.split_registry_by_project。
+"""
+
+import glob
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+SHARD_DIR_NAME = "shards"
+SHARD_LAYOUT_FILE = "shard_layout.json"
+SHARD_FILE_PREFIX = "registry_"
+# 项目号为空的记录落入的分片
+DEFAULT_SHARD_NAME = "_default"
+
+# 布局标记的检查间隔（秒）：避免每次读写都访问网络盘
+LAYOUT_CHECK_INTERVAL = 30.0
+# 跨分片读取的并发数
+FAN_OUT_WORKERS = 4
+
+_SAFE_NAME = re.compile(r"^[0-9A-Za-z_\-]+$")
+
+# 主库路径 -> (检查时间, 是否已分片)
+_LAYOUT_CACHE: Dict[str, Tuple[float, bool]] = {}
+_LAYOUT_LOCK = Lock()
+
+T = TypeVar('T')
+
+
+def get_shard_dir(db_path: str) -> str:
+    """分片目录：与 registry.db 同级的 shards"""
+    return os.path.join(os.path.dirname(db_path), SHARD_DIR_NAME)
+
+
+def get_layout_path(db_path: str) -> str:
+    """分片布局标记文件路径"""
+    return os.path.join(get_shard_dir(db_path), SHARD_LAYOUT_FILE)
+
+
+def is_shard_path(db_path: str) -> bool:
+    """路径是否为分片库（位于 shards 目录下）"""
+    if not db_path:
+        return False
+    return os.path.basename(os.path.dirname(db_path)) == SHARD_DIR_NAME
+
+
+def get_main_db_path(db_path: str) -> str:
+    """分片库对应的主库路径（主库路径原样返回）"""
+    if not is_shard_path(db_path):
+        return db_path
+    return os.path.join(os.path.dirname(os.path.dirname(db_path)), "registry.db")
+
+
+def is_sharded(db_path: str) -> bool:
+    """
+    主库是否已拆分为项目分片（按 LAYOUT_CHECK_INTERVAL 缓存检查结果）
+
+    参数:
+        db_path: 主库路径
+    """
+    if not db_path or is_shard_path(db_path):
+        return False
+    now = time.monotonic()
+    with _LAYOUT_LOCK:
+        cached = _LAYOUT_CACHE.get(db_path)
+        if cached and now - cached[0] < LAYOUT_CHECK_INTERVAL:
+            return cached[1]
+    sharded = os.path.exists(get_layout_path(db_path))
+    with _LAYOUT_LOCK:
+        _LAYOUT_CACHE[db_path] = (now, sharded)
+    return sharded
+
+
+def invalidate_layout_cache(db_path: Optional[str] = None) -> None:
+    """清除布局检查缓存（迁移完成后或测试中调用）"""
+    with _LAYOUT_LOCK:
+        if db_path is None:
+            _LAYOUT_CACHE.clear()
+        else:
+            _LAYOUT_CACHE.pop(db_path, None)
+
+
+def shard_name(project_id: Any) -> str:
+    """
+    项目号对应的分片名（可直接用作文件名）
+
+    仅含字母、数字、下划线、横线的项目号原样使用，其余取摘要，避免非法文件名。
+    """
+    text = str(project_id or "").strip()
+    if not text:
+        return DEFAULT_SHARD_NAME
+    if _SAFE_NAME.match(text):
+        return text
+    return "h" + hashlib.md5(text.encode("utf-8")).hexdigest()[:16]
+
+
+def shard_file_path(db_path: str, project_id: Any) -> str:
+    """某项目分片库的文件路径（不检查是否已分片，迁移工具使用）"""
+    return os.path.join(get_shard_dir(db_path), f"{SHARD_FILE_PREFIX}{shard_name(project_id)}.db")
+
+
+def shard_db_path(db_path: str, project_id: Any) -> str:
+    """
+    路由：某项目的数据所在的数据库路径
+
+    参数:
+        db_path: 主库路径（配置中的 registry_db_path）
+        project_id: 项目号
+
+    返回:
+        已分片时为 shards/registry_<项目号>.db，否则原样返回 db_path
+    """
+    if not is_sharded(db_path):
+        return db_path
+    return shard_file_path(db_path, project_id)
+
+
+def list_shard_paths(db_path: str) -> List[str]:
+    """
+    需要全量读取/扫描的数据库列表
+
+    返回:
+        已分片时为已存在的全部分片库（按文件名排序），否则为 [db_path]
+    """
+    if not is_sharded(db_path):
+        return [db_path]
+    pattern = os.path.join(get_shard_dir(db_path), f"{SHARD_FILE_PREFIX}*.db")
+    return sorted(glob.glob(pattern))
+
+
+def group_by_shard(db_path: str, items: Iterable[Dict[str, Any]],
+                   project_of: Callable[[Dict[str, Any]], Any] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    按所在分片分组（保持组内原有顺序）
+
+    参数:
+        db_path: 主库路径
+        items: 待分组的记录
+        project_of: 取项目号的函数，默认读取 item['project_id']
+    """
+    project_of = project_of or (lambda item: item.get('project_id'))
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for item in items:
+        groups.setdefault(shard_db_path(db_path, project_of(item)), []).append(item)
+    return groups
+
+
+def fan_out(db_paths: List[str], func: Callable[[str], T],
+            max_workers: int = FAN_OUT_WORKERS) -> List[T]:
+    """
+    在多个数据库上并行执行只读操作
+
+    func 必须自行打开独立连接（如 read_snapshot_connection），不能使用单例连接。
+    只有一个库时直接在当前线程执行。任一分片失败时抛出其异常。
+
+    返回:
+        与 db_paths 顺序一致的结果列表
+    """
+    if len(db_paths) <= 1:
+        return [func(path) for path in db_paths]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(db_paths)),
+                            thread_name_prefix="RegistryShardRead") as pool:
+        return list(pool.map(func, db_paths))
+
+
+def read_layout(db_path: str) -> Optional[Dict[str, Any]]:
+    """读取分片布局标记（未分片或读取失败时返回 None）"""
+    try:
+        with open(get_layout_path(db_path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_layout(db_path: str, projects: List[str], created_at: str) -> str:
+    """
+    写入分片布局标记（先写临时文件再替换，其他客户端不会读到半个文件）
+
+    返回:
+        标记文件路径
+    """
+    layout_path = get_layout_path(db_path)
+    os.makedirs(os.path.dirname(layout_path), exist_ok=True)
+    tmp_path = layout_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "created_at": created_at,
+                   "shards": {str(pid): shard_name(pid) for pid in projects}},
+                  f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, layout_path)
+    invalidate_layout_cache(db_path)
+    return layout_path
@@ -5,6 +5,7 @@
 """
 import hashlib
 import os
+import numpy as np
 import pandas as pd
 from datetime import datetime
 from typing import Dict, Any
@@ -102,6 +103,50 @@ def extract_interface_id(df_row: pd.Series, file_type: int) -> str:
     # 兜底：返回空字符串
     return ""
 
+# 【新增】接口号列映射（与 extract_interface_id 一致，供整列提取使用）
+INTERFACE_COL_MAP = {
+    1: 0,   # A列
+    2: 17,  # R列
+    3: 2,   # C列
+    4: 4,   # E列
+    5: 0,   # A列
+    6: 4,   # E列
+}
+
+
+def extract_interface_id_series(df: pd.DataFrame, file_type: int) -> pd.Series:
+    """
+    整列提取接口号（extract_interface_id 的向量化版本，结果逐行一致）
+
+    参数:
+        df: 原始数据
+        file_type: 文件类型（1-6）
+
+    返回:
+        与 df 等长、按位置索引（RangeIndex）的字符串 Series
+    """
+    if "接口号" in df.columns:
+        column = df["接口号"]
+    else:
+        col_idx = INTERFACE_COL_MAP.get(file_type)
+        if col_idx is None or col_idx >= len(df.columns):
+            return pd.Series([""] * len(df), dtype=object)
+        column = df.iloc[:, col_idx]
+    # 先按取值去重，只对唯一值做 str()/去角色后缀，再按编码展开（接口号重复率高时开销大幅降低）
+    values = column.to_numpy(dtype=object)
+    codes, uniques = pd.factorize(values)
+    cleaned = (
+        pd.Series(uniques, dtype=object).map(str).str.strip()
+        .str.replace(r'\([^)]*\)$', '', regex=True).str.strip()
+        .to_numpy(dtype=object)
+    )
+    result = cleaned.take(codes) if len(cleaned) else np.empty(len(values), dtype=object)
+    missing = codes < 0
+    if missing.any():
+        # 缺失值与逐行 str() 一致（'nan' / 'None'）
+        result[missing] = [str(v).strip() for v in values[missing]]
+    return pd.Series(result, dtype=object)
+
 def extract_project_id(df_row: pd.Series, file_type: int) -> str:
     """
     从DataFrame行中提取项目号
@@ -133,6 +178,21 @@ def extract_project_id(df_row: pd.Series, file_type: int) -> str:
     # 避免business_id不一致导致重复记录
     return project_id
 
+def extract_project_id_series(df: pd.DataFrame) -> pd.Series:
+    """
+    整列提取项目号（extract_project_id 的向量化版本）
+
+    返回:
+        与 df 等长、按位置索引的字符串 Series（取不到时为空字符串）
+    """
+    if "项目号" in df.columns:
+        values = df["项目号"].map(str).str.strip()
+    elif "source_file" in df.columns:
+        values = df["source_file"].map(str).str.extract(r'(\d{4})', expand=False).fillna("")
+    else:
+        values = pd.Series([""] * len(df), dtype=object)
+    return values.reset_index(drop=True)
+
 def extract_department(df_row: pd.Series) -> str:
     """
     从DataFrame行中提取部门/科室信息
@@ -157,6 +217,20 @@ def extract_department(df_row: pd.Series) -> str:
     
     return ""
 
+# 【新增】完成列映射（与 extract_completed_column_value 一致，供紧凑结果预先提取使用）
+COMPLETED_COL_MAP = {
+    1: 12,   # M列
+    2: 13,   # N列
+    3: (16, 19),  # Q列或T列（返回两者中任一有值的）
+    4: 21,   # V列
+    5: 13,   # N列
+    6: 9,    # J列
+}
+
+# 紧凑结果中保存完成列取值的列名
+COMPLETED_VALUE_COLUMN = "_completed_value"
+
+
 def extract_completed_column_value(df_row: pd.Series, file_type: int) -> str:
     """
     从DataFrame行中提取完成列的值（用于判断是否已填写回文单号）
@@ -176,16 +250,12 @@ def extract_completed_column_value(df_row: pd.Series, file_type: int) -> str:
     返回:
         列值字符串（去除前后空格），如果为空返回空字符串
     """
-    col_map = {
-        1: 12,   # M列
-        2: 13,   # N列
-        3: (16, 19),  # Q列或T列（返回两者中任一有值的）
-        4: 21,   # V列
-        5: 13,   # N列
-        6: 9,    # J列
-    }
+    # 【新增】紧凑结果（core.result_frame）已预先提取完成列的值
+    if COMPLETED_VALUE_COLUMN in df_row.index:
+        val = df_row[COMPLETED_VALUE_COLUMN]
+        return str(val).strip() if pd.notna(val) else ""
     
-    col_idx = col_map.get(file_type)
+    col_idx = COMPLETED_COL_MAP.get(file_type)
     if col_idx is None:
         return ""
     
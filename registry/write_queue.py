@@ -30,6 +30,7 @@ class WriteOperation(Enum):
     MARK_IGNORED = "mark_ignored"
     UNMARK_IGNORED = "unmark_ignored"
     WRITE_EVENT = "write_event"
+    APPLY_OUTBOX = "apply_outbox"  # 执行本机 outbox 中的一条变更（按幂等键去重）
 
 
 class WriteRequest:
@@ -52,6 +53,8 @@ class WriteRequest:
         self.timestamp = time.time()
         self.result = None
         self.error = None
+        # 整批失败（锁定/连接/维护模式）时为 True，可稍后原样重试
+        self.transient = False
 
 
 class WriteQueue:
@@ -182,6 +185,18 @@ class WriteQueue:
             ids.append(self.enqueue(op, data, callback))
         return ids
     
+    def execute_batch(self, requests: List[WriteRequest]) -> None:
+        """
+        在调用线程上以一个事务执行一批请求（结果写入各请求的 result/error/transient）
+        
+        参数:
+            requests: 写入请求列表
+        """
+        if not requests:
+            return
+        self._stats['total_requests'] += len(requests)
+        self._process_batch(requests)
+    
     def _worker_loop(self):
         """后台工作线程"""
         while self._running:
@@ -275,6 +290,7 @@ class WriteQueue:
                 for request in batch:
                     request.result = False
                     request.error = str(e)
+                    request.transient = True
                     if request.callback:
                         try:
                             request.callback(False, str(e))
@@ -288,6 +304,7 @@ class WriteQueue:
             for request in batch:
                 request.result = False
                 request.error = error_msg
+                request.transient = True
                 if request.callback:
                     try:
                         request.callback(False, error_msg)
@@ -298,6 +315,7 @@ class WriteQueue:
             for request in batch:
                 request.result = False
                 request.error = str(e)
+                request.transient = True
                 if request.callback:
                     try:
                         request.callback(False, str(e))
@@ -373,6 +391,8 @@ class WriteQueue:
             self._do_unmark_ignored(conn, data)
         elif op == WriteOperation.WRITE_EVENT:
             self._do_write_event(conn, data)
+        elif op == WriteOperation.APPLY_OUTBOX:
+            self._do_apply_outbox(conn, data)
         else:
             raise ValueError(f"未知操作类型: {op}")
     
@@ -471,6 +491,36 @@ class WriteQueue:
             detail=data.get('detail')
         )
     
+    def _do_apply_outbox(self, conn, data: dict):
+        """
+        执行 outbox 变更：applied_ops 中已有该幂等键则跳过；
+        变更在保存点内执行，失败时只回滚这一条，不影响同批其他变更
+        """
+        from registry.outbox import apply_outbox_operation
+        
+        op_id = data['op_id']
+        if conn.execute("SELECT 1 FROM applied_ops WHERE op_id = ?", (op_id,)).fetchone():
+            return  # 之前已执行（提交后本机删除前中断）
+        
+        conn.execute("SAVEPOINT outbox_op")
+        try:
+            apply_outbox_operation(
+                _DeferredCommitConnection(conn),
+                data.get('db_path', self._db_path),
+                data.get('wal', False),
+                data['operation'],
+                data['params'],
+            )
+            conn.execute(
+                "INSERT INTO applied_ops (op_id, applied_at) VALUES (?, ?)",
+                (op_id, datetime.now().isoformat())
+            )
+            conn.execute("RELEASE SAVEPOINT outbox_op")
+        except Exception:
+            conn.execute("ROLLBACK TO SAVEPOINT outbox_op")
+            conn.execute("RELEASE SAVEPOINT outbox_op")
+            raise
+    
     def get_stats(self) -> dict:
         """获取统计信息"""
         return dict(self._stats)
@@ -495,6 +545,22 @@ class WriteQueue:
         return self._queue.qsize() == 0
 
 
+class _DeferredCommitConnection:
+    """
+    批次事务内使用的连接包装：service 层函数内部的 commit() 不提交，
+    由批次结束时统一提交（否则一条变更会把整批事务提前提交）
+    """
+    
+    def __init__(self, conn):
+        self._conn = conn
+    
+    def commit(self):
+        pass
+    
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
 # 模块级单例
 _write_queue: Optional[WriteQueue] = None
 _queue_lock = threading.Lock()
@@ -0,0 +1 @@
+"""性能基准脚本（无界面运行，可在Linux/CI上执行）"""
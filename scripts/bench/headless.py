@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+无界面运行支持
+
+功能：
+1. 在非Windows环境下注入 winreg 桩模块（base.py 顶层 import winreg）
+2. 在缺少 _tkinter / 无显示器时注入 tkinter 桩模块
+3. 将 LOCALAPPDATA/APPDATA 与用户目录（HOME/USERPROFILE）指向临时目录，
+   避免基准测试读写真实的本机状态（outbox、缓存、日志等）
+
+说明：桩模块只保证"可导入"，不模拟任何界面行为；
+基准测试不会创建 tk.Tk() 窗口。
+"""
+
+import os
+import sys
+import types
+from unittest.mock import MagicMock
+
+
+def _install_winreg_stub():
+    """注入 winreg 桩模块（仅在真实模块不可用时）"""
+    if "winreg" in sys.modules:
+        return
+    try:
+        import winreg  # noqa: F401
+        return
+    except ImportError:
+        pass
+
+    # 标准库 mimetypes 在导入时根据 winreg 是否存在决定是否读取注册表，
+    # 先于桩模块导入，避免其误判为 Windows 环境
+    import mimetypes  # noqa: F401
+
+    stub = types.ModuleType("winreg")
+    stub.HKEY_CLASSES_ROOT = 0x80000000
+    stub.HKEY_CURRENT_USER = 0x80000001
+    stub.HKEY_LOCAL_MACHINE = 0x80000002
+    stub.KEY_READ = 0x20019
+    stub.KEY_WRITE = 0x20006
+    stub.KEY_ALL_ACCESS = 0xF003F
+    stub.REG_SZ = 1
+
+    def _unavailable(*_args, **_kwargs):
+        raise OSError("winreg 在当前平台不可用")
+
+    for name in ("OpenKey", "CreateKey", "SetValueEx", "QueryValueEx",
+                 "DeleteValue", "CloseKey", "EnumKey", "EnumValue"):
+        setattr(stub, name, _unavailable)
+    sys.modules["winreg"] = stub
+
+
+def _install_tkinter_stub():
+    """注入 tkinter 桩模块（仅在 _tkinter 不可用时）"""
+    try:
+        import tkinter  # noqa: F401
+        return
+    except ImportError:
+        pass
+
+    for name in ("tkinter", "tkinter.ttk", "tkinter.filedialog",
+                 "tkinter.messagebox", "tkinter.simpledialog",
+                 "tkinter.scrolledtext", "tkinter.font"):
+        sys.modules[name] = MagicMock(name=name)
+
+
+def install_headless_stubs(local_appdata: str = None):
+    """
+    安装无界面运行所需的桩模块
+
+    参数:
+        local_appdata: 可选，本机状态重定向目录（基准测试使用临时目录）；
+            LOCALAPPDATA、APPDATA 与用户目录（~）都指向该目录
+    """
+    _install_winreg_stub()
+    _install_tkinter_stub()
+    os.environ.setdefault("EXCEL_PROCESSOR_SKIP_AUTO_STARTUP", "1")
+    if local_appdata:
+        os.makedirs(local_appdata, exist_ok=True)
+        # registry outbox（Registry 启用时由 set_data_folder 打开并启动后台写入）、
+        # 指派记忆、性能日志等位于 LOCALAPPDATA；app_log 等位于 ~ 下
+        for name in ("LOCALAPPDATA", "APPDATA", "HOME", "USERPROFILE"):
+            os.environ[name] = local_appdata
+
+
+def repo_root() -> str:
+    """返回仓库根目录（scripts/bench 的上两级）"""
+    return os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def ensure_repo_on_path():
+    """确保仓库根目录位于 sys.path 首位"""
+    root = repo_root()
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    return root
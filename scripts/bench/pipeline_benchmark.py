@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+处理流水线基准（无界面）
+
+对合成数据文件夹按项目规模（默认 1 / 10 / 100 个项目）分别测量：
+1. read      ：pd.read_excel 读取源文件
+2. filter    ：process_target_fileN 的筛选与派生列（总耗时减去读取耗时）
+3. registry  ：registry.hooks.on_process_done 批量写入任务
+4. export    ：export_result_to_excelN 导出结果文件
+
+每个规模使用独立的临时数据目录（独立 registry.db），结果以 JSON 输出。
+
+使用方法：
+    python scripts/bench/pipeline_benchmark.py
+    python scripts/bench/pipeline_benchmark.py --scales 1,10 --rows 300 --output bench.json
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from scripts.bench.headless import install_headless_stubs  # noqa: E402
+from scripts.bench.synthetic_data import generate_data_folder  # noqa: E402
+
+STAGES = ("read", "filter", "registry", "export")
+DEFAULT_SCALES = (1, 10, 100)
+
+
+def _pipeline_functions():
+    """返回 {file_type: (process_func, export_func)}（延迟导入 core.main）"""
+    from core import main
+    return {
+        1: (main.process_target_file, main.export_result_to_excel),
+        2: (main.process_target_file2, main.export_result_to_excel2),
+        3: (main.process_target_file3, main.export_result_to_excel3),
+        4: (main.process_target_file4, main.export_result_to_excel4),
+        5: (main.process_target_file5, main.export_result_to_excel5),
+        6: (main.process_target_file6, main.export_result_to_excel6),
+    }
+
+
+def _call_process(process_func, file_type: int, path: str, project_id: str, now):
+    if file_type == 2:
+        return process_func(path, now, project_id)
+    return process_func(path, now)
+
+
+@contextlib.contextmanager
+def _quiet(enabled: bool):
+    """静默处理函数的大量 print 输出"""
+    if not enabled:
+        yield
+        return
+    sink = io.StringIO()
+    with contextlib.redirect_stdout(sink), contextlib.redirect_stderr(sink):
+        yield
+
+
+def run_scale(project_count: int, rows: int, work_dir: str, now: datetime.datetime,
+              seed: int = 0, quiet: bool = True) -> dict:
+    """
+    执行单个规模的基准
+
+    返回:
+        {"projects": N, "files": M, "rows_in": ..., "rows_out": ...,
+         "stages_ms": {stage: 总耗时}, "by_file_type": {ft: {stage: 耗时}}}
+    """
+    import pandas as pd
+    from registry import hooks as registry_hooks
+    from registry.pending_review import begin_run_snapshot, end_run_snapshot
+
+    folder = os.path.join(work_dir, f"data_{project_count}")
+    output_dir = os.path.join(work_dir, f"export_{project_count}")
+    os.makedirs(output_dir, exist_ok=True)
+
+    t0 = time.perf_counter()
+    files = generate_data_folder(folder, project_count, rows=rows, now=now, seed=seed)
+    generate_ms = (time.perf_counter() - t0) * 1000.0
+
+    with _quiet(quiet):
+        registry_hooks.set_data_folder(folder)
+        # 与主程序一致：本轮处理共享待审查快照
+        begin_run_snapshot()
+
+    functions = _pipeline_functions()
+    stages = {stage: 0.0 for stage in STAGES}
+    by_type: Dict[int, Dict[str, float]] = {}
+    rows_in = rows_out = 0
+
+    for file_type, project_id, path in files:
+        process_func, export_func = functions[file_type]
+        type_stages = by_type.setdefault(file_type, {stage: 0.0 for stage in STAGES})
+
+        with _quiet(quiet):
+            t0 = time.perf_counter()
+            raw = pd.read_excel(path, sheet_name=0, engine="openpyxl")
+            read_ms = (time.perf_counter() - t0) * 1000.0
+
+            t0 = time.perf_counter()
+            result = _call_process(process_func, file_type, path, project_id, now)
+            process_ms = (time.perf_counter() - t0) * 1000.0
+
+            registry_ms = export_ms = 0.0
+            if result is not None and not result.empty:
+                registry_df = result.copy()
+                registry_df["项目号"] = project_id
+                t0 = time.perf_counter()
+                registry_hooks.on_process_done(
+                    file_type=file_type,
+                    project_id=project_id,
+                    source_file=path,
+                    result_df=registry_df,
+                    now=now,
+                )
+                registry_ms = (time.perf_counter() - t0) * 1000.0
+
+                t0 = time.perf_counter()
+                export_func(result, path, now, output_dir, project_id)
+                export_ms = (time.perf_counter() - t0) * 1000.0
+
+        measured = {
+            "read": read_ms,
+            # process_target_fileN 内部会再次读取文件，扣除读取耗时得到筛选耗时
+            "filter": max(0.0, process_ms - read_ms),
+            "registry": registry_ms,
+            "export": export_ms,
+        }
+        for stage, ms in measured.items():
+            stages[stage] += ms
+            type_stages[stage] += ms
+        rows_in += len(raw)
+        rows_out += 0 if result is None else len(result)
+
+    with _quiet(quiet):
+        end_run_snapshot()
+        registry_hooks.shutdown()
+
+    return {
+        "projects": project_count,
+        "files": len(files),
+        "rows_in": rows_in,
+        "rows_out": rows_out,
+        "generate_ms": generate_ms,
+        "stages_ms": stages,
+        "by_file_type": {str(ft): values for ft, values in sorted(by_type.items())},
+    }
+
+
+def run_benchmark(scales=DEFAULT_SCALES, rows: int = 200, seed: int = 0,
+                  quiet: bool = True, now: Optional[datetime.datetime] = None) -> dict:
+    """执行全部规模的基准，返回报告字典"""
+    now = now or datetime.datetime.now()
+    work_dir = tempfile.mkdtemp(prefix="pipeline_bench_")
+    install_headless_stubs(os.path.join(work_dir, "appdata"))
+    try:
+        results = []
+        for project_count in scales:
+            item = run_scale(project_count, rows, work_dir, now, seed=seed, quiet=quiet)
+            results.append(item)
+            stages = item["stages_ms"]
+            print(
+                f"[Bench] {project_count:>3} 个项目 / {item['files']} 个文件: "
+                + "  ".join(f"{stage}={stages[stage]:.0f}ms" for stage in STAGES)
+            )
+        return {
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": sys.platform,
+            "rows_per_file": rows,
+            "seed": seed,
+            "scales": results,
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _parse_scales(text: str) -> List[int]:
+    return [int(part) for part in text.split(",") if part.strip()]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="处理流水线基准（读取/筛选/Registry写入/导出）")
+    parser.add_argument("--scales", default=",".join(str(s) for s in DEFAULT_SCALES),
+                        help="项目规模列表，逗号分隔（默认 1,10,100）")
+    parser.add_argument("--rows", type=int, default=200, help="每个文件的数据行数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--output", default="", help="可选：结果JSON路径")
+    parser.add_argument("--verbose", action="store_true", help="保留处理函数的控制台输出")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(_parse_scales(args.scales), rows=args.rows, seed=args.seed,
+                           quiet=not args.verbose)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"[Bench] 结果已写入: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Registry 多进程并发压力基准（无界面）
+
+启动 N 个工作进程，对同一个 registry.db 执行接近真实使用的混合操作：
+1. process_done ：batch_upsert_tasks + write_event（on_process_done 的写入路径，共用租约连接）
+2. display      ：get_display_status 批量查询显示状态
+3. mark         ：mark_completed / mark_confirmed
+4. finalize     ：finalize_scan
+
+分别在 DELETE 与 WAL 日志模式、不同进程数下运行，输出吞吐量、总体与各操作的 p50/p99 延迟、
+锁定重试次数（execute_with_retry 与钩子重试的计数）和错误率，结果以 JSON 输出。
+
+钩子会吞掉异常，因此工作进程直接调用钩子内部使用的 service 函数并用 execute_with_retry 包装，
+锁定重试与最终失败都能计入统计。--server 时改为经本机 Registry 服务读写（见 registry/server.py）。
+
+使用方法：
+    python scripts/bench/registry_concurrency_benchmark.py
+    python scripts/bench/registry_concurrency_benchmark.py --processes 4,16 --duration 20 --modes delete,wal --output bench.json
+    python scripts/bench/registry_concurrency_benchmark.py --server --processes 16
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+OPERATIONS = ("process_done", "display", "mark", "finalize")
+DEFAULT_MIX = {"process_done": 10, "display": 60, "mark": 25, "finalize": 5}
+DEFAULT_PROCESSES = (1, 4, 16)
+DEFAULT_MODES = ("delete", "wal")
+# 工作进程启动（导入模块）完成后统一开始计时的等待时间（秒）
+START_DELAY = 3.0
+
+
+def _key(project: int, row: int) -> dict:
+    return {
+        "file_type": 1,
+        "project_id": f"{2000 + project}",
+        "interface_id": f"S-BENCH-{project:02d}-{row:05d}",
+        "source_file": f"bench_{2000 + project}.xlsx",
+        "row_index": row + 2,
+        "interface_time": "2025.01.01",
+    }
+
+
+def _fields(row: int) -> dict:
+    # 重复扫描时预期时间、完成列保持不变（与实际重复处理同一文件一致），
+    # 不会在一秒内反复触发归档（归档 id 按秒生成）
+    return {
+        "department": "结构",
+        "interface_time": f"2025.{row % 12 + 1:02d}.{row % 28 + 1:02d}",
+        "role": "设计人员",
+        "display_status": "待完成",
+        "_completed_col_value": "2025.01.15",
+    }
+
+
+def seed_database(db_path: str, wal: bool, projects: int, tasks_per_project: int,
+                  now: datetime.datetime) -> str:
+    """
+    创建基准用数据库并写入初始任务
+
+    返回:
+        实际的日志模式（journal_mode）
+    """
+    from registry import db as registry_db
+    from registry.service import batch_upsert_tasks
+
+    tasks = [{"key": _key(p, r), "fields": _fields(r)} for p in range(projects) for r in range(tasks_per_project)]
+    batch_upsert_tasks(db_path, wal, tasks, now)
+    journal_mode = registry_db.get_connection(db_path, wal).execute("PRAGMA journal_mode").fetchone()[0]
+    registry_db.close_connection()
+    return journal_mode
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    """最近秩百分位（sorted_values 已排序）"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def _latency_summary(values: List[float]) -> dict:
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "p50": round(_percentile(ordered, 0.50), 3),
+        "p99": round(_percentile(ordered, 0.99), 3),
+        "max": round(ordered[-1], 3) if ordered else 0.0,
+    }
+
+
+def _choose(rng: random.Random, mix: Dict[str, int]) -> str:
+    names = [name for name in OPERATIONS if mix.get(name, 0) > 0]
+    return rng.choices(names, weights=[mix[name] for name in names])[0]
+
+
+def run_worker(spec: dict) -> dict:
+    """
+    工作进程：在截止时间前循环执行混合操作
+
+    参数:
+        spec: {'index', 'db_path', 'wal', 'server_url', 'force_network_mode', 'projects', 'tasks_per_project',
+               'rows_per_file', 'keys_per_query', 'mix', 'start_at', 'duration', 'seed', 'quiet'}
+
+    返回:
+        {'latencies_ms': {操作: [毫秒...]}, 'errors': {操作: 次数}, 'error_samples': [...],
+         'lock_retries', 'lock_failures', 'elapsed_s'}
+    """
+    from registry import db as registry_db
+    from registry import service
+
+    registry_db.set_force_network_mode(bool(spec.get("force_network_mode", False)))
+    registry_db.reset_retry_stats()
+    rng = random.Random(spec["seed"] * 1000 + spec["index"])
+    db_path, wal = spec["db_path"], spec["wal"]
+    projects, per_project = spec["projects"], spec["tasks_per_project"]
+    client = None
+    if spec.get("server_url"):
+        from registry.server import RegistryClient
+        client = RegistryClient(spec["server_url"], timeout=120.0)
+
+    def random_key():
+        return _key(rng.randrange(projects), rng.randrange(per_project))
+
+    def op_process_done(now):
+        project = rng.randrange(projects)
+        start = rng.randrange(max(1, per_project - spec["rows_per_file"]))
+        tasks = [{"key": _key(project, row), "fields": _fields(row)}
+                 for row in range(start, min(per_project, start + spec["rows_per_file"]))]
+        event = {"file_type": 1, "project_id": f"{2000 + project}", "source_file": f"bench_{2000 + project}.xlsx",
+                 "extra": {"count": len(tasks)}}
+        if client is not None:
+            client.call("batch_upsert_tasks", tasks_data=tasks, now=now.isoformat())
+            client.call("write_event", event="process_done", payload=event, now=now.isoformat())
+            return
+
+        def write():
+            with registry_db.lease_connection(db_path, wal):
+                service.batch_upsert_tasks(db_path, wal, tasks, now)
+                service.write_event(db_path, wal, "process_done", event, now)
+        registry_db.execute_with_retry(write, operation_name="process_done")
+
+    def op_display(now):
+        keys = [random_key() for _ in range(spec["keys_per_query"])]
+        if client is not None:
+            client.call("get_display_status", task_keys=keys, current_user_roles=["设计人员"])
+            return
+        registry_db.execute_with_retry(lambda: service.get_display_status(db_path, wal, keys, ["设计人员"]),
+                                       operation_name="display")
+
+    def op_mark(now):
+        key = random_key()
+        method = "mark_completed" if rng.random() < 0.5 else "mark_confirmed"
+        if client is not None:
+            client.call(method, key=key, now=now.isoformat())
+            return
+        func = service.mark_completed if method == "mark_completed" else service.mark_confirmed
+        registry_db.execute_with_retry(lambda: func(db_path, wal, key, now), operation_name=method)
+
+    def op_finalize(now):
+        if client is not None:
+            client.call("finalize_scan", now=now.isoformat(), missing_keep_days=7)
+            return
+        registry_db.execute_with_retry(lambda: service.finalize_scan(db_path, wal, now, 7), operation_name="finalize")
+
+    handlers = {"process_done": op_process_done, "display": op_display, "mark": op_mark, "finalize": op_finalize}
+    latencies: Dict[str, List[float]] = {name: [] for name in OPERATIONS}
+    errors: Dict[str, int] = {name: 0 for name in OPERATIONS}
+    samples: List[str] = []
+
+    delay = spec["start_at"] - time.time()
+    if delay > 0:
+        time.sleep(delay)
+    began = time.perf_counter()
+    deadline = began + spec["duration"]
+    sink = io.StringIO()
+    quiet = contextlib.redirect_stdout(sink) if spec.get("quiet", True) else contextlib.nullcontext()
+    with quiet:
+        while time.perf_counter() < deadline:
+            name = _choose(rng, spec["mix"])
+            started = time.perf_counter()
+            try:
+                handlers[name](datetime.datetime.now())
+            except Exception as e:
+                errors[name] += 1
+                if len(samples) < 5:
+                    samples.append(f"{name}: {type(e).__name__}: {e}")
+            finally:
+                latencies[name].append((time.perf_counter() - started) * 1000.0)
+                sink.seek(0)
+                sink.truncate()
+    elapsed = time.perf_counter() - began
+    registry_db.close_connection()
+    stats = registry_db.get_retry_stats()
+    return {"latencies_ms": latencies, "errors": errors, "error_samples": samples,
+            "lock_retries": stats["lock_retries"], "lock_failures": stats["lock_failures"],
+            "elapsed_s": elapsed}
+
+
+def summarize(worker_results: List[dict], wall_seconds: float) -> dict:
+    """汇总各工作进程的结果：吞吐量、延迟分位、锁定重试与错误率"""
+    per_op: Dict[str, List[float]] = {name: [] for name in OPERATIONS}
+    errors = {name: 0 for name in OPERATIONS}
+    samples: List[str] = []
+    lock_retries = lock_failures = 0
+    for result in worker_results:
+        for name in OPERATIONS:
+            per_op[name].extend(result["latencies_ms"].get(name, []))
+            errors[name] += result["errors"].get(name, 0)
+        samples.extend(result.get("error_samples", []))
+        lock_retries += result.get("lock_retries", 0)
+        lock_failures += result.get("lock_failures", 0)
+
+    all_latencies = [value for values in per_op.values() for value in values]
+    total_ops = len(all_latencies)
+    total_errors = sum(errors.values())
+    return {
+        "ops": total_ops,
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_ops_s": round(total_ops / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+        "error_rate": round(total_errors / total_ops, 4) if total_ops else 0.0,
+        "errors": errors,
+        "lock_retries": lock_retries,
+        "lock_failures": lock_failures,
+        "latency_ms": dict({"all": _latency_summary(all_latencies)},
+                           **{name: _latency_summary(values) for name, values in per_op.items() if values}),
+        "error_samples": samples[:10],
+    }
+
+
+def run_case(mode: str, processes: int, work_dir: str, args: argparse.Namespace, now: datetime.datetime) -> dict:
+    """在新建的数据库上以指定日志模式与进程数运行一轮"""
+    from registry import db as registry_db
+
+    wal = mode == "wal"
+    case_dir = os.path.join(work_dir, f"{mode}_{processes}")
+    db_path = os.path.join(case_dir, ".registry", "registry.db")
+    registry_db.set_force_network_mode(bool(args.force_network_mode))
+    with contextlib.redirect_stdout(io.StringIO()):
+        journal_mode = seed_database(db_path, wal, args.projects, args.tasks_per_project, now)
+
+    server = None
+    if args.server:
+        from registry.server import RegistryServer
+        registry_db.reset_retry_stats()
+        server = RegistryServer(db_path, wal=wal, port=0).start()
+
+    specs = [{
+        "index": index,
+        "db_path": db_path,
+        "wal": wal,
+        "server_url": server.url if server else "",
+        "force_network_mode": bool(args.force_network_mode),
+        "projects": args.projects,
+        "tasks_per_project": args.tasks_per_project,
+        "rows_per_file": args.rows_per_file,
+        "keys_per_query": args.keys_per_query,
+        "mix": args.mix,
+        "start_at": time.time() + START_DELAY,
+        "duration": args.duration,
+        "seed": args.seed,
+        "quiet": not args.verbose,
+    } for index in range(processes)]
+
+    context = multiprocessing.get_context("spawn")
+    try:
+        with context.Pool(processes) as pool:
+            pending = pool.map_async(run_worker, specs)
+            results = pending.get(timeout=START_DELAY + args.duration + 600)
+    finally:
+        if server is not None:
+            server.stop()
+    # 各进程在同一时刻开始，墙钟时间取最晚结束的进程（含截止时仍在执行的操作）
+    summary = summarize(results, max(result["elapsed_s"] for result in results))
+    if server is not None:
+        server_retries = registry_db.get_retry_stats()
+        summary["lock_retries"] += server_retries["lock_retries"]
+        summary["lock_failures"] += server_retries["lock_failures"]
+        summary["server"] = dict(server.stats)
+    return dict({"mode": mode, "journal_mode": journal_mode, "processes": processes, "via_server": bool(server)},
+                **summary)
+
+
+def run_benchmark(args: argparse.Namespace, now: Optional[datetime.datetime] = None) -> dict:
+    """执行全部日志模式 × 进程数组合，返回报告字典"""
+    now = now or datetime.datetime.now()
+    work_dir = tempfile.mkdtemp(prefix="registry_bench_")
+    try:
+        runs = []
+        for mode in args.modes:
+            for processes in args.processes:
+                item = run_case(mode, processes, work_dir, args, now)
+                runs.append(item)
+                latency = item["latency_ms"]["all"]
+                print(
+                    f"[Bench] {mode:<6} {processes:>3} 进程: {item['throughput_ops_s']:.1f} ops/s  "
+                    f"p50={latency['p50']:.1f}ms p99={latency['p99']:.1f}ms  "
+                    f"重试={item['lock_retries']} 错误率={item['error_rate']:.2%}"
+                )
+        return {
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": sys.platform,
+            "config": {
+                "duration_s": args.duration,
+                "projects": args.projects,
+                "tasks_per_project": args.tasks_per_project,
+                "rows_per_file": args.rows_per_file,
+                "keys_per_query": args.keys_per_query,
+                "mix": args.mix,
+                "force_network_mode": bool(args.force_network_mode),
+                "via_server": bool(args.server),
+                "seed": args.seed,
+            },
+            "runs": runs,
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _parse_ints(text: str) -> List[int]:
+    return [int(part) for part in text.split(",") if part.strip()]
+
+
+def _parse_mix(text: str) -> Dict[str, int]:
+    mix = {name: 0 for name in OPERATIONS}
+    for part in text.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in mix:
+            raise argparse.ArgumentTypeError(f"未知的操作: {name}（可选 {', '.join(OPERATIONS)}）")
+        mix[name] = int(weight)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("操作比例不能全为 0")
+    return mix
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Registry 多进程并发压力基准（DELETE / WAL）")
+    parser.add_argument("--processes", type=_parse_ints, default=list(DEFAULT_PROCESSES),
+                        help="进程数列表，逗号分隔（默认 1,4,16）")
+    parser.add_argument("--modes", type=lambda text: [m.strip().lower() for m in text.split(",") if m.strip()],
+                        default=list(DEFAULT_MODES), help="日志模式列表：delete,wal（默认两者）")
+    parser.add_argument("--duration", type=float, default=10.0, help="每轮运行时长（秒）")
+    parser.add_argument("--mix", type=_parse_mix,
+                        default=dict(DEFAULT_MIX),
+                        help="操作比例，如 process_done=10,display=60,mark=25,finalize=5")
+    parser.add_argument("--projects", type=int, default=4, help="项目数")
+    parser.add_argument("--tasks-per-project", type=int, default=500, help="每个项目的初始任务数")
+    parser.add_argument("--rows-per-file", type=int, default=50, help="每次 process_done 写入的行数")
+    parser.add_argument("--keys-per-query", type=int, default=100, help="每次状态查询的任务数")
+    parser.add_argument("--force-network-mode", action="store_true",
+                        help="使用网络盘连接参数（此时 WAL 会被自动禁用）")
+    parser.add_argument("--server", action="store_true", help="经本机 Registry 服务读写（进程内启动）")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--output", default="", help="可选：结果JSON路径")
+    parser.add_argument("--verbose", action="store_true", help="保留工作进程的控制台输出")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    unknown = [mode for mode in args.modes if mode not in DEFAULT_MODES]
+    if unknown:
+        print(f"[Bench] 未知的日志模式: {', '.join(unknown)}")
+        return 2
+
+    report = run_benchmark(args)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"[Bench] 结果已写入: {args.output}")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动性能基准（无界面）
+
+测量内容：
+1. 各模块冷启动导入耗时（core.main、registry.*、services.*、ui.*、base），
+   每个模块在独立子进程中导入，取多次中位数
+2. 首次刷新耗时（time-to-first-refresh）：对合成数据文件夹执行与
+   refresh_file_list 后台线程相同的步骤（Registry初始化、列目录、识别文件、检查缓存）
+
+基线：
+- 结果以 JSON 形式写入基线文件；再次运行时与基线比较，
+  任一指标超过 基线*(1+阈值) 且绝对增量超过 --min-delta-ms 即判定为回退，退出码为1
+- 测量出错的指标（导入失败、首次刷新崩溃）与基线中有、本次缺失的指标同样判定为失败；
+  本次有出错指标时不写入基线
+
+使用方法：
+    python scripts/bench/startup_benchmark.py                   # 与基线比较（无基线时自动创建）
+    python scripts/bench/startup_benchmark.py --update-baseline # 重写基线
+    python scripts/bench/startup_benchmark.py --threshold 0.3 --repeats 5
+"""
+
+import argparse
+import json
+import os
+import pkgutil
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from scripts.bench.headless import install_headless_stubs, repo_root  # noqa: E402
+from scripts.bench.synthetic_data import generate_data_folder  # noqa: E402
+
+
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_baseline.json")
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_MIN_DELTA_MS = 20.0
+DEFAULT_PROJECTS = ["1818", "1907", "2016"]
+
+# 子进程输出结果行的前缀（模块导入时可能有其他print输出）
+_RESULT_MARKER = "__BENCH_RESULT__"
+
+# 需要测量导入耗时的包（按子模块展开）与单独模块
+_MEASURED_PACKAGES = ("registry", "services", "ui")
+_MEASURED_MODULES = ("core.main", "base")
+
+
+def discover_modules() -> List[str]:
+    """列出需要测量导入耗时的模块（core.main + registry/services/ui 全部子模块 + base）"""
+    root = repo_root()
+    modules = ["core.main"]
+    for package in _MEASURED_PACKAGES:
+        package_dir = os.path.join(root, package)
+        if not os.path.isdir(package_dir):
+            continue
+        for info in sorted(pkgutil.iter_modules([package_dir]), key=lambda m: m.name):
+            modules.append(f"{package}.{info.name}")
+    for name in _MEASURED_MODULES:
+        if name not in modules:
+            modules.append(name)
+    return modules
+
+
+# ============================================================================
+# 子进程测量
+# ============================================================================
+
+def _run_child(code: str, cwd: str) -> dict:
+    """在独立子进程中执行测量代码，解析结果行"""
+    env = dict(os.environ)
+    env["PYTHONDONTWRITEBYTECODE"] = "0"
+    env["PYTHONIOENCODING"] = "utf-8"
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=cwd,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        timeout=300,
+    )
+    stdout = proc.stdout.decode("utf-8", errors="replace")
+    for line in reversed(stdout.splitlines()):
+        if line.startswith(_RESULT_MARKER):
+            return json.loads(line[len(_RESULT_MARKER):])
+    stderr = proc.stderr.decode("utf-8", errors="replace").strip().splitlines()
+    return {"error": stderr[-1] if stderr else f"exit code {proc.returncode}"}
+
+
+def _child_prelude(appdata: str) -> str:
+    return (
+        "import sys, json, time\n"
+        f"sys.path.insert(0, {repo_root()!r})\n"
+        "from scripts.bench.headless import install_headless_stubs\n"
+        f"install_headless_stubs({appdata!r})\n"
+    )
+
+
+def measure_import(module: str, appdata: str, cwd: str, repeats: int = 3) -> dict:
+    """
+    测量单个模块的冷启动导入耗时（每次独立子进程）
+
+    返回:
+        {"ms": 中位数毫秒, "samples": [...]} 或 {"error": ...}
+    """
+    code = _child_prelude(appdata) + (
+        "import importlib\n"
+        "t0 = time.perf_counter()\n"
+        f"importlib.import_module({module!r})\n"
+        "ms = (time.perf_counter() - t0) * 1000.0\n"
+        f"print({_RESULT_MARKER!r} + json.dumps({{'ms': ms}}))\n"
+    )
+    samples = []
+    for _ in range(max(1, repeats)):
+        result = _run_child(code, cwd)
+        if "error" in result:
+            return result
+        samples.append(result["ms"])
+    return {"ms": statistics.median(samples), "samples": samples}
+
+
+def build_headless_app(appdata: str):
+    """
+    构造不创建 Tk 窗口的最小 ExcelProcessorApp 实例（ExcelProcessorApp.__new__）
+
+    调用方需先执行 install_headless_stubs(appdata)。
+    """
+    from base import ExcelProcessorApp
+    from services.file_manager import FileIdentityManager
+    from ui.render_cache import TabRenderCache
+    from utils.job_scheduler import JobScheduler
+
+    app = ExcelProcessorApp.__new__(ExcelProcessorApp)
+    app.config = {"user_name": "基准测试"}
+    app.user_name = "基准测试"
+    app.user_role = ""
+    app.user_roles = []
+    app.file_manager = FileIdentityManager(
+        cache_file=os.path.join(appdata, "file_cache.json"),
+        result_cache_dir=os.path.join(appdata, "result_cache"),
+    )
+    # identify_target_files 会清空选项卡渲染缓存
+    app._tab_render_cache = TabRenderCache()
+    # identify_target_files 会取消预渲染任务；无界面时回调在工作线程直接执行
+    app.job_scheduler = JobScheduler(post_ui=None, name="BenchJob")
+    return app
+
+
+def run_first_refresh(folder: str, appdata: str, projects: List[str]) -> Dict[str, float]:
+    """
+    在当前进程内执行一次"首次刷新"（与 refresh_file_list 的后台线程步骤一致）
+
+    注意：不创建 Tk 窗口；使用 build_headless_app 构造最小实例。
+
+    返回:
+        各阶段耗时（毫秒）
+    """
+    install_headless_stubs(appdata)
+    timings: Dict[str, float] = {}
+    t_start = time.perf_counter()
+
+    t0 = time.perf_counter()
+    import base  # noqa: F401
+    timings["import_base"] = (time.perf_counter() - t0) * 1000.0
+
+    app = build_headless_app(appdata)
+
+    # 1) Registry 数据目录初始化
+    t0 = time.perf_counter()
+    from registry import hooks as registry_hooks
+    from registry.config import load_config
+    registry_hooks.set_data_folder(folder)
+    load_config(data_folder=folder, ensure_registry_dir=True)
+    timings["registry_init"] = (time.perf_counter() - t0) * 1000.0
+
+    # 2) 列出Excel文件
+    t0 = time.perf_counter()
+    app.excel_files = [
+        os.path.join(folder, name) for name in os.listdir(folder)
+        if os.path.splitext(name)[1].lower() in (".xlsx", ".xls")
+        and os.path.isfile(os.path.join(folder, name))
+    ]
+    timings["list_files"] = (time.perf_counter() - t0) * 1000.0
+
+    # 3) 识别目标文件
+    t0 = time.perf_counter()
+    app.identify_target_files(update_ui=False, enabled_projects_override=list(projects))
+    timings["identify_files"] = (time.perf_counter() - t0) * 1000.0
+
+    # 4) 检查文件标识并加载缓存
+    t0 = time.perf_counter()
+    app._check_and_load_cache()
+    timings["check_cache"] = (time.perf_counter() - t0) * 1000.0
+
+    timings["total"] = (time.perf_counter() - t_start) * 1000.0
+    return timings
+
+
+def measure_first_refresh(folder: str, appdata: str, cwd: str, projects: List[str],
+                          repeats: int = 3) -> dict:
+    """在独立子进程中测量首次刷新（每次使用全新的 LOCALAPPDATA 以保证"首次"）"""
+    samples: Dict[str, List[float]] = {}
+    for i in range(max(1, repeats)):
+        run_appdata = os.path.join(appdata, f"refresh_{i}")
+        code = _child_prelude(run_appdata) + (
+            "from scripts.bench.startup_benchmark import run_first_refresh\n"
+            f"timings = run_first_refresh({folder!r}, {run_appdata!r}, {list(projects)!r})\n"
+            f"print({_RESULT_MARKER!r} + json.dumps(timings))\n"
+        )
+        result = _run_child(code, cwd)
+        if "error" in result:
+            return result
+        for stage, ms in result.items():
+            samples.setdefault(stage, []).append(ms)
+        # 清理 .registry 目录，确保下一轮仍为首次初始化
+        shutil.rmtree(os.path.join(folder, ".registry"), ignore_errors=True)
+    return {stage: statistics.median(values) for stage, values in samples.items()}
+
+
+# ============================================================================
+# 基线比较
+# ============================================================================
+
+def flatten_metrics(report: dict) -> Dict[str, float]:
+    """将报告展开为 {指标名: 毫秒} 的扁平字典（跳过出错项，见 metric_errors）"""
+    metrics: Dict[str, float] = {}
+    for module, item in (report.get("imports") or {}).items():
+        if isinstance(item, dict) and "ms" in item:
+            metrics[f"import:{module}"] = float(item["ms"])
+    for stage, ms in (report.get("first_refresh") or {}).items():
+        if isinstance(ms, (int, float)):
+            metrics[f"refresh:{stage}"] = float(ms)
+    return metrics
+
+
+def metric_errors(report: dict) -> Dict[str, str]:
+    """
+    报告中测量出错的指标 {指标名: 错误信息}
+
+    首次刷新整体失败时记为 refresh:total。
+    """
+    errors: Dict[str, str] = {}
+    for module, item in (report.get("imports") or {}).items():
+        if isinstance(item, dict) and "error" in item:
+            errors[f"import:{module}"] = str(item["error"])
+    refresh = report.get("first_refresh") or {}
+    if "error" in refresh:
+        errors["refresh:total"] = str(refresh["error"])
+    return errors
+
+
+def compare_with_baseline(current: dict, baseline: dict,
+                          threshold: float = DEFAULT_THRESHOLD,
+                          min_delta_ms: float = DEFAULT_MIN_DELTA_MS) -> List[Tuple[str, Optional[float], Optional[float]]]:
+    """
+    与基线比较
+
+    参数:
+        current: 本次报告
+        baseline: 基线报告
+        threshold: 相对阈值（0.25 表示允许慢25%）
+        min_delta_ms: 绝对增量下限（过滤小指标的计时噪声）
+
+    返回:
+        失败列表 [(指标名, 基线ms, 本次ms), ...]（按指标名排序）：
+        - 超过阈值的回退
+        - 本次出错的指标（本次ms 为 None；基线中没有时基线ms 也为 None）
+        - 基线中有、本次缺失的指标（本次ms 为 None）
+        基线中不存在的新指标只要测量成功就不判定
+    """
+    cur = flatten_metrics(current)
+    base = flatten_metrics(baseline)
+    errors = metric_errors(current)
+    failures = [(name, base.get(name), None) for name in errors]
+    for name, base_ms in base.items():
+        if name in errors:
+            continue
+        if name not in cur:
+            failures.append((name, base_ms, None))
+            continue
+        cur_ms = cur[name]
+        if cur_ms > base_ms * (1.0 + threshold) and (cur_ms - base_ms) > min_delta_ms:
+            failures.append((name, base_ms, cur_ms))
+    return sorted(failures, key=lambda item: item[0])
+
+
+def run_benchmark(repeats: int = 3, projects: Optional[List[str]] = None,
+                  modules: Optional[List[str]] = None) -> dict:
+    """执行完整基准，返回报告字典"""
+    projects = list(projects or DEFAULT_PROJECTS)
+    modules = list(modules or discover_modules())
+    work_dir = tempfile.mkdtemp(prefix="startup_bench_")
+    try:
+        appdata = os.path.join(work_dir, "appdata")
+        folder = os.path.join(work_dir, "data")
+        generate_data_folder(folder, projects, rows=50)
+
+        imports = {}
+        for module in modules:
+            imports[module] = measure_import(module, appdata, work_dir, repeats=repeats)
+            item = imports[module]
+            if "error" in item:
+                print(f"[Bench] 导入 {module}: 失败 {item['error']}")
+            else:
+                print(f"[Bench] 导入 {module}: {item['ms']:.1f} ms")
+
+        first_refresh = measure_first_refresh(folder, appdata, work_dir, projects, repeats=repeats)
+        if "error" in first_refresh:
+            print(f"[Bench] 首次刷新失败: {first_refresh['error']}")
+        else:
+            print(f"[Bench] 首次刷新: {first_refresh.get('total', 0):.1f} ms")
+
+        return {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": sys.platform,
+            "repeats": repeats,
+            "projects": projects,
+            "imports": imports,
+            "first_refresh": first_refresh,
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _write_json(path: str, data: dict):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="启动性能基准（无界面）")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="基线JSON路径")
+    parser.add_argument("--update-baseline", action="store_true", help="用本次结果覆盖基线")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="相对回退阈值（默认0.25，即慢25%%判定回退）")
+    parser.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help="绝对增量下限（毫秒），低于此值不判定回退")
+    parser.add_argument("--repeats", type=int, default=3, help="每项测量次数（取中位数）")
+    parser.add_argument("--projects", default=",".join(DEFAULT_PROJECTS), help="合成数据的项目号，逗号分隔")
+    parser.add_argument("--output", default="", help="可选：另存本次结果JSON")
+    args = parser.parse_args(argv)
+
+    projects = [p.strip() for p in args.projects.split(",") if p.strip()]
+    report = run_benchmark(repeats=args.repeats, projects=projects)
+
+    if args.output:
+        _write_json(args.output, report)
+
+    if args.update_baseline or not os.path.exists(args.baseline):
+        errors = metric_errors(report)
+        if errors:
+            # 出错的指标不能作为基线（之后的比较会漏掉这些指标）
+            print(f"[Bench] {len(errors)} 项测量出错，未写入基线:")
+            for name, error in sorted(errors.items()):
+                print(f"  - {name}: {error}")
+            return 1
+        _write_json(args.baseline, report)
+        print(f"[Bench] 基线已写入: {args.baseline}")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressions = compare_with_baseline(report, baseline, args.threshold, args.min_delta_ms)
+    if regressions:
+        print(f"[Bench] 检测到 {len(regressions)} 项性能回退或测量失败（阈值 {args.threshold:.0%}）:")
+        errors = metric_errors(report)
+        for name, base_ms, cur_ms in regressions:
+            base_text = "-" if base_ms is None else f"{base_ms:.1f} ms"
+            if cur_ms is not None:
+                print(f"  - {name}: {base_text} -> {cur_ms:.1f} ms")
+            elif name in errors:
+                print(f"  - {name}: {base_text} -> 出错 {errors[name]}")
+            else:
+                print(f"  - {name}: {base_text} -> 缺失")
+        return 1
+
+    print("[Bench] 未检测到性能回退")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+合成数据文件夹生成器
+
+为六类待处理文件生成结构与真实报表一致的Excel：
+1. 文件名符合 core.main.find_all_target_filesN 的识别规则
+2. 列布局与 process_target_fileN 使用的列索引一致（表头行 + 说明行 + 数据行）
+3. 日期分布覆盖筛选窗口内/外，以及1818项目6天偏移的边界区间
+4. 带版次列的文件类型（2/3/4/6）包含同接口号多版次的重复行
+5. 每类文件都混入不满足筛选条件的行（作废、已回复、非本所等）
+
+同一 (seed, 项目号, 文件类型) 生成的内容固定，便于基准对比和黄金测试。
+
+使用方法：
+    python scripts/bench/synthetic_data.py OUTPUT_DIR --projects 10 --rows 200
+"""
+
+import argparse
+import datetime
+import os
+import random
+import sys
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+# 已知项目号（与主界面项目勾选框一致），超出部分按 3001 起顺延
+KNOWN_PROJECT_IDS = ["1818", "1907", "1915", "1916", "2016", "2026", "2306"]
+
+DEPARTMENTS = ["结构一室", "结构二室", "建筑总图室"]
+DEPT_CODES = {"结构一室": "25C1", "结构二室": "25C2", "建筑总图室": "25C3"}
+PERSON_NAMES = ["王丹丹", "张三", "李四", "赵六", "刘峰", "陈晨", "孙悦", "周洋", "吴磊", "郑爽"]
+
+# 每类文件的总列数（覆盖 process_target_fileN 访问的最大列索引）
+COLUMN_COUNTS = {1: 20, 2: 40, 3: 42, 4: 35, 5: 15, 6: 30}
+
+# 接口号列 / 版次列（与 registry.util.extract_interface_id 及 _filter_rows_by_highest_version 一致）
+INTERFACE_COLUMNS = {1: 0, 2: 17, 3: 2, 4: 4, 5: 0, 6: 4}
+VERSION_COLUMNS = {2: 4, 3: 28, 4: 8, 6: 28}
+
+# 关键列的表头名称（其余列使用"字段N"）
+# 注意：避免与处理后追加的列同名（接口号/科室/接口时间/责任人/原始行号/source_file），
+# 否则 extract_interface_id 会优先按列名取值，与真实报表行为不一致
+HEADER_NAMES = {
+    1: {0: "接口编号", 1: "状态", 7: "责任单位", 10: "计划完成时间", 12: "回文单号", 17: "责任人员"},
+    2: {0: "序号", 4: "版次", 5: "类型", 8: "接收单位", 12: "要求回复时间", 13: "回复单号",
+        17: "接口编号", 27: "关联编号", 38: "接收人"},
+    3: {2: "接口编号", 8: "类别", 11: "预计完成时间", 12: "要求打开时间", 16: "完成情况",
+        19: "打开情况", 28: "版次", 37: "责任单位", 40: "责任科室", 41: "承办人"},
+    4: {4: "接口编号", 8: "版次", 15: "类别", 18: "要求回复时间", 21: "回复单号",
+        28: "备用类别", 31: "接收单位", 32: "接收科室", 33: "接收人"},
+    5: {0: "接口编号", 6: "提资单位", 10: "提资人", 11: "提资时间", 13: "完成情况"},
+    6: {4: "文件编号", 8: "要求回复日期", 12: "回复状态", 21: "主送单位", 22: "主办室",
+        23: "承办人", 28: "版次"},
+}
+
+
+def default_project_ids(count: int) -> List[str]:
+    """返回 count 个项目号：先取已知项目号（含1818），不足时按 3001 起顺延"""
+    ids = list(KNOWN_PROJECT_IDS[:count])
+    extra = 3001
+    while len(ids) < count:
+        ids.append(str(extra))
+        extra += 1
+    return ids
+
+
+def source_filename(file_type: int, project_id: str, day: datetime.datetime) -> str:
+    """返回指定类型源文件的文件名（与识别正则一致）"""
+    ymd = day.strftime("%Y%m%d")
+    if file_type == 1:
+        return f"{project_id}按项目导出IDI手册{day.strftime('%Y-%m-%d')}-08_00_00.xlsx"
+    if file_type == 2:
+        return f"内部接口信息单报表{project_id}{ymd}.xlsx"
+    if file_type == 3:
+        return f"外部接口ICM报表{project_id}{ymd}.xlsx"
+    if file_type == 4:
+        return f"外部接口单报表{project_id}{ymd}.xlsx"
+    if file_type == 5:
+        return f"{project_id}接口提资清单.xlsx"
+    if file_type == 6:
+        return f"收发文清单{project_id}.xlsx"
+    raise ValueError(f"未知文件类型: {file_type}")
+
+
+def filter_window_end(now: datetime.datetime) -> datetime.datetime:
+    """与文件1处理2（core.process_engine.filter_date_window）一致的筛选窗口终点：1~19号到当月末，20号以后到次月末"""
+    months_ahead = 1 if now.day <= 19 else 2
+    year, month = now.year, now.month + months_ahead
+    while month > 12:
+        month -= 12
+        year += 1
+    return datetime.datetime(year, month, 1) - datetime.timedelta(days=1)
+
+
+class _RowFactory:
+    """按文件类型生成数据行（仅负责单元格取值，不涉及写文件）"""
+
+    def __init__(self, file_type: int, project_id: str, now: datetime.datetime, rng: random.Random):
+        self.file_type = file_type
+        self.project_id = project_id
+        self.now = now
+        self.rng = rng
+        self.width = COLUMN_COUNTS[file_type]
+        self.year_start = datetime.datetime(now.year, 1, 1)
+        self.window_end = filter_window_end(now)
+
+    # ---------------- 取值工具 ----------------
+    def date(self) -> datetime.datetime:
+        """
+        日期分布：
+        - 55% 位于筛选窗口内
+        - 15% 位于窗口终点后6天内（仅1818项目减6天后落入窗口）
+        - 15% 为下一年（窗口外）
+        - 15% 为上一年（窗口外）
+        """
+        r = self.rng.random()
+        if r < 0.55:
+            span = max(1, (self.window_end - self.year_start).days)
+            return self.year_start + datetime.timedelta(days=self.rng.randint(0, span))
+        if r < 0.70:
+            return self.window_end + datetime.timedelta(days=self.rng.randint(1, 6))
+        if r < 0.85:
+            return datetime.datetime(self.now.year + 1, self.rng.randint(1, 12), self.rng.randint(1, 28))
+        return datetime.datetime(self.now.year - 1, self.rng.randint(1, 12), self.rng.randint(1, 28))
+
+    def chance(self, p: float) -> bool:
+        return self.rng.random() < p
+
+    def person(self) -> str:
+        return self.rng.choice(PERSON_NAMES)
+
+    def department(self) -> str:
+        return self.rng.choice(DEPARTMENTS)
+
+    def reply_no(self) -> str:
+        return f"HF-{self.now.year}-{self.rng.randint(1, 9999):04d}"
+
+    def interface_id(self, seq: int) -> str:
+        code = DEPT_CODES[self.department()]
+        if self.file_type in (1, 5):
+            return f"S-SA---1JT-{seq:04d}-{code}-25E6"
+        if self.file_type == 2:
+            return f"NB-{self.project_id}-{seq:05d}"
+        if self.file_type == 3:
+            return f"ICM-{self.project_id}-{seq:05d}"
+        if self.file_type == 4:
+            return f"WB-{self.project_id}-{seq:05d}"
+        return f"SFW-{self.project_id}-{seq:05d}"
+
+    # ---------------- 行生成 ----------------
+    def subheader(self) -> List[object]:
+        """说明行（DataFrame 第0行，处理逻辑会跳过或不命中）"""
+        row = [""] * self.width
+        row[0] = "说明"
+        return row
+
+    def row(self, seq: int, interface_id: str, version: Optional[str]) -> List[object]:
+        row: List[object] = [None] * self.width
+        builder = getattr(self, f"_fill_file{self.file_type}")
+        builder(row, seq, interface_id)
+        if version is not None:
+            row[VERSION_COLUMNS[self.file_type]] = version
+        row[INTERFACE_COLUMNS[self.file_type]] = interface_id
+        return row
+
+    def _fill_file1(self, row, seq, interface_id):
+        dept = self.department()
+        row[1] = "作废" if self.chance(0.05) else "正常"
+        row[7] = DEPT_CODES[dept] if self.chance(0.85) else "25E6"
+        row[10] = self.date()
+        row[12] = self.reply_no() if self.chance(0.25) else None
+        row[17] = f"{self.person()}(zhang{seq})" if self.chance(0.9) else None
+
+    def _fill_file2(self, row, seq, interface_id):
+        row[0] = seq
+        row[5] = "传递" if self.chance(0.2) else "答复"
+        row[8] = f"河北分公司-建筑结构所-{self.department()}" if self.chance(0.8) else "河北分公司-机电所"
+        row[12] = self.date()
+        row[13] = self.reply_no() if self.chance(0.25) else None
+        row[27] = f"4444{seq:06d}" if self.chance(0.15) else f"REF{seq:06d}"
+        row[38] = self.person() if self.chance(0.85) else None
+
+    def _fill_file3(self, row, seq, interface_id):
+        row[8] = "B" if self.chance(0.85) else "A"
+        row[11] = self.date()
+        row[12] = "4444-12-31" if self.chance(0.1) else self.date()
+        row[16] = "已完成" if self.chance(0.3) else None
+        row[19] = "已打开" if self.chance(0.3) else None
+        row[37] = "河北分公司-建筑结构所" if self.chance(0.85) else "河北分公司-机电所"
+        row[40] = self.department() if self.chance(0.8) else None
+        row[41] = self.person() if self.chance(0.85) else None
+
+    def _fill_file4(self, row, seq, interface_id):
+        r = self.rng.random()
+        if r < 0.6:
+            row[15] = "B"
+        elif r < 0.8:
+            row[15] = None
+            row[28] = "B"
+        else:
+            row[15] = "A"
+        row[18] = self.date()
+        row[21] = self.reply_no() if self.chance(0.25) else None
+        row[31] = "河北分公司-建筑结构所" if self.chance(0.85) else "河北分公司-机电所"
+        row[32] = self.department() if self.chance(0.8) else None
+        row[33] = self.person() if self.chance(0.85) else None
+
+    def _fill_file5(self, row, seq, interface_id):
+        row[6] = DEPT_CODES[self.department()] if self.chance(0.85) else "25E6"
+        row[10] = self.person() if self.chance(0.9) else None
+        row[11] = self.date()
+        row[13] = "已提资" if self.chance(0.25) else None
+
+    def _fill_file6(self, row, seq, interface_id):
+        row[8] = self.date() if self.chance(0.95) else None
+        row[12] = self.rng.choice(["尚未回复", "超期未回复", "已回复"])
+        row[21] = "河北分公司.建筑结构所" if self.chance(0.85) else "河北分公司.机电所"
+        row[22] = self.department()
+        owners = self.rng.sample(PERSON_NAMES, k=self.rng.randint(1, 3))
+        row[23] = "、".join(owners) if self.chance(0.5) else ",".join(owners)
+
+
+def generate_rows(file_type: int, project_id: str, rows: int,
+                  now: datetime.datetime, seed: int = 0) -> Tuple[List[str], List[List[object]]]:
+    """
+    生成单个源文件的表头与数据行
+
+    参数:
+        file_type: 文件类型（1-6）
+        project_id: 项目号
+        rows: 数据行数（不含表头和说明行）
+        now: 基准时间（决定筛选窗口）
+        seed: 随机种子
+
+    返回:
+        (表头, 行列表)；行列表第一行为说明行
+    """
+    rng = random.Random(zlib.crc32(f"{seed}|{file_type}|{project_id}".encode("utf-8")))
+    factory = _RowFactory(file_type, project_id, now, rng)
+
+    names = HEADER_NAMES[file_type]
+    header = [names.get(i, f"字段{i + 1}") for i in range(COLUMN_COUNTS[file_type])]
+
+    data: List[List[object]] = [factory.subheader()]
+    has_version = file_type in VERSION_COLUMNS
+    seq = 1
+    while len(data) - 1 < rows:
+        interface_id = factory.interface_id(seq)
+        # 约15%的接口出现多个版次（A→B→C），版次乱序写入，模拟报表中的真实排列
+        versions = [None]
+        if has_version:
+            count = rng.choice([2, 3]) if rng.random() < 0.15 else 1
+            versions = [chr(ord("A") + i) for i in range(count)]
+            rng.shuffle(versions)
+        for version in versions:
+            if len(data) - 1 >= rows:
+                break
+            data.append(factory.row(seq, interface_id, version))
+        seq += 1
+    return header, data
+
+
+def write_xlsx(path: str, header: List[str], rows: List[List[object]]) -> None:
+    """以 openpyxl 只写模式写入Excel（比 DataFrame.to_excel 快，适合批量生成）"""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    ws.append(header)
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+
+
+def generate_project_files(folder: str, project_id: str, rows: int = 200,
+                           now: Optional[datetime.datetime] = None, seed: int = 0,
+                           file_types=(1, 2, 3, 4, 5, 6)) -> Dict[int, str]:
+    """
+    为单个项目生成各类源文件
+
+    返回:
+        {file_type: 文件路径}
+    """
+    now = now or datetime.datetime.now()
+    os.makedirs(folder, exist_ok=True)
+    created = {}
+    for file_type in file_types:
+        header, data = generate_rows(file_type, project_id, rows, now, seed)
+        path = os.path.join(folder, source_filename(file_type, project_id, now))
+        write_xlsx(path, header, data)
+        created[file_type] = path
+    return created
+
+
+def generate_data_folder(folder: str, projects, rows: int = 200,
+                         now: Optional[datetime.datetime] = None, seed: int = 0,
+                         file_types=(1, 2, 3, 4, 5, 6)) -> List[Tuple[int, str, str]]:
+    """
+    生成完整的合成数据文件夹
+
+    参数:
+        folder: 输出目录
+        projects: 项目号列表，或整数（使用 default_project_ids 生成）
+        rows: 每个文件的数据行数
+        now: 基准时间（默认当前时间）
+        seed: 随机种子
+
+    返回:
+        [(file_type, project_id, 文件路径), ...]
+    """
+    if isinstance(projects, int):
+        projects = default_project_ids(projects)
+    now = now or datetime.datetime.now()
+    created = []
+    for project_id in projects:
+        files = generate_project_files(folder, project_id, rows, now, seed, file_types)
+        for file_type, path in sorted(files.items()):
+            created.append((file_type, project_id, path))
+    return created
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="生成合成数据文件夹（六类待处理文件）")
+    parser.add_argument("output", help="输出目录")
+    parser.add_argument("--projects", type=int, default=3, help="项目数量（含1818）")
+    parser.add_argument("--rows", type=int, default=200, help="每个文件的数据行数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    args = parser.parse_args(argv)
+
+    created = generate_data_folder(args.output, args.projects, rows=args.rows, seed=args.seed)
+    print(f"[Synthetic] 已生成 {len(created)} 个文件 -> {os.path.abspath(args.output)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,8 +6,11 @@
 功能：
 1. 记录每次指派的业务标识（file_type|project_id|interface_id）和指派人
 2. 下次处理Excel时，对于责任人为空但业务标识匹配的接口自动填充指派人
+3. 批量查询：lookup_series() 对整列接口号做向量化规范化后按哈希索引匹配
 
-存储位置：%LOCALAPPDATA%\\InterfaceFilter\\assignment_memory.json
+存储位置：%LOCALAPPDATA%\\InterfaceFilter\\assignment_memory.json（快照）
+         + assignment_memory.log（增量追加日志，每行一个 [key, name]，name 为 null 表示删除）
+加载时先读快照再重放日志；日志行数超过阈值时合并回快照（压缩）。
 """
 
 from __future__ import annotations
@@ -19,6 +22,14 @@ import threading
 from pathlib import Path
 from typing import Dict, Optional
 
+import pandas as pd
+
+# 接口号角色后缀，如 "HQ-TA-3999(设计人员)" 中的 "(设计人员)"
+_ROLE_SUFFIX_PATTERN = r"\([^)]*\)$"
+
+# 日志行数超过 max(COMPACT_MIN_LINES, 记忆条数) 时压缩为快照
+COMPACT_MIN_LINES = 2000
+
 
 class AssignmentMemory:
     """指派记忆管理器"""
@@ -38,6 +49,8 @@ class AssignmentMemory:
             storage_path = storage_dir / "assignment_memory.json"
 
         self.storage_path = Path(storage_path)
+        self.log_path = self.storage_path.with_suffix(".log")
+        self._log_lines = 0
         self._lock = threading.RLock()  # 使用可重入锁，避免嵌套调用死锁
         self._disabled = False
         self._disabled_reason = ""
@@ -71,7 +84,7 @@ class AssignmentMemory:
         """
         # 规范化接口号：去除角色后缀
         normalized_interface_id = self._normalize_interface_id(interface_id)
-        return f"{file_type}|{project_id}|{normalized_interface_id}"
+        return f"{file_type}|{str(project_id).strip()}|{normalized_interface_id}"
 
     def _normalize_interface_id(self, interface_id: str) -> str:
         """
@@ -86,32 +99,87 @@ class AssignmentMemory:
         if not interface_id:
             return ""
         # 去除括号及其内容，如 "HQ-TA-3999(设计人员)" -> "HQ-TA-3999"
-        normalized = re.sub(r"\([^)]*\)$", "", str(interface_id).strip())
+        normalized = re.sub(_ROLE_SUFFIX_PATTERN, "", str(interface_id).strip())
         return normalized.strip()
 
     def _load(self) -> None:
-        """从文件加载记忆"""
+        """从快照加载记忆，并重放增量日志"""
         if self._disabled:
             return
 
-        if not self.storage_path.exists():
-            self._memories = {}
-            return
+        self._memories = {}
+        self._log_lines = 0
+        if self.storage_path.exists():
+            try:
+                with self.storage_path.open("r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self._memories = data.get("memories", {})
+            except Exception as e:
+                print(f"[AssignmentMemory] 加载失败，已忽略: {e}")
+                self._memories = {}
 
-        try:
-            with self.storage_path.open("r", encoding="utf-8") as f:
-                data = json.load(f)
-            self._memories = data.get("memories", {})
-        except Exception as e:
-            print(f"[AssignmentMemory] 加载失败，已忽略: {e}")
-            self._memories = {}
+        if self.log_path.exists():
+            try:
+                with self.log_path.open("r", encoding="utf-8") as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            key, name = json.loads(line)
+                        except (ValueError, TypeError):
+                            # 写入中断导致的残行，忽略
+                            continue
+                        if name is None:
+                            self._memories.pop(key, None)
+                        else:
+                            self._memories[key] = name
+                        self._log_lines += 1
+            except Exception as e:
+                print(f"[AssignmentMemory] 读取增量日志失败，已忽略: {e}")
 
-    def _save(self) -> None:
-        """保存记忆到文件"""
+    def _disable(self, error: Exception) -> None:
+        self._disabled = True
+        self._disabled_reason = str(error)
+        if not self._warned:
+            self._warned = True
+            print(f"[AssignmentMemory] 写入失败，已降级为仅内存：{error}")
+
+    def _persist_disabled(self) -> bool:
         if self._disabled:
             if not self._warned:
                 self._warned = True
                 print(f"[AssignmentMemory] 持久化已禁用：{self._disabled_reason}")
+            return True
+        return False
+
+    def _append(self, changes: Dict[str, Optional[str]]) -> None:
+        """
+        增量持久化：仅追加本次变更（O(变更数)），必要时压缩为快照
+
+        参数:
+            changes: {key: name}，name 为 None 表示删除
+        """
+        if not changes or self._persist_disabled():
+            return
+
+        with self._lock:
+            try:
+                with self.log_path.open("a", encoding="utf-8") as f:
+                    f.write("".join(
+                        json.dumps([key, name], ensure_ascii=False) + "\n"
+                        for key, name in changes.items()
+                    ))
+                self._log_lines += len(changes)
+            except Exception as e:
+                self._disable(e)
+                return
+            if self._log_lines > max(COMPACT_MIN_LINES, len(self._memories)):
+                self._save()
+
+    def _save(self) -> None:
+        """压缩：将全部记忆写入快照并清空增量日志"""
+        if self._persist_disabled():
             return
 
         payload = {"memories": self._memories}
@@ -119,20 +187,14 @@ class AssignmentMemory:
             tmp_path = self.storage_path.with_suffix(".tmp")
             try:
                 with tmp_path.open("w", encoding="utf-8") as f:
-                    json.dump(payload, f, ensure_ascii=False, indent=2)
+                    json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
                 tmp_path.replace(self.storage_path)
-            except PermissionError as e:
-                self._disabled = True
-                self._disabled_reason = str(e)
-                if not self._warned:
-                    self._warned = True
-                    print(f"[AssignmentMemory] 写入失败，已降级为仅内存：{e}")
+                # 快照已包含全部变更，日志可以清空
+                if self.log_path.exists():
+                    self.log_path.unlink()
+                self._log_lines = 0
             except Exception as e:
-                self._disabled = True
-                self._disabled_reason = str(e)
-                if not self._warned:
-                    self._warned = True
-                    print(f"[AssignmentMemory] 写入失败，已降级为仅内存：{e}")
+                self._disable(e)
 
     def save_memory(
         self, file_type: int, project_id: str, interface_id: str, assigned_name: str
@@ -150,9 +212,12 @@ class AssignmentMemory:
             return
 
         key = self._make_key(file_type, project_id, interface_id)
+        name = assigned_name.strip()
         with self._lock:
-            self._memories[key] = assigned_name.strip()
-        self._save()
+            if self._memories.get(key) == name:
+                return
+            self._memories[key] = name
+        self._append({key: name})
 
     def get_memory(
         self, file_type: int, project_id: str, interface_id: str
@@ -171,6 +236,29 @@ class AssignmentMemory:
         key = self._make_key(file_type, project_id, interface_id)
         return self._memories.get(key)
 
+    def lookup_series(self, file_type: int, project_ids, interface_ids) -> pd.Series:
+        """
+        批量获取指派记忆（向量化）
+
+        参数:
+            file_type: 文件类型（1-6）
+            project_ids: 项目号 Series
+            interface_ids: 接口号 Series（可带角色后缀），索引需与 project_ids 一致
+
+        返回:
+            Series: 与输入同索引，命中为指派人姓名，未命中为 NaN
+        """
+        project_ids = pd.Series(project_ids)
+        interface_ids = pd.Series(interface_ids, index=project_ids.index)
+        if project_ids.empty or not self._memories:
+            return pd.Series(index=project_ids.index, dtype=object)
+
+        pid = project_ids.astype(str).str.strip()
+        iid = (interface_ids.astype(str).str.strip()
+               .str.replace(_ROLE_SUFFIX_PATTERN, "", regex=True).str.strip())
+        keys = (f"{file_type}|" + pid + "|" + iid).where(iid != "")
+        return keys.map(self._memories)
+
     def batch_save_memories(self, assignments: list) -> int:
         """
         批量保存指派记忆
@@ -188,6 +276,7 @@ class AssignmentMemory:
             int: 成功保存的记忆数量
         """
         count = 0
+        changes: Dict[str, Optional[str]] = {}
         with self._lock:
             for assignment in assignments:
                 file_type = assignment.get("file_type")
@@ -199,11 +288,14 @@ class AssignmentMemory:
                     continue
 
                 key = self._make_key(file_type, project_id, interface_id)
-                self._memories[key] = assigned_name.strip()
+                name = assigned_name.strip()
                 count += 1
+                if self._memories.get(key) != name:
+                    self._memories[key] = name
+                    changes[key] = name
 
-        if count > 0:
-            self._save()
+        # 仅追加实际变化的记忆
+        self._append(changes)
 
         return count
 
@@ -225,7 +317,7 @@ class AssignmentMemory:
         with self._lock:
             if key in self._memories:
                 del self._memories[key]
-                self._save()
+                self._append({key: None})
                 return True
         return False
 
@@ -282,6 +374,11 @@ def get_memory(file_type: int, project_id: str, interface_id: str) -> Optional[s
     return get_assignment_memory().get_memory(file_type, project_id, interface_id)
 
 
+def lookup_memories(file_type: int, project_ids, interface_ids) -> pd.Series:
+    """批量获取指派记忆（便捷函数，Series 入 Series 出）"""
+    return get_assignment_memory().lookup_series(file_type, project_ids, interface_ids)
+
+
 def batch_save_memories(assignments: list) -> int:
     """批量保存指派记忆（便捷函数）"""
     return get_assignment_memory().batch_save_memories(assignments)
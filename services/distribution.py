@@ -1070,6 +1070,7 @@ class ForceAssignDialog(tk.Toplevel):
         try:
             from registry.service import find_tasks_for_force_assign
             from registry.config import get_config
+            from registry.sharding import shard_db_path
 
             cfg = get_config()
             db_path = cfg.get('registry_db_path')
@@ -1079,7 +1080,7 @@ class ForceAssignDialog(tk.Toplevel):
                 messagebox.showerror("错误", "未配置Registry数据库路径", parent=self)
                 return
 
-            tasks = find_tasks_for_force_assign(db_path, wal, file_type, project_id, interface_id)
+            tasks = find_tasks_for_force_assign(shard_db_path(db_path, project_id), wal, file_type, project_id, interface_id)
 
             if not tasks:
                 messagebox.showwarning(
@@ -388,7 +388,30 @@ class FileIdentityManager:
         file_hash = hashlib.md5(os.path.abspath(file_path).encode('utf-8')).hexdigest()[:8]
         cache_filename = f"{file_hash}_{project_id}_{file_type}.pkl"
         return os.path.join(self.result_cache_dir, cache_filename)
-    
+
+    def _migrate_legacy_result(self, file_path: str, project_id: str, file_type: str, dataframe):
+        """
+        旧版完整结果 -> 紧凑结果（core.result_frame），并回写缓存
+
+        参数:
+            file_type: 文件类型（file1-file6）
+
+        返回:
+            紧凑结果；无法识别文件类型或转换失败时原样返回
+        """
+        try:
+            from core.result_frame import compact_result, is_compact
+
+            if not isinstance(dataframe, pd.DataFrame) or is_compact(dataframe):
+                return dataframe
+            type_num = int(str(file_type).replace('file', ''))
+            compact = compact_result(dataframe, type_num)
+            if compact is not dataframe:
+                self.save_cached_result(file_path, project_id, file_type, compact)
+            return compact
+        except Exception:
+            return dataframe
+
     def save_cached_result(self, file_path: str, project_id: str, file_type: str, 
                           dataframe: pd.DataFrame) -> bool:
         """
@@ -469,7 +492,10 @@ class FileIdentityManager:
             # 加载缓存
             with open(cache_file, 'rb') as f:
                 dataframe = pickle.load(f)
-            
+
+            # 【优化】旧版缓存保存的是完整结果（源表全部列）：投影为紧凑结果并回写，缩小缓存文件
+            dataframe = self._migrate_legacy_result(file_path, project_id, file_type, dataframe)
+
             # 控制台输出优化：已验证逻辑，默认不输出
             return dataframe
             
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Structured logging (levels / categories / rate limiting) and Monitor batching tests.
+"""
+
+import json
+
+import pytest
+
+from utils import app_log
+from core import Monitor
+
+
+pytestmark = pytest.mark.allow_empty_name
+
+TOTAL_MESSAGES = 1200
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def log_env(tmp_path, monkeypatch):
+    clock = _FakeClock()
+    monkeypatch.setattr(app_log, "_clock", clock)
+    monkeypatch.setattr(app_log, "_sinks", {})
+    monkeypatch.setattr(app_log, "_limiter", app_log._RateLimiter(app_log.DEFAULT_RATE_LIMITS))
+    monkeypatch.setattr(app_log, "_file_level", app_log.LEVELS["DEBUG"])
+    path = str(tmp_path / "logs" / "app.jsonl")
+    monkeypatch.setattr(app_log, "_file_sink", app_log._FileSink(path))
+    captured = []
+    app_log.add_sink("capture", captured.append, level="INFO")
+    return clock, captured, path
+
+
+def test_levels_route_to_sinks_and_file(log_env):
+    _, captured, path = log_env
+
+    app_log.debug("general", "debug line")
+    app_log.info("general", "info line")
+    app_log.error("export", "error line")
+    app_log.flush()
+
+    assert [r["message"] for r in captured] == ["info line", "error line"]
+    assert captured[1]["category"] == "export" and captured[1]["level"] == "ERROR"
+    with open(path, encoding="utf-8") as f:
+        file_records = [json.loads(line) for line in f]
+    # 文件默认记录 DEBUG 及以上
+    assert [r["message"] for r in file_records] == ["debug line", "info line", "error line"]
+
+
+def test_rate_limit_drops_excess_and_reports_count(log_env):
+    clock, captured, _ = log_env
+    app_log.set_rate_limit("date_parse", per_second=1.0, burst=3)
+
+    for i in range(10):
+        app_log.warning("date_parse", f"bad date {i}")
+    assert [r["message"] for r in captured] == ["bad date 0", "bad date 1", "bad date 2"]
+
+    clock.now += 1.0
+    app_log.warning("date_parse", "bad date later")
+    assert captured[-2]["message"] == "（date_parse 类日志已省略 7 条）"
+    assert captured[-1]["message"] == "bad date later"
+
+
+def test_errors_are_never_rate_limited(log_env):
+    _, captured, _ = log_env
+    app_log.set_rate_limit("registry.pending", per_second=0.1, burst=1)
+
+    for _ in range(5):
+        app_log.error("registry.pending", "boom")
+    assert len(captured) == 5
+
+
+def test_monitor_compact_mode_filters_by_category():
+    monitor = Monitor.ProcessMonitor()
+
+    monitor.add_message("找到待处理文件1: 项目2016", "SUCCESS")
+    monitor.add_message("处理1完成：找到 3 行", "INFO", category="step")
+    monitor.add_message("逐行调试", "DEBUG")
+    monitor.compact_mode = False
+    monitor.add_message("处理2完成：找到 5 行", "INFO", category="step")
+
+    assert [m for _, m, _ in monitor.drain_pending()] == [
+        "找到待处理文件1: 项目2016",
+        "处理2完成：找到 5 行",
+    ]
+
+
+def test_monitor_renders_in_batches_and_trims_history():
+    monitor = Monitor.ProcessMonitor()
+    for i in range(TOTAL_MESSAGES):
+        monitor.add_message(f"msg {i}", "INFO")
+
+    first = monitor.drain_pending(Monitor.ProcessMonitor.MAX_BATCH)
+    assert len(first) == Monitor.ProcessMonitor.MAX_BATCH
+    # 无窗口时仍记录历史，超过上限后裁剪为一半
+    monitor._render_batch(first)
+    monitor._render_batch(monitor.drain_pending(Monitor.ProcessMonitor.MAX_BATCH))
+    monitor._render_batch(monitor.drain_pending(Monitor.ProcessMonitor.MAX_BATCH))
+    assert len(monitor.messages) <= Monitor.ProcessMonitor.MAX_MESSAGES
+    assert monitor.messages[-1].endswith(f"[信息] msg {TOTAL_MESSAGES - 1}\n")
@@ -193,6 +193,64 @@ class TestAssignmentMemory:
         assert memory_instance.get_memory(1, '1907', 'HQ-TA-001') == '张三'
         assert memory_instance.get_memory(2, '1907', 'HQ-TA-001') == '李四'
 
+    def test_lookup_series_vectorized(self, memory_instance):
+        """测试批量查询：Series 入 Series 出，接口号后缀规范化"""
+        memory_instance.save_memory(1, '1907', 'HQ-TA-001', '张三')
+        memory_instance.save_memory(1, '1818', 'HQ-TA-002', '李四')
+
+        project_ids = pd.Series([' 1907', '1818', '1907', '1818'], index=[10, 11, 12, 13])
+        interface_ids = pd.Series(['HQ-TA-001(设计人员)', 'HQ-TA-002', 'HQ-TA-002', '(设计人员)'],
+                                  index=[10, 11, 12, 13])
+
+        result = memory_instance.lookup_series(1, project_ids, interface_ids)
+
+        assert list(result.index) == [10, 11, 12, 13]
+        assert result[10] == '张三'
+        assert result[11] == '李四'
+        assert pd.isna(result[12]) and pd.isna(result[13])
+
+    def test_incremental_persistence_appends_changes(self, temp_storage_path):
+        """测试增量持久化：保存只追加日志，重新加载时重放（含删除）"""
+        from services.assignment_memory import AssignmentMemory
+
+        memory1 = AssignmentMemory(storage_path=temp_storage_path)
+        memory1.batch_save_memories([
+            {'file_type': 1, 'project_id': '1907', 'interface_id': f'HQ-TA-{i:03d}', 'assigned_name': '张三'}
+            for i in range(50)
+        ])
+        memory1.save_memory(1, '1907', 'HQ-TA-001', '李四')
+        # 重复保存相同指派不产生新日志
+        memory1.save_memory(1, '1907', 'HQ-TA-001', '李四')
+        memory1.clear_memory(1, '1907', 'HQ-TA-002')
+
+        assert not temp_storage_path.exists()
+        with memory1.log_path.open(encoding='utf-8') as f:
+            assert len(f.readlines()) == 52
+
+        memory2 = AssignmentMemory(storage_path=temp_storage_path)
+        assert memory2.get_memory_count() == 49
+        assert memory2.get_memory(1, '1907', 'HQ-TA-001') == '李四'
+        assert memory2.get_memory(1, '1907', 'HQ-TA-002') is None
+
+    def test_log_compacts_into_snapshot(self, temp_storage_path, monkeypatch):
+        """测试日志超过阈值后压缩为快照"""
+        import services.assignment_memory as am
+        monkeypatch.setattr(am, 'COMPACT_MIN_LINES', 5)
+
+        memory1 = am.AssignmentMemory(storage_path=temp_storage_path)
+        for i in range(6):
+            memory1.save_memory(2, '1818', f'HQ-TA-{i % 2}', f'王{i}')
+
+        # 第6条日志超过阈值：全部合并进快照，日志清空
+        assert temp_storage_path.exists()
+        assert not memory1.log_path.exists()
+        memory1.save_memory(2, '1818', 'HQ-TA-0', '赵六')
+
+        memory2 = am.AssignmentMemory(storage_path=temp_storage_path)
+        assert memory2.get_memory_count() == 2
+        assert memory2.get_memory(2, '1818', 'HQ-TA-0') == '赵六'
+        assert memory2.get_memory(2, '1818', 'HQ-TA-1') == '王5'
+
 
 class TestConvenienceFunctions:
     """便捷函数测试"""
@@ -266,6 +324,23 @@ class TestApplyAssignmentMemory:
         assert result_df.loc[2, '责任人'] == '王五'  # 从记忆填充
         assert result_df.loc[3, '责任人'] == ''  # 没有记忆，保持为空
 
+    def test_apply_memory_with_duplicate_index(self, tmp_path, monkeypatch, reset_singleton):
+        """测试：合并多项目结果后行索引重复时按位置填充"""
+        monkeypatch.setenv('LOCALAPPDATA', str(tmp_path))
+
+        from services.assignment_memory import save_memory
+        from core.main import apply_assignment_memory
+
+        save_memory(1, '1818', 'HQ-TA-003', '王五')
+        df = pd.DataFrame({
+            '项目号': ['1907', '1818'],
+            '接口号': ['HQ-TA-003', 'HQ-TA-003'],
+            '责任人': ['', 'nan'],
+        }, index=[0, 0])
+
+        result_df = apply_assignment_memory(df.copy(), file_type=1)
+        assert list(result_df['责任人']) == ['', '王五']
+
     def test_apply_memory_respects_existing_responsible(self, tmp_path, monkeypatch, reset_singleton):
         """测试：不覆盖已有责任人"""
         monkeypatch.setenv('LOCALAPPDATA', str(tmp_path))
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Folder scanner: one-pass filename classification and directory snapshot reuse.
+"""
+
+import datetime
+import os
+import time
+
+import pytest
+
+from core import main
+from core.file_scanner import classify_files, classify_filename, parse_source_timestamp, scan_excel_files
+
+
+pytestmark = pytest.mark.allow_empty_name
+
+FILENAMES = [
+    "2016按项目导出IDI手册2025-08-01-17_55_52.xlsx",
+    "2016按项目导出IDI手册2025-08-03.xlsx",
+    "1818按项目导出IDI手册2025-07-30-08_00_00.xls",
+    "内部接口信息单报表201620250801.xlsx",
+    "外部接口ICM报表201620250802.xlsx",
+    "外部接口单报表181820250803.xlsx",
+    "2016接口提资清单(更新).xlsx",
+    "收发文清单2016.xlsx",
+    "副本-收发文清单.xlsx",
+    "收发文清单2016.XLSX",
+    "外部接口单报表2016.xlsx",
+    "说明.xlsx",
+    "~$内部接口信息单报表201620250801.xlsx",
+]
+
+
+def test_classification_matches_find_all_target_files():
+    paths = [os.path.join("data", name) for name in FILENAMES]
+
+    by_type, _timestamps = classify_files(paths)
+
+    legacy = {
+        1: main.find_all_target_files1, 2: main.find_all_target_files2, 3: main.find_all_target_files3,
+        4: main.find_all_target_files4, 5: main.find_all_target_files5, 6: main.find_all_target_files6,
+    }
+    for file_type, finder in legacy.items():
+        assert by_type[file_type] == finder(paths), file_type
+    assert by_type[6] == [(paths[7], "2016"), (paths[8], "")]
+    assert classify_filename("说明.xlsx") == []
+
+
+def test_classification_carries_filename_timestamps():
+    paths = [os.path.join("data", name) for name in FILENAMES[:6]]
+
+    _by_type, timestamps = classify_files(paths)
+
+    assert timestamps[paths[0]] == datetime.datetime(2025, 8, 1, 17, 55, 52)
+    assert timestamps[paths[1]] == datetime.datetime(2025, 8, 3)
+    assert timestamps[paths[3]] == datetime.datetime(2025, 8, 1)
+    assert timestamps[paths[5]] == datetime.datetime(2025, 8, 3)
+    for path, ts in timestamps.items():
+        file_type = classify_filename(os.path.basename(path))[0].file_type
+        assert parse_source_timestamp(file_type, os.path.basename(path)) == ts
+    assert parse_source_timestamp(5, FILENAMES[6]) is None
+
+
+def test_scan_reuses_snapshot_until_folder_changes(tmp_path):
+    folder = tmp_path / "data"
+    folder.mkdir()
+    for name in ("收发文清单2016.xlsx", "内部接口信息单报表201620250801.xlsx", "notes.txt"):
+        (folder / name).write_bytes(b"x" * 10)
+    (folder / "归档.xlsx").mkdir()
+    snapshot = str(tmp_path / "cache" / "folder_snapshot.json")
+    old = time.time() - 60
+    os.utime(str(folder), (old, old))
+
+    entries, from_snapshot = scan_excel_files(str(folder), snapshot_path=snapshot)
+    assert not from_snapshot
+    assert [os.path.basename(e.path) for e in entries] == ["内部接口信息单报表201620250801.xlsx", "收发文清单2016.xlsx"]
+    assert all(e.size == 10 for e in entries)
+
+    again, from_snapshot = scan_excel_files(str(folder), snapshot_path=snapshot)
+    assert from_snapshot and again == entries
+
+    # 新增文件改变文件夹修改时间，快照失效
+    (folder / "外部接口单报表201620250803.xlsx").write_bytes(b"y")
+    os.utime(str(folder), (old + 10, old + 10))
+    refreshed, from_snapshot = scan_excel_files(str(folder), snapshot_path=snapshot)
+    assert not from_snapshot and len(refreshed) == 3
+
+
+def test_snapshot_is_not_trusted_for_recently_modified_folder(tmp_path):
+    folder = tmp_path / "data"
+    folder.mkdir()
+    (folder / "收发文清单2016.xlsx").write_bytes(b"x")
+    snapshot = str(tmp_path / "folder_snapshot.json")
+
+    scan_excel_files(str(folder), snapshot_path=snapshot)
+    _entries, from_snapshot = scan_excel_files(str(folder), snapshot_path=snapshot)
+
+    # 文件夹刚修改过（同一时间粒度内可能还有写入），不复用快照
+    assert not from_snapshot
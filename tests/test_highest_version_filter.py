@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Vectorized highest-version selection tests (_filter_rows_by_highest_version).
+"""
+
+import random
+import re
+
+import pandas as pd
+import pytest
+
+from core import main
+from registry.util import extract_interface_id
+
+
+pytestmark = pytest.mark.allow_empty_name
+
+VERSION_COL = 4
+
+
+def _reference_filter(df, file_type, rows, version_col_index):
+    """逐行实现（向量化前的算法），用于对照"""
+    def rank_of(value):
+        if value is None:
+            return 0
+        text = str(value).strip()
+        if not text or text.lower() in ("nan", "none"):
+            return 0
+        match = re.search(r"[A-Za-z]", text)
+        return ord(match.group(0).upper()) - ord("A") + 1 if match else 0
+
+    best_rank, best_rows, keep_rows = {}, {}, set()
+    for idx in rows:
+        if idx < 0 or idx >= len(df):
+            continue
+        interface_id = str(extract_interface_id(df.iloc[idx], file_type) or "").strip()
+        if not interface_id:
+            keep_rows.add(idx)
+            continue
+        rank = rank_of(df.iloc[idx, version_col_index])
+        current = best_rank.get(interface_id)
+        if current is None or rank > current:
+            best_rank[interface_id] = rank
+            best_rows[interface_id] = [idx]
+        elif rank == current:
+            best_rows[interface_id].append(idx)
+    for row_list in best_rows.values():
+        keep_rows.update(row_list)
+    return keep_rows
+
+
+def _random_frame(n, seed):
+    rng = random.Random(seed)
+    ids = [f"IF-{i:03d}" for i in range(n // 4 + 1)]
+    versions = ["A", "b", "C版", "rev D", "", None, float("nan"), "nan", "12", " E "]
+    rows = [["接口号", "", "", "", "版次"]]
+    for _ in range(n):
+        iid = rng.choice(ids + ["", None])
+        if iid and rng.random() < 0.2:
+            iid += "(设计人员)"
+        rows.append([iid, "x", "y", "z", rng.choice(versions)])
+    return pd.DataFrame(rows, columns=list("ABCDE"))
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_matches_row_by_row_reference(seed):
+    df = _random_frame(400, seed)
+    rows = set(range(1, len(df))) | {-1, len(df) + 3}
+
+    expected = _reference_filter(df, 1, rows, VERSION_COL)
+    actual = main._filter_rows_by_highest_version(df, 1, rows, VERSION_COL)
+
+    assert actual == expected
+    assert all(type(idx) is int for idx in actual)
+
+
+def test_keeps_ties_and_blank_ids_and_respects_subset():
+    df = pd.DataFrame(
+        [["接口号", "", "", "", "版次"],
+         ["IF-1", "", "", "", "A"],
+         ["IF-1", "", "", "", "B"],
+         ["IF-1(接口工程师)", "", "", "", "b"],
+         ["", "", "", "", "A"],
+         ["IF-2", "", "", "", "C"]],
+        columns=list("ABCDE"),
+    )
+
+    assert main._filter_rows_by_highest_version(df, 1, set(range(1, 6)), VERSION_COL) == {2, 3, 4, 5}
+    # 只在候选行内比较版次
+    assert main._filter_rows_by_highest_version(df, 1, {1, 5}, VERSION_COL) == {1, 5}
+    # 版次列不存在时原样返回
+    assert main._filter_rows_by_highest_version(df, 1, {1, 2}, 40) == {1, 2}
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Background job scheduler: priorities, coalescing, cancellation and progress.
+"""
+
+import datetime
+import os
+import threading
+import time
+
+import pytest
+
+from core import main
+from scripts.bench import synthetic_data
+from utils.job_scheduler import (
+    CANCELLED, DONE, PRIORITY_BACKGROUND_TAB, PRIORITY_EXPORT, PRIORITY_REGISTRY_SYNC, PRIORITY_VISIBLE,
+    CancelToken, JobCancelled, JobScheduler, check_cancelled,
+)
+
+
+pytestmark = pytest.mark.allow_empty_name
+
+TIMEOUT = 5
+
+
+def _blocker(scheduler):
+    """占住唯一的工作线程，直到 release.set()"""
+    started, release = threading.Event(), threading.Event()
+
+    def run(job):
+        started.set()
+        release.wait(TIMEOUT)
+
+    job = scheduler.submit("blocker", run)
+    assert started.wait(TIMEOUT)
+    return job, release
+
+
+def test_jobs_run_in_priority_order():
+    scheduler = JobScheduler(max_workers=1)
+    blocker, release = _blocker(scheduler)
+    order = []
+    jobs = [
+        scheduler.submit(name, lambda job, n=name: order.append(n), priority=priority)
+        for name, priority in (("export", PRIORITY_EXPORT), ("sync", PRIORITY_REGISTRY_SYNC),
+                               ("background", PRIORITY_BACKGROUND_TAB), ("visible", PRIORITY_VISIBLE),
+                               ("visible2", PRIORITY_VISIBLE))
+    ]
+    release.set()
+
+    assert all(job.wait(TIMEOUT) for job in jobs)
+    assert order == ["visible", "visible2", "background", "sync", "export"]
+    assert blocker.state == DONE
+
+
+def test_duplicate_jobs_coalesce_and_replace_cancels_stale_run():
+    scheduler = JobScheduler(max_workers=2)
+    events = []
+    started = threading.Event()
+
+    def stale(job):
+        started.set()
+        # 模拟长循环：每轮检查取消
+        while True:
+            check_cancelled()
+            time.sleep(0.01)
+
+    first = scheduler.submit("refresh", stale, key="refresh", on_cancelled=lambda: events.append("cancelled"))
+    assert started.wait(TIMEOUT)
+    # 重复点击：复用同一任务
+    assert scheduler.submit("refresh", stale, key="refresh") is first
+
+    # 切换文件夹：取消旧任务，新任务在旧任务退出后才开始（同 key 串行）
+    second = scheduler.submit("refresh", lambda job: events.append(("ran", first.state)), key="refresh",
+                              replace=True, on_done=lambda _result: events.append("done"))
+    assert second is not first
+    assert second.wait(TIMEOUT) and first.wait(TIMEOUT)
+    assert first.state == CANCELLED and second.state == DONE
+    assert events == ["cancelled", ("ran", CANCELLED), "done"]
+    assert scheduler.active_job("refresh") is None
+
+
+def test_cancelled_queued_job_never_runs_and_progress_reaches_callback():
+    posted = []
+    scheduler = JobScheduler(post_ui=posted.append, max_workers=1)
+    _blocker_job, release = _blocker(scheduler)
+    ran = []
+    queued = scheduler.submit("process", lambda job: ran.append(1), key="process",
+                              on_cancelled=lambda: ran.append("cancelled"))
+    assert scheduler.cancel("process")
+    assert queued.state == CANCELLED and scheduler.pending_count() == 0
+
+    progress = []
+
+    def work(job):
+        for i in range(1, 4):
+            job.report_progress(i, 3, f"step{i}")
+        return "ok"
+
+    job = scheduler.submit("work", work, on_progress=lambda *args: progress.append(args),
+                           on_done=lambda result: progress.append(result))
+    release.set()
+    assert job.wait(TIMEOUT)
+    # 回调只投递到 post_ui（主线程）执行
+    assert ran == [] and progress == []
+    for callback in posted:
+        callback()
+    assert ran == ["cancelled"]
+    assert progress == [(1, 3, "step1"), (2, 3, "step2"), (3, 3, "step3"), "ok"]
+
+
+def test_cancel_token_stops_processing_before_filtering(tmp_path):
+    now = datetime.datetime(2026, 3, 10, 9, 0, 0)
+    header, rows = synthetic_data.generate_rows(1, "2016", 20, now, seed=1)
+    path = os.path.join(str(tmp_path), synthetic_data.source_filename(1, "2016", now))
+    synthetic_data.write_xlsx(path, header, rows)
+
+    token = CancelToken()
+    assert not main.process_target_file(path, now, cancel_token=token).empty
+
+    token.cancel()
+    with pytest.raises(JobCancelled):
+        main.process_target_file(path, now, cancel_token=token)
+
+    # 调度器任务内不传令牌时使用当前任务的令牌
+    scheduler = JobScheduler(max_workers=1)
+    job = scheduler.submit("process", lambda job: (job.token.cancel(), main.process_target_file(path, now)))
+    assert job.wait(TIMEOUT)
+    assert job.state == CANCELLED
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local read-only replica: online-backup snapshots, cheap verification and atomic swap.
+"""
+
+import os
+import sqlite3
+
+import pytest
+
+from registry.local_cache import LocalCacheManager
+
+
+pytestmark = pytest.mark.allow_empty_name
+
+
+@pytest.fixture
+def network_db(tmp_path):
+    path = str(tmp_path / "share" / "registry.db")
+    os.makedirs(os.path.dirname(path))
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=DELETE")
+    conn.execute("CREATE TABLE tasks (id TEXT PRIMARY KEY, note TEXT)")
+    conn.executemany("INSERT INTO tasks VALUES (?, ?)", [(f"t{i}", "x" * 500) for i in range(400)])
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _count(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_backup_replica_ignores_uncommitted_writes_and_keeps_network_mtime(tmp_path, network_db):
+    manager = LocalCacheManager(network_db, local_cache_dir=str(tmp_path / "cache"), backup_pages=16, backup_sleep=0)
+    steps = []
+    real_verify = manager._verify_replica
+    manager._verify_replica = lambda *args: (steps.append(args[1:]), real_verify(*args))
+
+    writer = sqlite3.connect(network_db, timeout=0.1)
+    writer.execute("BEGIN IMMEDIATE")
+    writer.execute("INSERT INTO tasks VALUES ('pending', 'uncommitted')")
+    try:
+        assert manager.force_sync()
+    finally:
+        writer.rollback()
+        writer.close()
+
+    assert _count(manager.local_db_path) == 400
+    assert steps and steps[0][0] == steps[0][1] > 16
+    assert os.path.getmtime(manager.local_db_path) == pytest.approx(os.path.getmtime(network_db))
+    assert not os.path.exists(manager.local_db_path + ".tmp")
+
+    conn = manager.get_read_connection()
+    assert conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0] == 400
+    manager.cleanup()
+
+
+def test_failed_verification_keeps_previous_replica(tmp_path, network_db):
+    manager = LocalCacheManager(network_db, local_cache_dir=str(tmp_path / "cache"), backup_sleep=0)
+    assert manager.force_sync()
+
+    conn = sqlite3.connect(network_db)
+    conn.execute("DELETE FROM tasks WHERE id LIKE 't1%'")
+    conn.commit()
+    conn.close()
+
+    def _reject(*args):
+        raise ValueError("副本页数不一致")
+
+    manager._verify_replica = _reject
+    assert manager.force_sync() is False
+    assert _count(manager.local_db_path) == 400
+    assert not os.path.exists(manager.local_db_path + ".tmp")
+
+    del manager._verify_replica
+    assert manager.force_sync()
+    assert _count(manager.local_db_path) == 400 - 111
+    manager.cleanup()
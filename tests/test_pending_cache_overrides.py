@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PendingCache overrides: indexed lookup, per-file-type versions and memoized results.
+"""
+
+import gc
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pytest
+
+from write_tasks.pending_cache import PendingCache
+
+
+pytestmark = pytest.mark.allow_empty_name
+
+SOURCE = "D:/data/2016按项目导出IDI手册2025-08-01.xlsx"
+
+
+def _results(rows=10, source=SOURCE):
+    return pd.DataFrame({
+        "原始行号": list(range(2, rows + 2)),
+        "source_file": [source] * rows,
+        "责任人": pd.Categorical(["旧人"] * rows),
+        "状态": [""] * rows,
+        "回文单号": [""] * rows,
+        "是否已完成": [""] * rows,
+    })
+
+
+def _cache():
+    cache = PendingCache()
+    cache.add_assignment_entries("a1", [
+        {"file_path": SOURCE, "row_index": 3, "file_type": 1, "assigned_name": "张三"},
+        {"file_path": SOURCE, "row_index": 5, "file_type": 1, "assigned_name": "李四"},
+    ])
+    cache.add_response_entry("r1", {"file_path": SOURCE, "row_index": 6, "file_type": 1,
+                                    "response_number": "HW-1", "user_name": "王五"})
+    return cache
+
+
+def test_overrides_patch_only_matching_rows():
+    cache = _cache()
+    df = _results()
+
+    out = cache.apply_overrides_to_dataframe(df, 1, user_roles=["设计人员"])
+
+    assert list(out["责任人"]) == ["旧人", "张三", "旧人", "李四"] + ["旧人"] * 6
+    assert out.loc[1, "状态"] == "📌 待完成"
+    assert (out.loc[4, "回文单号"], out.loc[4, "是否已完成"], out.loc[4, "状态"]) == ("HW-1", "☑", "⏳ 待审查")
+    assert out.loc[0, "状态"] == "" and out.loc[0, "回文单号"] == ""
+    # 原 DataFrame 不被修改
+    assert list(df["责任人"]) == ["旧人"] * 10
+
+    # 结果按文件名（不含目录）记录时同样命中
+    by_name = cache.apply_overrides_to_dataframe(_results(source="2016按项目导出IDI手册2025-08-01.xlsx"), 1)
+    assert by_name.loc[1, "责任人"] == "张三"
+
+    # 本人提交的回文从列表中移除
+    mine = cache.apply_overrides_to_dataframe(df, 1, current_user="王五")
+    assert len(mine) == 9 and 6 not in list(mine["原始行号"])
+
+
+def test_unchanged_frames_skip_the_pass_and_versions_are_per_file_type():
+    cache = _cache()
+    df = _results()
+
+    # 没有该文件类型的覆盖记录：原样返回
+    assert cache.apply_overrides_to_dataframe(df, 2) is df
+
+    first = cache.apply_overrides_to_dataframe(df, 1)
+    assert cache.apply_overrides_to_dataframe(df, 1) is first
+    assert cache.apply_overrides_to_dataframe(df, 1, user_roles=["2016接口工程师"]) is not first
+
+    type1, type2 = cache.type_version(1), cache.type_version(2)
+    cache.add_assignment_entries("a2", [{"file_path": SOURCE, "row_index": 8, "file_type": 2, "assigned_name": "赵六"}])
+    assert cache.type_version(1) == type1 and cache.type_version(2) == type2 + 1
+
+    cache.on_task_status_changed(MagicMock(task_id="a1", status="failed"))
+    assert cache.type_version(1) == type1 + 1
+    after_failure = cache.apply_overrides_to_dataframe(df, 1)
+    assert after_failure is not first
+    assert list(after_failure["责任人"][:4]) == ["旧人"] * 4
+
+
+def test_memo_is_dropped_once_the_source_frame_is_gone():
+    cache = _cache()
+    df = _results()
+
+    cache.apply_overrides_to_dataframe(df, 1)
+    assert 1 in cache._apply_memo
+
+    del df
+    gc.collect()
+    # 源 DataFrame 回收后不再持有覆盖结果副本
+    assert 1 not in cache._apply_memo
+
+    fresh = _results()
+    assert cache.apply_overrides_to_dataframe(fresh, 1).loc[1, "责任人"] == "张三"
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-run pending-review snapshot and vectorized interface-id matching tests.
+"""
+
+import pandas as pd
+import pytest
+
+from registry import db as registry_db
+from registry import pending_review
+from registry.util import extract_interface_id, extract_interface_id_series
+
+
+pytestmark = pytest.mark.allow_empty_name
+
+NOW = "2025-01-01T00:00:00"
+
+
+def _create_db(tmp_path, tasks):
+    db_path = str(tmp_path / "data" / ".registry" / "registry.db")
+    conn = registry_db.get_connection(db_path, wal=False)
+    try:
+        for i, (file_type, project_id, interface_id, display_status) in enumerate(tasks):
+            conn.execute(
+                """
+                INSERT INTO tasks (
+                    id, file_type, project_id, interface_id, source_file, row_index,
+                    business_id, status, display_status, first_seen_at, last_seen_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (f"t{i}", file_type, project_id, interface_id, "source.xlsx", i,
+                 f"{file_type}|{project_id}|{interface_id}", "open", display_status, NOW, NOW),
+            )
+        conn.commit()
+    finally:
+        registry_db.close_connection()
+    return db_path
+
+
+def _file1_frame(interface_ids):
+    rows = [[iid, "x", "y"] for iid in ["接口号"] + list(interface_ids)]
+    return pd.DataFrame(rows, columns=["A", "B", "C"])
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = _create_db(tmp_path, [
+        (1, "2016", "IF-001", "待审查"),
+        (1, "2017", "IF-002", "待指派人审查"),
+        (1, "2016", "IF-003", "待完成"),
+        (2, "2016", "IF-009", "待审查"),
+    ])
+    yield path
+    pending_review.end_run_snapshot()
+    registry_db.close_connection()
+
+
+def test_interface_id_series_matches_row_extraction():
+    df = pd.DataFrame({
+        "A": ["接口号", " IF-001(设计人员) ", None, 12, float("nan")],
+        "B": list("abcde"),
+    })
+    vectorized = extract_interface_id_series(df, 1)
+    assert list(vectorized) == [extract_interface_id(df.iloc[i], 1) for i in range(len(df))]
+
+    named = pd.DataFrame({"接口号": ["IF-7(接口工程师)"], "X": [1]}, index=[5])
+    assert list(extract_interface_id_series(named, 3)) == ["IF-7"]
+    # 列数不足时返回空接口号
+    assert list(extract_interface_id_series(df, 2)) == [""] * len(df)
+
+
+def test_snapshot_queries_once_per_file_type(db_path):
+    snapshot = pending_review.PendingReviewSnapshot(db_path)
+    df = _file1_frame(["IF-001(设计人员)", "IF-002", "IF-003", "IF-001"])
+
+    rows_2016 = pending_review.collect_pending_review_rows(
+        df, 1, "2016", allowed_rows={1, 2, 3}, final_rows=set(), snapshot=snapshot)
+    rows_2017 = pending_review.collect_pending_review_rows(
+        df, 1, "2017", allowed_rows={1, 2, 3, 4}, final_rows={2}, snapshot=snapshot)
+    rows_none = pending_review.collect_pending_review_rows(
+        df, 1, "", allowed_rows={1, 2, 3, 4}, final_rows=set(), snapshot=snapshot)
+
+    # 第4行未通过科室筛选；"待完成"不加回；已在结果中的行不重复加回；无项目号不匹配
+    assert rows_2016 == {1}
+    assert rows_2017 == set()
+    assert rows_none == set()
+    assert snapshot.query_count == 1
+
+    assert snapshot.tasks_by_project(2) == {"2016": {"IF-009": "待审查"}}
+    assert snapshot.query_count == 2
+
+
+def test_row_project_and_interface_only_fallback(db_path):
+    snapshot = pending_review.PendingReviewSnapshot(db_path)
+    columns = [f"c{i}" for i in range(5)]
+    df = pd.DataFrame([["h"] * 5, ["", "", "", "", "IF-002"], ["", "", "", "", "IF-001"]], columns=columns)
+
+    # 文件名无项目号：退化为按接口号匹配（不限项目）
+    assert pending_review.collect_pending_review_rows(
+        df, 1, "", {1, 2}, set(), snapshot=snapshot, use_row_project=True) == set()
+    df4 = df.copy()
+    rows = pending_review.collect_pending_review_rows(
+        df4.rename(columns={"c4": "接口号"}), 1, "", {1, 2}, set(),
+        snapshot=snapshot, use_row_project=True)
+    assert rows == {1, 2}
+
+    # 行内项目号优先于文件名项目号
+    with_project = df4.rename(columns={"c4": "接口号"}).assign(项目号=["", "2017", "2017"])
+    rows = pending_review.collect_pending_review_rows(
+        with_project, 1, "2016", {1, 2}, set(), snapshot=snapshot, use_row_project=True)
+    assert rows == {1}
+
+
+def test_process_functions_use_active_run_snapshot(db_path, monkeypatch):
+    calls = []
+    snapshot = pending_review.begin_run_snapshot({"registry_db_path": db_path, "registry_wal": False})
+    original_query = snapshot._query
+    monkeypatch.setattr(snapshot, "_query", lambda ft: calls.append(ft) or original_query(ft))
+
+    df = _file1_frame(["IF-001"])
+    for _ in range(15):
+        assert pending_review.collect_pending_review_rows(df, 1, "2016", {1}, set()) == {1}
+    assert calls == [1]
+
+    pending_review.end_run_snapshot()
+    assert pending_review.get_active_snapshot() is None
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Performance span/timer instrumentation tests.
+"""
+
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from utils import perf_trace
+from ui.perf_report import format_run_rows
+
+
+pytestmark = pytest.mark.allow_empty_name
+
+
+@pytest.fixture
+def trace_log(tmp_path, monkeypatch):
+    path = str(tmp_path / "perf" / "perf_trace.jsonl")
+    previous = perf_trace.is_enabled()
+    perf_trace.set_log_path(path)
+    perf_trace.clear_log()
+    yield path
+    perf_trace.set_enabled(False)
+    perf_trace.end_run()
+    perf_trace.clear_log()
+    perf_trace.set_log_path(None)
+    perf_trace.set_enabled(previous)
+
+
+def test_disabled_span_and_decorator_record_nothing(trace_log):
+    perf_trace.set_enabled(False)
+    calls = []
+
+    @perf_trace.traced("stage", describe=lambda a, k, r: calls.append(1) or {})
+    def work(x):
+        return [x] * 3
+
+    with perf_trace.span("outer", file_type=1) as sp:
+        sp.set(rows=5)
+        assert work(1) == [1, 1, 1]
+
+    assert calls == []
+    assert perf_trace.get_recent_records() == []
+    assert perf_trace.load_records() == []
+
+
+def test_enabled_records_fields_and_flushes(trace_log):
+    perf_trace.set_enabled(True)
+    run_id = perf_trace.begin_run("开始处理")
+
+    @perf_trace.traced("process", file_type=2)
+    def process(path):
+        return pd.DataFrame({"a": range(4)})
+
+    with perf_trace.span("process_with_cache", file_type="file2", project_id="2016") as sp:
+        result = process("按项目导出IDI手册2016-2025.xlsx")
+        sp.set(rows=len(result), cache_hit=False)
+    perf_trace.end_run()
+
+    with open(trace_log, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+
+    assert [r["stage"] for r in records] == ["process", "process_with_cache"]
+    assert all(r["run_id"] == run_id for r in records)
+    assert records[0]["rows"] == 4 and records[0]["file_type"] == 2
+    assert records[1]["project"] == "2016" and records[1]["file_type"] == 2
+    assert records[1]["cache_hit"] is False
+    assert records[1]["ms"] >= records[0]["ms"]
+
+
+def test_decorator_records_error_and_reraises(trace_log):
+    perf_trace.set_enabled(True)
+
+    @perf_trace.traced("boom")
+    def boom():
+        raise ValueError("x")
+
+    with pytest.raises(ValueError):
+        boom()
+    assert perf_trace.get_recent_records()[-1]["error"] == "ValueError"
+
+
+def test_log_rolls_over_to_backup(trace_log, monkeypatch):
+    monkeypatch.setattr(perf_trace, "MAX_LOG_BYTES", 200)
+    perf_trace.set_enabled(True)
+    perf_trace.begin_run()
+    for _ in range(3):
+        for i in range(5):
+            perf_trace.record("stage", 1.0, rows=i)
+        perf_trace.flush()
+
+    # 只保留一个备份：第三次写入前再次滚动，最早一批被丢弃
+    assert os.path.exists(trace_log + ".1")
+    assert len(perf_trace.load_records()) == 10
+
+
+def test_summarize_runs_keeps_latest_runs_first(trace_log):
+    records = []
+    for run_id, hits in (("r1", [True, False]), ("r2", [True, True]), ("r3", [False])):
+        for hit in hits:
+            records.append({"run_id": run_id, "stage": "process_with_cache", "ms": 10.0, "parent": None,
+                            "rows": 5, "cache_hit": hit, "ts": "2026-03-10T09:00:00"})
+        records.append({"run_id": run_id, "stage": "process", "ms": 4.0, "rows": 5,
+                        "parent": "process_with_cache"})
+    records.append({"run_id": "", "stage": "process", "ms": 99.0})
+
+    runs = perf_trace.summarize_runs(records, last_n=2)
+
+    assert [r["run_id"] for r in runs] == ["r3", "r2"]
+    stage = runs[1]["stages"]["process_with_cache"]
+    assert stage["count"] == 2 and stage["cache_hits"] == 2 and stage["rows"] == 10
+
+    parent, children = format_run_rows(runs)[1]
+    # 内层"筛选处理"已包含在"处理(含缓存)"中，运行总耗时不重复计算
+    assert parent[3] == "20"
+    assert children[0][1] == "处理(含缓存)" and children[0][6] == "2/2"
+
+
+def test_nested_spans_record_parent_and_total_counts_top_level_only(trace_log):
+    perf_trace.set_enabled(True)
+    perf_trace.begin_run("开始处理")
+
+    @perf_trace.traced("get_task_states")
+    def get_task_states():
+        perf_trace.record("prepare_display_model", 2.0)
+        return {}
+
+    with perf_trace.span("display_excel_data"):
+        get_task_states()
+    perf_trace.record("on_process_done", 5.0)
+    perf_trace.end_run()
+
+    records = perf_trace.load_records()
+    assert [(r["stage"], r["parent"]) for r in records] == [
+        ("prepare_display_model", "get_task_states"),
+        ("get_task_states", "display_excel_data"),
+        ("display_excel_data", None),
+        ("on_process_done", None),
+    ]
+    run = perf_trace.summarize_runs(records)[0]
+    display_ms = run["stages"]["display_excel_data"]["total_ms"]
+    assert run["total_ms"] == pytest.approx(display_ms + 5.0)
+    parent, _ = format_run_rows([run])[0]
+    assert parent[3] == f"{display_ms + 5.0:.0f}"
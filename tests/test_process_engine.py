@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Golden-output tests for the declarative six-file-type processing engine.
+
+The golden file was produced by the per-type process_target_fileN implementations
+that the engine replaced. Regenerate only when a filtering rule changes on purpose:
+
+    python -m tests.test_process_engine
+"""
+
+import datetime
+import json
+import os
+import random
+import sys
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook, load_workbook
+from openpyxl.styles import Border, Font, PatternFill, Side
+
+from core import main
+from registry.pending_review import PendingReviewSnapshot
+from scripts.bench import synthetic_data
+
+
+pytestmark = pytest.mark.allow_empty_name
+
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), "golden", "process_engine.json")
+
+# 覆盖：1~19号 / 20号以后 / 11月与12月跨年窗口；1818偏移、1907/2016文件2标准逻辑、普通项目
+SCENARIOS = [
+    datetime.datetime(2026, 3, 10, 9, 0, 0),
+    datetime.datetime(2026, 11, 25, 9, 0, 0),
+    datetime.datetime(2026, 12, 21, 9, 0, 0),
+]
+PROJECTS = ["1818", "2016", "2306"]
+ROWS = 40
+VALID_NAMES = {"王丹丹", "张三", "刘峰"}
+DATE_FORMATS = ["%Y-%m-%d", "%Y/%m/%d", "%Y.%m.%d", "%Y-%m-%d %H:%M:%S", "%Y/%m/%d %H:%M:%S", "%Y年%m月%d日"]
+RESULT_FIELDS = ["原始行号", "接口号", "_completed_value", "科室", "接口时间", "责任人", "_source_column", "主办室"]
+
+
+class _FixedSnapshot(PendingReviewSnapshot):
+    """固定内容的待审查快照（不访问数据库）"""
+
+    def __init__(self, tasks):
+        super().__init__(None)
+        self._by_type = tasks
+
+
+def _messify(rows, rng):
+    """把部分日期改为各种格式的字符串/带时刻，部分空值改为空白串，部分文本加空格"""
+    messy = [list(rows[0])]
+    for row in rows[1:]:
+        new_row = []
+        for value in row:
+            r = rng.random()
+            if isinstance(value, datetime.datetime):
+                if r < 0.45:
+                    value = value.strftime(rng.choice(DATE_FORMATS))
+                elif r < 0.55:
+                    value = value + datetime.timedelta(hours=rng.randint(1, 23))
+            elif value is None:
+                if r < 0.1:
+                    value = " "
+            elif isinstance(value, str) and r < 0.08:
+                value = f" {value} "
+            new_row.append(value)
+        messy.append(new_row)
+    return messy
+
+
+def _build_cases(folder):
+    """生成源文件与待审查快照，返回 [(key, file_type, project_id, path, now, kwargs, snapshot)]"""
+    cases = []
+    for now in SCENARIOS:
+        tasks = {}
+        sources = []
+        # 原始数据只在第一个场景生成一次，其余场景只用混杂格式的数据
+        variants = ("clean", "messy") if now == SCENARIOS[0] else ("messy",)
+        for variant in variants:
+            for project_id in PROJECTS:
+                for file_type in range(1, 7):
+                    header, rows = synthetic_data.generate_rows(file_type, project_id, ROWS, now, seed=now.day)
+                    if variant == "messy":
+                        rows = _messify(rows, random.Random(f"{now:%Y%m%d}|{file_type}|{project_id}"))
+                    sub = os.path.join(folder, f"{now:%Y%m%d}_{variant}")
+                    os.makedirs(sub, exist_ok=True)
+                    path = os.path.join(sub, synthetic_data.source_filename(file_type, project_id, now))
+                    synthetic_data.write_xlsx(path, header, rows)
+                    iface_col = synthetic_data.INTERFACE_COLUMNS[file_type]
+                    for row in rows[1::5]:
+                        iid = str(row[iface_col] or "").strip()
+                        tasks.setdefault(file_type, {}).setdefault(project_id, {})[iid] = "待审查"
+                    sources.append((variant, file_type, project_id, path))
+        snapshot = _FixedSnapshot(tasks)
+        for variant, file_type, project_id, path in sources:
+            key = f"{now:%Y-%m-%d}|{variant}|{file_type}|{project_id}"
+            cases.append((key, file_type, project_id, path, now, {}, snapshot))
+            if file_type == 6:
+                cases.append((key + "|skip_date", 6, project_id, path, now, {"skip_date_filter": True}, snapshot))
+                cases.append((key + "|valid_names", 6, project_id, path, now, {"valid_names_set": VALID_NAMES}, snapshot))
+    return cases
+
+
+def _run_case(file_type, project_id, path, now, kwargs, snapshot):
+    func = main.process_target_file if file_type == 1 else getattr(main, f"process_target_file{file_type}")
+    if file_type == 2:
+        kwargs = dict(kwargs, project_id=project_id)
+    return func(path, now, pending_snapshot=snapshot, **kwargs)
+
+
+def _serialize(df):
+    """结果 -> 按原始行号排序的行列表（只比较 UI/导出/Registry 使用的列）"""
+    if df is None or df.empty:
+        return []
+    rows = []
+    for _, row in df.iterrows():
+        rows.append([
+            int(row["原始行号"]) if field == "原始行号" else (str(row[field]) if field in df.columns else None)
+            for field in RESULT_FIELDS
+        ])
+    return sorted(rows, key=lambda r: r[0])
+
+
+def collect_results(folder):
+    results = {}
+    for key, file_type, project_id, path, now, kwargs, snapshot in _build_cases(folder):
+        results[key] = _serialize(_run_case(file_type, project_id, path, now, kwargs, snapshot))
+    return results
+
+
+@pytest.fixture(scope="module")
+def engine_results(tmp_path_factory):
+    folder = str(tmp_path_factory.mktemp("engine_golden"))
+    return collect_results(folder)
+
+
+def test_results_match_golden_outputs(engine_results):
+    with open(GOLDEN_PATH, encoding="utf-8") as f:
+        golden = json.load(f)
+
+    assert sorted(engine_results) == sorted(golden)
+    mismatched = [key for key in golden if engine_results[key] != golden[key]]
+    assert not mismatched, mismatched[:10]
+    # 黄金数据覆盖每种文件类型的非空结果
+    for file_type in range(1, 7):
+        assert any(rows for key, rows in golden.items() if key.split("|")[2] == str(file_type)), file_type
+
+
+def _styled_source(path):
+    """两行表头 + 5行数据：奇数行加粗红底带边框，日期列带数字格式"""
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["接口号", "名称", "日期"])
+    ws.append(["编号", "说明", "时间"])
+    thin = Side(style="thin")
+    for i in range(5):
+        ws.append([f"IF-{i}", f"名称{i}", datetime.datetime(2026, 3, i + 1)])
+        if i % 2 == 0:
+            for cell in ws[ws.max_row]:
+                cell.font = Font(bold=True)
+                cell.fill = PatternFill("solid", fgColor="FFFF0000")
+                cell.border = Border(left=thin, right=thin)
+        ws.cell(row=ws.max_row, column=3).number_format = "yyyy/mm/dd"
+    wb.save(path)
+
+
+def test_export_copies_selected_rows_with_styles(tmp_path):
+    source = tmp_path / "2016按项目导出IDI手册.xlsx"
+    _styled_source(str(source))
+    # 原始行号为 Excel 行号：第3、4、6行
+    result = pd.DataFrame({"原始行号": [6, 3, 4]})
+    now = datetime.datetime(2026, 3, 10)
+
+    first = main.export_result_to_excel3(result, str(source), now, str(tmp_path), "2016")
+    second = main.export_result_to_excel3(result, str(source), now, str(tmp_path), "2016")
+
+    assert os.path.dirname(first) == str(tmp_path / "2016结果文件")
+    assert os.path.basename(first) == "外部需打开接口2026-03-10.xlsx"
+    assert os.path.basename(second) == "外部需打开接口2026-03-10(1).xlsx"
+    ws = load_workbook(first).active
+    assert ws.title == "外部需打开接口"
+    assert [c.value for c in ws[1]] == ["接口号", "名称", "日期"]
+    assert [ws.cell(row=r, column=1).value for r in range(2, ws.max_row + 1)] == ["IF-0", "IF-1", "IF-3"]
+    # 同一源样式复用后仍与源单元格一致
+    for row, styled in ((2, True), (3, False), (4, False)):
+        cell = ws.cell(row=row, column=1)
+        assert cell.font.bold is styled
+        assert (cell.fill.fgColor.rgb == "FFFF0000") is styled
+        assert (cell.border.left.style == "thin") is styled
+        assert ws.cell(row=row, column=3).number_format == "yyyy/mm/dd"
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data = collect_results(tmp)
+    os.makedirs(os.path.dirname(GOLDEN_PATH), exist_ok=True)
+    # 每行结果占一行，便于审阅差异
+    lines = []
+    for key in sorted(data):
+        rows = ",\n".join("  " + json.dumps(row, ensure_ascii=False) for row in data[key])
+        lines.append(f" {json.dumps(key, ensure_ascii=False)}: [\n{rows}\n ]" if rows else f" {json.dumps(key, ensure_ascii=False)}: []")
+    with open(GOLDEN_PATH, "w", encoding="utf-8") as f:
+        f.write("{\n" + ",\n".join(lines) + "\n}\n")
+    print(f"[Golden] 已写入 {len(data)} 组结果 -> {GOLDEN_PATH}", file=sys.stderr)
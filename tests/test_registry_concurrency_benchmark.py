@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Registry concurrency benchmark: worker operation mix, lock-retry accounting and JSON summary.
+"""
+
+import datetime
+import sqlite3
+import time
+
+import pytest
+
+from registry import db as registry_db
+from scripts.bench import registry_concurrency_benchmark as bench
+
+
+pytestmark = pytest.mark.allow_empty_name
+
+
+def test_summary_reports_throughput_percentiles_and_error_rate():
+    workers = [
+        {"latencies_ms": {"display": [1.0, 2.0, 3.0], "mark": [10.0]}, "errors": {"mark": 1},
+         "error_samples": ["mark: OperationalError: database is locked"], "lock_retries": 2, "lock_failures": 1},
+        {"latencies_ms": {"display": [4.0], "finalize": [100.0]}, "errors": {},
+         "lock_retries": 3, "lock_failures": 0},
+    ]
+    summary = bench.summarize(workers, wall_seconds=2.0)
+
+    assert summary["ops"] == 6 and summary["throughput_ops_s"] == 3.0
+    assert summary["error_rate"] == round(1 / 6, 4) and summary["errors"]["mark"] == 1
+    assert (summary["lock_retries"], summary["lock_failures"]) == (5, 1)
+    assert summary["latency_ms"]["display"] == {"count": 4, "p50": 3.0, "p99": 4.0, "max": 4.0}
+    assert summary["latency_ms"]["all"]["max"] == 100.0
+    assert "process_done" not in summary["latency_ms"]
+
+
+def test_lock_retries_are_counted_by_execute_with_retry():
+    registry_db.reset_retry_stats()
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise sqlite3.OperationalError("database is locked")
+        return "ok"
+
+    assert registry_db.execute_with_retry(flaky, base_delay=0.001, max_delay=0.001) == "ok"
+    with pytest.raises(sqlite3.OperationalError):
+        registry_db.execute_with_retry(lambda: (_ for _ in ()).throw(sqlite3.OperationalError("database is busy")),
+                                       max_retries=1, base_delay=0.001, max_delay=0.001)
+    assert registry_db.get_retry_stats() == {"lock_retries": 3, "lock_failures": 1}
+    registry_db.reset_retry_stats()
+
+
+@pytest.mark.parametrize("mode", ["delete", "wal"])
+def test_worker_runs_the_operation_mix_against_a_seeded_database(tmp_path, mode):
+    db_path = str(tmp_path / ".registry" / "registry.db")
+    wal = mode == "wal"
+    now = datetime.datetime(2030, 1, 1, 9, 0, 0)
+    assert bench.seed_database(db_path, wal, projects=2, tasks_per_project=20, now=now) == mode
+
+    result = bench.run_worker({
+        "index": 0, "db_path": db_path, "wal": wal, "server_url": "", "projects": 2, "tasks_per_project": 20,
+        "rows_per_file": 5, "keys_per_query": 10, "mix": dict(bench.DEFAULT_MIX, finalize=20),
+        "start_at": time.time(), "duration": 0.5, "seed": 1,
+    })
+
+    assert result["error_samples"] == [] and sum(result["errors"].values()) == 0
+    assert all(result["latencies_ms"][name] for name in bench.OPERATIONS)
+    assert result["lock_retries"] == 0 and result["elapsed_s"] >= 0.5
+    assert registry_db._CONN is None
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Registry history: indexed keyset pagination, the interface event timeline and event archival.
+"""
+
+import pytest
+
+from registry import db as registry_db
+from registry import service
+
+
+pytestmark = pytest.mark.allow_empty_name
+
+
+@pytest.fixture
+def history_db(tmp_path):
+    db_path = str(tmp_path / "registry.db")
+    conn = registry_db.get_connection(db_path, wal=False)
+    for i in range(23):
+        file_type = 1 if i % 3 else 2
+        # 每两条共用一个首次发现时间，验证同一时间戳跨页时不丢不重
+        seen = f"2025-01-{1 + i // 2:02d}T08:00:00"
+        conn.execute(
+            "INSERT INTO tasks (id, file_type, project_id, interface_id, source_file, row_index, "
+            "business_id, status, first_seen_at, last_seen_at) VALUES (?,?,?,?,?,?,?,?,?,?)",
+            (f"t{i}", file_type, "2016", "IF-1", f"file{i}.xlsx", i + 2, f"{file_type}|2016|IF-1",
+             "open", seen, seen),
+        )
+    conn.execute(
+        "INSERT INTO tasks (id, file_type, project_id, interface_id, source_file, row_index, status, "
+        "first_seen_at, last_seen_at) VALUES ('other', 1, '2016', 'IF-2', 'x.xlsx', 2, 'open', '2025-01-01', '2025-01-01')"
+    )
+    for i in range(7):
+        conn.execute(
+            "INSERT INTO events (ts, event, file_type, project_id, interface_id, source_file, row_index) "
+            "VALUES (?,?,?,?,?,?,?)",
+            (f"2025-02-{i + 1:02d}T08:00:00", "process_done", 1, "2016", "IF-1", "a.xlsx", 2),
+        )
+    conn.commit()
+    registry_db.close_connection()
+    yield db_path
+    registry_db.close_connection()
+
+
+def test_history_pages_are_ordered_without_gaps_or_duplicates(history_db):
+    everything = service.query_task_history(history_db, False, "2016", "IF-1")
+    assert len(everything) == 23
+    seen = [row["first_seen_at"] for row in everything]
+    assert seen == sorted(seen, reverse=True)
+
+    paged, cursor = [], None
+    while True:
+        rows, cursor = service.query_task_history_page(history_db, False, "2016", "IF-1", after=cursor, limit=4)
+        paged.extend(rows)
+        if cursor is None:
+            break
+    assert [row["id"] for row in paged] == [row["id"] for row in everything]
+
+    only_type2 = service.query_task_history(history_db, False, "2016", "IF-1", file_type=2)
+    assert {row["file_type"] for row in only_type2} == {2} and len(only_type2) == 8
+    assert registry_db._CONN is None
+
+
+def test_history_queries_use_interface_indexes(history_db):
+    conn = registry_db.open_isolated_connection(history_db, wal=False)
+    try:
+        task_plan = " ".join(str(row) for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM tasks WHERE project_id = ? AND interface_id = ? "
+            "ORDER BY first_seen_at DESC, rowid DESC LIMIT 10", ("2016", "IF-1")))
+        event_plan = " ".join(str(row) for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM events WHERE project_id = ? AND interface_id = ? "
+            "ORDER BY id DESC LIMIT 10", ("2016", "IF-1")))
+    finally:
+        conn.close()
+    assert "idx_tasks_history" in task_plan
+    assert "idx_events_interface" in event_plan
+
+
+def test_iter_interface_history_streams_tasks_then_events(history_db):
+    first, cursor = service.query_task_history_page(history_db, False, "2016", "IF-1", limit=5)
+    pages = list(service.iter_interface_history(history_db, False, "2016", "IF-1",
+                                                task_cursor=cursor, page_size=5))
+    kinds = [kind for kind, _ in pages]
+    assert kinds == ["tasks"] * 4 + ["events"] * 2
+
+    streamed = first + [row for kind, rows in pages if kind == "tasks" for row in rows]
+    assert len({row["id"] for row in streamed}) == 23
+    events = [row for kind, rows in pages if kind == "events" for row in rows]
+    assert [row["ts"][:10] for row in events] == [f"2025-02-{d:02d}" for d in range(7, 0, -1)]
+
+    only_events = list(service.iter_interface_history(history_db, False, "2016", "IF-1", skip_tasks=True))
+    assert [kind for kind, _ in only_events] == ["events"]
+    assert registry_db._CONN is None
+
+
+def test_compaction_moves_old_events_to_monthly_archives(tmp_path):
+    from datetime import datetime
+    from registry import event_archive
+
+    data_folder = tmp_path / "data"
+    db_path = str(data_folder / ".registry" / "registry.db")
+    conn = registry_db.get_connection(db_path, wal=False)
+    for month, count in (("2024-01", 30), ("2024-02", 20), ("2025-06", 5)):
+        for i in range(count):
+            conn.execute(
+                "INSERT INTO events (ts, event, file_type, project_id, interface_id, source_file, row_index, extra) "
+                "VALUES (?,?,?,?,?,?,?,?)",
+                (f"{month}-{i % 28 + 1:02d}T08:00:00", "process_done" if i % 2 else "archived", 1, "2016",
+                 "IF-1" if i < 3 else f"IF-{i}", "a.xlsx", i + 2, '{"note": "' + "x" * 200 + '"}'),
+            )
+    conn.commit()
+    registry_db.close_connection()
+
+    now = datetime(2025, 7, 1)
+    with pytest.raises(RuntimeError):
+        event_archive.compact_events(db_path, retention_days=90, now=now)
+
+    registry_db.enable_maintenance_mode(str(data_folder))
+    report = event_archive.compact_events(db_path, retention_days=90, now=now)
+    assert report["archived"] == 50 and report["months"] == {"2024-01": 30, "2024-02": 20}
+    assert report["db_size_after"] < report["db_size_before"]
+    assert event_archive.list_archive_months(db_path) == ["2024-02", "2024-01"]
+    # 重复执行不会重复归档或计数
+    assert event_archive.compact_events(db_path, retention_days=90, now=now)["archived"] == 0
+    registry_db.disable_maintenance_mode(str(data_folder))
+
+    conn = registry_db.open_isolated_connection(db_path, wal=False)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM events").fetchone()[0] == 5
+        summary = event_archive.query_event_summary(conn, project_id="2016")
+    finally:
+        conn.close()
+    assert sum(row["count"] for row in summary) == 50
+    assert {row["month"] for row in summary} == {"2024-01", "2024-02"}
+
+    # 历史时间线：热库事件之后按月倒序读取归档，extra 已解压
+    events = [row for kind, rows in service.iter_interface_history(db_path, False, "2016", "IF-1", skip_tasks=True)
+              for row in rows]
+    assert [row["ts"][:7] for row in events] == ["2025-06"] * 3 + ["2024-02"] * 3 + ["2024-01"] * 3
+    assert events[-1]["extra"].startswith('{"note"')
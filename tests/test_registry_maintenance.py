@@ -5,6 +5,7 @@ Registry maintenance mode and connection lifecycle tests.
 """
 
 import os
+import threading
 
 import pytest
 
@@ -146,3 +147,77 @@ def test_write_queue_blocks_in_maintenance(monkeypatch):
     assert request.result is False
     assert "maintenance" in (request.error or "")
     assert callback_result.get("success") is False
+
+
+def test_reconnect_skips_bootstrap_for_validated_schema(tmp_path, monkeypatch):
+    _, db_path = _create_db_with_task(tmp_path)
+    calls = []
+    original_init_db = registry_db.init_db
+    monkeypatch.setattr(registry_db, "init_db", lambda conn: (calls.append(1), original_init_db(conn)))
+
+    for _ in range(3):
+        conn = registry_db.get_connection(str(db_path), wal=False)
+        assert conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0] == 1
+        registry_db.close_connection_after_use()
+    assert calls == []
+
+    # 数据库文件被替换后重新引导
+    os.remove(db_path)
+    conn = registry_db.get_connection(str(db_path), wal=False)
+    registry_db.close_connection_after_use()
+    assert calls == [1]
+
+
+def test_lease_defers_inner_close_and_releases_on_exit(tmp_path):
+    _, db_path = _create_db_with_task(tmp_path)
+
+    with registry_db.lease_connection(str(db_path), wal=False) as conn:
+        registry_db.close_connection_after_use()
+        # 租约期间内部关闭被推迟，连接仍可用
+        assert registry_db.get_connection(str(db_path), wal=False) is conn
+        assert conn.execute("SELECT 1").fetchone() == (1,)
+
+    assert registry_db._CONN is None
+
+
+def test_lease_is_owned_by_its_thread_and_survives_path_switches(tmp_path):
+    _, db_path = _create_db_with_task(tmp_path)
+    other_path = str(tmp_path / "other" / ".registry" / "registry.db")
+    registry_db.close_connection()
+    leased = threading.Event()
+    switched = threading.Event()
+    results = []
+
+    def holder():
+        with registry_db.lease_connection(str(db_path), wal=False) as conn:
+            leased.set()
+            switched.wait(10)
+            results.append(conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0])
+            results.append(registry_db.get_connection(str(db_path), wal=False) is conn)
+
+    thread = threading.Thread(target=holder)
+    thread.start()
+    assert leased.wait(10)
+    # 其他线程切换到另一个库并释放全局连接，不影响持有租约的线程
+    registry_db.get_connection(other_path, wal=False)
+    registry_db.close_connection_after_use()
+    assert registry_db._CONN is None
+    switched.set()
+    thread.join(10)
+    assert results == [1, True]
+    assert registry_db._thread_leases() == {}
+
+
+def test_maintenance_mode_blocks_lease_and_clears_validation(tmp_path):
+    data_folder, db_path = _create_db_with_task(tmp_path)
+    assert registry_db._pool_key(str(db_path)) in registry_db._SCHEMA_VALIDATED
+
+    registry_db.enable_maintenance_mode(str(data_folder))
+    try:
+        with pytest.raises(registry_db.MaintenanceModeError):
+            with registry_db.lease_connection(str(db_path), wal=False):
+                pass
+        assert registry_db._pool_key(str(db_path)) not in registry_db._SCHEMA_VALIDATED
+        assert registry_db._thread_leases() == {}
+    finally:
+        registry_db.disable_maintenance_mode(str(data_folder))
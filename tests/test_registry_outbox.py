@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local registry outbox: hooks return without touching the share, idempotent batched draining.
+"""
+
+import sqlite3
+
+import pytest
+
+from registry import db as registry_db
+from registry import hooks
+from registry import outbox as registry_outbox
+from registry import service
+from registry.outbox import LocalOutbox, OutboxDrainer
+
+
+pytestmark = pytest.mark.allow_empty_name
+
+KEY = {"file_type": 1, "project_id": "2016", "interface_id": "IF-1", "source_file": "a.xlsx", "row_index": 5}
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "data" / ".registry" / "registry.db")
+    conn = registry_db.get_connection(db_path, wal=False)
+    for row_index, interface_id in ((5, "IF-1"), (6, "IF-2")):
+        key = dict(KEY, row_index=row_index, interface_id=interface_id)
+        service.upsert_task(db_path, False, key, {"status": "open", "display_status": "待审查"}, conn=conn)
+        conn.execute("UPDATE tasks SET status = 'completed' WHERE interface_id = ?", (interface_id,))
+    conn.commit()
+    registry_db.close_connection()
+
+    cfg = {"registry_enabled": True, "registry_db_path": db_path, "registry_wal": False, "registry_outbox_enabled": True}
+    monkeypatch.setattr(hooks, "_cfg", lambda: cfg)
+    monkeypatch.setattr(hooks, "_ensure_data_folder_from_path", lambda _path: None)
+
+    box = LocalOutbox(str(tmp_path / "local" / "registry_outbox.db"))
+    drainer = OutboxDrainer(box)
+    wakes = []
+    monkeypatch.setattr(drainer, "wake", lambda: wakes.append(1))
+    monkeypatch.setattr(registry_outbox, "_outbox", box)
+    monkeypatch.setattr(registry_outbox, "_drainer", drainer)
+    yield db_path, box, drainer, wakes
+    box.close()
+    registry_db.close_connection()
+
+
+def _shared(db_path, sql, params=()):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+
+def _confirm(interface_id="IF-1", row_index=5):
+    hooks.on_confirmed_by_superior(file_type=1, file_path="D:/x/a.xlsx", row_index=row_index,
+                                   user_name="李四", project_id="2016", interface_id=interface_id)
+
+
+def test_confirmation_is_queued_locally_and_visible_before_drain(env, monkeypatch):
+    db_path, box, drainer, wakes = env
+
+    def _no_share(*_args, **_kwargs):
+        raise AssertionError("钩子不应在调用线程上连接共享库")
+
+    real_get_connection = registry_db.get_connection
+    monkeypatch.setattr(registry_db, "get_connection", _no_share)
+    _confirm()
+    monkeypatch.setattr(registry_db, "get_connection", real_get_connection)
+    assert box.pending_count() == 1 and wakes == [1]
+    assert _shared(db_path, "SELECT status FROM tasks WHERE interface_id = 'IF-1'") == [("completed",)]
+
+    # 尚未写入共享库的确认叠加在本机的状态查询结果上
+    tid = next(iter(box.pending_ops(db_path)))
+    states = service.get_task_states(db_path, False, [KEY], pending_ops=box.pending_ops(db_path))
+    assert states[tid]["status"] == "confirmed" and states[tid]["display_status"] == "已审查"
+
+    assert drainer.drain_once() == (1, False)
+    assert box.pending_count() == 0
+    assert _shared(db_path, "SELECT status, confirmed_by FROM tasks WHERE interface_id = 'IF-1'") == [("confirmed", "李四")]
+    assert _shared(db_path, "SELECT COUNT(*) FROM events WHERE event = 'confirmed'") == [(1,)]
+    assert registry_db._CONN is None
+
+
+def test_retries_never_double_apply_and_outages_keep_entries(env, monkeypatch):
+    db_path, box, drainer, _ = env
+    _confirm()
+
+    # 共享库被锁：变更留在本机，不计失败次数
+    def _locked(*_args, **_kwargs):
+        raise sqlite3.OperationalError("database is locked")
+
+    real_lease = registry_db.lease_connection
+    monkeypatch.setattr(registry_db, "lease_connection", _locked)
+    assert drainer.drain_once() == (0, True)
+    monkeypatch.setattr(registry_db, "lease_connection", real_lease)
+    assert box.due()[0].attempts == 0
+
+    # 共享库已提交、本机删除前中断：重试时按幂等键跳过
+    real_mark_applied = box.mark_applied
+    box.mark_applied = lambda op_ids: None
+    assert drainer.drain_once() == (1, False)
+    box.mark_applied = real_mark_applied
+    assert drainer.drain_once() == (1, False)
+    assert box.pending_count() == 0
+    assert _shared(db_path, "SELECT COUNT(*) FROM events WHERE event = 'confirmed'") == [(1,)]
+    assert len(_shared(db_path, "SELECT op_id FROM applied_ops")) == 1
+
+
+def test_failed_operation_rolls_back_alone_within_the_batch(env, monkeypatch):
+    db_path, box, drainer, _ = env
+    _confirm("IF-1", 5)
+    _confirm("IF-2", 6)
+
+    real_write_event = service.write_event
+
+    def _flaky(db_path_, wal, event_type, payload, now, conn=None):
+        if payload.get("interface_id") == "IF-1":
+            raise RuntimeError("boom")
+        return real_write_event(db_path_, wal, event_type, payload, now, conn=conn)
+
+    monkeypatch.setattr(service, "write_event", _flaky)
+    assert drainer.drain_once() == (1, False)
+    # IF-1 的 mark_confirmed 随保存点回滚，IF-2 正常提交
+    assert dict(_shared(db_path, "SELECT interface_id, status FROM tasks")) == {"IF-1": "completed", "IF-2": "confirmed"}
+    assert box.pending_count() == 1 and box.due()[0].attempts == 1
@@ -123,6 +123,89 @@ class TestRegistryConfigCacheRefresh:
             registry_hooks._DATA_FOLDER = original_folder
 
 
+class TestRegistryCachedConfig:
+    """测试 registry/config.get_cached_config 的按目录缓存"""
+
+    @pytest.fixture
+    def cfg_env(self, tmp_path, monkeypatch):
+        from registry import config as registry_config
+
+        clock = [100.0]
+        monkeypatch.setattr(registry_config, "_clock", lambda: clock[0])
+        monkeypatch.setattr(registry_config, "_cached_configs", {})
+        monkeypatch.setattr(registry_config, "_registry_dir_status", {})
+        calls = {"load": 0, "makedirs": 0}
+        real_load = registry_config.load_config
+        real_makedirs = os.makedirs
+
+        def counting_load(*args, **kwargs):
+            calls["load"] += 1
+            return real_load(*args, **kwargs)
+
+        def counting_makedirs(*args, **kwargs):
+            calls["makedirs"] += 1
+            return real_makedirs(*args, **kwargs)
+
+        monkeypatch.setattr(registry_config, "load_config", counting_load)
+        monkeypatch.setattr(registry_config.os, "makedirs", counting_makedirs)
+        config_path = tmp_path / "config.json"
+        config_path.write_text('{"registry_query_cache_ttl": 30}', encoding="utf-8")
+        (tmp_path / "data").mkdir()
+        return registry_config, clock, calls, config_path
+
+    def test_repeated_calls_reuse_cache_and_check_dir_once(self, cfg_env, tmp_path):
+        registry_config, clock, calls, config_path = cfg_env
+        data_folder = str(tmp_path / "data")
+
+        first = registry_config.get_cached_config(data_folder, str(config_path))
+        first["registry_query_cache_ttl"] = 999  # 返回副本，修改不影响缓存
+        for _ in range(5):
+            cfg = registry_config.get_cached_config(data_folder, str(config_path))
+        clock[0] += registry_config.CONFIG_CHECK_INTERVAL + 1
+        cfg = registry_config.get_cached_config(data_folder, str(config_path))
+
+        assert cfg["registry_query_cache_ttl"] == 30
+        assert cfg["registry_db_path"] == os.path.join(data_folder, ".registry", "registry.db")
+        assert os.path.isdir(os.path.join(data_folder, ".registry"))
+        assert calls == {"load": 1, "makedirs": 1}
+
+    def test_mtime_change_reloads_after_interval(self, cfg_env, tmp_path):
+        registry_config, clock, calls, config_path = cfg_env
+        data_folder = str(tmp_path / "data")
+        registry_config.get_cached_config(data_folder, str(config_path))
+
+        config_path.write_text('{"registry_query_cache_ttl": 5}', encoding="utf-8")
+        stat = os.stat(config_path)
+        os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        # 检查间隔内仍返回旧值
+        assert registry_config.get_cached_config(data_folder, str(config_path))["registry_query_cache_ttl"] == 30
+
+        clock[0] += registry_config.CONFIG_CHECK_INTERVAL + 1
+        cfg = registry_config.get_cached_config(data_folder, str(config_path))
+        assert cfg["registry_query_cache_ttl"] == 5
+        # 重新加载配置不会重复检查目录
+        assert calls == {"load": 2, "makedirs": 1}
+
+    def test_each_folder_has_own_entry_and_failure_is_cached(self, cfg_env, tmp_path):
+        registry_config, clock, calls, config_path = cfg_env
+        blocker = tmp_path / "blocked"
+        blocker.write_text("not a folder", encoding="utf-8")
+
+        ok = registry_config.get_cached_config(str(tmp_path / "data"), str(config_path))
+        bad = registry_config.get_cached_config(str(blocker), str(config_path))
+        clock[0] += registry_config.CONFIG_CHECK_INTERVAL + 1
+        bad_again = registry_config.get_cached_config(str(blocker), str(config_path))
+
+        assert ok["registry_enabled"] is True
+        assert bad["registry_enabled"] is False and bad_again["registry_enabled"] is False
+        assert "无法创建公共盘数据库目录" in bad_again["registry_disabled_reason"]
+        assert calls == {"load": 2, "makedirs": 2}
+
+        registry_config.invalidate_config_cache(str(blocker))
+        registry_config.get_cached_config(str(blocker), str(config_path))
+        assert calls == {"load": 3, "makedirs": 3}
+
+
 class TestRegistryDbConnectionSwitch:
     """测试 registry/db.py 连接切换逻辑"""
 
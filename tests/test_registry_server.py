@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local registry server: batched writes from many concurrent clients and hook fallback to direct SQLite.
+"""
+
+import sqlite3
+import threading
+from datetime import datetime
+
+import pytest
+
+from registry import db as registry_db
+from registry import hooks
+from registry import outbox as registry_outbox
+from registry import server as registry_server
+from registry import service
+from registry.outbox import LocalOutbox, OutboxDrainer
+from registry.server import RegistryClient, RegistryServer
+
+
+pytestmark = pytest.mark.allow_empty_name
+
+CLIENTS = 8
+TASKS_PER_CLIENT = 5
+
+
+def _key(client, i):
+    return {"file_type": 1, "project_id": "2016", "interface_id": f"IF-{client}-{i}",
+            "source_file": "a.xlsx", "row_index": client * 100 + i}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "data" / ".registry" / "registry.db")
+    conn = registry_db.get_connection(path, wal=False)
+    for client in range(CLIENTS):
+        for i in range(TASKS_PER_CLIENT):
+            service.upsert_task(path, False, _key(client, i), {"status": "open", "display_status": "待完成"}, conn=conn)
+    conn.commit()
+    registry_db.close_connection()
+    yield path
+    registry_db.close_connection()
+
+
+def _rows(path, sql, params=()):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+
+def test_concurrent_clients_are_batched_into_few_transactions(db_path, tmp_path):
+    server = RegistryServer(db_path, port=0, batch_interval=0.05).start()
+    errors = []
+    now = datetime(2030, 1, 1, 9, 0, 0).isoformat()
+
+    def client_session(client):
+        rpc = RegistryClient(server.url)
+        try:
+            for i in range(TASKS_PER_CLIENT):
+                rpc.call("mark_completed", key=_key(client, i), now=now)
+                rpc.call("mark_confirmed", key=_key(client, i), now=now, confirmed_by=f"user{client}")
+            rpc.call("batch_upsert_tasks", now=now, tasks_data=[
+                {"key": _key(client, 99), "fields": {"display_status": "待完成", "interface_time": ""}}])
+            rpc.call("finalize_scan", now=now, missing_keep_days=7)
+        except Exception as e:  # pragma: no cover - 失败时在主线程断言
+            errors.append(e)
+
+    threads = [threading.Thread(target=client_session, args=(c,)) for c in range(CLIENTS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(30)
+
+    try:
+        assert errors == []
+        assert _rows(db_path, "SELECT COUNT(*) FROM tasks WHERE status = 'confirmed'") == [(CLIENTS * TASKS_PER_CLIENT,)]
+        assert _rows(db_path, "SELECT COUNT(*) FROM tasks WHERE row_index % 100 = 99") == [(CLIENTS,)]
+        assert _rows(db_path, "SELECT confirmed_by FROM tasks WHERE interface_id = 'IF-3-0'") == [("user3",)]
+
+        assert RegistryClient(server.url).call("ping") is True
+        stats = server.stats
+        writes = CLIENTS * (2 * TASKS_PER_CLIENT + 2)
+        assert stats["writes"] == writes and stats["errors"] == 0
+        # 并发客户端的确认被合并为远少于调用次数的事务
+        assert stats["batches"] < writes and stats["transactions"] < CLIENTS * 2 * TASKS_PER_CLIENT
+
+        status = RegistryClient(server.url).call("get_display_status", task_keys=[_key(0, 0)], current_user_roles=[])
+        assert list(status.values()) == ["已审查"]
+
+        registry_db.enable_maintenance_mode(str(tmp_path / "data"))
+        with pytest.raises(registry_db.MaintenanceModeError):
+            RegistryClient(server.url).call("mark_completed", key=_key(1, 1), now=now)
+        registry_db.disable_maintenance_mode(str(tmp_path / "data"))
+    finally:
+        server.stop()
+    assert registry_db._CONN is None
+
+
+def test_hooks_use_the_server_and_fall_back_when_it_is_gone(db_path, tmp_path, monkeypatch):
+    server = RegistryServer(db_path, port=0, batch_interval=0.01).start()
+    cfg = {"registry_enabled": True, "registry_db_path": db_path, "registry_wal": False,
+           "registry_outbox_enabled": True, "registry_server_url": server.url}
+    monkeypatch.setattr(hooks, "_cfg", lambda: cfg)
+    monkeypatch.setattr(hooks, "_ensure_data_folder_from_path", lambda _path: None)
+    monkeypatch.setattr(registry_server, "_client", None)
+    box = LocalOutbox(str(tmp_path / "local" / "registry_outbox.db"))
+    drainer = OutboxDrainer(box)
+    monkeypatch.setattr(drainer, "wake", lambda: None)
+    monkeypatch.setattr(registry_outbox, "_outbox", box)
+    monkeypatch.setattr(registry_outbox, "_drainer", drainer)
+
+    try:
+        # 变更先写入本机 outbox（界面线程不等待服务），后台写入时转交服务
+        hooks.on_response_written(file_type=1, file_path="D:/x/a.xlsx", row_index=0, interface_id="IF-0-0",
+                                  response_number="HW-1", user_name="张三", project_id="2016")
+        assert box.pending_count() == 1 and server.stats["writes"] == 0
+        assert drainer.drain_once() == (1, False)
+        assert box.pending_count() == 0 and server.stats["writes"] == 1
+        assert _rows(db_path, "SELECT response_number FROM tasks WHERE interface_id = 'IF-0-0'") == [("HW-1",)]
+        assert _rows(db_path, "SELECT COUNT(*) FROM applied_ops") == [(1,)]
+        states = hooks.get_task_states([_key(0, 0)])
+        assert server.stats["reads"] == 1 and len(states) == 1
+    finally:
+        server.stop()
+
+    # 服务已停止：确认同样写入本机 outbox，改为直接写入共享库，状态查询直接读库
+    hooks.on_confirmed_by_superior(file_type=1, file_path="D:/x/a.xlsx", row_index=0, user_name="李四",
+                                   project_id="2016", interface_id="IF-0-0")
+    assert box.pending_count() == 1
+    assert drainer.drain_once() == (1, False)
+    assert registry_server.get_client(cfg) is None
+    assert _rows(db_path, "SELECT status FROM tasks WHERE interface_id = 'IF-0-0'") == [("confirmed",)]
+    assert hooks.get_task_states([_key(0, 0)]) and server.stats["reads"] == 1
+    box.close()
+
+
+def test_server_execution_errors_fall_back_to_the_local_outbox(db_path, tmp_path, monkeypatch):
+    cfg = {"registry_enabled": True, "registry_db_path": db_path, "registry_wal": False,
+           "registry_outbox_enabled": True, "registry_server_url": "http://127.0.0.1:9"}
+    monkeypatch.setattr(hooks, "_cfg", lambda: cfg)
+    monkeypatch.setattr(hooks, "_ensure_data_folder_from_path", lambda _path: None)
+    monkeypatch.setattr(registry_server, "_client", None)
+    box = LocalOutbox(str(tmp_path / "local" / "registry_outbox.db"))
+    drainer = OutboxDrainer(box)
+    monkeypatch.setattr(drainer, "wake", lambda: None)
+    monkeypatch.setattr(registry_outbox, "_outbox", box)
+    monkeypatch.setattr(registry_outbox, "_drainer", drainer)
+
+    def failing_call(self, method, **params):
+        raise registry_server.RegistryServerError(f"{method}: database is locked")
+
+    monkeypatch.setattr(RegistryClient, "call", failing_call)
+    # 服务端锁定重试用尽：确认保留在本机 outbox，后台改为直接写入共享库
+    hooks.on_confirmed_by_superior(file_type=1, file_path="D:/x/a.xlsx", row_index=0, user_name="李四",
+                                   project_id="2016", interface_id="IF-0-0")
+    assert box.pending_count() == 1
+    assert drainer.drain_once() == (1, False)
+    assert _rows(db_path, "SELECT status FROM tasks WHERE interface_id = 'IF-0-0'") == [("confirmed",)]
+    box.close()
+
+
+def test_timed_out_operations_are_cancelled_and_applied_once(db_path, tmp_path, monkeypatch):
+    monkeypatch.setattr(registry_server, "SERVER_WRITE_TIMEOUT", 0.2)
+    box = LocalOutbox(str(tmp_path / "local" / "registry_outbox.db"))
+    op_id = box.append(db_path, False, "confirmed", {"key": _key(2, 2), "now": datetime(2030, 1, 1).isoformat(),
+                                                     "user_name": "李四"})
+    operation = {"op_id": op_id, "operation": "confirmed", "params": box.due()[0].params}
+
+    # 写线程未运行：排队超时的变更被取消，之后不会再执行
+    server = RegistryServer(db_path, port=0, batch_interval=0.01)
+    server._running = True
+    assert server.dispatch("apply_operations", {"operations": [operation]}) == [
+        {"ok": False, "error": "apply_operation 等待执行超时（已取消）", "transient": True}]
+    assert RegistryClient(server.url).write_timeout > registry_server.SERVER_WRITE_TIMEOUT
+
+    # 客户端超时后改为直接写入；服务端随后收到同一幂等键的变更时跳过
+    assert OutboxDrainer(box).drain_once() == (1, False)
+    server.start()
+    try:
+        assert server.dispatch("apply_operations", {"operations": [operation]}) == [
+            {"ok": True, "error": None, "transient": False}]
+    finally:
+        server.stop()
+    assert server.stats["writes"] == 1
+    assert _rows(db_path, "SELECT COUNT(*) FROM events WHERE event = 'confirmed'") == [(1,)]
+    assert _rows(db_path, "SELECT op_id FROM applied_ops") == [(op_id,)]
+    box.close()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-project registry shards: split migration, hook routing and cross-shard fan-out reads.
+"""
+
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from registry import db as registry_db
+from registry import hooks
+from registry import migrate
+from registry import outbox as registry_outbox
+from registry import service
+from registry import sharding
+from registry.outbox import LocalOutbox, OutboxDrainer
+
+
+pytestmark = pytest.mark.allow_empty_name
+
+
+def _key(project_id, interface_id, row_index):
+    return {"file_type": 1, "project_id": project_id, "interface_id": interface_id,
+            "source_file": "a.xlsx", "row_index": row_index}
+
+
+KEYS = [_key("2016", "IF-1", 2), _key("2016", "IF-2", 3), _key("1818", "IF-3", 4)]
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    data_folder = str(tmp_path / "data")
+    db_path = os.path.join(data_folder, ".registry", "registry.db")
+    conn = registry_db.get_connection(db_path, wal=False)
+    for key in KEYS:
+        service.upsert_task(db_path, False, key, {"status": "open", "display_status": "待完成"}, conn=conn)
+        conn.execute("INSERT INTO events (ts, event, file_type, project_id, interface_id) VALUES (?,?,?,?,?)",
+                     ("2025-01-01T08:00:00", "process_done", 1, key["project_id"], key["interface_id"]))
+    conn.execute("UPDATE tasks SET status = 'completed' WHERE interface_id = 'IF-1'")
+    conn.execute("INSERT INTO applied_ops (op_id, applied_at) VALUES ('old-op', '2025-01-01')")
+    conn.commit()
+    registry_db.close_connection()
+
+    cfg = {"registry_enabled": True, "registry_db_path": db_path, "registry_wal": False,
+           "registry_outbox_enabled": True}
+    monkeypatch.setattr(hooks, "_cfg", lambda: cfg)
+    monkeypatch.setattr(hooks, "_ensure_data_folder_from_path", lambda _path: None)
+
+    box = LocalOutbox(str(tmp_path / "local" / "registry_outbox.db"))
+    drainer = OutboxDrainer(box)
+    monkeypatch.setattr(drainer, "wake", lambda: None)
+    monkeypatch.setattr(registry_outbox, "_outbox", box)
+    monkeypatch.setattr(registry_outbox, "_drainer", drainer)
+    sharding.invalidate_layout_cache()
+    yield data_folder, db_path, box, drainer
+    box.close()
+    registry_db.close_connection()
+    sharding.invalidate_layout_cache()
+
+
+def _rows(db_path, sql, params=()):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+
+def _split(data_folder, db_path):
+    registry_db.enable_maintenance_mode(data_folder)
+    try:
+        return migrate.split_registry_by_project(db_path)
+    finally:
+        registry_db.disable_maintenance_mode(data_folder)
+
+
+def test_split_moves_each_project_into_its_own_shard(env):
+    data_folder, db_path, box, drainer = env
+    with pytest.raises(RuntimeError):
+        migrate.split_registry_by_project(db_path)
+    assert sharding.shard_db_path(db_path, "2016") == db_path
+
+    # 拆分前追加的确认仍记录主库路径，写入时改写到项目分片
+    hooks.on_confirmed_by_superior(file_type=1, file_path="D:/x/a.xlsx", row_index=2,
+                                   user_name="李四", project_id="2016", interface_id="IF-1")
+    assert box.pending_count() == 1
+
+    report = _split(data_folder, db_path)
+    shard_2016 = sharding.shard_db_path(db_path, "2016")
+    shard_1818 = sharding.shard_db_path(db_path, "1818")
+    assert report["projects"] == 2 and report["removed_from_main"]
+    assert report["shards"][shard_2016] == {"tasks": 2, "events": 2, "ignored_snapshots": 0, "event_summary": 0}
+    assert sharding.list_shard_paths(db_path) == sorted([shard_2016, shard_1818])
+    assert _rows(db_path, "SELECT COUNT(*) FROM tasks") == [(0,)]
+    assert _rows(shard_1818, "SELECT interface_id FROM tasks") == [("IF-3",)]
+    assert _rows(shard_1818, "SELECT op_id FROM applied_ops") == [("old-op",)]
+    # 重复执行不会复制出重复数据
+    registry_db.enable_maintenance_mode(data_folder)
+    migrate.split_registry_by_project(db_path, remove_from_main=False)
+    registry_db.disable_maintenance_mode(data_folder)
+    assert _rows(shard_2016, "SELECT COUNT(*) FROM tasks") == [(2,)]
+
+    # 写入前的状态查询同样把这条确认叠加到项目分片的结果上
+    pending = box.pending_ops(shard_2016)
+    assert [op for ops in pending.values() for op, _params in ops] == [registry_outbox.OP_CONFIRMED]
+    assert box.pending_ops(shard_1818) == {}
+    overlay = hooks.get_task_states([KEYS[0]])
+    assert [state["status"] for state in overlay.values()] == ["confirmed"]
+
+    assert drainer.drain_once() == (1, False)
+    assert _rows(shard_2016, "SELECT status, confirmed_by FROM tasks WHERE interface_id = 'IF-1'") == [("confirmed", "李四")]
+    assert _rows(db_path, "SELECT COUNT(*) FROM tasks") == [(0,)]
+
+    # 跨分片读取：状态查询与全量扫描合并各分片结果；历史查询只读项目所在分片
+    states = hooks.get_task_states(KEYS + [_key("9999", "IF-9", 5)])
+    assert len(states) == 3
+    assert sorted(task["interface_id"] for task in hooks.get_active_tasks()) == ["IF-1", "IF-2", "IF-3"]
+    assert [row["interface_id"] for row in service.query_task_history(shard_1818, False, "1818", "IF-3")] == ["IF-3"]
+    # 查询不存在的项目不会创建空分片
+    assert not os.path.exists(sharding.shard_db_path(db_path, "9999"))
+    assert registry_db._CONN is None
+
+
+def test_bootstrap_probe_reads_the_shards_after_a_split(env, tmp_path):
+    data_folder, db_path, _, _ = env
+    assert hooks.registry_is_empty(str(tmp_path / "fresh" / "registry.db"))
+    assert not hooks.registry_is_empty(db_path)
+    registry_db.close_connection()
+
+    _split(data_folder, db_path)
+    assert _rows(db_path, "SELECT COUNT(*) FROM tasks") == [(0,)]
+    # 主库 tasks 已清空，但任务都在分片中：不触发 bootstrap
+    assert not hooks.registry_is_empty(db_path)
+
+    for shard_path in sharding.list_shard_paths(db_path):
+        conn = sqlite3.connect(shard_path)
+        conn.execute("DELETE FROM tasks")
+        conn.commit()
+        conn.close()
+    assert hooks.registry_is_empty(db_path)
+
+
+def test_hooks_route_writes_to_project_shards(env):
+    data_folder, db_path, _, _ = env
+    _split(data_folder, db_path)
+    shard_2016 = sharding.shard_db_path(db_path, "2016")
+    shard_1818 = sharding.shard_db_path(db_path, "1818")
+
+    now = datetime(2030, 3, 1, 9, 0, 0)
+    df = pd.DataFrame({"接口号": ["IF-7", "IF-8"], "项目号": ["2016", "1818"], "原始行号": [10, 11]})
+    hooks.on_process_done(1, "2016", "D:/x/b.xlsx", df, now=now)
+    assert _rows(shard_2016, "SELECT interface_id FROM tasks WHERE source_file = 'b.xlsx'") == [("IF-7",)]
+    assert _rows(shard_1818, "SELECT interface_id FROM tasks WHERE source_file = 'b.xlsx'") == [("IF-8",)]
+    assert _rows(shard_2016, "SELECT extra FROM events WHERE event = 'process_done' AND ts = ?",
+                 (now.isoformat(),)) == [('{"count": 2}',)]
+    assert _rows(db_path, "SELECT COUNT(*) FROM tasks") == [(0,)]
+    assert _rows(db_path, "SELECT COUNT(*) FROM events") == [(0,)]
+
+    # 扫描收尾逐个分片执行：本轮未出现的旧任务都被标记消失
+    hooks.on_scan_finalize(batch_tag="t", now=now)
+    assert _rows(shard_2016, "SELECT interface_id FROM tasks WHERE missing_since IS NOT NULL ORDER BY 1") == [("IF-1",), ("IF-2",)]
+    assert _rows(shard_1818, "SELECT interface_id FROM tasks WHERE missing_since IS NOT NULL") == [("IF-3",)]
+    assert registry_db._CONN is None
+
+
+def test_concurrent_writers_on_two_shards_keep_their_connections(env):
+    data_folder, db_path, box, drainer = env
+    _split(data_folder, db_path)
+    shard_2016 = sharding.shard_db_path(db_path, "2016")
+    shard_1818 = sharding.shard_db_path(db_path, "1818")
+    rounds = 15
+    now = datetime(2030, 3, 1, 9, 0, 0)
+
+    # outbox 中待写入 2016 分片的确认，由第三个线程持租约写入
+    for _ in range(rounds):
+        hooks.on_confirmed_by_superior(file_type=1, file_path="D:/x/a.xlsx", row_index=3,
+                                       user_name="李四", project_id="2016", interface_id="IF-2")
+    errors = []
+    drained = []
+
+    def process(project_id):
+        try:
+            for i in range(rounds):
+                df = pd.DataFrame({"接口号": [f"IF-{project_id}-{i}"], "项目号": [project_id], "原始行号": [100 + i]})
+                hooks.on_process_done(1, project_id, f"D:/x/{project_id}_{i}.xlsx", df, now=now)
+        except Exception as e:  # pragma: no cover - 失败时在主线程断言
+            errors.append(e)
+
+    def drain():
+        while box.pending_count():
+            applied, transient = drainer.drain_once()
+            drained.append((applied, transient))
+            if transient:
+                break
+
+    threads = [threading.Thread(target=process, args=("2016",)), threading.Thread(target=process, args=("1818",)),
+               threading.Thread(target=drain)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(30)
+
+    assert errors == []
+    assert not any(transient for _, transient in drained) and box.pending_count() == 0
+    assert _rows(shard_2016, "SELECT COUNT(*) FROM tasks WHERE interface_id LIKE 'IF-2016-%'") == [(rounds,)]
+    assert _rows(shard_1818, "SELECT COUNT(*) FROM tasks WHERE interface_id LIKE 'IF-1818-%'") == [(rounds,)]
+    assert _rows(shard_1818, "SELECT COUNT(*) FROM events WHERE event = 'process_done'") == [(rounds + 1,)]
+    assert _rows(shard_2016, "SELECT status FROM tasks WHERE interface_id = 'IF-2'") == [("confirmed",)]
+    assert _rows(shard_2016, "SELECT COUNT(*) FROM applied_ops") == [(rounds + 1,)]
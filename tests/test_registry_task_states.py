@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Batched registry task-state reads (service.get_task_states / list_active_tasks).
+"""
+
+import pytest
+
+from registry import db as registry_db
+from registry import service
+from registry.util import make_task_id
+
+
+pytestmark = pytest.mark.allow_empty_name
+
+NOW = "2025-01-01T00:00:00"
+SOURCE = "2016按项目导出接口文件.xlsx"
+SUPERIOR = ["2016接口工程师"]
+DESIGNER = ["设计人员"]
+
+# (interface_id, status, display_status, responsible_person, confirmed_at, confirmed_by, ignored)
+TASKS = [
+    ("IF-001", "open", "待完成", None, None, None, 0),
+    ("IF-002", "open", "待完成", "张三", None, None, 0),
+    ("IF-003", "completed", "待审查", "张三", None, None, 0),
+    ("IF-004", "confirmed", "待审查", "张三", NOW, "李四", 0),
+    ("IF-005", "open", "待完成", "张三", None, None, 1),
+    ("IF-006", "archived", "", "张三", None, None, 0),
+    ("IF-007", "open", "", None, None, None, 0),
+]
+
+
+def _key(interface_id, row_index, interface_time="2099.12.31"):
+    return {
+        "file_type": 1,
+        "project_id": "2016",
+        "interface_id": interface_id,
+        "source_file": SOURCE,
+        "row_index": row_index,
+        "interface_time": interface_time,
+    }
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "data" / ".registry" / "registry.db")
+    conn = registry_db.get_connection(path, wal=False)
+    try:
+        rows = list(TASKS) + [(f"BULK-{i:04d}", "open", "待审查", "张三", None, None, 0) for i in range(1200)]
+        for i, (iid, status, display, person, confirmed_at, confirmed_by, ignored) in enumerate(rows):
+            row_index = i + 2
+            conn.execute(
+                """
+                INSERT INTO tasks (
+                    id, file_type, project_id, interface_id, source_file, row_index,
+                    business_id, status, display_status, responsible_person,
+                    confirmed_at, confirmed_by, ignored, interface_time, first_seen_at, last_seen_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (make_task_id(1, "2016", iid, SOURCE, row_index), 1, "2016", iid, SOURCE, row_index,
+                 f"1|2016|{iid}", status, display, person, confirmed_at, confirmed_by, ignored,
+                 "2020.01.01" if iid == "IF-003" else "2099.12.31", NOW, NOW),
+            )
+        conn.commit()
+    finally:
+        registry_db.close_connection()
+    yield path
+    registry_db.close_connection()
+
+
+def _tid(interface_id, row_index):
+    return make_task_id(1, "2016", interface_id, SOURCE, row_index)
+
+
+def test_task_states_combine_status_confirmation_and_owner(db_path):
+    keys = [_key(iid, i + 2) for i, (iid, *_rest) in enumerate(TASKS)] + [_key("IF-404", 999)]
+
+    superior = service.get_task_states(db_path, False, keys, SUPERIOR)
+    designer = service.get_display_status(db_path, False, keys, DESIGNER)
+
+    assert superior[_tid("IF-001", 2)]["display_status"] == "❗ 请指派"
+    assert superior[_tid("IF-002", 3)]["display_status"] == "📌 待设计人员完成"
+    assert superior[_tid("IF-002", 3)]["responsible_person"] == "张三"
+    assert superior[_tid("IF-003", 4)]["display_status"] == "⏳ 待审查"
+    confirmed = superior[_tid("IF-004", 5)]
+    assert (confirmed["display_status"], confirmed["confirmed_by"], confirmed["confirmed_at"]) == ("已审查", "李四", NOW)
+    # 已忽略、无状态的任务仍返回确认信息，但不显示状态；不存在的任务不返回
+    assert superior[_tid("IF-005", 6)]["ignored"] is True
+    assert superior[_tid("IF-005", 6)]["display_status"] == ""
+    assert superior[_tid("IF-007", 8)]["display_status"] == ""
+    assert _tid("IF-404", 999) not in superior
+
+    assert designer == {
+        _tid("IF-001", 2): "📌 待完成",
+        _tid("IF-002", 3): "📌 待完成",
+        _tid("IF-003", 4): "⏳ 待审查",
+        _tid("IF-004", 5): "已审查",
+    }
+    # 延期判断来自调用方传入的接口时间
+    overdue = service.get_display_status(db_path, False, [_key("IF-003", 4, "2020.01.01")], DESIGNER)
+    assert overdue == {_tid("IF-003", 4): "⏳ （已延期）待审查"}
+
+
+def test_task_states_batches_large_key_sets_without_shared_connection(db_path):
+    keys = [_key(f"BULK-{i:04d}", len(TASKS) + i + 2) for i in range(1200)]
+
+    states = service.get_task_states(db_path, False, keys + keys[:10], DESIGNER)
+
+    assert len(states) == 1200
+    assert all(state["display_status"] == "⏳ 待审查" for state in states.values())
+    # 批量读取使用独立只读连接，不占用写队列共享的单例连接
+    assert registry_db._CONN is None
+
+
+def test_list_active_tasks_skips_archived_and_ignored(db_path):
+    tasks = service.list_active_tasks(db_path, False)
+
+    ids = [task["interface_id"] for task in tasks]
+    assert "IF-005" not in ids and "IF-006" not in ids
+    assert len(ids) == len(TASKS) - 2 + 1200
+    assert ids == sorted(ids)
+    first = tasks[0]
+    assert set(first) == set(service.ACTIVE_TASK_COLUMNS)
+    assert (first["interface_id"], first["responsible_person"], first["interface_time"]) == ("BULK-0000", "张三", "2099.12.31")
+
+
+def test_snapshot_version_changes_after_commit(db_path):
+    before = registry_db.get_snapshot_version(db_path)
+    assert registry_db.get_snapshot_version(db_path) == before
+
+    conn = registry_db.get_connection(db_path, wal=False)
+    conn.execute("UPDATE tasks SET responsible_person = '王五' WHERE interface_id = 'IF-001'")
+    conn.commit()
+    registry_db.close_connection()
+
+    assert registry_db.get_snapshot_version(db_path) != before
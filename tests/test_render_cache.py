@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tab render cache tests: prepared display models and cache bookkeeping.
+"""
+
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pytest
+
+from ui.render_cache import DisplayModel, TabRenderCache
+from ui.window import WindowManager
+from write_tasks.pending_cache import PendingCache
+
+
+pytestmark = pytest.mark.allow_empty_name
+
+TAB = "内部需打开接口"
+
+
+def _results(rows):
+    """紧凑结果：含 _completed_value 列，接口号取"接口号"列"""
+    return pd.DataFrame({
+        "原始行号": [i + 3 for i in range(rows)],
+        "接口号": [f"IF-{i:03d}" for i in range(rows)],
+        "_completed_value": [""] * rows,
+        "项目号": ["2016"] * rows,
+        "接口时间": ["2020.01.01" if i % 3 == 0 else ("" if i % 3 == 1 else "2099.12.31") for i in range(rows)],
+        "责任人": ["张三" if i % 2 else None for i in range(rows)],
+        "角色来源": ["设计人员" if i % 4 else "2016接口工程师" for i in range(rows)],
+        "source_file": ["2016按项目导出接口文件.xlsx"] * rows,
+    })
+
+
+def _window_manager():
+    manager = WindowManager.__new__(WindowManager)
+    manager.app = None
+    return manager
+
+
+def test_prepared_model_matches_rendered_rows():
+    manager = _window_manager()
+    df = _results(30)
+
+    model = manager.prepare_display_model(
+        df, TAB, show_all=True, original_row_numbers=list(df["原始行号"]), current_user_roles=["设计人员"])
+
+    # 角色筛选：只保留含"设计人员"的行；空值统一显示
+    assert [m["interface_id"] for *_rest, m in model.rows] == [f"IF-{i:03d}" for i in range(30) if i % 4]
+    assert model.columns == ["状态", "项目号", "接口号", "接口时间", "责任人", "是否已完成"]
+    first_text, first_values, first_tags, first_meta = model.rows[0]
+    assert first_text == "4" and first_meta["original_row"] == 4
+    assert first_values[3:5] == ["-", "张三"]
+    assert first_tags == ()
+    assert model.rows[2][2] == ("overdue",)
+    assert not model.truncated
+
+    viewer = MagicMock()
+    viewer.get_children.return_value = []
+    viewer.insert.side_effect = [f"I{i}" for i in range(len(model.rows))]
+    manager.render_display_model(viewer, model)
+
+    inserted = [(c.kwargs["text"], c.kwargs["values"], c.kwargs["tags"]) for c in viewer.insert.call_args_list]
+    assert inserted == [(text, values, tags) for text, values, tags, _meta in model.rows]
+    assert manager._item_metadata[(viewer, "I0")] == first_meta
+
+
+def test_preview_model_is_truncated_and_empty_model_shows_message():
+    manager = _window_manager()
+
+    preview = manager.prepare_display_model(_results(25), TAB, show_all=False)
+    assert len(preview.rows) == 20 and preview.truncated
+
+    empty = manager.prepare_display_model(pd.DataFrame(), TAB)
+    assert empty.empty_message == f"无{TAB}数据" and empty.rows == []
+    viewer = MagicMock()
+    viewer.get_children.return_value = []
+    manager.show_empty_message = MagicMock()
+    manager.render_display_model(viewer, empty)
+    manager.show_empty_message.assert_called_once_with(viewer, f"无{TAB}数据")
+
+
+def test_tab_render_cache_keys_and_rendered_tracking():
+    cache = TabRenderCache()
+    first = DisplayModel(tab_name=TAB, df=None)
+    second = DisplayModel(tab_name=TAB, df=None)
+
+    assert cache.get(TAB, ("v1",)) is None
+    assert cache.put(TAB, ("v1",), first) is first
+    # 同一键已有数据时保留已有的 model
+    assert cache.put(TAB, ("v1",), second) is first
+    assert cache.get(TAB, ("v1",)) is first
+    assert cache.get(TAB, ("v2",)) is None
+
+    assert not cache.is_rendered(TAB, first)
+    cache.mark_rendered(TAB, first)
+    assert cache.is_rendered(TAB, first)
+    cache.mark_rendered(TAB, None)
+    assert not cache.is_rendered(TAB, first)
+
+    assert cache.put(TAB, ("v2",), second) is second
+    cache.invalidate(TAB)
+    assert cache.get(TAB, ("v2",)) is None
+
+
+def test_pending_cache_version_changes_with_overrides():
+    cache = PendingCache()
+    versions = [cache.version]
+
+    cache.add_assignment_entries("t1", [{"file_path": "a.xlsx", "row_index": 3, "file_type": 1, "assigned_name": "张三"}])
+    versions.append(cache.version)
+    cache.add_response_entry("t2", {"file_path": "a.xlsx", "row_index": 4, "file_type": 1, "response_number": "HW-1"})
+    versions.append(cache.version)
+    cache.on_task_status_changed(MagicMock(task_id="t1", status="failed"))
+    versions.append(cache.version)
+    # 无关任务不改变版本
+    cache.on_task_status_changed(MagicMock(task_id="unknown", status="completed"))
+
+    assert versions == sorted(set(versions))
+    assert cache.version == versions[-1]
+
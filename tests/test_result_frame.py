@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compact processed-result representation tests (core.result_frame).
+"""
+
+import os
+import pickle
+import random
+
+import pandas as pd
+import pytest
+
+from core.result_frame import compact_result, concat_results, interface_column, is_compact
+from registry.util import (
+    INTERFACE_COL_MAP,
+    build_task_fields_from_row,
+    build_task_key_from_row,
+    extract_completed_column_value,
+)
+from services.file_manager import FileIdentityManager
+
+
+pytestmark = pytest.mark.allow_empty_name
+
+SOURCE_COLUMNS = 30
+SOURCE_FILE = os.path.abspath(os.path.join("数据", "按项目", "2016按项目导出接口文件.xlsx"))
+
+
+def _full_result(file_type, rows, seed=0):
+    """模拟 process_target_fileN 旧版返回：源表全部列 + 派生列"""
+    rng = random.Random(seed)
+    data = []
+    for i in range(rows):
+        row = [f"cell-{i}-{c}-{rng.random():.6f}" for c in range(SOURCE_COLUMNS)]
+        row[INTERFACE_COL_MAP[file_type]] = rng.choice([f"IF-{i:05d}", None, float("nan"), f" IF-{i:05d} "])
+        for c in (9, 12, 13, 16, 19, 21):
+            row[c] = rng.choice(["", None, float("nan"), f"HW-{i}", " 回文 "])
+        data.append(row)
+    df = pd.DataFrame(data, columns=[f"列{c}" for c in range(SOURCE_COLUMNS)])
+    result = df.iloc[list(range(1, rows, 2))].copy()
+    result["原始行号"] = [i + 2 for i in result.index]
+    result["科室"] = [rng.choice(["结构一室", "结构二室", "请室主任确认"]) for _ in range(len(result))]
+    result["接口时间"] = [rng.choice(["2025.01.02", "", "2025.03.04"]) for _ in range(len(result))]
+    result["责任人"] = [rng.choice(["张三", "李四", "", "无"]) for _ in range(len(result))]
+    result["source_file"] = SOURCE_FILE
+    if file_type == 3:
+        result["_source_column"] = [rng.choice(["M", "L"]) for _ in range(len(result))]
+    if file_type == 6:
+        result["主办室"] = [rng.choice(["结构一室", "建筑总图室"]) for _ in range(len(result))]
+    return result
+
+
+@pytest.mark.parametrize("file_type", [1, 2, 3, 4, 5, 6])
+def test_compact_result_preserves_consumer_values(file_type):
+    full = _full_result(file_type, 200, seed=file_type)
+    compact = compact_result(full, file_type)
+
+    assert is_compact(compact) and not is_compact(full)
+    assert list(compact.index) == list(full.index)
+    assert compact["原始行号"].tolist() == full["原始行号"].tolist()
+    for col in ("source_file", "科室", "责任人"):
+        assert isinstance(compact[col].dtype, pd.CategoricalDtype)
+
+    # UI/汇总读取的接口号与按列位置读取一致
+    col_idx = INTERFACE_COL_MAP[file_type]
+    assert interface_column(compact, col_idx).tolist() == full.iloc[:, col_idx].tolist()
+
+    # Registry 写入的字段逐行一致
+    full_reg = full.assign(项目号="2016")
+    compact_reg = compact.assign(项目号="2016")
+    for (_, a), (_, b) in zip(full_reg.iterrows(), compact_reg.iterrows()):
+        assert build_task_key_from_row(b, file_type, SOURCE_FILE) == build_task_key_from_row(a, file_type, SOURCE_FILE)
+        assert build_task_fields_from_row(b, file_type) == build_task_fields_from_row(a, file_type)
+        assert extract_completed_column_value(b, file_type) == extract_completed_column_value(a, file_type)
+
+
+def test_compact_result_is_much_smaller_in_memory_and_on_disk():
+    full = _full_result(1, 4000)
+    compact = compact_result(full, 1)
+
+    full_bytes = full.memory_usage(deep=True).sum()
+    compact_bytes = compact.memory_usage(deep=True).sum()
+    assert compact_bytes * 5 < full_bytes
+
+    full_pickle = len(pickle.dumps(full, protocol=pickle.HIGHEST_PROTOCOL))
+    compact_pickle = len(pickle.dumps(compact, protocol=pickle.HIGHEST_PROTOCOL))
+    assert compact_pickle * 5 < full_pickle
+
+    # 已是紧凑结果时原样返回；空结果原样返回
+    assert compact_result(compact, 1) is compact
+    empty = pd.DataFrame()
+    assert compact_result(empty, 1) is empty
+
+
+def test_concat_results_keeps_categories():
+    a = compact_result(_full_result(2, 40, seed=1), 2).assign(项目号="2016")
+    b = compact_result(_full_result(2, 40, seed=2), 2).assign(项目号="2017")
+
+    combined = concat_results([a, b])
+
+    assert len(combined) == len(a) + len(b)
+    assert isinstance(combined["项目号"].dtype, pd.CategoricalDtype)
+    assert set(combined["项目号"]) == {"2016", "2017"}
+    assert isinstance(combined["责任人"].dtype, pd.CategoricalDtype)
+
+
+def test_legacy_full_cache_is_compacted_on_load(tmp_path):
+    source = tmp_path / "2016按项目导出接口文件.xlsx"
+    source.write_bytes(b"placeholder")
+    manager = FileIdentityManager(
+        cache_file=str(tmp_path / "file_cache.json"),
+        result_cache_dir=str(tmp_path / "result_cache"),
+    )
+    full = _full_result(4, 600)
+    cache_file = manager._get_cache_filename(str(source), "2016", "file4")
+    with open(cache_file, "wb") as f:
+        pickle.dump(full, f, protocol=pickle.HIGHEST_PROTOCOL)
+    legacy_size = os.path.getsize(cache_file)
+
+    loaded = manager.load_cached_result(str(source), "2016", "file4")
+
+    assert is_compact(loaded)
+    assert loaded["原始行号"].tolist() == full["原始行号"].tolist()
+    assert os.path.getsize(cache_file) * 5 < legacy_size
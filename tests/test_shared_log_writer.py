@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Buffered shared write-task log: coalesced transactions and local spooling during outages.
+"""
+
+import sqlite3
+
+import pytest
+
+from registry import db as registry_db
+from write_tasks import shared_log
+from write_tasks.models import WriteTask
+from write_tasks.shared_log_writer import SharedLogWriter
+
+
+pytestmark = pytest.mark.allow_empty_name
+
+
+def _task(task_id, status="pending"):
+    return WriteTask(
+        task_id=task_id,
+        task_type="assignment",
+        payload={"assignments": [{"interface_id": f"IF-{i}", "file_path": "a.xlsx", "file_type": 1,
+                                  "project_id": "2016", "row_index": i + 2} for i in range(50)]},
+        submitted_by="张三",
+        description="指派 50 条",
+        submitted_at="2025-01-01T08:00:00+00:00",
+        status=status,
+    )
+
+
+def _statuses(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return dict(conn.execute("SELECT task_id, status FROM write_tasks_log").fetchall())
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    """统计打开共享库连接的次数；fail=True 时模拟共享盘不可用"""
+    state = {"count": 0, "fail": False}
+    real_open = registry_db.open_isolated_connection
+
+    def _open(db_path, wal=True):
+        state["count"] += 1
+        if state["fail"]:
+            raise sqlite3.OperationalError("unable to open database file")
+        return real_open(db_path, wal)
+
+    monkeypatch.setattr(registry_db, "open_isolated_connection", _open)
+    return state
+
+
+def test_transitions_are_coalesced_into_one_write(tmp_path, opened, monkeypatch):
+    db_path = str(tmp_path / "registry.db")
+    writer = SharedLogWriter(lambda: (db_path, False), flush_interval=60)
+    schema_checks = []
+    real_ensure = shared_log.ensure_schema
+    monkeypatch.setattr(shared_log, "ensure_schema", lambda conn: (schema_checks.append(1), real_ensure(conn)))
+
+    task = _task("t1")
+    writer.enqueue(task)
+    task.status, task.started_at = "running", "2025-01-01T08:00:01+00:00"
+    writer.enqueue(task)
+    task.status, task.completed_at = "completed", "2025-01-01T08:00:05+00:00"
+    writer.enqueue(task)
+    writer.enqueue(_task("t2"))
+    assert writer.pending_count() == 2
+
+    assert writer.flush() == 2
+    assert opened["count"] == 1
+    assert _statuses(db_path) == {"t1": "completed", "t2": "pending"}
+
+    # 同一进程内不再重复建表检查
+    writer.enqueue(_task("t3"))
+    writer.close()
+    assert opened["count"] == 2 and len(schema_checks) == 1
+    assert _statuses(db_path)["t3"] == "pending"
+
+
+def test_outage_spools_locally_and_replays_after_restart(tmp_path, opened):
+    db_path = str(tmp_path / "registry.db")
+    spool = tmp_path / "cache" / "write_tasks_shared_spool.json"
+    writer = SharedLogWriter(lambda: (db_path, False), spool_path=spool, flush_interval=60)
+
+    opened["fail"] = True
+    writer.enqueue(_task("t1"))
+    assert writer.flush() == 0
+    assert spool.exists() and writer.pending_count() == 1
+    # 失败期间的新状态覆盖暂存的旧状态
+    writer.enqueue(_task("t1", status="completed"))
+    writer.close()
+    assert spool.exists()
+
+    opened["fail"] = False
+    # 下次启动：后台线程立即补写暂存的状态
+    restarted = SharedLogWriter(lambda: None, spool_path=spool, flush_interval=60)
+    restarted.close()
+    assert restarted.pending_count() == 0
+    assert _statuses(db_path) == {"t1": "completed"}
+    assert not spool.exists()
+
+
+def test_unflushed_transitions_survive_a_crash_and_a_late_enqueue(tmp_path, opened):
+    db_path = str(tmp_path / "registry.db")
+    spool = tmp_path / "cache" / "write_tasks_shared_spool.json"
+    crashed = SharedLogWriter(lambda: (db_path, False), spool_path=spool, flush_interval=60)
+
+    # 等待刷新期间进程被结束：未调用 flush/close，状态已在 spool 中
+    crashed.enqueue(_task("t1", status="running"))
+    assert spool.exists() and opened["count"] == 0
+
+    restarted = SharedLogWriter(lambda: (db_path, False), spool_path=spool, flush_interval=60)
+    restarted.close()
+    assert _statuses(db_path) == {"t1": "running"}
+    assert not spool.exists()
+
+    # 关闭后才到达的状态变化不丢失，下次启动补写
+    restarted.enqueue(_task("t1", status="completed"))
+    assert spool.exists()
+    SharedLogWriter(lambda: None, spool_path=spool, flush_interval=60).close()
+    assert _statuses(db_path) == {"t1": "completed"}
+
+
+def test_disabled_registry_records_nothing(tmp_path, opened):
+    writer = SharedLogWriter(lambda: None, spool_path=tmp_path / "spool.json")
+    writer.enqueue(_task("t1"))
+    writer.close()
+    assert writer.pending_count() == 0 and opened["count"] == 0
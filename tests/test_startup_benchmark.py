@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Startup benchmark baseline comparison tests.
+"""
+
+import pytest
+
+from scripts.bench import startup_benchmark as bench
+
+
+pytestmark = pytest.mark.allow_empty_name
+
+
+def _report(imports, refresh):
+    return {
+        "imports": {name: {"ms": ms} for name, ms in imports.items()},
+        "first_refresh": dict(refresh),
+    }
+
+
+def test_discover_modules_covers_core_packages():
+    modules = bench.discover_modules()
+    assert modules[0] == "core.main"
+    assert "registry.hooks" in modules
+    assert "services.assignment_memory" in modules
+    assert "ui.window" in modules
+    assert modules[-1] == "base"
+
+
+def test_compare_flags_only_relative_and_absolute_regressions():
+    baseline = _report({"core.main": 400.0, "registry.models": 2.0}, {"total": 500.0})
+    current = _report({"core.main": 560.0, "registry.models": 8.0}, {"total": 520.0})
+
+    regressions = bench.compare_with_baseline(current, baseline, threshold=0.25, min_delta_ms=20.0)
+
+    # registry.models 相对慢了4倍，但绝对增量只有6ms，视为噪声
+    assert regressions == [("import:core.main", 400.0, 560.0)]
+
+
+def test_compare_fails_on_errored_and_missing_metrics_but_ignores_new_ones():
+    baseline = _report({"core.main": 400.0, "registry.db": 30.0}, {"total": 500.0})
+    current = {
+        "imports": {"core.main": {"error": "ImportError"}, "ui.window": {"ms": 9999.0}},
+        "first_refresh": {"error": "AttributeError"},
+    }
+
+    assert bench.compare_with_baseline(current, baseline) == [
+        ("import:core.main", 400.0, None),
+        ("import:registry.db", 30.0, None),
+        ("refresh:total", 500.0, None),
+    ]
+
+
+def test_main_exits_nonzero_and_keeps_baseline_when_a_metric_errored(tmp_path, monkeypatch):
+    baseline_path = tmp_path / "baseline.json"
+    report = _report({"core.main": 400.0}, {})
+    report["first_refresh"] = {"error": "AttributeError"}
+    monkeypatch.setattr(bench, "run_benchmark", lambda **_kwargs: report)
+
+    # 出错的报告不能写成基线
+    assert bench.main(["--baseline", str(baseline_path)]) == 1
+    assert not baseline_path.exists()
+
+    bench._write_json(str(baseline_path), _report({"core.main": 400.0}, {"total": 500.0}))
+    assert bench.main(["--baseline", str(baseline_path)]) == 1
+
+
+def test_first_refresh_runs_headless_on_a_synthetic_folder(tmp_path, monkeypatch):
+    from scripts.bench.synthetic_data import generate_data_folder
+
+    folder = str(tmp_path / "data")
+    generate_data_folder(folder, ["1818"], rows=5)
+    # 开发者的真实本机状态（用户目录与 LOCALAPPDATA）
+    real_home = tmp_path / "home"
+    real_home.mkdir()
+    for name in ("HOME", "USERPROFILE", "LOCALAPPDATA", "APPDATA"):
+        monkeypatch.setenv(name, str(real_home))
+
+    # 与基准相同：在子进程中用 ExcelProcessorApp.__new__ 构造的实例执行首次刷新
+    timings = bench.measure_first_refresh(folder, str(tmp_path / "appdata"), str(tmp_path), ["1818"], repeats=1)
+
+    assert "error" not in timings, timings.get("error")
+    assert {"registry_init", "identify_files", "check_cache", "total"} <= set(timings)
+    # outbox、日志等只写入基准的临时目录
+    assert list(real_home.iterdir()) == []
+    assert (tmp_path / "appdata" / "refresh_0" / "InterfaceFilter" / "cache" / "registry_outbox.db").exists()
+
+
+def test_generated_folder_is_classified_by_identify_target_files(tmp_path):
+    from scripts.bench.synthetic_data import generate_data_folder
+
+    folder = str(tmp_path / "data")
+    appdata = str(tmp_path / "appdata")
+    generate_data_folder(folder, ["1818", "2016"], rows=3)
+
+    # 无界面桩会替换 tkinter 等模块，因此在子进程中识别
+    code = bench._child_prelude(appdata) + (
+        "import os\n"
+        "from scripts.bench.startup_benchmark import build_headless_app\n"
+        f"app = build_headless_app({appdata!r})\n"
+        f"app.excel_files = [os.path.join({folder!r}, n) for n in os.listdir({folder!r})]\n"
+        "app.identify_target_files(update_ui=False, enabled_projects_override=['1818', '2016'])\n"
+        "found = {i: sorted(pid for _, pid in getattr(app, f'target_files{i}')) for i in range(1, 7)}\n"
+        f"print({bench._RESULT_MARKER!r} + json.dumps(found))\n"
+    )
+    found = bench._run_child(code, str(tmp_path))
+
+    assert "error" not in found, found.get("error")
+    assert found == {str(i): ["1818", "2016"] for i in range(1, 7)}
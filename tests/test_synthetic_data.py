@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Synthetic data folder generator tests.
+"""
+
+import datetime
+
+import pandas as pd
+import pytest
+
+from core import main
+from scripts.bench import synthetic_data
+
+
+pytestmark = pytest.mark.allow_empty_name
+
+NOW = datetime.datetime(2026, 3, 10, 9, 0, 0)
+
+
+@pytest.fixture
+def data_folder(tmp_path):
+    files = synthetic_data.generate_data_folder(str(tmp_path), ["1818", "2016"], rows=80, now=NOW)
+    return tmp_path, files
+
+
+def test_filenames_match_identification_patterns(data_folder):
+    _, files = data_folder
+    paths = [path for _, _, path in files]
+    finders = {
+        1: main.find_all_target_files1,
+        2: main.find_all_target_files2,
+        3: main.find_all_target_files3,
+        4: main.find_all_target_files4,
+        5: main.find_all_target_files5,
+        6: main.find_all_target_files6,
+    }
+    for file_type, finder in finders.items():
+        assert sorted(pid for _, pid in finder(paths)) == ["1818", "2016"], file_type
+
+
+def test_generation_is_deterministic(tmp_path):
+    header_a, rows_a = synthetic_data.generate_rows(3, "1907", 50, NOW, seed=7)
+    header_b, rows_b = synthetic_data.generate_rows(3, "1907", 50, NOW, seed=7)
+    _, rows_c = synthetic_data.generate_rows(3, "1907", 50, NOW, seed=8)
+
+    assert header_a == header_b
+    assert rows_a == rows_b
+    assert rows_a != rows_c
+    assert len(rows_a) == 51  # 说明行 + 50 行数据
+
+
+def test_versioned_types_contain_duplicate_interfaces():
+    for file_type, version_col in synthetic_data.VERSION_COLUMNS.items():
+        _, rows = synthetic_data.generate_rows(file_type, "2016", 200, NOW)
+        iface_col = synthetic_data.INTERFACE_COLUMNS[file_type]
+        counts = pd.Series([r[iface_col] for r in rows[1:]]).value_counts()
+        assert (counts > 1).any(), file_type
+        assert {r[version_col] for r in rows[1:]} >= {"A", "B"}
+
+
+def test_every_file_type_produces_filtered_rows(data_folder):
+    _, files = data_folder
+    for file_type, project_id, path in files:
+        if file_type == 1:
+            df = main.process_target_file(path, NOW)
+        elif file_type == 2:
+            df = main.process_target_file2(path, NOW, project_id)
+        else:
+            df = getattr(main, f"process_target_file{file_type}")(path, NOW)
+        assert 0 < len(df) < 80, (file_type, project_id)
+        assert "source_file" in df.columns
+
+
+def test_1818_offset_rows_fall_into_window_only_for_1818():
+    window_end = synthetic_data.filter_window_end(NOW)
+    _, rows = synthetic_data.generate_rows(1, "1818", 300, NOW)
+    boundary = [r for r in rows[1:] if window_end < r[10] <= window_end + datetime.timedelta(days=6)]
+    assert boundary, "应生成位于窗口终点后6天内的日期，用于覆盖1818偏移逻辑"
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Write-task panel: change-token polling of the shared log and incremental tree updates.
+"""
+
+import sqlite3
+from unittest.mock import MagicMock
+
+import pytest
+
+from write_tasks import shared_log
+from write_tasks import task_panel
+from write_tasks.models import WriteTask
+from write_tasks.task_panel import SharedTaskPoller, TaskRecordPanel
+
+
+pytestmark = pytest.mark.allow_empty_name
+
+
+def _task(task_id, submitted_at, status="pending", user="张三", interface_id="IF-1"):
+    return WriteTask(
+        task_id=task_id,
+        task_type="response",
+        payload={"interface_id": interface_id, "response_number": f"HW-{task_id}"},
+        submitted_by=user,
+        description=f"回文 {task_id}",
+        submitted_at=submitted_at,
+        status=status,
+    )
+
+
+@pytest.fixture
+def conn(tmp_path):
+    connection = sqlite3.connect(str(tmp_path / "registry.db"))
+    yield connection
+    connection.close()
+
+
+class _CountingConn:
+    """记录执行过的 SQL（判断轮询是否只读了变化标记）"""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.statements = []
+
+    def execute(self, sql, params=()):
+        self.statements.append(" ".join(sql.split()))
+        return self._conn.execute(sql, params)
+
+    def cursor(self):
+        return self._conn.cursor()
+
+    def commit(self):
+        self._conn.commit()
+
+
+def test_poller_skips_unchanged_log_and_reads_only_newer_rows(conn):
+    shared_log.upsert_task(conn, _task("t1", "2025-01-01T08:00:00+00:00"))
+    shared_log.upsert_task(conn, _task("t2", "2025-01-01T09:00:00+00:00", user="李四"))
+    poller = SharedTaskPoller(full_resync_every=100)
+
+    rows = poller.poll(conn)
+    assert [row.task.task_id for row in rows] == ["t2", "t1"]
+    # payload 不在轮询时解码
+    assert rows[0].task.payload == {} and '"HW-t2"' in rows[0].payload_json
+
+    counting = _CountingConn(conn)
+    assert poller.poll(counting) is None
+    assert not any("payload_json" in sql for sql in counting.statements)
+
+    running = _task("t1", "2025-01-01T08:00:00+00:00", status="running")
+    running.started_at = "2025-01-01T10:00:00+00:00"
+    shared_log.upsert_task(conn, running)
+    shared_log.upsert_task(conn, _task("t3", "2025-01-01T11:00:00+00:00"))
+    counting = _CountingConn(conn)
+    rows = poller.poll(counting)
+    assert [(row.task.task_id, row.task.status) for row in rows] == [("t3", "pending"), ("t2", "pending"), ("t1", "running")]
+    assert any("updated_at > ?" in sql for sql in counting.statements)
+
+    # 切换“只看我的任务”时完整重读
+    rows = poller.poll(conn, only_user="李四")
+    assert [row.task.task_id for row in rows] == ["t2"]
+
+
+def test_poller_periodic_full_resync_catches_skewed_updates(conn):
+    shared_log.upsert_task(conn, _task("t1", "2025-01-01T08:00:00+00:00"))
+    shared_log.upsert_task(conn, _task("t2", "2025-01-01T09:00:00+00:00"))
+    poller = SharedTaskPoller(full_resync_every=3)
+    poller.poll(conn)
+
+    # 另一台机器时钟偏慢：状态变化但 updated_at 不超过水位，变化标记不变
+    conn.execute("UPDATE write_tasks_log SET status = 'completed' WHERE task_id = 't1'")
+    conn.commit()
+    assert poller.poll(conn) is None
+    assert poller.poll(conn) is None
+    rows = poller.poll(conn)
+    assert {row.task.task_id: row.task.status for row in rows} == {"t1": "completed", "t2": "pending"}
+
+
+class _FakeTree:
+    def __init__(self):
+        self.order = []
+        self.values = {}
+        self.calls = []
+
+    def exists(self, iid):
+        return iid in self.values
+
+    def get_children(self):
+        return tuple(self.order)
+
+    def insert(self, parent, index, iid, values):
+        self.calls.append(("insert", iid))
+        self.order.insert(index, iid)
+        self.values[iid] = values
+        return iid
+
+    def item(self, iid, values):
+        self.calls.append(("item", iid))
+        self.values[iid] = values
+
+    def delete(self, iid):
+        self.calls.append(("delete", iid))
+        self.order.remove(iid)
+        del self.values[iid]
+
+    def move(self, iid, parent, index):
+        self.order.remove(iid)
+        self.order.insert(index, iid)
+
+
+def _panel():
+    panel = TaskRecordPanel.__new__(TaskRecordPanel)
+    panel.tree = _FakeTree()
+    panel.status_var = MagicMock()
+    panel._task_by_iid = {}
+    panel._payload_json_by_iid = {}
+    panel._values_by_iid = {}
+    return panel
+
+
+def test_populate_tree_diffs_rows_and_decodes_payload_on_demand():
+    panel = _panel()
+    t1, t2 = _task("t1", "08:00"), _task("t2", "09:00")
+    t1.payload, t2.payload = {}, {}
+    panel._populate_tree([t2, t1], {"t1": '{"interface_id": "IF-1"}', "t2": '{"interface_id": "IF-2"}'})
+    assert panel.tree.order == ["t2", "t1"]
+    assert t1.payload == {}
+
+    panel.tree.calls.clear()
+    t1.status = "completed"
+    t3 = _task("t3", "10:00")
+    panel._populate_tree([t3, t1])
+    assert panel.tree.order == ["t3", "t1"]
+    assert sorted(panel.tree.calls) == [("delete", "t2"), ("insert", "t3"), ("item", "t1")]
+    assert panel.tree.values["t1"][4] == "完成"
+    panel.status_var.set.assert_called_with("显示 2 条任务")
+
+    # 未变化的行不触碰
+    panel.tree.calls.clear()
+    panel._populate_tree([t3, t1])
+    assert panel.tree.calls == []
+
+    assert panel._get_task("t1").payload == {"interface_id": "IF-1"}
+    assert panel._extract_interface_ids_from_task(panel._get_task("t3")) == ["IF-1"]
+
+
+class _LocalManager:
+    def __init__(self, tasks):
+        self.tasks = tasks
+        self.listeners = []
+
+    def register_listener(self, listener):
+        self.listeners.append(listener)
+
+    def get_tasks(self):
+        return list(self.tasks)
+
+
+def test_local_transitions_show_up_while_the_shared_log_stays_empty(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "registry.db")
+    monkeypatch.setattr(task_panel.registry_hooks, "_cfg",
+                        lambda: {"registry_enabled": True, "registry_db_path": db_path, "registry_wal": False})
+    panel = _panel()
+    panel._poller = SharedTaskPoller(full_resync_every=100)
+    panel._poll_wake = task_panel.threading.Event()
+    panel._poll_force_full = False
+    panel._poll_only_user = None
+    panel.refresh_tasks = lambda: None
+
+    def poll_once():
+        # 与 _poll_loop 的一轮相同
+        force_full, panel._poll_force_full = panel._poll_force_full, False
+        return panel._collect_tasks(force_full)
+
+    task = _task("t1", "2025-01-01T08:00:00+00:00")
+    manager = _LocalManager([task])
+    panel.bind_manager(manager)
+    tasks, _ = poll_once()
+    assert [(t.task_id, t.status) for t in tasks] == [("t1", "pending")]
+    assert poll_once() is None
+
+    # 共享日志仍为空（变化标记不变），本机任务状态变化后列表立即更新
+    task.status = "completed"
+    manager.listeners[0](task)
+    assert panel._poll_wake.is_set()
+    tasks, _ = poll_once()
+    assert [(t.task_id, t.status) for t in tasks] == [("t1", "completed")]
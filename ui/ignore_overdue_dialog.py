@@ -494,13 +494,21 @@ class IgnoreOverdueDialog(tk.Toplevel):
                     'interface_time': task['interface_time']
                 })
             
-            result = registry_service.mark_ignored_batch(
-                db_path=db_path,
-                wal=wal,
-                task_keys=task_keys,
-                ignored_by=self.user_name,
-                ignored_reason=reason
-            )
+            # 已按项目分片时逐个分片标记，结果合并
+            from registry.db import lease_connection
+            from registry.sharding import group_by_shard
+            result = {'success_count': 0, 'failed_tasks': []}
+            for shard_path, shard_keys in group_by_shard(db_path, task_keys).items():
+                with lease_connection(shard_path, wal):
+                    shard_result = registry_service.mark_ignored_batch(
+                        db_path=shard_path,
+                        wal=wal,
+                        task_keys=shard_keys,
+                        ignored_by=self.user_name,
+                        ignored_reason=reason
+                    )
+                result['success_count'] += shard_result['success_count']
+                result['failed_tasks'].extend(shard_result['failed_tasks'])
             
             # 隐藏处理中提示
             processing_label.destroy()
@@ -207,6 +207,10 @@ class InterfaceInputDialog(tk.Toplevel):
                 return
             
             db_path = cfg.get('registry_db_path')
+            if db_path:
+                # 已按项目分片时读取该项目所在的分片
+                from registry.sharding import shard_db_path
+                db_path = shard_db_path(db_path, self.project_id)
             if not db_path or not os.path.exists(db_path):
                 return
             
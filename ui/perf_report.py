@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能报告窗口模块
+汇总 utils.perf_trace 滚动日志中最近N次运行的各阶段耗时
+"""
+
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, Optional
+
+from utils import perf_trace
+
+# 阶段显示顺序与中文名称（未列出的阶段排在最后，按原名显示）
+STAGE_LABELS = {
+    "process_with_cache": "处理(含缓存)",
+    "process": "筛选处理",
+    "on_process_done": "Registry写入",
+    "get_task_states": "状态查询",
+    "display_excel_data": "界面渲染",
+    "prepare_display_model": "渲染数据准备",
+}
+
+
+def format_run_rows(runs):
+    """
+    将 summarize_runs 的结果展开为表格行
+
+    返回:
+        [(parent_values, [child_values, ...]), ...]
+        parent_values: (运行, 开始时间, 记录数, 总耗时ms, "", "", "")
+        child_values: ("", 阶段, 次数, 总耗时ms, 最大ms, 行数, 缓存命中)
+    """
+    order = list(STAGE_LABELS.keys())
+    rows = []
+    for run in runs:
+        stages = run.get("stages", {})
+        names = sorted(stages.keys(), key=lambda s: (order.index(s) if s in order else len(order), s))
+        # 总耗时只累加顶层阶段（嵌套阶段已包含在外层耗时中，见 summarize_runs）
+        total_ms = run.get("total_ms", 0.0)
+        parent = (
+            run.get("label") or run.get("run_id", ""),
+            str(run.get("started", ""))[:19].replace("T", " "),
+            run.get("records", 0),
+            f"{total_ms:.0f}",
+            "", "", "",
+        )
+        children = []
+        for name in names:
+            item = stages[name]
+            children.append((
+                "",
+                STAGE_LABELS.get(name, name),
+                item["count"],
+                f"{item['total_ms']:.0f}",
+                f"{item['max_ms']:.0f}",
+                item["rows"],
+                f"{item['cache_hits']}/{item['count']}" if name == "process_with_cache" else "",
+            ))
+        rows.append((parent, children))
+    return rows
+
+
+class PerfReportWindow:
+    """性能报告窗口"""
+
+    COLUMNS = ("run", "stage", "count", "total_ms", "max_ms", "rows", "cache")
+    HEADINGS = ("运行", "阶段", "次数", "总耗时(ms)", "最大(ms)", "行数", "缓存命中")
+    WIDTHS = (160, 120, 60, 90, 80, 80, 80)
+
+    def __init__(self, parent: tk.Misc, last_n: int = 10,
+                 on_toggle: Optional[Callable[[bool], None]] = None):
+        """
+        参数:
+            parent: 父窗口
+            last_n: 默认展示最近几次运行
+            on_toggle: 启用/关闭埋点后的回调（用于保存配置）
+        """
+        self.parent = parent
+        self.on_toggle = on_toggle
+        self.window: Optional[tk.Toplevel] = None
+        self.tree: Optional[ttk.Treeview] = None
+        self.enabled_var: Optional[tk.BooleanVar] = None
+        self.last_n_var: Optional[tk.StringVar] = None
+        self._default_last_n = last_n
+
+    def show(self):
+        """创建并显示窗口"""
+        self.window = tk.Toplevel(self.parent)
+        self.window.title("性能报告")
+        self.window.geometry("760x460")
+        self.window.transient(self.parent)
+
+        top = ttk.Frame(self.window, padding=(10, 8))
+        top.pack(fill=tk.X)
+
+        self.enabled_var = tk.BooleanVar(value=perf_trace.is_enabled())
+        ttk.Checkbutton(top, text="启用性能埋点", variable=self.enabled_var,
+                        command=self._on_toggle).pack(side=tk.LEFT)
+
+        ttk.Label(top, text="最近运行次数:").pack(side=tk.LEFT, padx=(16, 4))
+        self.last_n_var = tk.StringVar(value=str(self._default_last_n))
+        ttk.Entry(top, textvariable=self.last_n_var, width=5).pack(side=tk.LEFT)
+
+        ttk.Button(top, text="刷新", command=self.refresh, width=8).pack(side=tk.LEFT, padx=(8, 0))
+        ttk.Button(top, text="清空日志", command=self._on_clear, width=10).pack(side=tk.LEFT, padx=(8, 0))
+
+        body = ttk.Frame(self.window, padding=(10, 0, 10, 10))
+        body.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(body, columns=self.COLUMNS, show="headings")
+        for col, heading, width in zip(self.COLUMNS, self.HEADINGS, self.WIDTHS):
+            self.tree.heading(col, text=heading)
+            self.tree.column(col, width=width, anchor=tk.W if col in ("run", "stage") else tk.E)
+        scrollbar = ttk.Scrollbar(body, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        ttk.Label(self.window, text=f"日志: {perf_trace.get_log_path()}",
+                  foreground="gray").pack(anchor=tk.W, padx=10, pady=(0, 8))
+
+        self.refresh()
+
+    def _last_n(self) -> int:
+        try:
+            return max(1, int(self.last_n_var.get().strip()))
+        except (ValueError, AttributeError):
+            return self._default_last_n
+
+    def refresh(self):
+        """重新读取日志并刷新表格"""
+        if self.tree is None:
+            return
+        self.tree.delete(*self.tree.get_children())
+        runs = perf_trace.summarize_runs(perf_trace.load_records(), last_n=self._last_n())
+        if not runs:
+            self.tree.insert("", tk.END, values=("暂无记录", "请启用埋点后执行一次处理", "", "", "", "", ""))
+            return
+        for parent_values, children in format_run_rows(runs):
+            self.tree.insert("", tk.END, values=parent_values)
+            for child_values in children:
+                self.tree.insert("", tk.END, values=child_values)
+
+    def _on_toggle(self):
+        enabled = bool(self.enabled_var.get())
+        perf_trace.set_enabled(enabled)
+        if self.on_toggle is not None:
+            try:
+                self.on_toggle(enabled)
+            except Exception as e:
+                print(f"[性能报告] 保存开关失败: {e}")
+
+    def _on_clear(self):
+        perf_trace.clear_log()
+        self.refresh()
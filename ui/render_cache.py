@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+选项卡渲染缓存模块
+
+切换选项卡时原先每次都要重跑：PendingCache 覆盖 -> Registry 状态过滤 -> 超期过滤 ->
+角色筛选 -> display_excel_data（含 Registry 批量查询与逐行格式化）。
+
+本模块把"准备显示数据"与"插入 Treeview"分开：
+1. DisplayModel：一次准备好的显示数据（列、列宽、每行的行号/取值/标签/元数据），不含任何 Tk 对象
+2. TabRenderCache：tab -> (缓存键, DisplayModel)，并记录每个 viewer 当前显示的是哪个 model
+
+缓存键由调用方给出（结果版本、角色、PendingCache 版本、Registry 快照版本等），
+键不变时切换选项卡直接复用 model；viewer 已显示该 model 时无需任何操作。
+准备工作可以在后台线程完成，Tk 线程只负责把 model 插入 Treeview。
+"""
+
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import pandas as pd
+
+
+@dataclass
+class DisplayModel:
+    """准备好的选项卡显示数据（WindowManager.prepare_display_model 生成）"""
+
+    tab_name: str
+    df: Optional[pd.DataFrame]  # 传入的数据（勾选/接口号点击回调使用）
+    display_df: Optional[pd.DataFrame] = None
+    columns: List[str] = field(default_factory=list)
+    column_widths: List[int] = field(default_factory=list)
+    # (行号文本, 显示值列表, tags, 元数据)
+    rows: List[Tuple[str, List[str], tuple, Dict[str, Any]]] = field(default_factory=list)
+    show_all: bool = False
+    original_row_numbers: Optional[list] = None
+    source_files: Optional[list] = None
+    file_manager: Any = None
+    empty_message: Optional[str] = None  # 非空时只显示该提示
+    results: Optional[pd.DataFrame] = None  # 生成该数据的处理结果（持有引用，缓存键中的 id 不会被复用）
+
+    @property
+    def truncated(self) -> bool:
+        """是否只显示了前20行（预览模式）"""
+        return self.display_df is not None and len(self.rows) < len(self.display_df)
+
+
+class TabRenderCache:
+    """
+    选项卡渲染缓存（线程安全）
+
+    用法:
+        model = cache.get(tab, key)
+        if model is None:
+            model = cache.put(tab, key, prepare(...))
+        if not cache.is_rendered(tab, model):
+            render(viewer, model)
+            cache.mark_rendered(tab, model)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Tuple[Hashable, DisplayModel]] = {}
+        self._rendered: Dict[Hashable, Optional[DisplayModel]] = {}
+
+    def get(self, tab: Hashable, key: Hashable) -> Optional[DisplayModel]:
+        """键一致时返回缓存的 model，否则返回 None"""
+        with self._lock:
+            entry = self._entries.get(tab)
+        if entry is not None and entry[0] == key:
+            return entry[1]
+        return None
+
+    def put(self, tab: Hashable, key: Hashable, model: DisplayModel) -> DisplayModel:
+        """
+        存入 model；同一键已有 model 时保留已有的（后台与 Tk 线程同时准备同一选项卡时只用一份）
+
+        返回:
+            缓存中的 model
+        """
+        with self._lock:
+            entry = self._entries.get(tab)
+            if entry is not None and entry[0] == key:
+                return entry[1]
+            self._entries[tab] = (key, model)
+            return model
+
+    def invalidate(self, tab: Optional[Hashable] = None) -> None:
+        """丢弃指定 tab（None 表示全部）的缓存 model"""
+        with self._lock:
+            if tab is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(tab, None)
+
+    def is_rendered(self, tab: Hashable, model: DisplayModel) -> bool:
+        """viewer 当前显示的是否就是该 model"""
+        with self._lock:
+            return self._rendered.get(tab) is model
+
+    def mark_rendered(self, tab: Hashable, model: Optional[DisplayModel]) -> None:
+        """记录 viewer 当前显示的 model（None 表示内容来自其他渲染路径）"""
+        with self._lock:
+            self._rendered[tab] = model
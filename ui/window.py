@@ -12,7 +12,9 @@ import pandas as pd
 import os
 import sys
 from utils.date_utils import is_date_overdue
+from utils import perf_trace
 
+from ui.render_cache import DisplayModel
 from write_tasks.task_panel import TaskRecordPanel
 
 # 导入数据库状态显示器
@@ -23,6 +25,20 @@ except ImportError:
     set_db_status_indicator = None
 
 
+def _trace_display(args, kwargs, result):
+    """display_excel_data 埋点字段：args 为 (self, viewer, df, tab_name, ...)"""
+    df = args[2] if len(args) > 2 else kwargs.get("df")
+    tab_name = args[3] if len(args) > 3 else kwargs.get("tab_name", "")
+    return {"rows": 0 if df is None else len(df), "tab": tab_name}
+
+
+def _trace_prepare(args, kwargs, result):
+    """prepare_display_model 埋点字段：args 为 (self, df, tab_name, ...)"""
+    df = args[1] if len(args) > 1 else kwargs.get("df")
+    tab_name = args[2] if len(args) > 2 else kwargs.get("tab_name", "")
+    return {"rows": 0 if df is None else len(df), "tab": tab_name}
+
+
 def get_resource_path(relative_path):
     """获取资源文件的绝对路径，兼容开发环境和打包环境"""
     if hasattr(sys, '_MEIPASS'):
@@ -545,6 +561,7 @@ class WindowManager:
         empty_values = [message] + [""] * (len(default_columns) - 1)
         viewer.insert("", "end", text="", values=empty_values)
     
+    @perf_trace.traced("display_excel_data", describe=_trace_display)
     def display_excel_data(self, viewer, df, tab_name, show_all=False, original_row_numbers=None, source_files=None, file_manager=None, current_user_roles=None):
         """
         在viewer中显示Excel数据
@@ -566,13 +583,30 @@ class WindowManager:
             original_row_numbers: 原始Excel行号列表（可选）
             current_user_roles: 当前用户的角色列表（用于筛选显示，如["设计人员", "2016接口工程师"]）
         """
-        # 清空现有内容
-        for item in viewer.get_children():
-            viewer.delete(item)
+        model = self.prepare_display_model(
+            df, tab_name,
+            show_all=show_all,
+            original_row_numbers=original_row_numbers,
+            source_files=source_files,
+            file_manager=file_manager,
+            current_user_roles=current_user_roles,
+        )
+        self.render_display_model(viewer, model)
+        return model
+
+    @perf_trace.traced("prepare_display_model", describe=_trace_prepare)
+    def prepare_display_model(self, df, tab_name, show_all=False, original_row_numbers=None, source_files=None, file_manager=None, current_user_roles=None):
+        """
+        准备显示数据（角色筛选、Registry状态、逐行格式化），不访问任何 Tk 控件，可在后台线程调用
+        
+        参数同 display_excel_data（不含 viewer）
         
+        返回:
+            DisplayModel，交给 render_display_model 插入 Treeview
+        """
         if df is None or df.empty:
-            self.show_empty_message(viewer, f"无{tab_name}数据")
-            return
+            return DisplayModel(tab_name=tab_name, df=df, empty_message=f"无{tab_name}数据")
+        
         
         # 【新增】如果提供了用户角色，进行筛选
         filtered_df = df.copy()
@@ -611,9 +645,7 @@ class WindowManager:
         registry_confirmed_map = {}  # 【新增】存储确认状态 {df_idx: (confirmed_by, current_user_name)}
         try:
             from registry import hooks as registry_hooks
-            from registry.util import extract_interface_id, extract_project_id
-            from registry.db import get_connection, close_connection_after_use
-            from registry.config import load_config
+            from registry.util import extract_interface_id, extract_project_id, make_task_id
             
             # 根据tab_name确定file_type
             file_type_map = {
@@ -647,7 +679,6 @@ class WindowManager:
                         # 因为我们不知道每行数据来自哪个文件，所以尝试所有文件
                         if interface_id and project_id:
                             for source_file in source_files:
-                                from registry.util import make_task_id
                                 task_key = {
                                     'file_type': file_type,
                                     'project_id': project_id,
@@ -665,50 +696,25 @@ class WindowManager:
                     task_keys_only = [tk[1] for tk in task_keys]
                     # 【新增】传递当前用户角色列表
                     user_roles_str = ','.join(current_user_roles) if current_user_roles else ''
-                    registry_status_map_raw = registry_hooks.get_display_status(task_keys_only, user_roles_str)
+                    # 【优化】一次读事务同时取回显示状态与确认人，不再逐行查询 confirmed_by
+                    task_states = registry_hooks.get_task_states(task_keys_only, user_roles_str)
+                    current_user_name = getattr(self.app, 'user_name', '').strip()
                     
-                    # 【新增】查询确认状态（confirmed_at, confirmed_by）
-                    # 必须与 hooks.get_display_status 使用同一套 data_folder，否则会出现“状态查得到/confirmed 查不到”或反之。
-                    folder_path = ""
-                    try:
-                        folder_path = (getattr(self.app, "config", {}) or {}).get("folder_path", "") or ""
-                        folder_path = folder_path.strip()
-                    except Exception:
-                        folder_path = ""
-                    cfg = load_config(data_folder=folder_path or None)
-                    db_path = cfg.get('registry_db_path', 'registry/task_registry.db')
-                    wal = cfg.get('registry_wal', False)
-                    conn = get_connection(db_path, wal)
-                    try:
-                        current_user_name = getattr(self.app, 'user_name', '').strip()
-                        
-                        # 映射回display_df的索引（取第一个匹配的状态）
-                        for df_idx, task_key in task_keys:
-                            from registry.util import make_task_id
-                            tid = make_task_id(
-                                task_key['file_type'],
-                                task_key['project_id'],
-                                task_key['interface_id'],
-                                task_key['source_file'],
-                                task_key['row_index']
-                            )
-                            if tid in registry_status_map_raw and df_idx not in registry_status_map:
-                                # 只使用第一个匹配的状态（避免重复）
-                                registry_status_map[df_idx] = registry_status_map_raw[tid]
-                            
-                            # 查询confirmed_by
-                            if df_idx not in registry_confirmed_map:
-                                try:
-                                    row = conn.execute(
-                                        "SELECT confirmed_by FROM tasks WHERE id = ?",
-                                        (tid,)
-                                    ).fetchone()
-                                    if row and row[0]:
-                                        registry_confirmed_map[df_idx] = (row[0], current_user_name)
-                                except Exception:
-                                    pass
-                    finally:
-                        close_connection_after_use()
+                    # 映射回display_df的索引（取第一个匹配的状态/确认人）
+                    for df_idx, task_key in task_keys:
+                        state = task_states.get(make_task_id(
+                            task_key['file_type'],
+                            task_key['project_id'],
+                            task_key['interface_id'],
+                            task_key['source_file'],
+                            task_key['row_index']
+                        ))
+                        if not state:
+                            continue
+                        if state["display_status"] and df_idx not in registry_status_map:
+                            registry_status_map[df_idx] = state["display_status"]
+                        if state["confirmed_by"] and df_idx not in registry_confirmed_map:
+                            registry_confirmed_map[df_idx] = (state["confirmed_by"], current_user_name)
         except Exception as e:
             print(f"[Registry] 状态查询失败（不影响主流程）: {e}")
         
@@ -786,9 +792,6 @@ class WindowManager:
         # 【新增】保留"接口时间"列用于GUI显示
         columns = list(display_df.columns)
         
-        viewer["columns"] = columns
-        viewer["show"] = "tree headings"
-        
         # 配置数据列（使用固定列宽方案）
         # 方案C - 平衡布局
         fixed_column_widths = {
@@ -809,53 +812,10 @@ class WindowManager:
                 # 其他列（如科室、责任人）自动计算
                 column_widths.append(self._calculate_single_column_width(display_df, col))
         
-        # 配置序号列（宽度与接口号列一致）
-        # 如果有项目号列，接口号在第二列(索引1)；否则在第一列(索引0)
-        interface_col_idx = 1 if "项目号" in columns else 0
-        row_number_width = column_widths[interface_col_idx] if len(column_widths) > interface_col_idx else 60
-        viewer.column("#0", width=row_number_width, minwidth=row_number_width)
-        viewer.heading("#0", text="行号")
-        
-        # 配置列对齐方式
-        column_alignment = {
-            '状态': 'center',
-            '项目号': 'center',
-            '接口号': 'w',  # 左对齐
-            '接口时间': 'center',
-            '责任人': 'center',  # 新增责任人列对齐方式
-            '是否已完成': 'center'
-        }
-        
-        for i, col in enumerate(columns):
-            col_width = column_widths[i] if i < len(column_widths) else 100
-            alignment = column_alignment.get(col, 'center')
-            
-            # 为所有列添加排序功能（点击列头排序）
-            # 使用 lambda 的技巧：通过 c=col 固定变量，避免闭包问题
-            viewer.heading(col, text=str(col), 
-                         command=lambda c=col: self._sort_by_column(viewer, c, tab_name))
-            
-            viewer.column(col, width=col_width, minwidth=col_width, anchor=alignment)
-        
-        # 配置延期数据的标签（在插入数据前配置）
-        # 【重要】ttk.Treeview在Windows系统主题下的限制：
-        #   - background: 通常不生效（被主题锁定）
-        #   - foreground: 部分主题支持
-        #   - font: 完全支持
-        # 策略：使用 深红色前景 + 加粗 + 斜体 的组合来最大化视觉冲击
-        try:
-            # 方案：深红色 + 加粗 + 斜体
-            viewer.tag_configure('overdue', 
-                                foreground='#8B0000',         # 深红色/暗红色（DarkRed）
-                                font=('', 10, 'bold italic')) # 加粗+斜体，字号稍大
-        except Exception as e:
-            print(f"[错误] tag配置失败: {e}")
-        
-        # 【关键】创建item元数据映射字典，存储每行的关键信息（不受排序影响）
-        if not hasattr(self, '_item_metadata'):
-            self._item_metadata = {}
-        
-        # 添加数据行
+        # 逐行准备显示值、标签与元数据
+        rows = []
+        empty_interface_count = 0
+        empty_source_count = 0
         max_rows = len(display_df) if show_all else min(20, len(display_df))
         
         for index in range(max_rows):
@@ -899,7 +859,6 @@ class WindowManager:
             
             # 应用标签
             tags = ('overdue',) if is_overdue_flag else ()
-            item_id = viewer.insert("", "end", text=display_text, values=display_values, tags=tags)
             
             # 【关键修复】存储元数据到映射字典，包含原始行信息（不受排序影响）
             # 注意：必须从filtered_df（原始完整数据）读取，而不是display_df（优化显示数据）
@@ -930,32 +889,118 @@ class WindowManager:
                 'source_column': metadata_row.get('_source_column', None) if '_source_column' in metadata_row.index else None,
                 'responsible': str(display_row.get('责任人', '')).strip() if '责任人' in display_row.index else '',
             }
-            self._item_metadata[(viewer, item_id)] = metadata
+            rows.append((display_text, display_values, tags, metadata))
             
             # 【优化】收集警告，循环结束后汇总输出
             if not interface_id_val:
-                _empty_interface_count = getattr(self, '_empty_interface_count', 0) + 1
-                setattr(self, '_empty_interface_count', _empty_interface_count)
+                empty_interface_count += 1
             if not metadata['source_file']:
-                _empty_source_count = getattr(self, '_empty_source_count', 0) + 1
-                setattr(self, '_empty_source_count', _empty_source_count)
+                empty_source_count += 1
         
         # 【优化】汇总输出警告
-        _empty_interface_count = getattr(self, '_empty_interface_count', 0)
-        _empty_source_count = getattr(self, '_empty_source_count', 0)
-        if _empty_interface_count > 0 or _empty_source_count > 0:
+        if empty_interface_count > 0 or empty_source_count > 0:
             warn_parts = []
-            if _empty_interface_count > 0:
-                warn_parts.append(f"{_empty_interface_count}行接口号为空")
-            if _empty_source_count > 0:
-                warn_parts.append(f"{_empty_source_count}行source_file为空")
+            if empty_interface_count > 0:
+                warn_parts.append(f"{empty_interface_count}行接口号为空")
+            if empty_source_count > 0:
+                warn_parts.append(f"{empty_source_count}行source_file为空")
             print(f"[警告] {tab_name}: {', '.join(warn_parts)}")
-        # 重置计数器
-        self._empty_interface_count = 0
-        self._empty_source_count = 0
+        
+        return DisplayModel(
+            tab_name=tab_name,
+            df=df,
+            display_df=display_df,
+            columns=columns,
+            column_widths=column_widths,
+            rows=rows,
+            show_all=show_all,
+            original_row_numbers=original_row_numbers,
+            source_files=source_files,
+            file_manager=file_manager,
+        )
+
+    def render_display_model(self, viewer, model):
+        """
+        把 prepare_display_model 准备好的数据插入 Treeview（只在 Tk 线程调用）
+        
+        参数:
+            viewer: Treeview控件
+            model: DisplayModel
+        """
+        # 清空现有内容
+        for item in viewer.get_children():
+            viewer.delete(item)
+        
+        if model.empty_message:
+            self.show_empty_message(viewer, model.empty_message)
+            return
+        
+        tab_name = model.tab_name
+        df = model.df
+        display_df = model.display_df
+        columns = model.columns
+        column_widths = model.column_widths
+        original_row_numbers = model.original_row_numbers
+        source_files = model.source_files
+        file_manager = model.file_manager
+        
+        viewer["columns"] = columns
+        viewer["show"] = "tree headings"
+        
+        # 配置序号列（宽度与接口号列一致）
+        # 如果有项目号列，接口号在第二列(索引1)；否则在第一列(索引0)
+        interface_col_idx = 1 if "项目号" in columns else 0
+        row_number_width = column_widths[interface_col_idx] if len(column_widths) > interface_col_idx else 60
+        viewer.column("#0", width=row_number_width, minwidth=row_number_width)
+        viewer.heading("#0", text="行号")
+        
+        # 配置列对齐方式
+        column_alignment = {
+            '状态': 'center',
+            '项目号': 'center',
+            '接口号': 'w',  # 左对齐
+            '接口时间': 'center',
+            '责任人': 'center',  # 新增责任人列对齐方式
+            '是否已完成': 'center'
+        }
+        
+        for i, col in enumerate(columns):
+            col_width = column_widths[i] if i < len(column_widths) else 100
+            alignment = column_alignment.get(col, 'center')
+            
+            # 为所有列添加排序功能（点击列头排序）
+            # 使用 lambda 的技巧：通过 c=col 固定变量，避免闭包问题
+            viewer.heading(col, text=str(col), 
+                         command=lambda c=col: self._sort_by_column(viewer, c, tab_name))
+            
+            viewer.column(col, width=col_width, minwidth=col_width, anchor=alignment)
+        
+        # 配置延期数据的标签（在插入数据前配置）
+        # 【重要】ttk.Treeview在Windows系统主题下的限制：
+        #   - background: 通常不生效（被主题锁定）
+        #   - foreground: 部分主题支持
+        #   - font: 完全支持
+        # 策略：使用 深红色前景 + 加粗 + 斜体 的组合来最大化视觉冲击
+        try:
+            # 方案：深红色 + 加粗 + 斜体
+            viewer.tag_configure('overdue', 
+                                foreground='#8B0000',         # 深红色/暗红色（DarkRed）
+                                font=('', 10, 'bold italic')) # 加粗+斜体，字号稍大
+        except Exception as e:
+            print(f"[错误] tag配置失败: {e}")
+        
+        # 【关键】创建item元数据映射字典，存储每行的关键信息（不受排序影响）
+        if not hasattr(self, '_item_metadata'):
+            self._item_metadata = {}
+        
+        # 添加数据行
+        for display_text, display_values, tags, metadata in model.rows:
+            item_id = viewer.insert("", "end", text=display_text, values=display_values, tags=tags)
+            self._item_metadata[(viewer, item_id)] = metadata
+        max_rows = len(model.rows)
         
         # 如果有更多行未显示，添加提示
-        if not show_all and len(display_df) > 20:
+        if model.truncated:
             viewer.insert("", "end", text="...", 
                          values=["...（其他行已省略显示）"] + [""] * (len(columns) - 1))
         
@@ -1115,7 +1160,8 @@ class WindowManager:
                         # 获取Registry配置
                         try:
                             cfg = registry_hooks._cfg()
-                            db_path = cfg.get('registry_db_path')
+                            from registry.sharding import shard_db_path
+                            db_path = shard_db_path(cfg.get('registry_db_path'), project_id)
                             wal = False
                         except Exception:
                             print("[Registry] 无法获取数据库配置")
@@ -1583,10 +1629,14 @@ class WindowManager:
             if tab_name in interface_column_index:
                 col_idx = interface_column_index[tab_name]
                 
+                # 【优化】紧凑结果按"接口号"列名读取，完整结果按列位置读取
+                from core.result_frame import interface_column
+                interface_source = interface_column(df, col_idx)
+                
                 # 检查列索引是否有效
-                if col_idx < len(df.columns):
+                if interface_source is not None:
                     # 提取接口号列
-                    interface_values = df.iloc[:, col_idx].copy()
+                    interface_values = interface_source.copy()
                     
                     # 如果存在"角色来源"列，则添加角色标注
                     if "角色来源" in df.columns:
@@ -1684,7 +1734,7 @@ class WindowManager:
                             result = pd.DataFrame({
                                 "状态": [""] * len(df),
                                 "项目号": df["项目号"],
-                                "接口号": df.iloc[:, col_idx],
+                                "接口号": interface_source,
                                 "接口时间": df["接口时间"],  # 保留用于延期判断
                                 "责任人": responsible_data,  # 新增责任人列
                                 "是否已完成": completed_status
@@ -1695,7 +1745,7 @@ class WindowManager:
                             result = pd.DataFrame({
                                 "状态": [""] * len(df),
                                 "项目号": df["项目号"],
-                                "接口号": df.iloc[:, col_idx],
+                                "接口号": interface_source,
                                 "接口时间": ["-"] * len(df),  # 没有时间数据时显示"-"
                                 "责任人": responsible_data,  # 新增责任人列
                                 "是否已完成": completed_status
@@ -1705,7 +1755,7 @@ class WindowManager:
                             responsible_data = df["责任人"] if "责任人" in df.columns else [""] * len(df)
                             result = pd.DataFrame({
                                 "状态": [""] * len(df),
-                                "接口号": df.iloc[:, col_idx],
+                                "接口号": interface_source,
                                 "接口时间": df["接口时间"],  # 保留用于延期判断
                                 "责任人": responsible_data,  # 新增责任人列
                                 "是否已完成": completed_status
@@ -1715,7 +1765,7 @@ class WindowManager:
                             responsible_data = df["责任人"] if "责任人" in df.columns else [""] * len(df)
                             result = pd.DataFrame({
                                 "状态": [""] * len(df),
-                                "接口号": df.iloc[:, col_idx],
+                                "接口号": interface_source,
                                 "接口时间": ["-"] * len(df),  # 没有时间数据时显示"-"
                                 "责任人": responsible_data,  # 新增责任人列
                                 "是否已完成": completed_status
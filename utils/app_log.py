@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+统一日志模块
+
+功能：
+1. 级别：DEBUG / PROCESS / INFO / SUCCESS / SYSTEM / WARNING / ERROR（与监控器消息类型一致）
+2. 分类：每条日志带 category（如 "step"、"registry.pending"、"date_parse"），用于限流与监控器紧凑模式过滤
+3. 按分类限流：令牌桶，超出的日志计数后丢弃，下次放行时补一条"已省略N条"汇总；ERROR 不限流
+4. 输出目标（sink）：控制台、文件（JSON Lines，缓冲写入，超过5MB滚动）、监控器窗口（由 core.Monitor 注册）
+
+配置：
+- 环境变量 EXCEL_PROCESSOR_LOG_LEVEL 设置控制台级别（默认 PROCESS，即不输出 DEBUG）
+- configure() 调整各目标级别/文件路径，set_rate_limit() 调整分类限流
+
+用法：
+    from utils import app_log
+    app_log.debug("registry.pending", f"[Registry] 加回待审查任务: {iid}")
+    app_log.warning("date_parse", f"日期解析失败（第{n}行）: {value}")
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+LEVELS: Dict[str, int] = {
+    "DEBUG": 10,
+    "PROCESS": 15,
+    "INFO": 20,
+    "SUCCESS": 25,
+    "SYSTEM": 25,
+    "WARNING": 30,
+    "ERROR": 40,
+}
+
+DEFAULT_CATEGORY = "general"
+
+# 分类默认限流：(每秒放行条数, 突发上限)
+DEFAULT_RATE_LIMITS: Dict[str, Tuple[float, int]] = {
+    "registry.pending": (5.0, 20),
+    "date_parse": (2.0, 10),
+    "style": (1.0, 5),
+}
+
+MAX_FILE_BYTES = 5 * 1024 * 1024
+FILE_FLUSH_RECORDS = 200
+FILE_FLUSH_INTERVAL = 2.0
+
+_clock = time.monotonic
+
+
+def level_value(level) -> int:
+    """级别名或数值 -> 数值（未知级别按 INFO 处理）"""
+    if isinstance(level, int):
+        return level
+    return LEVELS.get(str(level).upper(), LEVELS["INFO"])
+
+
+class _RateLimiter:
+    """按分类的令牌桶"""
+
+    def __init__(self, limits: Dict[str, Tuple[float, int]]):
+        self.limits = dict(limits)
+        self._buckets: Dict[str, List[float]] = {}  # category -> [tokens, last_ts]
+        self.suppressed: Dict[str, int] = {}
+
+    def allow(self, category: str) -> bool:
+        limit = self.limits.get(category)
+        if limit is None:
+            return True
+        rate, burst = limit
+        now = _clock()
+        bucket = self._buckets.get(category)
+        if bucket is None:
+            bucket = [float(burst), now]
+            self._buckets[category] = bucket
+        tokens = min(float(burst), bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        if tokens >= 1.0:
+            bucket[0] = tokens - 1.0
+            return True
+        bucket[0] = tokens
+        self.suppressed[category] = self.suppressed.get(category, 0) + 1
+        return False
+
+    def take_suppressed(self, category: Optional[str] = None) -> Dict[str, int]:
+        if category is None:
+            taken = {k: v for k, v in self.suppressed.items() if v}
+            self.suppressed.clear()
+            return taken
+        count = self.suppressed.pop(category, 0)
+        return {category: count} if count else {}
+
+
+class _FileSink:
+    """JSON Lines 文件输出：缓冲写入，超限滚动为 .1"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._buffer: List[str] = []
+        self._last_flush = _clock()
+
+    def write(self, record: dict) -> bool:
+        """写入缓冲，返回是否需要落盘"""
+        self._buffer.append(json.dumps(record, ensure_ascii=False))
+        return (len(self._buffer) >= FILE_FLUSH_RECORDS
+                or _clock() - self._last_flush >= FILE_FLUSH_INTERVAL)
+
+    def take(self) -> List[str]:
+        lines, self._buffer = self._buffer, []
+        self._last_flush = _clock()
+        return lines
+
+    def append_lines(self, lines: List[str]) -> None:
+        if not lines:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            if os.path.exists(self.path) and os.path.getsize(self.path) > MAX_FILE_BYTES:
+                os.replace(self.path, self.path + ".1")
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        except Exception as e:
+            print(f"[AppLog] 写入日志文件失败: {e}")
+
+
+def _default_file_path() -> str:
+    return os.path.join(os.path.expanduser("~/.excel_processor"), "logs", "app.jsonl")
+
+
+def _console_sink(record: dict) -> None:
+    try:
+        print(f"[{record['level']}] {record['message']}")
+    except Exception:
+        pass
+
+
+_lock = threading.Lock()
+_limiter = _RateLimiter(DEFAULT_RATE_LIMITS)
+_file_sink: Optional[_FileSink] = None
+_file_level: Optional[int] = LEVELS["DEBUG"]  # None 表示关闭文件输出
+# name -> (callable, min_level)
+_sinks: Dict[str, Tuple[Callable[[dict], None], int]] = {
+    "console": (_console_sink, level_value(os.environ.get("EXCEL_PROCESSOR_LOG_LEVEL", "PROCESS"))),
+}
+
+
+def configure(console_level=None, file_level=None, file_path: Optional[str] = None,
+              monitor_level=None) -> None:
+    """
+    调整输出目标
+
+    参数:
+        console_level: 控制台最低级别
+        file_level: 文件最低级别
+        file_path: 日志文件路径（会先落盘旧文件的缓冲；空字符串表示关闭文件输出）
+        monitor_level: 监控器最低级别（监控器已注册时生效）
+    """
+    global _file_sink, _file_level
+    if file_path is not None:
+        flush()
+        with _lock:
+            _file_sink = _FileSink(file_path) if file_path else None
+            if not file_path:
+                _file_level = None
+    with _lock:
+        if console_level is not None and "console" in _sinks:
+            _sinks["console"] = (_sinks["console"][0], level_value(console_level))
+        if monitor_level is not None and "monitor" in _sinks:
+            _sinks["monitor"] = (_sinks["monitor"][0], level_value(monitor_level))
+        if file_level is not None:
+            _file_level = level_value(file_level)
+
+
+def set_rate_limit(category: str, per_second: Optional[float], burst: int = 10) -> None:
+    """设置分类限流；per_second 为 None 时取消限流"""
+    with _lock:
+        if per_second is None:
+            _limiter.limits.pop(category, None)
+            _limiter._buckets.pop(category, None)
+        else:
+            _limiter.limits[category] = (float(per_second), int(burst))
+            _limiter._buckets.pop(category, None)
+
+
+def add_sink(name: str, func: Callable[[dict], None], level="INFO") -> None:
+    """注册输出目标（同名覆盖）。func(record) 中的异常会被忽略"""
+    with _lock:
+        _sinks[name] = (func, level_value(level))
+
+
+def remove_sink(name: str) -> None:
+    with _lock:
+        _sinks.pop(name, None)
+
+
+def _get_file_sink() -> _FileSink:
+    global _file_sink
+    if _file_sink is None:
+        _file_sink = _FileSink(_default_file_path())
+    return _file_sink
+
+
+def _make_record(level_name: str, category: str, message: str) -> dict:
+    return {
+        "ts": datetime.now().isoformat(timespec="milliseconds"),
+        "level": level_name,
+        "category": category,
+        "thread": threading.current_thread().name,
+        "message": message,
+    }
+
+
+def log(level, category: Optional[str], message) -> None:
+    """
+    记录一条日志
+
+    参数:
+        level: 级别名（DEBUG/PROCESS/INFO/SUCCESS/SYSTEM/WARNING/ERROR）
+        category: 分类（None 时为 general）
+        message: 消息文本
+    """
+    level_name = str(level).upper()
+    if level_name not in LEVELS:
+        level_name = "INFO"
+    value = LEVELS[level_name]
+    category = category or DEFAULT_CATEGORY
+
+    records = []
+    need_flush = False
+    with _lock:
+        targets = [func for func, min_level in _sinks.values() if value >= min_level]
+        to_file = _file_level is not None and value >= _file_level
+        if not targets and not to_file:
+            return
+        if value < LEVELS["ERROR"] and not _limiter.allow(category):
+            return
+        for cat, count in _limiter.take_suppressed(category).items():
+            records.append(_make_record(level_name, cat, f"（{cat} 类日志已省略 {count} 条）"))
+        records.append(_make_record(level_name, category, str(message)))
+        if to_file:
+            sink = _get_file_sink()
+            for record in records:
+                need_flush = sink.write(record) or need_flush
+
+    for record in records:
+        for func in targets:
+            try:
+                func(record)
+            except Exception:
+                pass
+    if need_flush:
+        flush()
+
+
+def debug(category: str, message) -> None:
+    log("DEBUG", category, message)
+
+
+def info(category: str, message) -> None:
+    log("INFO", category, message)
+
+
+def success(category: str, message) -> None:
+    log("SUCCESS", category, message)
+
+
+def warning(category: str, message) -> None:
+    log("WARNING", category, message)
+
+
+def error(category: str, message) -> None:
+    log("ERROR", category, message)
+
+
+def flush() -> None:
+    """落盘文件缓冲，并把尚未汇报的限流计数写入文件"""
+    with _lock:
+        if _file_sink is None:
+            return
+        for category, count in _limiter.take_suppressed().items():
+            _file_sink.write(_make_record("INFO", category, f"（{category} 类日志已省略 {count} 条）"))
+        lines = _file_sink.take()
+        sink = _file_sink
+    sink.append_lines(lines)
+
+
+atexit.register(flush)
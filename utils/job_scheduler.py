@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后台任务调度模块
+
+功能：
+1. 统一的后台任务入口：刷新、处理、选项卡预渲染、Registry 同步、启动更新检查
+2. 优先级：当前可见选项卡/用户正在等待的操作 > 后台选项卡 > Registry 同步 > 导出
+3. 取消令牌：每个任务一个 CancelToken；core 处理循环通过 check_cancelled() 读取
+   当前线程正在执行的任务的令牌，无需逐层传参
+4. 合并重复任务：同一 key 的任务已在排队/执行时，重复提交直接复用（连点"刷新"只跑一次）；
+   replace=True 时取消旧任务并排入新任务（切换文件夹后不再等待旧一轮结束）
+5. 进度回报：任务内调用 job.report_progress()，回调经 post_ui 投递到 Tk 主线程
+
+线程约定：任务函数在工作线程执行，不允许调用任何 Tk API；
+on_done / on_error / on_cancelled / on_progress 回调经 post_ui 在主线程执行。
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+# 优先级（数值越小越先执行）
+PRIORITY_VISIBLE = 0          # 当前可见选项卡 / 用户正在等待的刷新、处理
+PRIORITY_BACKGROUND_TAB = 10  # 非当前选项卡的预渲染
+PRIORITY_REGISTRY_SYNC = 20   # Registry 本地副本同步、启动更新检查等后台网络任务
+PRIORITY_EXPORT = 30          # 导出
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+_local = threading.local()
+
+
+class JobCancelled(BaseException):
+    """
+    任务已被取消
+
+    继承 BaseException：处理流程中大量 `except Exception` 兜底，
+    取消信号必须穿透这些兜底直达调度器（同 asyncio.CancelledError）。
+    """
+
+
+class CancelToken:
+    """取消令牌（线程安全）"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise JobCancelled()
+
+
+def current_cancel_token() -> Optional[CancelToken]:
+    """当前线程正在执行的任务的取消令牌（不在调度器任务中时返回 None）"""
+    return getattr(_local, "token", None)
+
+
+def check_cancelled(token: Optional[CancelToken] = None) -> None:
+    """
+    检查取消：已取消时抛出 JobCancelled
+
+    参数:
+        token: 显式传入的令牌；为 None 时使用当前线程任务的令牌
+    """
+    token = token if token is not None else current_cancel_token()
+    if token is not None and token.cancelled:
+        raise JobCancelled()
+
+
+class Job:
+    """调度器中的一个任务（由 JobScheduler.submit 创建）"""
+
+    def __init__(self, scheduler: "JobScheduler", name: str, func: Callable[["Job"], Any], priority: int,
+                 key: Optional[Hashable], meta: Optional[Dict[str, Any]],
+                 on_done, on_error, on_cancelled, on_progress):
+        self.scheduler = scheduler
+        self.name = name
+        self.func = func
+        self.priority = priority
+        self.key = key
+        self.meta = dict(meta or {})
+        self.token = CancelToken()
+        self.state = QUEUED
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.submitted_at = time.time()
+        self._on_done = on_done
+        self._on_error = on_error
+        self._on_cancelled = on_cancelled
+        self._on_progress = on_progress
+        self._finished = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.token.cancelled
+
+    @property
+    def is_active(self) -> bool:
+        """排队中或执行中"""
+        return self.state in (QUEUED, RUNNING)
+
+    def cancel(self) -> None:
+        """请求取消（排队中的任务不再执行；执行中的任务在下一个检查点退出）"""
+        self.token.cancel()
+        self.scheduler._discard_queued(self)
+
+    def report_progress(self, current: int, total: int = 0, message: str = "") -> None:
+        """任务内回报进度（已取消时同时抛出 JobCancelled，作为循环中的检查点）"""
+        self.token.raise_if_cancelled()
+        if self._on_progress is not None:
+            self.scheduler._post(lambda: self._on_progress(current, total, message))
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """等待任务结束（测试/退出时使用），返回是否已结束"""
+        return self._finished.wait(timeout)
+
+    def __repr__(self) -> str:
+        return f"<Job {self.name} key={self.key!r} priority={self.priority} state={self.state}>"
+
+
+class JobScheduler:
+    """
+    带优先级、取消与合并的后台任务调度器
+
+    用法:
+        scheduler = JobScheduler(post_ui=app._post_ui_task)
+        job = scheduler.submit("refresh", worker, priority=PRIORITY_VISIBLE, key="refresh",
+                               on_done=finalize_ui)
+        ...
+        scheduler.cancel("refresh")
+    """
+
+    def __init__(self, post_ui: Optional[Callable[[Callable[[], None]], None]] = None,
+                 max_workers: int = 2, name: str = "Job"):
+        """
+        参数:
+            post_ui: 把回调投递到主线程的函数（None 表示在工作线程直接调用，测试用）
+            max_workers: 工作线程数上限（按需创建）
+            name: 工作线程名前缀
+        """
+        self._post_ui = post_ui
+        self._max_workers = max(1, int(max_workers))
+        self._name = name
+        # 可重入：post_ui 为 None 时回调在持锁线程内直接执行，回调中可以再次 submit
+        self._cond = threading.Condition(threading.RLock())
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        self._active: Dict[Hashable, Job] = {}
+        self._running: set = set()
+        self._workers: List[threading.Thread] = []
+        self._idle = 0
+        self._shutdown = False
+
+    # ------------------------------------------------------------------
+    # 提交 / 取消
+    # ------------------------------------------------------------------
+    def submit(self, name: str, func: Callable[[Job], Any], priority: int = PRIORITY_VISIBLE,
+               key: Optional[Hashable] = None, replace: bool = False, meta: Optional[Dict[str, Any]] = None,
+               on_done: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[BaseException], None]] = None,
+               on_cancelled: Optional[Callable[[], None]] = None,
+               on_progress: Optional[Callable[[int, int, str], None]] = None) -> Job:
+        """
+        提交任务
+
+        参数:
+            name: 任务名（日志/线程名）
+            func: 任务函数 func(job) -> result，在工作线程执行
+            priority: 优先级（PRIORITY_*，数值越小越先执行）
+            key: 合并键；同 key 的任务同一时间只保留一个
+            replace: 同 key 任务已存在时，False=复用已有任务，True=取消旧任务并排入新任务
+            meta: 附加信息（调用方判断是否需要 replace 时使用，如本次刷新的文件夹）
+            on_done / on_error / on_cancelled / on_progress: 主线程回调
+
+        返回:
+            Job（合并时返回已有任务）
+        """
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("JobScheduler 已关闭")
+            if key is not None:
+                existing = self._active.get(key)
+                if existing is not None and existing.is_active and not existing.cancelled:
+                    if not replace:
+                        print(f"[Jobs] 合并重复任务: {name}")
+                        return existing
+                    print(f"[Jobs] 取消旧任务: {existing.name}")
+                    existing.token.cancel()
+                    self._discard_queued_locked(existing)
+            job = Job(self, name, func, priority, key, meta, on_done, on_error, on_cancelled, on_progress)
+            if key is not None:
+                self._active[key] = job
+            heapq.heappush(self._heap, (priority, next(self._seq), job))
+            self._ensure_worker_locked()
+            self._cond.notify()
+        return job
+
+    def active_job(self, key: Hashable) -> Optional[Job]:
+        """同 key 当前排队/执行中（且未取消）的任务"""
+        with self._cond:
+            job = self._active.get(key)
+        if job is not None and job.is_active and not job.cancelled:
+            return job
+        return None
+
+    def cancel(self, key: Hashable) -> bool:
+        """取消指定 key 的任务，返回是否有任务被取消"""
+        job = self.active_job(key)
+        if job is None:
+            return False
+        job.cancel()
+        return True
+
+    def cancel_all(self) -> None:
+        """取消全部排队/执行中的任务"""
+        with self._cond:
+            jobs = [entry[2] for entry in self._heap] + list(self._running)
+        for job in jobs:
+            job.cancel()
+
+    def pending_count(self) -> int:
+        """排队中的任务数"""
+        with self._cond:
+            return sum(1 for entry in self._heap if entry[2].state == QUEUED)
+
+    def shutdown(self) -> None:
+        """取消全部任务并让工作线程退出（不等待执行中的任务）"""
+        self.cancel_all()
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+
+    # ------------------------------------------------------------------
+    # 内部实现
+    # ------------------------------------------------------------------
+    def _post(self, callback: Callable[[], None]) -> None:
+        if self._post_ui is None:
+            callback()
+            return
+        try:
+            self._post_ui(callback)
+        except Exception as e:
+            print(f"[Jobs] 投递主线程回调失败: {e}")
+
+    def _discard_queued(self, job: Job) -> None:
+        with self._cond:
+            self._discard_queued_locked(job)
+
+    def _discard_queued_locked(self, job: Job) -> None:
+        """排队中的任务直接出队并结束（执行中的任务由工作线程收尾）"""
+        if job.state != QUEUED:
+            return
+        self._heap = [entry for entry in self._heap if entry[2] is not job]
+        heapq.heapify(self._heap)
+        self._finish_locked(job, CANCELLED)
+        if job._on_cancelled is not None:
+            self._post(job._on_cancelled)
+
+    def _finish_locked(self, job: Job, state: str) -> None:
+        job.state = state
+        self._running.discard(job)
+        if job.key is not None and self._active.get(job.key) is job:
+            del self._active[job.key]
+        job._finished.set()
+        # 唤醒等待同 key 旧任务退出的工作线程
+        self._cond.notify_all()
+
+    def _ensure_worker_locked(self) -> None:
+        if self._idle > 0 or len(self._workers) >= self._max_workers:
+            return
+        worker = threading.Thread(target=self._worker_loop, name=f"{self._name}-{len(self._workers) + 1}",
+                                  daemon=True)
+        self._workers.append(worker)
+        worker.start()
+
+    def _next_job(self) -> Optional[Job]:
+        with self._cond:
+            while True:
+                # 同 key 的任务串行：被替换的旧任务退出前，新任务留在队列中
+                running_keys = {j.key for j in self._running if j.key is not None}
+                deferred = []
+                picked = None
+                while self._heap:
+                    entry = heapq.heappop(self._heap)
+                    job = entry[2]
+                    if job.state != QUEUED:
+                        continue
+                    if job.cancelled:
+                        self._finish_locked(job, CANCELLED)
+                        if job._on_cancelled is not None:
+                            self._post(job._on_cancelled)
+                        continue
+                    if job.key is not None and job.key in running_keys:
+                        deferred.append(entry)
+                        continue
+                    picked = job
+                    break
+                for entry in deferred:
+                    heapq.heappush(self._heap, entry)
+                if picked is not None:
+                    picked.state = RUNNING
+                    self._running.add(picked)
+                    return picked
+                if self._shutdown:
+                    return None
+                self._idle += 1
+                try:
+                    self._cond.wait()
+                finally:
+                    self._idle -= 1
+
+    def _worker_loop(self) -> None:
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            self._run(job)
+
+    def _run(self, job: Job) -> None:
+        _local.token = job.token
+        state = DONE
+        callback = None
+        try:
+            job.result = job.func(job)
+            if job.cancelled:
+                state = CANCELLED
+        except JobCancelled:
+            state = CANCELLED
+        except Exception as e:
+            state = FAILED
+            job.error = e
+            print(f"[Jobs] 任务 {job.name} 失败: {e}")
+        finally:
+            _local.token = None
+        if state == DONE and job._on_done is not None:
+            callback = lambda: job._on_done(job.result)
+        elif state == FAILED and job._on_error is not None:
+            callback = lambda: job._on_error(job.error)
+        elif state == CANCELLED:
+            print(f"[Jobs] 任务 {job.name} 已取消")
+            callback = job._on_cancelled
+        with self._cond:
+            self._finish_locked(job, state)
+        if callback is not None:
+            self._post(callback)
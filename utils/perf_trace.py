@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能埋点模块
+
+功能：
+1. span() 上下文管理器 / traced() 装饰器记录各阶段耗时
+2. 每条记录包含：阶段、文件类型、项目号、行数、耗时(ms)、缓存命中、
+   外层阶段（parent：同一线程内包含它的 span/traced，顶层为 None）
+3. 记录按"运行批次"(run_id) 分组，写入本地滚动日志（JSON Lines）
+4. 提供最近N次运行的汇总，供"性能报告"窗口展示
+
+开关：
+- 环境变量 EXCEL_PROCESSOR_PERF_TRACE=1，或主程序配置 perf_trace_enabled
+- 关闭时 span() 返回共享的空对象，traced() 直接调用原函数，开销仅为一次全局变量判断
+
+存储位置：%LOCALAPPDATA%\\InterfaceFilter\\perf\\perf_trace.jsonl（超过2MB滚动为 .1）
+"""
+
+import atexit
+import functools
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+_ENV_FLAG = "EXCEL_PROCESSOR_PERF_TRACE"
+
+MAX_LOG_BYTES = 2 * 1024 * 1024
+FLUSH_BATCH_SIZE = 50
+MEMORY_RECORDS = 2000
+
+_ENABLED = os.environ.get(_ENV_FLAG, "").strip().lower() in ("1", "true", "yes", "on")
+
+_lock = threading.Lock()
+_buffer: List[Dict[str, Any]] = []
+_recent: deque = deque(maxlen=MEMORY_RECORDS)
+_current_run: Dict[str, Any] = {"id": "", "label": ""}
+_log_path: Optional[str] = None
+# 每个线程正在计时的阶段栈（用于记录外层阶段）
+_active = threading.local()
+
+
+def is_enabled() -> bool:
+    """是否启用性能埋点"""
+    return _ENABLED
+
+
+def set_enabled(enabled: bool) -> None:
+    """启用/关闭性能埋点（关闭时会先落盘已缓冲的记录）"""
+    global _ENABLED
+    if not enabled and _ENABLED:
+        flush()
+    _ENABLED = bool(enabled)
+
+
+def get_log_path() -> str:
+    """返回滚动日志路径"""
+    global _log_path
+    if _log_path is None:
+        local_appdata = os.environ.get("LOCALAPPDATA", "") or os.path.expanduser("~")
+        _log_path = os.path.join(local_appdata, "InterfaceFilter", "perf", "perf_trace.jsonl")
+    return _log_path
+
+
+def set_log_path(path: Optional[str]) -> None:
+    """设置日志路径（测试用；None 恢复默认）"""
+    global _log_path
+    flush()
+    _log_path = path
+
+
+# ============================================================================
+# 运行批次
+# ============================================================================
+
+def begin_run(label: str = "") -> str:
+    """
+    开始一个新的运行批次（如一次"开始处理"），后续记录都归入该批次
+
+    返回:
+        run_id
+    """
+    run_id = datetime.now().strftime("%Y%m%d%H%M%S") + "-" + uuid.uuid4().hex[:6]
+    with _lock:
+        _current_run["id"] = run_id
+        _current_run["label"] = label or ""
+    return run_id
+
+
+def end_run() -> None:
+    """结束当前运行批次并落盘"""
+    with _lock:
+        _current_run["id"] = ""
+        _current_run["label"] = ""
+    flush()
+
+
+# ============================================================================
+# 记录
+# ============================================================================
+
+def _stage_stack() -> List[str]:
+    stack = getattr(_active, "stack", None)
+    if stack is None:
+        stack = _active.stack = []
+    return stack
+
+
+def _normalize_file_type(file_type) -> Optional[int]:
+    """'file3' / '3' / 3 -> 3"""
+    if file_type is None or file_type == "":
+        return None
+    try:
+        return int(str(file_type).replace("file", "").strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def record(stage: str, ms: float, file_type=None, project_id=None, rows=None,
+           cache_hit=None, **extra) -> None:
+    """
+    直接写入一条记录（已计时的场景使用；未启用时忽略）
+
+    外层阶段取当前线程正在计时的最内层 span/traced（没有时为 None）。
+    """
+    if not _ENABLED:
+        return
+    stack = _stage_stack()
+    item = {
+        "ts": datetime.now().isoformat(timespec="milliseconds"),
+        "run_id": _current_run["id"],
+        "run_label": _current_run["label"],
+        "stage": stage,
+        "file_type": _normalize_file_type(file_type),
+        "project": "" if project_id is None else str(project_id),
+        "rows": None if rows is None else int(rows),
+        "ms": round(float(ms), 3),
+        "cache_hit": cache_hit,
+        "parent": stack[-1] if stack else None,
+        "thread": threading.current_thread().name,
+    }
+    if extra:
+        item.update(extra)
+    with _lock:
+        _recent.append(item)
+        _buffer.append(item)
+        should_flush = len(_buffer) >= FLUSH_BATCH_SIZE
+    if should_flush:
+        flush()
+
+
+class Span:
+    """单次计时区间；可在 with 块内通过 set() 补充行数、缓存命中等字段"""
+
+    __slots__ = ("stage", "fields", "_start")
+
+    def __init__(self, stage: str, fields: Dict[str, Any]):
+        self.stage = stage
+        self.fields = fields
+        self._start = 0.0
+
+    def set(self, **fields) -> "Span":
+        self.fields.update(fields)
+        return self
+
+    def __enter__(self) -> "Span":
+        _stage_stack().append(self.stage)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        ms = (time.perf_counter() - self._start) * 1000.0
+        _stage_stack().pop()
+        if exc_type is not None:
+            self.fields.setdefault("error", exc_type.__name__)
+        try:
+            record(self.stage, ms, **self.fields)
+        except Exception:
+            pass
+        return False
+
+
+class _NoopSpan:
+    """未启用时返回的空对象（共享单例，无分配）"""
+
+    __slots__ = ()
+
+    def set(self, **_fields) -> "_NoopSpan":
+        return self
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(stage: str, **fields):
+    """
+    计时上下文管理器
+
+    用法:
+        with perf_trace.span("process_with_cache", file_type=1, project_id="2016") as sp:
+            ...
+            sp.set(rows=len(df), cache_hit=True)
+    """
+    if not _ENABLED:
+        return _NOOP_SPAN
+    return Span(stage, fields)
+
+
+def traced(stage: str, file_type=None, describe: Optional[Callable[..., Dict[str, Any]]] = None):
+    """
+    计时装饰器
+
+    参数:
+        stage: 阶段名
+        file_type: 固定的文件类型（可选）
+        describe: 可选，describe(args, kwargs, result) -> dict，用于提取项目号/行数等字段；
+                  仅在启用时调用。未提供时若返回值有 len() 则记录为行数。
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _ENABLED:
+                return func(*args, **kwargs)
+            stack = _stage_stack()
+            stack.append(stage)
+            start = time.perf_counter()
+            result = None
+            error = None
+            try:
+                result = func(*args, **kwargs)
+                return result
+            except Exception as e:
+                error = type(e).__name__
+                raise
+            finally:
+                ms = (time.perf_counter() - start) * 1000.0
+                stack.pop()
+                fields: Dict[str, Any] = {"file_type": file_type}
+                try:
+                    if describe is not None:
+                        fields.update(describe(args, kwargs, result) or {})
+                    elif result is not None and hasattr(result, "__len__"):
+                        fields["rows"] = len(result)
+                    if error:
+                        fields["error"] = error
+                    record(stage, ms, **fields)
+                except Exception:
+                    pass
+        return wrapper
+    return decorator
+
+
+def project_from_path(path) -> str:
+    """从源文件名提取4位项目号（与 process_target_fileN 一致）"""
+    match = re.search(r"(\d{4})", os.path.basename(str(path or "")))
+    return match.group(1) if match else ""
+
+
+# ============================================================================
+# 落盘与读取
+# ============================================================================
+
+def flush() -> None:
+    """将缓冲记录追加写入滚动日志（失败时静默丢弃，不影响主流程）"""
+    with _lock:
+        if not _buffer:
+            return
+        pending = list(_buffer)
+        _buffer.clear()
+    path = get_log_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path) and os.path.getsize(path) > MAX_LOG_BYTES:
+            os.replace(path, path + ".1")
+        with open(path, "a", encoding="utf-8") as f:
+            for item in pending:
+                f.write(json.dumps(item, ensure_ascii=False) + "\n")
+    except Exception as e:
+        print(f"[PerfTrace] 写入性能日志失败: {e}")
+
+
+def get_recent_records() -> List[Dict[str, Any]]:
+    """返回本进程内存中的最近记录（不读文件）"""
+    with _lock:
+        return list(_recent)
+
+
+def load_records(path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """读取滚动日志（含 .1 备份），按时间顺序返回"""
+    flush()
+    path = path or get_log_path()
+    records: List[Dict[str, Any]] = []
+    for candidate in (path + ".1", path):
+        if not os.path.exists(candidate):
+            continue
+        try:
+            with open(candidate, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except Exception as e:
+            print(f"[PerfTrace] 读取性能日志失败: {e}")
+    return records
+
+
+def summarize_runs(records: List[Dict[str, Any]], last_n: int = 10) -> List[Dict[str, Any]]:
+    """
+    按运行批次汇总最近 last_n 次运行（未归属批次的记录不参与汇总）
+
+    返回:
+        [{"run_id", "label", "started", "records", "total_ms",
+          "stages": {stage: {"count", "total_ms", "max_ms", "rows", "cache_hits"}}}, ...]
+        最新的运行排在最前；run 的 total_ms 只累加顶层记录（parent 为空），嵌套阶段不重复计算
+    """
+    runs: Dict[str, Dict[str, Any]] = {}
+    order: List[str] = []
+    for item in records:
+        run_id = item.get("run_id") or ""
+        if not run_id:
+            continue
+        run = runs.get(run_id)
+        if run is None:
+            run = {"run_id": run_id, "label": item.get("run_label", ""),
+                   "started": item.get("ts", ""), "records": 0, "total_ms": 0.0, "stages": {}}
+            runs[run_id] = run
+            order.append(run_id)
+        run["records"] += 1
+        stage = run["stages"].setdefault(item.get("stage", ""), {
+            "count": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0, "cache_hits": 0,
+        })
+        ms = float(item.get("ms") or 0.0)
+        if not item.get("parent"):
+            run["total_ms"] += ms
+        stage["count"] += 1
+        stage["total_ms"] += ms
+        stage["max_ms"] = max(stage["max_ms"], ms)
+        stage["rows"] += int(item.get("rows") or 0)
+        if item.get("cache_hit"):
+            stage["cache_hits"] += 1
+    latest = order[-last_n:] if last_n else order
+    return [runs[run_id] for run_id in reversed(latest)]
+
+
+def clear_log() -> None:
+    """清空日志文件与内存记录"""
+    with _lock:
+        _buffer.clear()
+        _recent.clear()
+    path = get_log_path()
+    for candidate in (path, path + ".1"):
+        try:
+            if os.path.exists(candidate):
+                os.remove(candidate)
+        except Exception as e:
+            print(f"[PerfTrace] 清除性能日志失败: {e}")
+
+
+atexit.register(flush)
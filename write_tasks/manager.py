@@ -10,6 +10,7 @@ from typing import Dict, Iterable, Optional
 
 from .cache import WriteTaskCache
 from .models import WriteTask, utc_now_iso
+from .shared_log_writer import SharedLogWriter
 from . import executors
 try:
     from registry import hooks as registry_hooks
@@ -103,6 +104,11 @@ class WriteTaskManager:
         except Exception:
             pass
         self.cache = WriteTaskCache(self.state_path)
+        # 共享任务日志缓冲写入：状态变化合并后一次写入，共享盘不可用时暂存本地
+        self._shared_log_writer = SharedLogWriter(
+            self._shared_log_target,
+            spool_path=self.state_path.with_name("write_tasks_shared_spool.json"),
+        )
         self.tasks: Dict[str, WriteTask] = {}
         self._queue: "queue.Queue[str]" = queue.Queue()
         self._stop_event = threading.Event()
@@ -283,6 +289,11 @@ class WriteTaskManager:
     def shutdown(self):
         self._stop_event.set()
         self._worker_thread.join(timeout=2)
+        self._shared_log_writer.close()
+
+    def flush_shared_log(self) -> int:
+        """立即把暂存的任务状态写入共享任务日志（退出前调用），返回写入条数"""
+        return self._shared_log_writer.flush()
 
     def register_listener(self, callback):
         if callback not in self._listeners:
@@ -295,32 +306,27 @@ class WriteTaskManager:
             except Exception as e:
                 print(f"[WriteTaskManager] listener 调用失败: {e}")
 
+    def _shared_log_target(self):
+        """共享任务日志位置 (registry_db_path, wal)；Registry 未启用时返回 None"""
+        cfg = registry_hooks._cfg()
+        if not cfg.get("registry_enabled", True):
+            return None
+        db_path = cfg.get("registry_db_path")
+        if not db_path:
+            return None
+        return str(db_path), bool(cfg.get("registry_wal", False))
+
     def _sync_to_shared_log(self, task: WriteTask):
         """
         将任务状态同步到公共盘 registry.db 的全局写入任务日志表。
         - 仅在registry模块可用且已启用时执行
+        - 【优化】只记入缓冲写入器，由后台线程合并写入（见 SharedLogWriter）
         - 所有异常吞掉，确保不影响主流程
         """
         if not registry_hooks or not _shared_log_upsert_task:
             return
         try:
-            cfg = registry_hooks._cfg()
-            if not cfg.get("registry_enabled", True):
-                return
-            db_path = cfg.get("registry_db_path")
-            if not db_path:
-                return
-            wal = bool(cfg.get("registry_wal", False))
-            from registry.db import open_isolated_connection
-
-            conn = open_isolated_connection(db_path, wal)
-            try:
-                _shared_log_upsert_task(conn, task)
-            finally:
-                try:
-                    conn.close()
-                except Exception:
-                    pass
+            self._shared_log_writer.enqueue(task)
         except Exception as e:
             print(f"[WriteTaskManager] 同步全局任务日志失败(已忽略): {e}")
 
@@ -2,7 +2,8 @@ from __future__ import annotations
 
 import os
 import threading
-from typing import Dict, List, Tuple
+import weakref
+from typing import Dict, List, Optional, Tuple
 
 from .models import WriteTask
 
@@ -29,6 +30,28 @@ class PendingCache:
         self._assignments: Dict[Key, Dict] = {}
         self._responses: Dict[Key, Dict] = {}
         self._task_index: Dict[str, List[Tuple[str, Key]]] = {}
+        self._version = 0  # 覆盖内容每次变化递增（界面渲染缓存据此失效）
+        self._type_versions: Dict[int, int] = {}  # 按文件类型的版本号（只使受影响的选项卡失效）
+        # 【优化】按 (类型, 文件类型) 缓存的覆盖索引：(版本, MultiIndex[(路径, 行号)], [info, ...])
+        self._override_index: Dict[Tuple[str, int], tuple] = {}
+        # 每个文件类型最近一次覆盖的结果：输入 DataFrame 与版本/用户都未变时直接复用
+        # （输入 DataFrame 被回收后条目随之移除，不再持有结果副本）
+        self._apply_memo: Dict[int, tuple] = {}
+
+    @property
+    def version(self) -> int:
+        """覆盖内容版本号"""
+        return self._version
+
+    def type_version(self, file_type: int) -> int:
+        """指定文件类型的覆盖内容版本号（其他文件类型的变化不影响）"""
+        return self._type_versions.get(int(file_type or 0), 0)
+
+    def _bump_versions(self, keys) -> None:
+        """覆盖内容变化：递增全局版本与涉及文件类型的版本（调用方持有锁）"""
+        self._version += 1
+        for file_type in {key[2] for key in keys}:
+            self._type_versions[file_type] = self._type_versions.get(file_type, 0) + 1
 
     # ------------------------------------------------------------------ #
     # Record tasks
@@ -53,6 +76,7 @@ class PendingCache:
                     entries.append(("assignment", key))
             if entries:
                 self._task_index[task_id] = entries
+                self._bump_versions(key for _kind, key in entries)
 
     def add_response_entry(self, task_id: str, info: Dict):
         with self._lock:
@@ -68,53 +92,181 @@ class PendingCache:
                 }
             # 记录索引：用于状态变更时清理/更新（同一任务可能对应多个 key）
             self._task_index[task_id] = [("response", k) for k in keys]
+            self._bump_versions(keys)
 
     # ------------------------------------------------------------------ #
     # Query helpers
     # ------------------------------------------------------------------ #
     def apply_overrides_to_dataframe(self, df, file_type: int, user_roles=None, current_user: str = ""):
-        """将缓存中的指派/回文信息覆盖到 DataFrame，供 UI 显示。"""
+        """
+        将缓存中的指派/回文信息覆盖到 DataFrame，供 UI 显示。
+
+        【优化】按 (源文件, 原始行号) 对该文件类型的覆盖索引做向量化查找，只修改命中的行：
+        - 该文件类型没有待覆盖记录时直接返回原 DataFrame（不复制）
+        - 同一 DataFrame、覆盖版本与用户未变化时直接返回上次结果
+        - 查找顺序同旧逻辑：先按完整路径，未命中再按文件名
+
+        约定：返回值可能就是 df 本身或与其他调用方共享的上次结果，调用方只读使用；
+        df 传入后也不应原地修改（记忆按对象身份命中，原地修改后会返回旧的覆盖结果），
+        需要修改时先 copy()。
+        """
         if df is None or df.empty or '原始行号' not in df.columns:
             return df
-        df = df.copy()
-        rows_to_drop = []
-        rows = df.to_dict("index")
+        file_type = int(file_type or 0)
         current_user = (current_user or "").strip()
         user_roles = self._normalize_roles(user_roles)
-        for idx, row in rows.items():
-            file_path = row.get('source_file') or row.get('源文件') or ''
-            row_index = row.get('原始行号') or row.get('行号') or 0
-            key_full = self._normalize_key(file_path, row_index, file_type)
-            key_base = self._normalize_key(os.path.basename(str(file_path or "")), row_index, file_type)
-            info = None
-            if key_full in self._assignments:
-                info = self._assignments[key_full]
-            elif key_base in self._assignments:
-                info = self._assignments[key_base]
-            if info:
-                if '责任人' in df.columns:
-                    df.at[idx, '责任人'] = info.get('assigned_name', '')
-                if '状态' in df.columns and info.get('assigned_name'):
-                    status_text = self._resolve_assignment_status(info, user_roles)
-                    df.at[idx, '状态'] = status_text
-            info = None
-            if key_full in self._responses:
-                info = self._responses[key_full]
-            elif key_base in self._responses:
-                info = self._responses[key_base]
-            if info:
-                if '回文单号' in df.columns:
-                    df.at[idx, '回文单号'] = info.get('response_number', '')
-                if '是否已完成' in df.columns:
-                    df.at[idx, '是否已完成'] = '☑'
-                if '状态' in df.columns:
-                    status_text = self._resolve_response_status(info, user_roles)
-                    df.at[idx, '状态'] = status_text
-                if current_user and info.get("user_name") == current_user:
-                    rows_to_drop.append(idx)
+
+        with self._lock:
+            version = self._type_versions.get(file_type, 0)
+            memo = self._apply_memo.get(file_type)
+            if memo is not None:
+                memo_df, memo_version, memo_roles, memo_user, memo_result = memo
+                if memo_df() is None:
+                    self._apply_memo.pop(file_type, None)
+                elif (memo_df() is df and memo_version == version and memo_roles == tuple(user_roles)
+                        and memo_user == current_user):
+                    return memo_result
+            assignment_index = self._get_override_index("assignment", file_type, version)
+            response_index = self._get_override_index("response", file_type, version)
+
+        if assignment_index is None and response_index is None:
+            return df
+
+        full_keys, base_keys = self._frame_keys(df)
+        assignment_hits = self._lookup(assignment_index, full_keys, base_keys)
+        response_hits = self._lookup(response_index, full_keys, base_keys)
+
+        if not len(assignment_hits[0]) and not len(response_hits[0]):
+            result = df
+        else:
+            result = self._apply_hits(df, assignment_hits, response_hits, user_roles, current_user)
+
+        with self._lock:
+            if self._type_versions.get(file_type, 0) == version:
+                ref = weakref.ref(df, lambda dead, ft=file_type: self._drop_memo(ft, dead))
+                self._apply_memo[file_type] = (ref, version, tuple(user_roles), current_user, result)
+        return result
+
+    def _drop_memo(self, file_type: int, ref) -> None:
+        """
+        输入 DataFrame 被回收：移除对应的记忆结果
+
+        由 weakref 回调触发（可能发生在持锁期间的垃圾回收中），因此不加锁，
+        只在条目仍属于该 DataFrame 时移除。
+        """
+        memo = self._apply_memo.get(file_type)
+        if memo is not None and memo[0] is ref:
+            self._apply_memo.pop(file_type, None)
+
+    def _get_override_index(self, kind: str, file_type: int, version: int):
+        """
+        该文件类型的覆盖索引（调用方持有锁；版本变化时重建）
+
+        返回:
+            (MultiIndex[(路径, 行号)], [info, ...])；没有记录时返回 None
+        """
+        import pandas as pd
+
+        cached = self._override_index.get((kind, file_type))
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        source = self._assignments if kind == "assignment" else self._responses
+        items = [(key[0], key[1], info) for key, info in source.items() if key[2] == file_type]
+        index = None
+        if items:
+            paths, rows, infos = zip(*items)
+            index = (pd.MultiIndex.from_arrays([list(paths), list(rows)]), list(infos))
+        self._override_index[(kind, file_type)] = (version, index)
+        return index
+
+    def _frame_keys(self, df):
+        """
+        DataFrame 每行的 (完整路径, 行号) 与 (文件名, 行号) 键（与 _normalize_key 口径一致）
+
+        源文件取 source_file，为空时取 源文件；行号取 原始行号，为空时取 行号。
+        路径归一化只对去重后的源文件做一次。
+        """
+        import pandas as pd
+
+        if 'source_file' in df.columns:
+            src = df['source_file'].astype(object)
+            if '源文件' in df.columns:
+                src = src.where(src.notna() & (src != ""), df['源文件'].astype(object))
+        elif '源文件' in df.columns:
+            src = df['源文件'].astype(object)
+        else:
+            src = pd.Series([""] * len(df), index=df.index, dtype=object)
+        src = src.where(src.notna(), "")
+
+        rows = pd.to_numeric(df['原始行号'], errors='coerce')
+        if '行号' in df.columns:
+            rows = rows.where(rows.notna() & (rows != 0), pd.to_numeric(df['行号'], errors='coerce'))
+        rows = rows.fillna(0).astype("int64").to_numpy()
+
+        full_map = {}
+        base_map = {}
+        for value in src.unique():
+            text = str(value or "")
+            full_map[value] = self._normalize_key(text, 0, 0)[0]
+            base_map[value] = self._normalize_key(os.path.basename(text), 0, 0)[0]
+        full_keys = pd.MultiIndex.from_arrays([src.map(full_map).to_numpy(), rows])
+        base_keys = pd.MultiIndex.from_arrays([src.map(base_map).to_numpy(), rows])
+        return full_keys, base_keys
+
+    @staticmethod
+    def _lookup(index, full_keys, base_keys):
+        """
+        返回:
+            (命中的行位置数组, 对应的 info 列表)
+        """
+        import numpy as np
+
+        if index is None:
+            return np.array([], dtype="int64"), []
+        keys, infos = index
+        positions = keys.get_indexer(full_keys)
+        missing = positions < 0
+        if missing.any():
+            positions = np.where(missing, keys.get_indexer(base_keys), positions)
+        matched = np.flatnonzero(positions >= 0)
+        return matched, [infos[p] for p in positions[matched]]
+
+    def _apply_hits(self, df, assignment_hits, response_hits, user_roles, current_user):
+        import numpy as np
+
+        columns = {}
+
+        def _column(name):
+            # 分类列（紧凑结果）转为 object 后再写入新值
+            if name not in columns:
+                columns[name] = df[name].to_numpy(dtype=object, copy=True)
+            return columns[name]
+
+        matched, infos = assignment_hits
+        for pos, info in zip(matched, infos):
+            if '责任人' in df.columns:
+                _column('责任人')[pos] = info.get('assigned_name', '')
+            if '状态' in df.columns and info.get('assigned_name'):
+                _column('状态')[pos] = self._resolve_assignment_status(info, user_roles)
+
+        rows_to_drop = []
+        matched, infos = response_hits
+        for pos, info in zip(matched, infos):
+            if '回文单号' in df.columns:
+                _column('回文单号')[pos] = info.get('response_number', '')
+            if '是否已完成' in df.columns:
+                _column('是否已完成')[pos] = '☑'
+            if '状态' in df.columns:
+                _column('状态')[pos] = self._resolve_response_status(info, user_roles)
+            if current_user and info.get("user_name") == current_user:
+                rows_to_drop.append(pos)
+
+        out = df.copy()
+        for name, values in columns.items():
+            out[name] = values
         if rows_to_drop:
-            df = df.drop(rows_to_drop).reset_index(drop=True)
-        return df
+            out = out.drop(out.index[np.unique(rows_to_drop)]).reset_index(drop=True)
+        return out
 
     def is_assignment_pending(self, file_path: str, row_index: int, file_type: int) -> bool:
         key = self._normalize_key(file_path, row_index, file_type)
@@ -154,6 +306,7 @@ class PendingCache:
             entries = self._task_index.get(task.task_id, [])
             if not entries:
                 return
+            self._bump_versions(key for _kind, key in entries)
             for entry_type, key in entries:
                 if entry_type == "assignment" and key in self._assignments:
                     self._assignments[key]["status"] = task.status
@@ -1,9 +1,20 @@
 from __future__ import annotations
 
 import json
-from typing import List, Optional
+from typing import List, NamedTuple, Optional, Tuple
 from .models import WriteTask
 
+_TASK_COLUMNS = """task_id, task_type, submitted_by, description, submitted_at,
+               status, started_at, completed_at, error, payload_json, updated_at"""
+
+
+class SharedTaskRow(NamedTuple):
+    """共享日志中的一条记录（payload 未解码，需要时用 decode_payload 解码）"""
+
+    task: WriteTask
+    updated_at: str
+    payload_json: str
+
 
 def _safe_json_dumps(data) -> str:
     try:
@@ -83,11 +94,11 @@ def ensure_schema(conn) -> None:
     conn.commit()
 
 
-def upsert_task(conn, task: WriteTask) -> None:
-    """
-    写入/更新一条全局日志记录（提交/状态变化都会调用）。
-    """
-    ensure_schema(conn)
+# 本进程内已确认建表的数据库（按路径），批量写入时不再重复执行建表语句
+_SCHEMA_READY = set()
+
+
+def _upsert_row(conn, task: WriteTask) -> None:
     extra = _extract_fields(task)
     payload_json = _safe_json_dumps(task.payload)
     updated_at = task.completed_at or task.started_at or task.submitted_at
@@ -134,26 +145,86 @@ def upsert_task(conn, task: WriteTask) -> None:
             updated_at or (task.submitted_at or ""),
         ),
     )
+
+
+def upsert_task(conn, task: WriteTask) -> None:
+    """
+    写入/更新一条全局日志记录（提交/状态变化都会调用）。
+    """
+    ensure_schema(conn)
+    _upsert_row(conn, task)
     conn.commit()
 
 
-def list_tasks(conn, limit: int = 100, only_user: Optional[str] = None) -> List[WriteTask]:
+def upsert_tasks(conn, tasks: List[WriteTask], schema_key: Optional[str] = None) -> None:
     """
-    读取共享日志记录，返回 WriteTask 列表（用于 UI 直接复用现有渲染逻辑）。
+    在一个事务内写入/更新多条全局日志记录（只提交一次）。
+
+    schema_key: 数据库标识（通常为路径）；同一进程内对同一数据库只建表检查一次
+    """
+    if schema_key is None or schema_key not in _SCHEMA_READY:
+        ensure_schema(conn)
+        if schema_key is not None:
+            _SCHEMA_READY.add(schema_key)
+    try:
+        for task in tasks:
+            _upsert_row(conn, task)
+        conn.commit()
+    except Exception:
+        # 数据库可能已被重建（维护/迁移），下次重新建表检查
+        _SCHEMA_READY.discard(schema_key)
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        raise
+
+
+def get_change_token(conn) -> Tuple[int, str]:
+    """
+    读取共享日志的变化标记：(记录数, 最大 updated_at)。
+
+    两个聚合都可由索引直接得到，轮询时先比较该标记，未变化则不再读取记录。
+    """
+    ensure_schema(conn)
+    row = conn.execute("SELECT COUNT(*), MAX(updated_at) FROM write_tasks_log").fetchone()
+    return int(row[0] or 0), str(row[1] or "")
+
+
+def decode_payload(payload_json: Optional[str]) -> dict:
+    try:
+        return json.loads(payload_json or "{}")
+    except Exception:
+        return {}
+
+
+def list_task_rows(
+    conn,
+    limit: int = 100,
+    only_user: Optional[str] = None,
+    updated_after: Optional[str] = None,
+) -> List[SharedTaskRow]:
+    """
+    读取共享日志记录（不解码 payload）。
+
+    updated_after: 仅返回 updated_at 晚于该值的记录（增量读取）
     """
     ensure_schema(conn)
     only_user = (only_user or "").strip()
     params = []
-    where = ""
+    conditions = []
     if only_user:
-        where = "WHERE submitted_by = ?"
+        conditions.append("submitted_by = ?")
         params.append(only_user)
+    if updated_after:
+        conditions.append("updated_at > ?")
+        params.append(updated_after)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
     params.append(int(limit))
 
     rows = conn.execute(
         f"""
-        SELECT task_id, task_type, submitted_by, description, submitted_at,
-               status, started_at, completed_at, error, payload_json
+        SELECT {_TASK_COLUMNS}
         FROM write_tasks_log
         {where}
         ORDER BY submitted_at DESC
@@ -162,27 +233,31 @@ def list_tasks(conn, limit: int = 100, only_user: Optional[str] = None) -> List[
         params,
     ).fetchall()
 
-    tasks: List[WriteTask] = []
+    result: List[SharedTaskRow] = []
     for row in rows:
-        task_id, task_type, submitted_by, description, submitted_at, status, started_at, completed_at, error, payload_json = row
-        try:
-            payload = json.loads(payload_json or "{}")
-        except Exception:
-            payload = {}
-        tasks.append(
-            WriteTask(
-                task_id=task_id,
-                task_type=task_type,
-                payload=payload,
-                submitted_by=submitted_by,
-                description=description or "",
-                submitted_at=submitted_at,
-                status=status or "pending",
-                started_at=started_at,
-                completed_at=completed_at,
-                error=error,
-            )
+        task_id, task_type, submitted_by, description, submitted_at, status, started_at, completed_at, error, payload_json, updated_at = row
+        task = WriteTask(
+            task_id=task_id,
+            task_type=task_type,
+            payload={},
+            submitted_by=submitted_by,
+            description=description or "",
+            submitted_at=submitted_at,
+            status=status or "pending",
+            started_at=started_at,
+            completed_at=completed_at,
+            error=error,
         )
-    return tasks
+        result.append(SharedTaskRow(task, updated_at or "", payload_json or "{}"))
+    return result
 
 
+def list_tasks(conn, limit: int = 100, only_user: Optional[str] = None) -> List[WriteTask]:
+    """
+    读取共享日志记录，返回 WriteTask 列表（用于 UI 直接复用现有渲染逻辑）。
+    """
+    tasks: List[WriteTask] = []
+    for row in list_task_rows(conn, limit=limit, only_user=only_user):
+        row.task.payload = decode_payload(row.payload_json)
+        tasks.append(row.task)
+    return tasks
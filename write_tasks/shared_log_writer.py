@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from .models import WriteTask
+
+Target = Tuple[str, bool]  # (registry_db_path, wal)
+
+SPOOL_VERSION = 1
+
+
+class SharedLogWriter:
+    """
+    共享写入任务日志的缓冲写入器。
+
+    原实现每次状态变化（提交/开始/完成）都单独打开一次网络 registry.db、建表检查并提交。
+    这里把状态变化先记在内存（同一任务只保留最新状态），由后台线程按 flush_interval
+    合并到一个事务写入。尚未写入的状态同时落盘到本地 spool 文件（本地盘，开销很小），
+    共享盘不可用、进程崩溃或关闭后才到达的状态变化都会在恢复后（含下次启动）补写。
+    """
+
+    def __init__(
+        self,
+        resolve_target: Callable[[], Optional[Target]],
+        spool_path: Optional[Path] = None,
+        flush_interval: float = 1.5,
+        retry_interval: float = 30.0,
+    ):
+        """
+        参数:
+            resolve_target: 返回当前共享日志位置 (db_path, wal)；返回 None 表示不同步（Registry 未启用）
+            spool_path: 本地暂存文件（None 表示不落盘）
+            flush_interval: 首条状态变化到写入的最长等待秒数
+            retry_interval: 写入失败后的重试间隔秒数
+        """
+        self.resolve_target = resolve_target
+        self.spool_path = Path(spool_path) if spool_path else None
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[Target, Dict[str, dict]] = {}
+        self._inflight: Dict[Target, Dict[str, dict]] = {}  # 正在写入的批次（写入完成前仍保留在 spool 中）
+        self._next_flush_at = 0.0
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._load_spool()
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+    def enqueue(self, task: WriteTask) -> None:
+        """记录一次任务状态变化（立即返回）"""
+        target = self.resolve_target()
+        if not target:
+            return
+        snapshot = task.to_dict()
+        with self._cond:
+            if not self._pending:
+                self._next_flush_at = time.time() + self.flush_interval
+            self._pending.setdefault(target, {})[task.task_id] = snapshot
+            self._save_spool_locked()
+            if self._closed:
+                # 已关闭：不再启动后台线程，留在 spool 中由下次启动补写
+                return
+            self._ensure_thread()
+            self._cond.notify()
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return sum(len(tasks) for tasks in self._pending.values())
+
+    def flush(self) -> int:
+        """
+        立即写入全部暂存的状态变化（每个数据库一个连接、一次提交）
+
+        返回:
+            成功写入的记录数
+        """
+        with self._flush_lock:
+            with self._cond:
+                batches, self._pending = self._pending, {}
+                self._inflight = batches
+            if not batches:
+                return 0
+
+            written = 0
+            failed: Dict[Target, Dict[str, dict]] = {}
+            for target, tasks in batches.items():
+                try:
+                    self._write_batch(target, list(tasks.values()))
+                    written += len(tasks)
+                except Exception as e:
+                    print(f"[SharedLogWriter] 写入共享任务日志失败，已暂存本地({len(tasks)}条): {e}")
+                    failed[target] = tasks
+
+            with self._cond:
+                for target, tasks in failed.items():
+                    merged = self._pending.setdefault(target, {})
+                    for task_id, snapshot in tasks.items():
+                        # 写入期间又有新的状态变化时，以新的为准
+                        merged.setdefault(task_id, snapshot)
+                if failed:
+                    self._next_flush_at = time.time() + self.retry_interval
+                self._inflight = {}
+                self._save_spool_locked()
+            return written
+
+    def close(self, timeout: float = 5.0) -> None:
+        """停止后台线程并写入剩余状态（失败的留在 spool 中，下次启动补写）"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout=timeout)
+        self.flush()
+
+    # ------------------------------------------------------------------ #
+    # Internals
+    # ------------------------------------------------------------------ #
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="SharedLogWriter", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                while not self._closed:
+                    remaining = self._next_flush_at - time.time()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._closed:
+                    return
+            self.flush()
+
+    def _write_batch(self, target: Target, snapshots) -> None:
+        from registry.db import open_isolated_connection
+        from .shared_log import upsert_tasks
+
+        db_path, wal = target
+        conn = open_isolated_connection(db_path, wal)
+        try:
+            upsert_tasks(conn, [WriteTask.from_dict(item) for item in snapshots], schema_key=db_path)
+        finally:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _load_spool(self) -> None:
+        if not self.spool_path or not self.spool_path.exists():
+            return
+        try:
+            with self.spool_path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != SPOOL_VERSION:
+                return
+            for entry in data.get("entries", []):
+                target = (str(entry["db_path"]), bool(entry.get("wal", False)))
+                task = entry["task"]
+                self._pending.setdefault(target, {})[task["task_id"]] = task
+        except Exception as e:
+            print(f"[SharedLogWriter] 读取本地暂存失败，已忽略: {e}")
+            return
+        count = sum(len(tasks) for tasks in self._pending.values())
+        if count:
+            print(f"[SharedLogWriter] 发现 {count} 条未同步的任务状态，将补写到共享任务日志")
+            self._next_flush_at = time.time()
+            self._ensure_thread()
+
+    def _save_spool_locked(self) -> None:
+        if not self.spool_path:
+            return
+        try:
+            unsynced: Dict[Target, Dict[str, dict]] = {}
+            for source in (self._inflight, self._pending):  # 较新的状态覆盖正在写入的旧状态
+                for target, tasks in source.items():
+                    unsynced.setdefault(target, {}).update(tasks)
+            if not unsynced:
+                if self.spool_path.exists():
+                    self.spool_path.unlink()
+                return
+            entries = [
+                {"db_path": db_path, "wal": wal, "task": task}
+                for (db_path, wal), tasks in unsynced.items()
+                for task in tasks.values()
+            ]
+            os.makedirs(self.spool_path.parent, exist_ok=True)
+            tmp_path = self.spool_path.with_suffix(".tmp")
+            with tmp_path.open("w", encoding="utf-8") as f:
+                json.dump({"version": SPOOL_VERSION, "entries": entries}, f, ensure_ascii=False)
+            tmp_path.replace(self.spool_path)
+        except Exception as e:
+            print(f"[SharedLogWriter] 保存本地暂存失败: {e}")
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk
-from typing import Callable, Iterable, Optional
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 from ui.ui_copy import copy_text, normalize_interface_id
 
@@ -12,9 +14,85 @@ except Exception:
     registry_hooks = None
 
 try:
-    from .shared_log import list_tasks as shared_list_tasks
+    from .shared_log import decode_payload as shared_decode_payload
+    from .shared_log import get_change_token as shared_get_change_token
+    from .shared_log import list_task_rows as shared_list_task_rows
 except Exception:
-    shared_list_tasks = None
+    shared_decode_payload = None
+    shared_get_change_token = None
+    shared_list_task_rows = None
+
+TASK_LIST_LIMIT = 100
+
+_TYPE_MAP = {
+    "assignment": "任务指派",
+    "response": "回文填报",
+}
+_STATUS_MAP = {
+    "pending": "待执行",
+    "running": "执行中",
+    "completed": "完成",
+    "failed": "失败",
+}
+
+
+class SharedTaskPoller:
+    """
+    共享写入任务日志的增量读取器（在后台线程调用，不涉及 Tk）。
+
+    每次轮询先读取变化标记（记录数 + 最大 updated_at），未变化直接返回 None；
+    变化时只读取 updated_at 晚于上次水位的记录并合并到本地缓存。
+    各用户机器时钟可能不一致（晚到的更新 updated_at 可能小于水位），
+    因此每 full_resync_every 次轮询做一次完整读取兜底。
+    """
+
+    def __init__(self, limit: int = TASK_LIST_LIMIT, full_resync_every: int = 12):
+        self.limit = limit
+        self.full_resync_every = max(1, int(full_resync_every))
+        self._rows: Dict[str, object] = {}
+        self._token: Optional[Tuple[int, str]] = None
+        self._watermark = ""
+        self._only_user: Optional[str] = None
+        self._polls = 0
+
+    def reset(self) -> None:
+        self._rows = {}
+        self._token = None
+        self._watermark = ""
+        self._polls = 0
+
+    def poll(self, conn, only_user: Optional[str] = None, force_full: bool = False):
+        """
+        返回:
+            None 表示无变化；否则返回按提交时间倒序的 SharedTaskRow 列表（最多 limit 条）
+        """
+        only_user = (only_user or "").strip() or None
+        if only_user != self._only_user:
+            self._only_user = only_user
+            force_full = True
+        self._polls += 1
+        if self._polls >= self.full_resync_every:
+            force_full = True
+
+        token = shared_get_change_token(conn)
+        if not force_full and self._token is not None and token == self._token:
+            return None
+
+        # 记录数减少（清理/归档）或首次读取：完整读取
+        if force_full or self._token is None or token[0] < self._token[0]:
+            rows = shared_list_task_rows(conn, limit=self.limit, only_user=only_user)
+            self._rows = {row.task.task_id: row for row in rows}
+            self._polls = 0
+        else:
+            for row in shared_list_task_rows(conn, limit=self.limit, only_user=only_user,
+                                             updated_after=self._watermark):
+                self._rows[row.task.task_id] = row
+
+        ordered = sorted(self._rows.values(), key=lambda r: r.task.submitted_at or "", reverse=True)[: self.limit]
+        self._rows = {row.task.task_id: row for row in ordered}
+        self._watermark = max((row.updated_at for row in ordered), default="")
+        self._token = token
+        return ordered
 
 
 class TaskRecordPanel(ttk.LabelFrame):
@@ -32,11 +110,23 @@ class TaskRecordPanel(ttk.LabelFrame):
         self.manager = None
         self.auto_refresh = auto_refresh
         self.refresh_interval = refresh_interval
-        self._refresh_job: Optional[str] = None
 
         self.only_mine_var = tk.BooleanVar(value=False)
         self.status_var = tk.StringVar(value="暂无写入任务")
         self._task_by_iid = {}
+        # 【优化】共享任务的 payload 延迟解码：打开明细/复制接口号时才解析 JSON
+        self._payload_json_by_iid: Dict[str, str] = {}
+        self._values_by_iid: Dict[str, tuple] = {}
+
+        # 【优化】后台轮询线程读取共享 registry.db，结果经队列交给主线程增量更新列表
+        self._poller = SharedTaskPoller()
+        self._poll_thread: Optional[threading.Thread] = None
+        self._poll_wake = threading.Event()
+        self._poll_stop = threading.Event()
+        self._poll_results: "queue.Queue" = queue.Queue()
+        self._poll_only_user: Optional[str] = None
+        self._poll_force_full = False
+        self._drain_job: Optional[str] = None
 
         self._build_ui()
 
@@ -173,7 +263,7 @@ class TaskRecordPanel(ttk.LabelFrame):
     def copy_selected_interface_ids(self):
         interface_ids = []
         for iid in self.tree.selection():
-            task = self._task_by_iid.get(iid)
+            task = self._get_task(iid)
             if not task:
                 continue
             interface_ids.extend(self._extract_interface_ids_from_task(task))
@@ -198,7 +288,7 @@ class TaskRecordPanel(ttk.LabelFrame):
         if not sel:
             return
         # 若多选，取第一条
-        task = self._task_by_iid.get(sel[0])
+        task = self._get_task(sel[0])
         if not task or getattr(task, "task_type", "") != "assignment":
             return
         self._open_assignment_detail_dialog(task)
@@ -207,7 +297,7 @@ class TaskRecordPanel(ttk.LabelFrame):
         sel = list(self.tree.selection())
         if not sel:
             return
-        task = self._task_by_iid.get(sel[0])
+        task = self._get_task(sel[0])
         if not task or getattr(task, "task_type", "") != "response":
             return
         self._open_response_detail_dialog(task)
@@ -366,70 +456,119 @@ class TaskRecordPanel(ttk.LabelFrame):
         ids = self._extract_interface_ids_from_task(task)
         copy_text(win, "\n".join(ids).strip())
 
+    def _get_task(self, iid):
+        task = self._task_by_iid.get(iid)
+        payload_json = self._payload_json_by_iid.pop(iid, None)
+        if task is not None and payload_json is not None and shared_decode_payload:
+            task.payload = shared_decode_payload(payload_json)
+        return task
+
     def bind_manager(self, manager):
         self.manager = manager
         try:
-            # 事件驱动刷新：写入任务状态变化时立刻刷新（比 5s 轮询更“实时”）
+            # 事件驱动刷新：写入任务状态变化时立刻唤醒后台轮询（比 5s 轮询更“实时”）
             def _listener(task):
-                try:
-                    # manager 的回调在后台线程触发，Tk 更新必须回到主线程
-                    self.after(0, self.refresh_tasks)
-                except Exception:
-                    pass
+                # manager 的回调在后台线程触发：只唤醒轮询线程，不触碰 Tk
+                # 本机状态变化不一定改变共享日志的变化标记（共享日志为空或转换尚未刷新），
+                # 因此要求完整读取，否则本机回退列表会一直停在旧状态
+                self._poll_force_full = True
+                self._poll_wake.set()
 
             manager.register_listener(_listener)
         except Exception:
             pass
         self.refresh_tasks()
-        if self.auto_refresh:
-            self._schedule_refresh()
-
-    def _schedule_refresh(self):
-        if self._refresh_job:
-            self.after_cancel(self._refresh_job)
-        self._refresh_job = self.after(self.refresh_interval, self.refresh_tasks)
 
     def refresh_tasks(self):
-        tasks = self._collect_tasks()
-        self._populate_tree(tasks)
-        if self.auto_refresh and self.manager:
-            self._schedule_refresh()
+        """请求刷新（主线程调用）：读取在后台线程完成，列表随后增量更新"""
+        current_user = ""
+        if self.only_mine_var.get():
+            current_user = (self.get_current_user() or "").strip()
+        self._poll_only_user = current_user or None
+        self._poll_force_full = True
+        self._ensure_poll_thread()
+        self._poll_wake.set()
+
+    def _ensure_poll_thread(self):
+        if self._poll_thread is None or not self._poll_thread.is_alive():
+            self._poll_thread = threading.Thread(target=self._poll_loop, name="TaskPanelPoller", daemon=True)
+            self._poll_thread.start()
+        if self._drain_job is None:
+            self._drain_job = self.after(150, self._drain_poll_results)
+
+    def _poll_loop(self):
+        interval = max(0.5, self.refresh_interval / 1000.0)
+        while not self._poll_stop.is_set():
+            woke = self._poll_wake.wait(timeout=interval if (self.auto_refresh and self.manager) else None)
+            if self._poll_stop.is_set():
+                return
+            if not woke and not (self.auto_refresh and self.manager):
+                continue
+            self._poll_wake.clear()
+            force_full, self._poll_force_full = self._poll_force_full, False
+            try:
+                result = self._collect_tasks(force_full)
+            except Exception as exc:
+                print(f"[TaskPanel] 读取写入任务失败: {exc}")
+                continue
+            if result is not None:
+                self._poll_results.put(result)
 
-    def _collect_tasks(self) -> Iterable:
+    def _drain_poll_results(self):
+        self._drain_job = None
+        latest = None
+        try:
+            while True:
+                latest = self._poll_results.get_nowait()
+        except queue.Empty:
+            pass
+        if latest is not None:
+            tasks, payload_json_by_id = latest
+            self._populate_tree(tasks, payload_json_by_id)
+        if not self._poll_stop.is_set():
+            try:
+                self._drain_job = self.after(150, self._drain_poll_results)
+            except Exception:
+                self._drain_job = None
+
+    def _collect_tasks(self, force_full: bool = False):
+        """
+        后台线程调用，返回 (tasks, {task_id: payload_json})；共享日志无变化时返回 None
+        """
         # 优先从共享 registry.db 的 write_tasks_log 读取（可看到所有用户）
-        shared_tasks = self._collect_shared_tasks()
+        shared_rows = self._collect_shared_tasks(force_full)
+        if shared_rows == "unchanged":
+            return None
         # 共享读取成功且有数据：直接使用共享数据
-        if isinstance(shared_tasks, list) and len(shared_tasks) > 0:
-            return shared_tasks
+        if isinstance(shared_rows, list) and len(shared_rows) > 0:
+            return [row.task for row in shared_rows], {row.task.task_id: row.payload_json for row in shared_rows}
         # 共享读取成功但为空：如果本机队列存在，则回退显示本机（避免首次运行空窗）
-        if isinstance(shared_tasks, list) and len(shared_tasks) == 0 and self.manager:
+        if isinstance(shared_rows, list) and len(shared_rows) == 0 and self.manager:
             pass
-        elif shared_tasks is not None and self.manager is None:
+        elif shared_rows is not None and self.manager is None:
             # 没有本机manager时，哪怕为空也返回共享结果
-            return shared_tasks
+            return [], {}
 
         # 兜底：只显示本机任务（旧模式）
         if not self.manager:
-            self.status_var.set("写入队列未初始化")
-            return []
+            return [], {}
 
         try:
             tasks = list(self.manager.get_tasks())
         except Exception as exc:
-            self.status_var.set(f"获取任务失败: {exc}")
-            return []
+            print(f"[TaskPanel] 获取本机任务失败: {exc}")
+            return [], {}
 
         tasks.sort(key=lambda t: (t.submitted_at or ""), reverse=True)
 
-        if self.only_mine_var.get():
-            current_user = (self.get_current_user() or "").strip()
-            if current_user:
-                tasks = [task for task in tasks if (task.submitted_by or "").strip() == current_user]
+        if self._poll_only_user:
+            tasks = [task for task in tasks if (task.submitted_by or "").strip() == self._poll_only_user]
 
-        return tasks[:100]
+        return tasks[:TASK_LIST_LIMIT], {}
 
-    def _collect_shared_tasks(self):
-        if not shared_list_tasks or not registry_hooks:
+    def _collect_shared_tasks(self, force_full: bool = False):
+        """返回 SharedTaskRow 列表；无变化返回 "unchanged"；不可用/失败返回 None"""
+        if not shared_list_task_rows or not registry_hooks:
             return None
         try:
             cfg = registry_hooks._cfg()
@@ -443,15 +582,8 @@ class TaskRecordPanel(ttk.LabelFrame):
 
             conn = open_isolated_connection(db_path, wal)
             try:
-                if self.only_mine_var.get():
-                    current_user = (self.get_current_user() or "").strip()
-                    tasks = shared_list_tasks(conn, limit=100, only_user=current_user)
-                else:
-                    tasks = shared_list_tasks(conn, limit=100, only_user=None)
-                # 仅当共享有数据时才显示“共享”状态；为空时交给上层决定是否回退
-                if tasks:
-                    self.status_var.set(f"显示 {len(tasks)} 条任务（共享）")
-                return tasks
+                rows = self._poller.poll(conn, only_user=self._poll_only_user, force_full=force_full)
+                return "unchanged" if rows is None else rows
             finally:
                 try:
                     conn.close()
@@ -459,57 +591,70 @@ class TaskRecordPanel(ttk.LabelFrame):
                     pass
         except Exception as exc:
             # 共享读取失败时不阻塞，回退到本机显示
-            self.status_var.set(f"共享任务读取失败，已回退本机: {exc}")
+            print(f"[TaskPanel] 共享任务读取失败，已回退本机: {exc}")
+            self._poller.reset()
             return None
-    def _populate_tree(self, tasks: Iterable):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        self._task_by_iid = {}
 
-        type_map = {
-            "assignment": "任务指派",
-            "response": "回文填报",
-        }
-        status_map = {
-            "pending": "待执行",
-            "running": "执行中",
-            "completed": "完成",
-            "failed": "失败",
-        }
-
-        count = 0
-        for task in tasks:
-            count += 1
-            display_type = type_map.get(task.task_type, task.task_type)
-            status = status_map.get(task.status, task.status)
-            submitted_time = task.submitted_at or ""
-            iid = str(getattr(task, "task_id", "")) or None
-            inserted = self.tree.insert(
-                "",
-                tk.END,
-                iid=iid,
-                values=(
-                    submitted_time,
-                    task.submitted_by or "",
-                    display_type,
-                    task.description or "",
-                    status,
-                ),
-            )
-            self._task_by_iid[inserted] = task
+    @staticmethod
+    def _task_values(task) -> tuple:
+        return (
+            task.submitted_at or "",
+            task.submitted_by or "",
+            _TYPE_MAP.get(task.task_type, task.task_type),
+            task.description or "",
+            _STATUS_MAP.get(task.status, task.status),
+        )
 
-        if count == 0:
+    def _populate_tree(self, tasks: Iterable, payload_json_by_id: Optional[Dict[str, str]] = None):
+        """按 task_id 增量更新列表：只插入新任务、更新变化的行、删除消失的行"""
+        payload_json_by_id = payload_json_by_id or {}
+        tasks = list(tasks)
+        new_order: List[str] = []
+        new_tasks = {}
+        for index, task in enumerate(tasks):
+            iid = str(getattr(task, "task_id", "") or "") or f"task-{index}"
+            new_order.append(iid)
+            new_tasks[iid] = task
+
+        for iid in list(self._task_by_iid):
+            if iid not in new_tasks:
+                if self.tree.exists(iid):
+                    self.tree.delete(iid)
+                self._task_by_iid.pop(iid, None)
+                self._values_by_iid.pop(iid, None)
+                self._payload_json_by_iid.pop(iid, None)
+
+        for index, iid in enumerate(new_order):
+            task = new_tasks[iid]
+            values = self._task_values(task)
+            if iid in self._task_by_iid and self.tree.exists(iid):
+                if self._values_by_iid.get(iid) != values:
+                    self.tree.item(iid, values=values)
+            else:
+                self.tree.insert("", index, iid=iid, values=values)
+            if self._task_by_iid.get(iid) is not task:
+                self._task_by_iid[iid] = task
+                self._payload_json_by_iid.pop(iid, None)
+                if task.task_id in payload_json_by_id and not task.payload:
+                    self._payload_json_by_iid[iid] = payload_json_by_id[task.task_id]
+            self._values_by_iid[iid] = values
+
+        if list(self.tree.get_children()) != new_order:
+            for index, iid in enumerate(new_order):
+                self.tree.move(iid, "", index)
+
+        if not new_order:
             self.status_var.set("暂无写入任务")
         else:
-            self.status_var.set(f"显示 {count} 条任务")
+            self.status_var.set(f"显示 {len(new_order)} 条任务")
 
     def destroy(self):
-        if self._refresh_job:
+        self._poll_stop.set()
+        self._poll_wake.set()
+        if self._drain_job:
             try:
-                self.after_cancel(self._refresh_job)
+                self.after_cancel(self._drain_job)
             except Exception:
                 pass
+            self._drain_job = None
         super().destroy()
-
-
-